@@ -10,6 +10,7 @@ from obci.control.peer.configured_multiplexer_server import ConfiguredMultiplexe
 
 from obci.configs import settings, variables_pb2
 from obci.analysis.obci_signal_processing.signal import data_write_proxy
+from obci.analysis.obci_signal_processing.signal import data_threaded_write_proxy
 from obci.analysis.obci_signal_processing.signal import signal_exceptions as  data_storage_exceptions
 
 DATA_FILE_EXTENSION = ".obci.raw"
@@ -124,6 +125,7 @@ class SignalSaver(ConfiguredMultiplexerServer):
         append_ts = int(self.config.get_param("append_timestamps"))
         use_tmp_file = int(self.config.get_param("use_tmp_file"))
         use_own_buffer = int(self.config.get_param("use_own_buffer"))
+        use_threaded_writer = int(self.config.get_param("use_threaded_writer"))
         signal_type = self.config.get_param("signal_type")
         self._samples_per_vector = int(self.config.get_param("samples_per_packet"))
 
@@ -137,7 +139,8 @@ class SignalSaver(ConfiguredMultiplexerServer):
                 l_f_dir, l_f_name + DATA_FILE_EXTENSION))
     
         self._data_proxy = data_write_proxy.get_proxy(self._file_path,append_ts, 
-                                                      use_tmp_file, use_own_buffer, signal_type)
+                                                      use_tmp_file, use_own_buffer, signal_type,
+                                                      use_threaded_writer)
 
         self._mx_signal_type = types.__dict__[self.config.get_param("mx_signal_type")]
 
@@ -151,6 +154,15 @@ class SignalSaver(ConfiguredMultiplexerServer):
             return
         self._session_is_active = False
 
+        l_files = self._data_proxy.finish_saving()
+        # only the threaded writer counts samples written, other proxies
+        # count received packets
+        if isinstance(self._data_proxy, data_threaded_write_proxy.DataThreadedWriteProxy) \
+                and l_files[1] < self._number_of_samples:
+            self.logger.error("Only "+str(l_files[1])+" of "+str(self._number_of_samples)+
+                              " samples were written to file!")
+            self._number_of_samples = l_files[1]
+
         l_vec = variables_pb2.VariableVector()
 
         l_var = l_vec.variables.add()
@@ -165,8 +177,6 @@ class SignalSaver(ConfiguredMultiplexerServer):
         l_var.key = 'file_path'
         l_var.value = self._file_path
 
-        l_files = self._data_proxy.finish_saving()
-
         self.conn.send_message(
             message=l_vec.SerializeToString(),
             type=types.SIGNAL_SAVER_FINISHED, flush=True)
@@ -0,0 +1,100 @@
+# -*- coding: utf-8 -*-
+#!/usr/bin/env python
+#
+
+"""
+>>> import os, logging, numpy
+
+>>> from multiplexer.multiplexer_constants import types
+
+>>> from obci.configs import variables_pb2
+
+>>> from obci.acquisition import signal_saver_peer
+
+>>> from obci.analysis.obci_signal_processing.signal import data_write_proxy, sample_vector_codec
+
+>>> class Conn(object):
+...     def __init__(self):
+...         self.messages = []
+...     def send_message(self, message, type, flush=False):
+...         self.messages.append((message, type))
+
+>>> class MxMessage(object):
+...     def __init__(self, message, type):
+...         self.message = message
+...         self.type = type
+
+>>> class Errors(logging.Handler):
+...     def __init__(self):
+...         logging.Handler.__init__(self, logging.ERROR)
+...         self.records = []
+...     def emit(self, record):
+...         self.records.append(record)
+
+>>> def saver(path, use_threaded_writer):
+...     s = signal_saver_peer.SignalSaver.__new__(signal_saver_peer.SignalSaver)
+...     s.logger = logging.getLogger('test_signal_saver_peer')
+...     s.logger.propagate = False
+...     s.errors = Errors()
+...     s.logger.handlers = [s.errors]
+...     s.conn = Conn()
+...     s.no_response = lambda: None
+...     s.debug_on = 0
+...     s._samples_per_vector = 4
+...     s._number_of_samples = 0
+...     s._first_sample_timestamp = -1.0
+...     s._file_path = path
+...     s._mx_signal_type = types.AMPLIFIER_SIGNAL_MESSAGE
+...     s._data_received = s._first_sample_data_received
+...     s._data_proxy = data_write_proxy.get_proxy(path, use_threaded_writer=use_threaded_writer)
+...     s._session_is_active = True
+...     return s
+
+>>> def save(s, packets):
+...     for i in range(packets):
+...         samples = numpy.arange(12, dtype=numpy.float64).reshape(3, 4) + i
+...         msg = sample_vector_codec.encode(samples, numpy.arange(4) + 4.0 * i)
+...         s.handle_message(MxMessage(msg, types.AMPLIFIER_SIGNAL_MESSAGE))
+...     s._finish_saving_session()
+...     [(msg, mtype)] = s.conn.messages
+...     vec = variables_pb2.VariableVector()
+...     vec.ParseFromString(msg)
+...     return dict((v.key, v.value) for v in vec.variables)
+
+>>> f = './tescik_signal_saver.obci.raw'
+
+Simple proxy counts packets, number of samples is taken from the peer:
+
+>>> s = saver(f, False)
+
+>>> str(save(s, 5)['number_of_samples'])
+'20'
+
+>>> s.errors.records
+[]
+
+>>> os.path.getsize(f) / (3 * 4)
+20
+
+Threaded writer counts samples it has written:
+
+>>> s = saver(f, True)
+
+>>> str(save(s, 5)['number_of_samples'])
+'20'
+
+>>> s.errors.records
+[]
+
+>>> os.remove(f)
+
+"""
+
+def run():
+    import doctest, sys
+    res = doctest.testmod(sys.modules[__name__])
+    if res.failed == 0:
+        print("All tests succeeded!")
+
+if __name__ == '__main__':
+    run()
@@ -0,0 +1,35 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import numpy
+class ArrayPool(object):
+    """A round-robin pool of preallocated numpy arrays.
+    Arrays of every requested shape are allocated once (on first request),
+    then reused in turn - an array returned from get() is owned by
+    the caller until get() is called pool_size more times for the same shape."""
+    def __init__(self, pool_size, dtype='float'):
+        assert(pool_size > 0)
+        self.pool_size = int(pool_size)
+        self.dtype = dtype
+        self.clear()
+
+    def clear(self):
+        self._arrays = {}
+        self._next = {}
+
+    def get(self, shape):
+        shape = tuple(shape)
+        arrays = self._arrays.get(shape)
+        if arrays is None:
+            arrays = [numpy.empty(shape, dtype=self.dtype) for i in range(self.pool_size)]
+            self._arrays[shape] = arrays
+            self._next[shape] = 0
+        ind = self._next[shape]
+        self._next[shape] = (ind + 1) % self.pool_size
+        return arrays[ind]
+
+    def copy(self, d):
+        """Return a copy of array d stored in one of pool`s arrays."""
+        out = self.get(d.shape)
+        out[...] = d
+        return out
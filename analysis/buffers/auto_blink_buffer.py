@@ -3,6 +3,9 @@
 import collections
 import ring_buffer_numpy_channels
 
+from obci.configs import variables_pb2
+from obci.analysis.obci_signal_processing.signal import sample_vector_codec
+
 class Blink(object):
     def __init__(self,blink,blink_count, blink_pos):
         self.blink = blink
@@ -14,13 +17,16 @@ class Sample(object):
         self.channels = [0]*num_of_channels
 
 class AutoBlinkBuffer(object):
-    def __init__(self, from_blink, samples_count, num_of_channels, sampling, ret_func, ret_format, copy_on_ret):
-        
+    def __init__(self, from_blink, samples_count, num_of_channels, sampling, ret_func, ret_format, copy_on_ret, pool_size=0):
+        """For ret_format NUMPY_CHANNELS_MIRRORED and pool_size
+        see auto_ring_buffer.AutoRingBuffer."""
+
         assert(samples_count > 0)
         assert(num_of_channels > 0)
-        assert(ret_format in ['PROTOBUF_SAMPLES', 'NUMPY_CHANNELS'])
+        assert(ret_format in ['PROTOBUF_SAMPLES', 'NUMPY_CHANNELS', 'NUMPY_CHANNELS_MIRRORED'])
 
         self.ret_func = ret_func
+        self.ret_format = ret_format
         self.ret_buf_len = samples_count #1024
         self.blink_from = from_blink #-128
         self.sampling = sampling #float(1024)
@@ -35,7 +41,10 @@ class AutoBlinkBuffer(object):
             import ring_buffer_protobuf_samples
             self.buffer = ring_buffer_protobuf_samples.RingBufferProtobufSamples(self.whole_buf_len, num_of_channels, copy_on_ret)
         elif ret_format == 'NUMPY_CHANNELS':
-            self.buffer = ring_buffer_numpy_channels.RingBufferNumpyChannels(self.whole_buf_len, num_of_channels, copy_on_ret)
+            self.buffer = ring_buffer_numpy_channels.RingBufferNumpyChannels(self.whole_buf_len, num_of_channels, copy_on_ret, pool_size)
+        elif ret_format == 'NUMPY_CHANNELS_MIRRORED':
+            import ring_buffer_numpy_mirrored
+            self.buffer = ring_buffer_numpy_mirrored.RingBufferNumpyMirrored(self.whole_buf_len, num_of_channels, copy_on_ret, pool_size)
 
         self.times = ring_buffer_numpy_channels.RingBufferNumpyChannels(self.whole_buf_len, 1, copy_on_ret)
         self.times_sample = Sample(1)
@@ -87,30 +96,82 @@ class AutoBlinkBuffer(object):
         #[10, 15, 18, 22]
 
     def handle_sample_vect(self, sample_vector):
-        for i in range(len(sample_vector.samples)):
-            self.handle_sample(sample_vector.samples[i], sample_vector.samples[i].timestamp)
+        if len(sample_vector.samples) == 0:
+            return
+        times = ring_buffer_numpy_channels.sample_vector_to_timestamps(sample_vector)
+        if self.ret_format != 'PROTOBUF_SAMPLES':
+            block = ring_buffer_numpy_channels.sample_vector_to_block(sample_vector)
+        else:
+            block = list(sample_vector.samples)
+        self.handle_sample_block(block, times)
+
+    def handle_sample_msg(self, msg):
+        """Add samples from serialized SampleVector msg."""
+        if self.ret_format != 'PROTOBUF_SAMPLES':
+            block, timestamps = sample_vector_codec.decode(msg)
+            if block.shape[1] > 0:
+                self.handle_sample_block(block, timestamps.reshape(1, -1))
+        else:
+            vect = variables_pb2.SampleVector()
+            vect.ParseFromString(msg)
+            self.handle_sample_vect(vect)
+
+    def handle_sample_block(self, block, times):
+        """Add a block of samples - numpy array of shape (channels, samples)
+        for NUMPY_CHANNELS format or list of samples for PROTOBUF_SAMPLES.
+        times is a numpy array of shape (1, samples) with samples` timestamps.
+        The block is split only where the buffer gets full or a blink
+        is to be fired, so ret_func is fired at the same samples as
+        with handle_sample."""
+        length = times.shape[1]
+        pos = 0
+        while pos < length:
+            if not self.is_full:
+                step = min(self.whole_buf_len - self.count, length - pos)
+            elif len(self.blinks) > 0:
+                step = min(max(self.blinks[0].count, 1), length - pos)
+            else:
+                step = length - pos
+            if pos == 0 and step == length:
+                self.buffer.add_block(block)
+                self.times.add_block(times)
+            else:
+                self.buffer.add_block(self._slice_block(block, pos, pos+step))
+                self.times.add_block(times[:, pos:pos+step])
+            pos += step
+            self._samples_added(step)
 
     def handle_sample(self, s, t):
         #print(str(s.channels[0])+" / "+str(t))
         self.buffer.add(s)
         self.times_sample.channels[0] = t
         self.times.add(self.times_sample)
-        self.count += 1
+        self._samples_added(1)
 
+    def _samples_added(self, count):
+        """count samples were just added. If the buffer was full before,
+        count is never greater than the current blink`s count (or 1)."""
+        self.count += count
         if not self.is_full:
             self.is_full = (self.count == self.whole_buf_len)
         else:
             if not len(self.blinks) == 0:
                 #print("HAVE BLINKS"+str(len(self.blinks)))
                 curr = self.blinks[0]
-                curr.count -= 1
-                self.blinks_count -= 1
+                curr.count -= count
+                self.blinks_count -= count
                 #print("COUNT "+str(curr.count))
                 if curr.count <= 0:
                     curr = self.blinks.popleft()
                     d = self.buffer.get(curr.position, self.ret_buf_len)
                     self.ret_func(curr.blink, d)
 
+    def _slice_block(self, block, start, end):
+        if self.ret_format != 'PROTOBUF_SAMPLES':
+            return block[:, start:end]
+        else:
+            return block[start:end]
+
 
     def _get_times_index(self, value):
         if self.is_full:
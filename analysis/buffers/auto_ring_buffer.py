@@ -1,16 +1,24 @@
 #!/usr/bin/env python
 # -*- coding: utf-8 -*-
 
+from obci.configs import variables_pb2
+from obci.analysis.obci_signal_processing.signal import sample_vector_codec
+
 class AutoRingBuffer(object):
-    def __init__(self, from_sample, samples_count, every, num_of_channels, ret_func, ret_format, copy_on_ret):
-        
+    def __init__(self, from_sample, samples_count, every, num_of_channels, ret_func, ret_format, copy_on_ret, pool_size=0):
+        """ret_format NUMPY_CHANNELS_MIRRORED makes ret_func get read-only
+        views of a mirrored buffer (no concatenation on buffer`s wrap).
+        pool_size > 0 (with copy_on_ret) makes returned copies be reused
+        from a pool of pool_size preallocated arrays."""
+
         assert(samples_count > 0)
         assert(from_sample > 0)
         assert(every > 0)
         assert(num_of_channels > 0)
-        assert(ret_format in ['PROTOBUF_SAMPLES', 'NUMPY_CHANNELS'])
+        assert(ret_format in ['PROTOBUF_SAMPLES', 'NUMPY_CHANNELS', 'NUMPY_CHANNELS_MIRRORED'])
 
         self.ret_func = ret_func
+        self.ret_format = ret_format
         self.every = every
 
         self.whole_buf_len = from_sample
@@ -24,7 +32,10 @@ class AutoRingBuffer(object):
             self.buffer = ring_buffer_protobuf_samples.RingBufferProtobufSamples(from_sample, num_of_channels, copy_on_ret)
         elif ret_format == 'NUMPY_CHANNELS':
             import ring_buffer_numpy_channels
-            self.buffer = ring_buffer_numpy_channels.RingBufferNumpyChannels(from_sample, num_of_channels, copy_on_ret)
+            self.buffer = ring_buffer_numpy_channels.RingBufferNumpyChannels(from_sample, num_of_channels, copy_on_ret, pool_size)
+        elif ret_format == 'NUMPY_CHANNELS_MIRRORED':
+            import ring_buffer_numpy_mirrored
+            self.buffer = ring_buffer_numpy_mirrored.RingBufferNumpyMirrored(from_sample, num_of_channels, copy_on_ret, pool_size)
 
     def clear(self):
         self.count = 0
@@ -32,12 +43,51 @@ class AutoRingBuffer(object):
         self.buffer.clear()
 
     def handle_sample_vect(self, sample_vector):
-        for i in range(len(sample_vector.samples)):
-            self.handle_sample(sample_vector.samples[i])
+        if len(sample_vector.samples) == 0:
+            return
+        if self.ret_format != 'PROTOBUF_SAMPLES':
+            import ring_buffer_numpy_channels
+            self.handle_sample_block(
+                ring_buffer_numpy_channels.sample_vector_to_block(sample_vector))
+        else:
+            self.handle_sample_block(list(sample_vector.samples))
+
+    def handle_sample_msg(self, msg):
+        """Add samples from serialized SampleVector msg."""
+        if self.ret_format != 'PROTOBUF_SAMPLES':
+            block, timestamps = sample_vector_codec.decode(msg)
+            if block.shape[1] > 0:
+                self.handle_sample_block(block)
+        else:
+            vect = variables_pb2.SampleVector()
+            vect.ParseFromString(msg)
+            self.handle_sample_vect(vect)
+
+    def handle_sample_block(self, block):
+        """Add a block of samples - numpy array of shape (channels, samples)
+        for NUMPY_CHANNELS format or list of samples for PROTOBUF_SAMPLES.
+        ret_func is fired exactly at the same samples as with handle_sample,
+        so the block is split only at 'every' ticks."""
+        length = self.buffer._block_len(block)
+        pos = 0
+        while pos < length:
+            if not self.is_full:
+                step = min(self.whole_buf_len - self.count, length - pos)
+            else:
+                step = min(self.every - self.count, length - pos)
+            if pos == 0 and step == length:
+                self.buffer.add_block(block)
+            else:
+                self.buffer.add_block(self._slice_block(block, pos, pos+step))
+            pos += step
+            self._samples_added(step)
 
     def handle_sample(self, s):
         self.buffer.add(s)
-        self.count += 1
+        self._samples_added(1)
+
+    def _samples_added(self, count):
+        self.count += count
         if not self.is_full:
             if self.count == self.whole_buf_len:
                 self.is_full = True
@@ -49,5 +99,9 @@ class AutoRingBuffer(object):
             d = self.buffer.get(0, self.ret_buf_len)
             self.ret_func(d)
             self.count = 0
-            
 
+    def _slice_block(self, block, start, end):
+        if self.ret_format != 'PROTOBUF_SAMPLES':
+            return block[:, start:end]
+        else:
+            return block[start:end]
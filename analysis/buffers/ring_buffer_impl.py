@@ -12,7 +12,7 @@ class RingBufferImpl(object):
     def clear(self):
         self.is_full = False
         self.index = 0
-        self._init_buffer()        
+        self._init_buffer()
 
     def add(self, s):
         self._add(s)
@@ -20,6 +20,30 @@ class RingBufferImpl(object):
             self.is_full = True
         self.index = (self.index + 1) % self.size
 
+    def add_block(self, block):
+        """Add many samples at once. The block is written with at most
+        two slice assignments (one if it does not wrap around buffer`s end).
+        The result is the same as calling add() for every sample in block."""
+        length = self._block_len(block)
+        start = 0
+        if length > self.size:
+            # only last self.size samples would survive anyway
+            start = length - self.size
+            self.index = (self.index + start) % self.size
+            self.is_full = True
+
+        count = length - start
+        if count <= 0:
+            return
+        first = min(count, self.size - self.index)
+        self._add_block(block, start, start+first, self.index)
+        if first < count:
+            self._add_block(block, start+first, length, 0)
+
+        if not self.is_full and self.index + count >= self.size:
+            self.is_full = True
+        self.index = (self.index + count) % self.size
+
     def get(self, start, length):
         if not self.is_full:
             d = self._get_normal(start, start+length)
@@ -28,15 +52,25 @@ class RingBufferImpl(object):
                 d = self._get_normal(self.index+start, self.index+start+length)
             elif self.index + start >= self.size:
                 ind = (self.index+start)%self.size
-                d = self._get_normal(ind, ind+length)                
+                d = self._get_normal(ind, ind+length)
             else:
-                d = self._get_concat(self.index+start, length-(self.size - (self.index + start)))
+                concat_start = self.index+start
+                concat_end = length-(self.size - (self.index + start))
+                if self.copy_on_ret:
+                    return self._get_concat_copy(concat_start, concat_end)
+                d = self._get_concat(concat_start, concat_end)
 
         if self.copy_on_ret:
-            return copy.deepcopy(d)
+            return self._copy(d)
         else:
             return d
 
+    def _copy(self, d):
+        return copy.deepcopy(d)
+
+    def _get_concat_copy(self, start, end):
+        return self._copy(self._get_concat(start, end))
+
 
     def _get_normal(self, start, end):
         raise Exception("To be implemented!")
@@ -47,8 +81,15 @@ class RingBufferImpl(object):
     def _add(self, s):
         raise Exception("To be implemented!")
 
+    def _add_block(self, block, block_from, block_to, index):
+        """Copy block[block_from:block_to] samples to buffer starting at index.
+        It is guaranteed that the copied part fits before buffer`s end."""
+        raise Exception("To be implemented!")
+
+    def _block_len(self, block):
+        raise Exception("To be implemented!")
+
     def _init_buffer(self):
         raise Exception("To be implemented!")
 
-        
 
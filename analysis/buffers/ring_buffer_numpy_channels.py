@@ -3,18 +3,61 @@
 
 import numpy
 import ring_buffer_impl
+import array_pool
 class RingBufferNumpyChannels(ring_buffer_impl.RingBufferImpl):
+    def __init__(self, size, number_of_channels, copy_on_ret, pool_size=0):
+        """If pool_size > 0 and copy_on_ret is set, returned copies are
+        stored in a pool of pool_size preallocated arrays instead of
+        being allocated on every get() - see array_pool.ArrayPool."""
+        if pool_size > 0:
+            self.pool = array_pool.ArrayPool(pool_size)
+        else:
+            self.pool = None
+        super(RingBufferNumpyChannels, self).__init__(size, number_of_channels, copy_on_ret)
+
     def _get_normal(self, start, end):
         return self.buffer[:, start:end]
 
     def _get_concat(self, start, end):
-        return numpy.concatenate((self.buffer[:, start:], 
+        return numpy.concatenate((self.buffer[:, start:],
                                   self.buffer[:, :end]),
                                  axis=1)
-    
+
     def _add(self, s):
         for i in range(self.number_of_channels):
             self.buffer[i, self.index] = s.channels[i]
-        
+
+    def _add_block(self, block, block_from, block_to, index):
+        self.buffer[:, index:index+(block_to-block_from)] = block[:, block_from:block_to]
+
+    def _block_len(self, block):
+        return block.shape[1]
+
+    def _copy(self, d):
+        if self.pool is not None:
+            return self.pool.copy(d)
+        else:
+            return super(RingBufferNumpyChannels, self)._copy(d)
+
+    def _get_concat_copy(self, start, end):
+        if self.pool is None:
+            # concatenate already returns a fresh array
+            return self._get_concat(start, end)
+        first = self.size - start
+        out = self.pool.get((self.number_of_channels, first+end))
+        out[:, :first] = self.buffer[:, start:]
+        out[:, first:] = self.buffer[:, :end]
+        return out
+
     def _init_buffer(self):
         self.buffer = numpy.zeros((self.number_of_channels, self.size), dtype='float')
+
+def sample_vector_to_block(sample_vector):
+    """Return sample_vector`s values as numpy array of shape (channels, samples)."""
+    return numpy.array([s.channels[:] for s in sample_vector.samples],
+                       dtype='float').T
+
+def sample_vector_to_timestamps(sample_vector):
+    """Return sample_vector`s timestamps as numpy array of shape (1, samples)."""
+    return numpy.array([[s.timestamp for s in sample_vector.samples]],
+                       dtype='float')
@@ -0,0 +1,33 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import numpy
+import ring_buffer_numpy_channels
+class RingBufferNumpyMirrored(ring_buffer_numpy_channels.RingBufferNumpyChannels):
+    """Ring buffer storing every sample twice - at index and index+size
+    of a double-length array, so that any window is one contiguous slice.
+    get() never concatenates and returns read-only views (writing to
+    a view would break the mirror), unless copy_on_ret is set."""
+    def _get_normal(self, start, end):
+        d = self.buffer[:, start:end]
+        d.flags.writeable = False
+        return d
+
+    def _get_concat(self, start, end):
+        return self._get_normal(start, self.size+end)
+
+    def _get_concat_copy(self, start, end):
+        return self._copy(self._get_concat(start, end))
+
+    def _add(self, s):
+        for i in range(self.number_of_channels):
+            self.buffer[i, self.index] = s.channels[i]
+            self.buffer[i, self.index+self.size] = s.channels[i]
+
+    def _add_block(self, block, block_from, block_to, index):
+        length = block_to - block_from
+        self.buffer[:, index:index+length] = block[:, block_from:block_to]
+        self.buffer[:, index+self.size:index+self.size+length] = block[:, block_from:block_to]
+
+    def _init_buffer(self):
+        self.buffer = numpy.zeros((self.number_of_channels, 2*self.size), dtype='float')
@@ -14,3 +14,9 @@ class RingBufferProtobufSamples(ring_buffer_impl.RingBufferImpl):
 
     def _add(self, s):
         self.buffer[self.index] = s
+
+    def _add_block(self, block, block_from, block_to, index):
+        self.buffer[index:index+(block_to-block_from)] = block[block_from:block_to]
+
+    def _block_len(self, block):
+        return len(block)
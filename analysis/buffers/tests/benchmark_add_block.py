@@ -0,0 +1,64 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""Compare samples/sec of per-sample and block paths of AutoRingBuffer.
+
+Usage: python benchmark_add_block.py [channels] [sampling] [samples_per_vector] [seconds]
+"""
+
+import sys, time
+
+from obci.configs import variables_pb2
+from obci.analysis.buffers import auto_ring_buffer, ring_buffer_numpy_channels
+
+def get_sample_vector(channels, per):
+    vect = variables_pb2.SampleVector()
+    for i in range(per):
+        s = vect.samples.add()
+        s.channels.extend([float(i*channels + j) for j in range(channels)])
+        s.timestamp = time.time()
+    return vect
+
+def get_buffer(channels, sampling):
+    return auto_ring_buffer.AutoRingBuffer(
+        from_sample=2*sampling, samples_count=sampling, every=sampling/4,
+        num_of_channels=channels, ret_func=lambda d: None,
+        ret_format='NUMPY_CHANNELS', copy_on_ret=False)
+
+def per_sample(buf, vect):
+    for s in vect.samples:
+        buf.handle_sample(s)
+
+def per_vector(buf, vect):
+    buf.handle_sample_vect(vect)
+
+def measure(name, func, buf, arg, per, seconds):
+    count = 0
+    start = time.time()
+    while time.time() - start < seconds:
+        for i in range(100):
+            func(buf, arg)
+        count += 100*per
+    rate = count/(time.time() - start)
+    print(name+": "+str(int(rate))+" samples/sec")
+    return rate
+
+def run(channels=32, sampling=2048, per=16, seconds=3.0):
+    print("Channels: "+str(channels)+", sampling: "+str(sampling)+
+          ", samples per vector: "+str(per))
+    vect = get_sample_vector(channels, per)
+    block = ring_buffer_numpy_channels.sample_vector_to_block(vect)
+    r1 = measure("handle_sample (per-sample add)", per_sample,
+                 get_buffer(channels, sampling), vect, per, seconds)
+    r2 = measure("handle_sample_vect (add_block)", per_vector,
+                 get_buffer(channels, sampling), vect, per, seconds)
+    r3 = measure("handle_sample_block (decoded block)",
+                 lambda b, a: b.handle_sample_block(a),
+                 get_buffer(channels, sampling), block, per, seconds)
+    print("Speedup: "+str(round(r2/r1, 2))+"x (with decoding), "+
+          str(round(r3/r1, 2))+"x (block only)")
+
+if __name__ == '__main__':
+    args = [int(a) for a in sys.argv[1:4]]
+    if len(sys.argv) > 4:
+        args.append(float(sys.argv[4]))
+    run(*args)
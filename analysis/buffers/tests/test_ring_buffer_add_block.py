@@ -0,0 +1,130 @@
+# -*- coding: utf-8 -*-
+#!/usr/bin/env python
+
+"""
+>>> from obci.analysis.buffers import ring_buffer_numpy_channels as R
+
+>>> from obci.analysis.buffers import auto_ring_buffer as A
+
+>>> r1 = R.RingBufferNumpyChannels(10, 3, False)
+
+>>> r2 = R.RingBufferNumpyChannels(10, 3, False)
+
+>>> for length in [3, 4, 1, 7, 10, 0, 23, 2]: add_both(r1, r2, length)
+
+>>> numpy.array_equal(r1.buffer, r2.buffer), r1.index == r2.index, r1.is_full == r2.is_full
+(True, True, True)
+
+>>> numpy.array_equal(r1.get(2, 7), r2.get(2, 7))
+True
+
+>>> r = R.RingBufferNumpyChannels(10, 2, False)
+
+>>> r.add_block(get_block(2, 6))
+
+>>> r.is_full, r.index
+(False, 6)
+
+>>> r.add_block(get_block(2, 6, 6))
+
+>>> r.is_full, r.index
+(True, 2)
+
+>>> r.get(0, 10)[0]
+array([  2.,   3.,   4.,   5.,   6.,   7.,   8.,   9.,  10.,  11.])
+
+
+>>> b1 = A.AutoRingBuffer(10, 5, 3, 2, collect(1), 'NUMPY_CHANNELS', False)
+
+>>> b2 = A.AutoRingBuffer(10, 5, 3, 2, collect(2), 'NUMPY_CHANNELS', False)
+
+>>> blk = get_block(2, 40)
+
+>>> for i in range(40): b1.handle_sample(Sample(blk[:, i]))
+
+>>> b2.handle_sample_block(blk[:, :4])
+
+>>> b2.handle_sample_block(blk[:, 4:31])
+
+>>> b2.handle_sample_block(blk[:, 31:])
+
+>>> len(RESULTS[1]) == len(RESULTS[2]) == 10
+True
+
+>>> all(numpy.array_equal(x, y) for x, y in zip(RESULTS[1], RESULTS[2]))
+True
+
+>>> RESULTS[2][0][0]
+array([ 2.,  3.,  4.,  5.,  6.])
+
+
+>>> from obci.analysis.buffers import auto_blink_buffer as B
+
+>>> b1 = B.AutoBlinkBuffer(0, 5, 2, 10, collect_blinks(3), 'NUMPY_CHANNELS', False)
+
+>>> b2 = B.AutoBlinkBuffer(0, 5, 2, 10, collect_blinks(4), 'NUMPY_CHANNELS', False)
+
+>>> blk, ts = get_block(2, 60), numpy.arange(60, dtype='float').reshape(1, 60)/10
+
+>>> for i in range(25): b1.handle_sample(Sample(blk[:, i]), ts[0, i])
+
+>>> b2.handle_sample_block(blk[:, :25], ts[:, :25])
+
+>>> for t in [2.05, 2.25, 2.3]: b1.handle_blink(Blink(t)); b2.handle_blink(Blink(t))
+
+>>> for i in range(25, 60): b1.handle_sample(Sample(blk[:, i]), ts[0, i])
+
+>>> b2.handle_sample_block(blk[:, 25:60], ts[:, 25:60])
+
+>>> len(RESULTS[3]) == len(RESULTS[4]) == 3
+True
+
+>>> all(numpy.array_equal(x, y) for x, y in zip(RESULTS[3], RESULTS[4]))
+True
+
+"""
+
+import numpy
+
+RESULTS = {}
+
+class Sample(object):
+    def __init__(self, channels):
+        self.channels = list(channels)
+
+class Blink(object):
+    def __init__(self, timestamp):
+        self.timestamp = timestamp
+
+def get_block(ch, length, start=0):
+    """Return (ch, length) array with sample numbers starting from start
+    in the first channel, multiplied by 10**channel in next ones."""
+    d = numpy.arange(start, start+length, dtype='float')
+    return numpy.array([d*(10**i) for i in range(ch)])
+
+def add_both(r1, r2, length):
+    blk = get_block(r1.number_of_channels, length, r1.index*100)
+    r1.add_block(blk)
+    for i in range(length):
+        r2.add(Sample(blk[:, i]))
+
+def collect(key):
+    RESULTS[key] = []
+    def f(d):
+        RESULTS[key].append(d.copy())
+    return f
+
+def collect_blinks(key):
+    RESULTS[key] = []
+    def f(blink, d):
+        RESULTS[key].append(d.copy())
+    return f
+
+def run():
+    import doctest, sys
+    res = doctest.testmod(sys.modules[__name__])
+    if res.failed == 0:
+        print("All tests succeeded!")
+
+if __name__ == '__main__':
+    run()
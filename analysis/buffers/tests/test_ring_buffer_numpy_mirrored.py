@@ -0,0 +1,131 @@
+# -*- coding: utf-8 -*-
+#!/usr/bin/env python
+
+"""
+>>> from obci.analysis.buffers import ring_buffer_numpy_channels as R
+
+>>> from obci.analysis.buffers import ring_buffer_numpy_mirrored as M
+
+>>> r1 = R.RingBufferNumpyChannels(10, 3, False)
+
+>>> r2 = M.RingBufferNumpyMirrored(10, 3, False)
+
+>>> for length in [3, 4, 1, 7, 10, 23, 2]: add_both(r1, r2, length)
+
+>>> all(numpy.array_equal(r1.get(i, 10-i), r2.get(i, 10-i)) for i in range(10))
+True
+
+>>> all(numpy.array_equal(r1.get(i, 3), r2.get(i, 3)) for i in range(8))
+True
+
+>>> d = r2.get(5, 5)
+
+>>> numpy.may_share_memory(d, r2.buffer), d.flags.writeable
+(True, False)
+
+>>> r1 = R.RingBufferNumpyChannels(10, 3, True, 2)
+
+>>> r2 = M.RingBufferNumpyMirrored(10, 3, True, 2)
+
+>>> for length in [3, 4, 1, 7, 10, 23, 2]: add_both(r1, r2, length)
+
+>>> d1, d2, d3 = r2.get(5, 5), r2.get(5, 5), r2.get(5, 5)
+
+>>> d1 is d3, d1 is d2, numpy.may_share_memory(d1, r2.buffer), d1.flags.writeable
+(True, False, False, True)
+
+>>> d1, d2, d3 = r1.get(5, 5), r1.get(5, 5), r1.get(5, 5)
+
+>>> d1 is d3, d1 is d2, numpy.array_equal(d1, r2.get(5, 5))
+(True, False, True)
+
+>>> from obci.analysis.buffers import auto_ring_buffer as A
+
+>>> b1 = A.AutoRingBuffer(10, 5, 3, 2, collect(1), 'NUMPY_CHANNELS', False)
+
+>>> b2 = A.AutoRingBuffer(10, 5, 3, 2, collect(2), 'NUMPY_CHANNELS_MIRRORED', False)
+
+>>> b3 = A.AutoRingBuffer(10, 5, 3, 2, collect(3), 'NUMPY_CHANNELS', True, 10)
+
+>>> for b in [b1, b2, b3]: b.handle_sample_block(get_block(2, 40))
+
+>>> len(RESULTS[1]) == len(RESULTS[2]) == len(RESULTS[3]) == 10
+True
+
+>>> all(numpy.array_equal(x, y) and numpy.array_equal(x, z) for x, y, z in zip(RESULTS[1], RESULTS[2], RESULTS[3]))
+True
+
+"""
+
+import numpy
+
+RESULTS = {}
+
+class Sample(object):
+    def __init__(self, channels):
+        self.channels = list(channels)
+
+def get_block(ch, length, start=0):
+    d = numpy.arange(start, start+length, dtype='float')
+    return numpy.array([d*(10**i) for i in range(ch)])
+
+def add_both(r1, r2, length):
+    blk = get_block(r1.number_of_channels, length, r1.index*100)
+    r1.add_block(blk)
+    for i in range(length):
+        r2.add(Sample(blk[:, i]))
+
+def collect(key):
+    RESULTS[key] = []
+    def f(d):
+        RESULTS[key].append(d.copy())
+    return f
+
+def returned_windows(ret_format, copy_on_ret, pool_size, ticks=200):
+    """Feed AutoRingBuffer with packets (so that ret_func is fired every
+    packet and windows wrap around). Return ring buffer`s array and lists
+    of windows returned while filling the buffer and in steady state."""
+    from obci.analysis.buffers import auto_ring_buffer
+    channels, window, per = 32, 1024, 32
+    returned = []
+    b = auto_ring_buffer.AutoRingBuffer(window, window, per, channels,
+                                        returned.append, ret_format,
+                                        copy_on_ret, pool_size)
+    block = get_block(channels, per)
+    for i in range(2*window//per):
+        b.handle_sample_block(block)
+    warm_up = returned[:]
+    del returned[:]
+    for i in range(ticks):
+        b.handle_sample_block(block)
+    return b.buffer.buffer, warm_up, returned
+
+def test_zero_allocation():
+    """In steady state mirrored views and pooled copies must not allocate
+    new windows (32 channels x 1024 samples), while plain copy_on_ret
+    allocates a window per tick. Windows are kept alive, so a new
+    allocation can`t reuse an id."""
+    buf, warm_up, windows = returned_windows('NUMPY_CHANNELS', True, 0)
+    assert len(set(id(d) for d in windows)) == len(windows)
+    assert not any(numpy.may_share_memory(d, buf) for d in windows)
+
+    buf, warm_up, windows = returned_windows('NUMPY_CHANNELS_MIRRORED', False, 0)
+    assert len(windows) == 200
+    assert all(numpy.may_share_memory(d, buf) and d.base is buf for d in windows)
+
+    for ret_format in ['NUMPY_CHANNELS', 'NUMPY_CHANNELS_MIRRORED']:
+        buf, warm_up, windows = returned_windows(ret_format, True, 4)
+        pooled = set(id(d) for d in warm_up[-4:])
+        assert len(pooled) == 4
+        assert set(id(d) for d in windows) == pooled
+        assert not any(numpy.may_share_memory(d, buf) for d in windows)
+    return True
+
+def run():
+    import doctest, sys
+    res = doctest.testmod(sys.modules[__name__])
+    if res.failed == 0 and test_zero_allocation():
+        print("All tests succeeded!")
+
+if __name__ == '__main__':
+    run()
@@ -0,0 +1,63 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""Streaming IIR filtering of multichannel signal blocks.
+
+A filter is designed once as second-order sections (a chain of
+notch and band-pass stages) and applied to subsequent blocks of shape
+(channels, samples) with scipy.signal.sosfilt. Filter state (zi) is
+carried between blocks separately for every channel, so filtering
+a signal block by block gives the same result as filtering it at once.
+"""
+
+import numpy
+import scipy.signal as signal
+
+def get_bandpass_sos(sampling, low, high, order=4):
+    """Return butterworth band-pass (or low-pass if low is None,
+    or high-pass if high is None) filter in sos form."""
+    nyq = sampling/2.0
+    if low is None:
+        return signal.butter(order, high/nyq, btype='lowpass', output='sos')
+    elif high is None:
+        return signal.butter(order, low/nyq, btype='highpass', output='sos')
+    else:
+        return signal.butter(order, [low/nyq, high/nyq], btype='bandpass', output='sos')
+
+def get_notch_sos(sampling, freq, width=2.0, order=2):
+    """Return butterworth band-stop filter of width Hz around freq in sos form."""
+    nyq = sampling/2.0
+    return signal.butter(order, [(freq - width/2.0)/nyq, (freq + width/2.0)/nyq],
+                         btype='bandstop', output='sos')
+
+def get_chain_sos(stages):
+    """Return sos array of filter stages (list of sos arrays) applied one after another."""
+    return numpy.vstack(stages)
+
+class SosFilter(object):
+    """Stateful filter of (channels, samples) blocks.
+    Public interface:
+    - filter(block) - return filtered block, update filter state
+    - reset() - forget filter state
+    """
+    def __init__(self, sos, num_of_channels, steady_start=True):
+        """If steady_start is True filter state is initialised
+        as if the signal was constant and equal to the first sample
+        of the first block (no startup transient), otherwise with zeros."""
+        self.sos = numpy.asarray(sos, dtype=numpy.float64)
+        self.num_of_channels = num_of_channels
+        self.steady_start = steady_start
+        # per-section state for unit step, shape (sections, 1, 2)
+        self._zi_step = signal.sosfilt_zi(self.sos)[:, numpy.newaxis, :]
+        self.reset()
+
+    def reset(self):
+        self._zi = None
+
+    def filter(self, block):
+        if self._zi is None:
+            if self.steady_start and block.shape[1] > 0:
+                self._zi = self._zi_step * block[:, 0][numpy.newaxis, :, numpy.newaxis]
+            else:
+                self._zi = numpy.zeros((self.sos.shape[0], self.num_of_channels, 2))
+        ret, self._zi = signal.sosfilt(self.sos, block, axis=-1, zi=self._zi)
+        return ret
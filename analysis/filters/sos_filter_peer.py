@@ -0,0 +1,61 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+from multiplexer.multiplexer_constants import peers, types
+from obci.control.peer.configured_multiplexer_server import ConfiguredMultiplexerServer
+from obci.configs import settings
+from obci.analysis.filters import sos_filter
+from obci.analysis.obci_signal_processing.signal import sample_vector_codec
+
+class SosFilterPeer(ConfiguredMultiplexerServer):
+    """Filter signal with a chain of notch and band-pass filters and send it
+    further as FILTERED_SIGNAL_MESSAGE. Every received SampleVector is
+    filtered as a (channels, samples) block and sent as a SampleVector with
+    the same samples and timestamps."""
+    def __init__(self, addresses):
+        super(SosFilterPeer, self).__init__(addresses=addresses,
+                                            type=peers.FILTER)
+        sampling = float(self.config.get_param('sampling_rate'))
+        channels_count = len(self.config.get_param('channel_names').split(';'))
+        self._signal_type = getattr(types, self.config.get_param('mx_signal_type'))
+
+        stages = []
+        for freq in self.config.get_param('notch_freqs').split(';'):
+            if len(freq.strip()) > 0:
+                stages.append(sos_filter.get_notch_sos(
+                        sampling, float(freq),
+                        float(self.config.get_param('notch_width')),
+                        int(self.config.get_param('notch_order'))))
+        low = self._get_freq('bandpass_low')
+        high = self._get_freq('bandpass_high')
+        if low is not None or high is not None:
+            stages.append(sos_filter.get_bandpass_sos(
+                    sampling, low, high, int(self.config.get_param('bandpass_order'))))
+        if len(stages) == 0:
+            self.logger.warning("No filter stages defined, signal will be passed unchanged.")
+            self.filter = None
+        else:
+            self.filter = sos_filter.SosFilter(sos_filter.get_chain_sos(stages), channels_count)
+            self.logger.info("Filter sections: "+str(self.filter.sos.shape[0]))
+        self.ready()
+
+    def _get_freq(self, param):
+        value = self.config.get_param(param)
+        if len(value.strip()) == 0:
+            return None
+        return float(value)
+
+    def handle_message(self, mxmsg):
+        if mxmsg.type == self._signal_type:
+            if self.filter is None:
+                msg = mxmsg.message
+            else:
+                samples, timestamps = sample_vector_codec.decode(mxmsg.message)
+                msg = sample_vector_codec.encode(self.filter.filter(samples), timestamps)
+            self.conn.send_message(message=msg, type=types.FILTERED_SIGNAL_MESSAGE, flush=True)
+        else:
+            self.logger.warning("Got unrecognised message type: "+str(mxmsg.type))
+        self.no_response()
+
+if __name__ == "__main__":
+    SosFilterPeer(settings.MULTIPLEXER_ADDRESSES).loop()
@@ -0,0 +1,38 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""Measure per-packet latency of SosFilterPeer`s work - decoding
+a SampleVector, filtering it with notch + band-pass chain and encoding
+filtered SampleVector.
+
+Usage: python benchmark_sos_filter.py [channels] [sampling] [samples_per_packet] [seconds]
+"""
+
+import sys, time
+import numpy
+
+from obci.analysis.filters import sos_filter
+from obci.analysis.obci_signal_processing.signal import sample_vector_codec
+
+def run(channels=32, sampling=1024, per=32, seconds=10):
+    sos = sos_filter.get_chain_sos([sos_filter.get_notch_sos(sampling, 50.0),
+                                    sos_filter.get_bandpass_sos(sampling, 0.5, 30.0)])
+    f = sos_filter.SosFilter(sos, channels)
+    packets = [sample_vector_codec.encode(numpy.random.randn(channels, per),
+                                          time.time() + numpy.arange(per)/float(sampling))
+               for i in range(10)]
+    times = []
+    for i in xrange(seconds*sampling/per):
+        msg = packets[i % len(packets)]
+        start = time.time()
+        samples, timestamps = sample_vector_codec.decode(msg)
+        sample_vector_codec.encode(f.filter(samples), timestamps)
+        times.append(time.time() - start)
+    times = numpy.array(times)*1000
+    print("%d channels, %d Hz, %d samples per packet, %d sections" %
+          (channels, sampling, per, sos.shape[0]))
+    print("per-packet latency (ms): mean %.3f, median %.3f, 99%% %.3f, max %.3f" %
+          (times.mean(), numpy.median(times), numpy.percentile(times, 99), times.max()))
+
+if __name__ == '__main__':
+    args = [int(a) for a in sys.argv[1:5]]
+    run(*args)
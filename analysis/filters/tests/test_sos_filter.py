@@ -0,0 +1,54 @@
+# -*- coding: utf-8 -*-
+#!/usr/bin/env python
+#
+
+"""
+>>> from obci.analysis.filters import sos_filter
+
+>>> import numpy, scipy.signal
+
+>>> sampling = 256.0
+
+>>> sos = sos_filter.get_chain_sos([sos_filter.get_notch_sos(sampling, 50.0),
+...                                 sos_filter.get_bandpass_sos(sampling, 1.0, 30.0)])
+
+>>> sos.shape
+(6, 6)
+
+Filtering block by block is the same as filtering the whole signal:
+
+>>> x = numpy.random.randn(4, 1000)
+
+>>> f = sos_filter.SosFilter(sos, 4, steady_start=False)
+
+>>> y = numpy.hstack([f.filter(x[:, i:i+16]) for i in range(0, 1000, 16)])
+
+>>> numpy.allclose(y, scipy.signal.sosfilt(sos, x, axis=-1))
+True
+
+Channels are filtered independently:
+
+>>> numpy.allclose(sos_filter.SosFilter(sos, 1, False).filter(x[2:3]), y[2:3])
+True
+
+50 Hz is stopped, 10 Hz passed:
+
+>>> t = numpy.arange(int(4*sampling))/sampling
+
+>>> f = sos_filter.SosFilter(sos, 2)
+
+>>> y = f.filter(numpy.vstack([numpy.sin(2*numpy.pi*50*t), numpy.sin(2*numpy.pi*10*t)]))
+
+>>> numpy.abs(y[:, 512:]).max(axis=1) < [0.01, 0.9]
+array([ True, False], dtype=bool)
+
+"""
+
+def run():
+    import doctest, sys
+    res = doctest.testmod(sys.modules[__name__])
+    if res.failed == 0:
+        print("All tests succeeded!")
+
+if __name__ == '__main__':
+    run()
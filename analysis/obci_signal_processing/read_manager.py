@@ -97,18 +97,28 @@ class ReadManager(object):
         
         return self.data_source.get_samples(p_from, p_len)
 
+    def get_number_of_samples(self):
+        """Return number of samples in every channel, without reading them."""
+        return self.data_source.get_number_of_samples()
+
+    def load_samples(self, p_dtype=numpy.float64):
+        """Load samples of a file data source to memory (as p_dtype),
+        so that arrays returned by get_samples can be modified."""
+        self.data_source.load_samples(p_dtype)
+
     def get_channel_samples(self, p_ch_name, p_from=None, p_len=None):
         """Return an array of values for channel p_ch_name, or
         raise ValueError exception if there is channel with that name."""
         ch_ind = self.get_param('channels_names').index(p_ch_name) #TODO error
-        return self.get_samples(p_from, p_len)[ch_ind]
+        return self.data_source.get_channels_samples(ch_ind, p_from, p_len)
         
     def get_channels_samples(self, p_ch_names, p_from=None, p_len=None):
 	assert(len(p_ch_names) > 0)
-        s = self.get_channel_samples(p_ch_names[0], p_from, p_len)
-        for ch in p_ch_names[1:]:
-            s = numpy.vstack((s, self.get_channel_samples(ch, p_from, p_len))) 
-        return s
+        if len(p_ch_names) == 1:
+            return self.get_channel_samples(p_ch_names[0], p_from, p_len)
+        names = self.get_param('channels_names')
+        return self.data_source.get_channels_samples(
+            [names.index(ch) for ch in p_ch_names], p_from, p_len)
 
     def set_samples(self, p_samples, p_channel_names, p_copy=False):
         try:
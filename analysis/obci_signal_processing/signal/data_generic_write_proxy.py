@@ -4,16 +4,17 @@
 #     Mateusz Kruszyński <mateusz.kruszynski@gmail.com>
 #
 
-import struct
 import sys, os.path
-from obci.configs import variables_pb2
+import numpy
 
 import signal_exceptions
+import sample_vector_codec
 import signal_constants
 import signal_logging as logger
 LOGGER = logger.get_logger("data_generic_write_proxy", 'info')
 
 SAMPLE_STRUCT_TYPES = signal_constants.SAMPLE_STRUCT_TYPES
+SAMPLE_NUMPY_TYPES = signal_constants.SAMPLE_NUMPY_TYPES
 
 class DataGenericWriteProxy(object):
     """
@@ -32,6 +33,7 @@ class DataGenericWriteProxy(object):
         self._append_ts = p_append_ts
         self._file_path = p_file_path
         self._sample_struct_type = SAMPLE_STRUCT_TYPES[p_sample_type]
+        self._sample_numpy_type = SAMPLE_NUMPY_TYPES[p_sample_type]
 
         try:
             if self._unpack_later:
@@ -99,19 +101,11 @@ class DataGenericWriteProxy(object):
             return
 
     def _vect_to_string(self, p_mx_vect):
-        l_vec = variables_pb2.SampleVector()
-        l_vec.ParseFromString(p_mx_vect)
-        samples = []
-        for j in range(len(l_vec.samples)):
-            s = l_vec.samples[j]
-            ts = s.timestamp
-            try:
-                strs = [struct.pack(self._sample_struct_type, ch) for ch in s.channels]
-                if self._append_ts:
-                    strs.append(struct.pack(self._sample_struct_type, ts))
-            except struct.error:
-                LOGGER.error("Error while writhing to file. Bad sample format.")
-                raise(signal_exceptions.BadSampleFormat())
-
-            samples.append(''.join(strs))
-        return ''.join(samples)
+        try:
+            samples, timestamps = sample_vector_codec.decode(p_mx_vect)
+        except Exception:
+            LOGGER.error("Error while writhing to file. Bad sample format.")
+            raise(signal_exceptions.BadSampleFormat())
+        if self._append_ts:
+            samples = numpy.vstack((samples, timestamps))
+        return numpy.ascontiguousarray(samples.T, dtype=self._sample_numpy_type).tostring()
@@ -3,7 +3,7 @@
 # Author:
 #     Mateusz Kruszyński <mateusz.kruszynski@gmail.com>
 #
-import scipy, struct
+import scipy, struct, numpy
 import os.path, sys
 import signal_exceptions
 import signal_constants
@@ -17,6 +17,7 @@ class DataReadProxy(object):
         self._file_path = p_file_path
         self._sample_size = SAMPLE_SIZES[sample_type]
         self._sample_struct_type = '<'+SAMPLE_STRUCT_TYPES[sample_type]
+        self._sample_dtype = numpy.dtype(self._sample_struct_type)
         self.start_reading()
         
     def start_reading(self):
@@ -29,28 +30,23 @@ class DataReadProxy(object):
     def finish_reading(self):
         self._data_file.close()
 
-    def get_all_values(self, p_channels_num=1):
+    def get_memmap(self, p_channels_num=1):
+        """Return data file mapped to memory as read-only numpy.memmap
+        of shape (samples, channels) and file`s sample type.
+        Nothing is read until the data is accessed."""
         assert(p_channels_num > 0)
-        self.finish_reading()
-        self.start_reading()
-        f_len = float(os.path.getsize(self._file_path))
-        ch_len = int((f_len/self._sample_size)/p_channels_num)
+        f_len = os.path.getsize(self._file_path)
+        ch_len = f_len // (self._sample_size*p_channels_num)
         if ch_len*self._sample_size*p_channels_num != f_len:
             LOGGER.info(''.join(["Remained samples ", str(f_len - ch_len*self._sample_size*p_channels_num), " .Should be 0."]))
+        if ch_len == 0:
+            # numpy.memmap can`t map an empty region
+            return numpy.zeros((0, p_channels_num), dtype=self._sample_dtype)
+        return numpy.memmap(self._file_path, dtype=self._sample_dtype, mode='r',
+                            shape=(ch_len, p_channels_num))
 
-        vals = scipy.zeros((p_channels_num, ch_len))
-        k = 0
-        while True:
-            try:
-                r = scipy.fromfile(self._data_file, self._sample_struct_type, p_channels_num)
-            except MemoryError:
-                break
-            if len(r) < p_channels_num:
-                break
-            for i in range(p_channels_num):
-                vals[i, k] = r[i]
-            k += 1
-        return vals
+    def get_all_values(self, p_channels_num=1):
+        return numpy.array(self.get_memmap(p_channels_num).T, dtype=numpy.float64)
 
     def get_next_value(self):
         """Return next value from data file (as python float). 
@@ -73,14 +69,9 @@ class DataReadProxy(object):
         l_raw_data = self._data_file.read(self._sample_size*p_num)
         # LOGGER.debug("After read. CURRENT POSITION/8 = "+str(self._data_file.tell()/8))        
 
-        # Initialize return array
-        l_ret = scipy.zeros(p_num)
         if (len(l_raw_data) == self._sample_size*p_num):
             # If all data required for return array is present
-            for i in range(p_num):
-                l_ret[i] = struct.unpack(self._sample_struct_type, 
-                                         l_raw_data[self._sample_size*i:self._sample_size*(i+1)])[0]
-            return l_ret
+            return numpy.frombuffer(l_raw_data, dtype=self._sample_dtype).astype(numpy.float64)
         else:
             # Either len(l_raw_data) is 0 and its ok -> EOF
             # or len(l_raw_data) > 0 and its last len(l_raw_data) data from the file.
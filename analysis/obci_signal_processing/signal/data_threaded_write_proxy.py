@@ -0,0 +1,134 @@
+# -*- coding: utf-8 -*-
+#!/usr/bin/env python
+#
+
+import threading
+import Queue
+import numpy
+
+from data_generic_write_proxy import DataGenericWriteProxy
+import signal_exceptions
+import sample_vector_codec
+import signal_logging as logger
+LOGGER = logger.get_logger("data_threaded_write_proxy", 'info')
+
+CHUNK_SAMPLES = 4096
+QUEUE_SIZE = 16
+
+class DataThreadedWriteProxy(DataGenericWriteProxy):
+    """
+    Data proxy decoding every SampleVector straight to a numpy block
+    stored in a preallocated chunk (CHUNK_SAMPLES samples).
+    Full chunks are written to the file by a separate writer thread,
+    so that a slow disk does not stall data_received.
+    Chunks are passed through a bounded queue (QUEUE_SIZE chunks) - if the
+    writer can`t keep up data_received blocks (backpressure) instead of
+    buffering unlimited data; queue`s high-water mark is recorded.
+    If writing fails, next chunks are dropped and finish_saving returns
+    the number of samples written before the error.
+    """
+    def __init__(self, p_file_path, p_append_ts=False, p_sample_type='FLOAT',
+                 p_chunk_samples=CHUNK_SAMPLES, p_queue_size=QUEUE_SIZE):
+        super(DataThreadedWriteProxy, self).__init__(p_file_path, False, p_append_ts, p_sample_type)
+        self._chunk_samples = int(p_chunk_samples)
+        self._columns = None
+        self._chunk = None
+        self._chunk_index = 0
+        self._queue = Queue.Queue(int(p_queue_size))
+        self._free_chunks = Queue.Queue()
+        self._writer_error = None
+        self._samples_written = 0
+
+        self.queue_high_water_mark = 0
+        self.backpressure_waits = 0
+        self.chunks_written = 0
+
+        self._writer = threading.Thread(target=self._write_chunks)
+        self._writer.daemon = True
+        self._writer.start()
+
+    def data_received(self, p_data):
+        """ p_data must be protobuf SampleVector message, but serialized to string."""
+        try:
+            samples, timestamps = sample_vector_codec.decode(p_data)
+        except Exception:
+            LOGGER.error("Error while writhing to file. Bad sample format.")
+            raise(signal_exceptions.BadSampleFormat())
+        num_of_channels, num_of_samples = samples.shape
+        if self._columns is None:
+            self._columns = num_of_channels + int(bool(self._append_ts))
+        if num_of_channels + int(bool(self._append_ts)) != self._columns:
+            LOGGER.error("Error while writhing to file. Bad number of channels.")
+            raise(signal_exceptions.BadSampleFormat())
+
+        written = 0
+        while written < num_of_samples:
+            if self._chunk is None:
+                self._chunk = self._get_free_chunk()
+                self._chunk_index = 0
+            count = min(num_of_samples - written, self._chunk_samples - self._chunk_index)
+            rows = self._chunk[self._chunk_index:self._chunk_index+count]
+            rows[:, :num_of_channels] = samples[:, written:written+count].T
+            if self._append_ts:
+                rows[:, num_of_channels] = timestamps[written:written+count]
+            self._chunk_index += count
+            written += count
+            if self._chunk_index == self._chunk_samples:
+                self._put_chunk()
+        self._number_of_samples += num_of_samples
+
+    def finish_saving(self):
+        """Write all buffered data, stop writer thread, close the file,
+        return a tuple - file`s name and number of samples written
+        (less than received if the writer failed)."""
+        if self._chunk is not None and self._chunk_index > 0:
+            self._put_chunk()
+        self._queue.put(None)
+        self._writer.join()
+        if self._writer_error is not None:
+            LOGGER.error("Writer thread failed: "+str(self._writer_error)+
+                         ". Samples written: "+str(self._samples_written)+
+                         " of "+str(self._number_of_samples))
+        LOGGER.info("Chunks written: "+str(self.chunks_written)+
+                    ", queue high-water mark: "+str(self.queue_high_water_mark)+
+                    ", backpressure waits: "+str(self.backpressure_waits))
+        path, number_of_samples = super(DataThreadedWriteProxy, self).finish_saving()
+        return path, self._samples_written
+
+    def get_stats(self):
+        return {'queue_high_water_mark': self.queue_high_water_mark,
+                'backpressure_waits': self.backpressure_waits,
+                'chunks_written': self.chunks_written,
+                'queue_size': self._queue.qsize()}
+
+    def _get_free_chunk(self):
+        try:
+            return self._free_chunks.get_nowait()
+        except Queue.Empty:
+            return numpy.empty((self._chunk_samples, self._columns),
+                               dtype=self._sample_numpy_type)
+
+    def _put_chunk(self):
+        item = (self._chunk, self._chunk_index)
+        self._chunk = None
+        try:
+            self._queue.put_nowait(item)
+        except Queue.Full:
+            self.backpressure_waits += 1
+            self._queue.put(item)
+        self.queue_high_water_mark = max(self.queue_high_water_mark, self._queue.qsize())
+
+    def _write_chunks(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                break
+            chunk, rows = item
+            if self._writer_error is None:
+                try:
+                    chunk[:rows].tofile(self._file)
+                    self.chunks_written += 1
+                    self._samples_written += rows
+                except Exception, e:
+                    self._writer_error = e
+            self._free_chunks.put(chunk)
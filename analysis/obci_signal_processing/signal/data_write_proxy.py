@@ -7,13 +7,19 @@ import data_buffered_write_proxy
 import data_simple_write_proxy
 import data_raw_write_proxy
 import data_asci_write_proxy
+import data_threaded_write_proxy
 
 import signal_logging as logger
 LOGGER = logger.get_logger("data_write_proxy", 'info')
 
-def get_proxy(file_path, append_ts=False, use_tmp_file=False, use_own_buffer=False, format='FLOAT'):
+def get_proxy(file_path, append_ts=False, use_tmp_file=False, use_own_buffer=False, format='FLOAT', use_threaded_writer=False):
     if format == 'FLOAT' or format == 'DOUBLE':
-        if use_own_buffer:
+        if use_threaded_writer:
+            if use_tmp_file or use_own_buffer:
+                LOGGER.warning("Threaded writer is used, use_tmp_file and use_own_buffer are ignored!!!")
+            return data_threaded_write_proxy.DataThreadedWriteProxy(
+                file_path, append_ts, format)
+        elif use_own_buffer:
             return data_buffered_write_proxy.DataBufferedWriteProxy(
                 file_path, use_tmp_file, append_ts, format)
         else:
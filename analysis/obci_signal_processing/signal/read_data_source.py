@@ -16,6 +16,20 @@ class DataSource(object):
 
     def iter_samples(self):
         LOGGER.error("The method must be subclassed") 
+
+    def get_channels_samples(self, p_channels, p_from=None, p_len=None):
+        """Return samples of channel (or list of channels) with index p_channels."""
+        return self.get_samples(p_from, p_len)[p_channels]
+
+    def get_number_of_samples(self):
+        """Return number of samples (in every channel)."""
+        return self.get_samples().shape[1]
+
+    def load_samples(self, p_dtype=numpy.float64):
+        """Make samples writable - sources not kept in memory read all
+        samples to a new array of p_dtype (once)."""
+        pass
+
     def __deepcopy(self, memo):
         return MemoryDataSource(copy.deepcopy(self.get_samples()))
 
@@ -56,15 +70,29 @@ class MemoryDataSource(DataSource):
             else:
                 return ret
 
+    def get_number_of_samples(self):
+        return self._data.shape[1]
+
     def iter_samples(self):
         for i in range(len(self._data[0])):
             yield self._data[:, i]
     
 
 class FileDataSource(DataSource):
+    """Data source backed by a raw signal file.
+    The file is mapped to memory (see DataReadProxy.get_memmap), so
+    get_samples and get_channels_samples return read-only views of the
+    map - for the whole data set or its part, for all channels or
+    a single one - without reading the whole file. Values have the
+    file`s sample type. To modify samples, copy them or load the whole
+    file to memory with load_samples."""
+    # number of samples copied at once by iter_samples
+    ITER_BLOCK = 1024
+
     def __init__ (self, p_file, p_num_of_channels, p_sample_type="DOUBLE"):
         self._num_of_channels = p_num_of_channels
         self._mem_source = None 
+        self._memmap = None
         try:
             ''+p_file
             LOGGER.debug("Got file path.")
@@ -73,27 +101,40 @@ class FileDataSource(DataSource):
             LOGGER.debug("Got file proxy.")
             self._data_proxy = p_file
 
+    def _get_memmap(self):
+        """Return (channels x samples) read-only view of the mapped file."""
+        if self._memmap is None:
+            LOGGER.debug("Mapping data file to memory...")
+            self._memmap = self._data_proxy.get_memmap(self._num_of_channels).T.view(numpy.ndarray)
+            self._memmap.flags.writeable = False
+        return self._memmap
 
-    def get_samples(self, p_from=None, p_len=None):
+    def get_channels_samples(self, p_channels, p_from=None, p_len=None):
         if self._mem_source:
-            # we have data in-memory
-            return self._mem_source.get_samples(p_from, p_len)
-        elif p_from is None:
-            # we dont have data in-memory
-            # and whole data set is reqested
-            # so let`s use the ocasion and cache data
-            LOGGER.info("All data set requested for the first time. Start reading all data from the file...")
-            vals = self._data_proxy.get_all_values(self._num_of_channels)
-            self._mem_source = MemoryDataSource(vals, False)
-            return self._mem_source.get_samples()
+            return self._mem_source.get_channels_samples(p_channels, p_from, p_len)
+        data = self._get_memmap()
+        if p_from is not None:
+            data = data[:, p_from:(p_from+p_len)]
+            if data.shape[1] != p_len:
+                raise(signal_exceptions.NoNextValue())
+        data = data[p_channels]
+        # a list of channels gives a copy, keep it read-only like views
+        data.flags.writeable = False
+        return data
 
-        else:
-            # we dont have data in-memory
-            # only a piece of data is requested
+    def get_samples(self, p_from=None, p_len=None):
+        return self.get_channels_samples(slice(None), p_from, p_len)
 
-            self._data_proxy.goto_value(p_from*self._num_of_channels)
-            d = self._data_proxy.get_next_values(self._num_of_channels*p_len)
-            return numpy.reshape(d, (self._num_of_channels, -1), 'f') 
+    def get_number_of_samples(self):
+        if self._mem_source:
+            return self._mem_source.get_number_of_samples()
+        # mapping the file reads nothing
+        return self._get_memmap().shape[1]
+
+    def load_samples(self, p_dtype=numpy.float64):
+        if self._mem_source is None:
+            LOGGER.debug("Loading data file to memory...")
+            self.set_samples(numpy.array(self._get_memmap(), dtype=p_dtype), False)
             
     def set_samples(self, samples, copy):
         if self._mem_source is None:
@@ -106,12 +147,8 @@ class FileDataSource(DataSource):
             for samp in self._mem_source.iter_samples():
                 yield samp
         else:
-            self._data_proxy.finish_reading()
-            self._data_proxy.start_reading()
-            while True:
-                try:
-                    samp = numpy.zeros(self._num_of_channels)
-                    samp[:] = self._data_proxy.get_next_values(self._num_of_channels)
+            data = self._get_memmap()
+            for i in xrange(0, data.shape[1], self.ITER_BLOCK):
+                block = numpy.array(data[:, i:i+self.ITER_BLOCK].T)
+                for samp in block:
                     yield samp
-                except signal_exceptions.NoNextValue:
-                    break
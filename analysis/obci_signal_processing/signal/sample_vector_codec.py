@@ -0,0 +1,165 @@
+# -*- coding: utf-8 -*-
+#!/usr/bin/env python
+#
+
+"""
+Vectorized SampleVector <-> numpy codec.
+
+A serialized variables_pb2.SampleVector where every sample has the same
+number of channels is a sequence of equally long records:
+
+  0x0a <varint sample_len> 0x09 <8B double timestamp> (0x15 <4B float channel>)*
+
+so it can be decoded (and encoded) with numpy.frombuffer and a precomputed
+byte-index layout instead of python loops over samples and channels.
+Messages not matching that layout (eg. packed channels, different number of
+channels in samples) are handled by a slower protobuf-based fallback.
+
+Public interface:
+- decode(msg) - serialized SampleVector -> (channels x samples float32 array,
+                                            samples float64 timestamps array)
+- encode(samples, timestamps) - the opposite
+- encode_dense(samples, timestamps), decode_dense(data) - a dense binary
+  payload: '<II' header (number of samples, number of channels),
+  float64 timestamps and float32 values stored sample after sample
+- to_dense(msg) - serialized SampleVector -> dense payload
+"""
+
+import struct
+import numpy
+
+from obci.configs import variables_pb2
+
+SAMPLES_TAG = 0x0a
+TIMESTAMP_TAG = 0x09
+CHANNEL_TAG = 0x15
+
+DENSE_HEADER = struct.Struct('<II')
+
+def _varint(value):
+    ret = []
+    while True:
+        b = value & 0x7f
+        value >>= 7
+        if value:
+            ret.append(b | 0x80)
+        else:
+            ret.append(b)
+            return ret
+
+class _Layout(object):
+    """Byte layout of a serialized sample with num_of_channels channels."""
+    def __init__(self, num_of_channels):
+        self.num_of_channels = num_of_channels
+        sample_len = 9 + 5*num_of_channels
+        header = [SAMPLES_TAG] + _varint(sample_len) + [TIMESTAMP_TAG]
+        self.stride = len(header) - 1 + sample_len
+        self.ts_index = numpy.arange(len(header), len(header)+8)
+        channels_start = len(header) + 8
+        tags_index = channels_start + 5*numpy.arange(num_of_channels)
+        self.channels_index = (tags_index[:, numpy.newaxis] + 1 +
+                               numpy.arange(4)[numpy.newaxis, :])
+
+        self.template = numpy.zeros(self.stride, dtype=numpy.uint8)
+        self.template[:len(header)] = header
+        self.template[tags_index] = CHANNEL_TAG
+        self.struct_index = numpy.concatenate((numpy.arange(len(header)), tags_index))
+        self.struct_values = self.template[self.struct_index]
+
+_LAYOUTS = {}
+def _get_layout(num_of_channels):
+    try:
+        return _LAYOUTS[num_of_channels]
+    except KeyError:
+        layout = _Layout(num_of_channels)
+        _LAYOUTS[num_of_channels] = layout
+        return layout
+
+def _guess_layout(raw):
+    """Return layout for a message starting with raw bytes,
+    or None if the message does not look like a regular SampleVector."""
+    if len(raw) < 2 or raw[0] != SAMPLES_TAG:
+        return None
+    sample_len, shift, i = 0, 0, 1
+    while i < len(raw) and i < 6:
+        sample_len |= (int(raw[i]) & 0x7f) << shift
+        shift += 7
+        if not raw[i] & 0x80:
+            break
+        i += 1
+    else:
+        return None
+    if sample_len < 9 or (sample_len - 9) % 5 != 0:
+        return None
+    return _get_layout((sample_len - 9) // 5)
+
+def decode(msg):
+    """Return tuple (samples, timestamps) for serialized SampleVector msg,
+    where samples is float32 array of shape (channels, samples)
+    and timestamps is float64 array of shape (samples,)."""
+    if len(msg) == 0:
+        return numpy.zeros((0, 0), dtype=numpy.float32), numpy.zeros(0)
+    raw = numpy.frombuffer(msg, dtype=numpy.uint8)
+    layout = _guess_layout(raw)
+    if layout is None or len(raw) % layout.stride != 0:
+        return _decode_generic(msg)
+    rows = raw.reshape(-1, layout.stride)
+    if not (rows[:, layout.struct_index] == layout.struct_values).all():
+        return _decode_generic(msg)
+
+    num_of_samples = rows.shape[0]
+    samples = numpy.ascontiguousarray(rows[:, layout.channels_index]).view(
+        '<f4').reshape(num_of_samples, layout.num_of_channels)
+    timestamps = numpy.ascontiguousarray(rows[:, layout.ts_index]).view(
+        '<f8').reshape(num_of_samples)
+    return samples.T, timestamps
+
+def _decode_generic(msg):
+    vec = variables_pb2.SampleVector()
+    vec.ParseFromString(msg)
+    samples = numpy.array([s.channels[:] for s in vec.samples],
+                          dtype=numpy.float32)
+    timestamps = numpy.array([s.timestamp for s in vec.samples],
+                             dtype=numpy.float64)
+    return samples.reshape(len(vec.samples), -1).T, timestamps
+
+def encode(samples, timestamps):
+    """Return serialized SampleVector for samples - array of shape
+    (channels, samples) and timestamps - array of shape (samples,).
+    The result is byte-to-byte the same as protobuf`s SerializeToString."""
+    num_of_channels, num_of_samples = samples.shape
+    layout = _get_layout(num_of_channels)
+    rows = numpy.empty((num_of_samples, layout.stride), dtype=numpy.uint8)
+    rows[:] = layout.template
+    rows[:, layout.channels_index] = numpy.ascontiguousarray(
+        samples.T, dtype='<f4').view(numpy.uint8).reshape(
+        num_of_samples, num_of_channels, 4)
+    rows[:, layout.ts_index] = numpy.ascontiguousarray(
+        timestamps, dtype='<f8').view(numpy.uint8).reshape(num_of_samples, 8)
+    return rows.tostring()
+
+def encode_dense(samples, timestamps):
+    """Return dense binary payload for samples - array of shape
+    (channels, samples) and timestamps - array of shape (samples,)."""
+    num_of_channels, num_of_samples = samples.shape
+    return b''.join([
+            DENSE_HEADER.pack(num_of_samples, num_of_channels),
+            numpy.ascontiguousarray(timestamps, dtype='<f8').tostring(),
+            numpy.ascontiguousarray(samples.T, dtype='<f4').tostring()])
+
+def decode_dense(data):
+    """Return tuple (samples, timestamps) for dense payload data.
+    Returned arrays are read-only views of data."""
+    num_of_samples, num_of_channels = DENSE_HEADER.unpack_from(data)
+    offset = DENSE_HEADER.size
+    timestamps = numpy.frombuffer(data, dtype='<f8', count=num_of_samples,
+                                  offset=offset)
+    offset += 8*num_of_samples
+    samples = numpy.frombuffer(data, dtype='<f4',
+                               count=num_of_samples*num_of_channels,
+                               offset=offset)
+    return samples.reshape(num_of_samples, num_of_channels).T, timestamps
+
+def to_dense(msg):
+    """Return dense binary payload for serialized SampleVector msg."""
+    return encode_dense(*decode(msg))
@@ -6,3 +6,4 @@
 
 SAMPLE_SIZES = {'DOUBLE': 8, 'FLOAT': 4}
 SAMPLE_STRUCT_TYPES = {'DOUBLE':'d', 'FLOAT':'f'}
+SAMPLE_NUMPY_TYPES = {'DOUBLE':'float64', 'FLOAT':'float32'}
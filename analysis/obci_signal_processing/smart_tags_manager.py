@@ -6,6 +6,7 @@
 """Implement one class - SmartTagsManager."""
 from tags import smart_tag
 import Queue
+import numpy
 import read_manager
 
 from signal import signal_exceptions
@@ -23,6 +24,8 @@ class SmartTagsManager(object):
     Public interface:
     - __init__()
     - iter_smart_tags()
+    - get_epochs_array()
+    - get_epochs_smart_tags()
     """
     def __init__(self, p_tag_def, p_info_file, p_data_file, p_tags_file, p_read_manager=None):
         """Init all needed slots, read tags file, init smart tags.
@@ -208,5 +211,74 @@ class SmartTagsManager(object):
         #iter_smart_tags call will work
 
 
+    def get_epochs_array(self, p_tag_def=None, p_len=None):
+        """Return a tuple (epochs, metadata), where epochs is an array of
+        shape (epochs, channels, samples) with data for all smart tags
+        (or for smart tags defined by p_tag_def if given) gathered at once.
+        Every epoch is p_len samples long; if p_len is None the shortest
+        smart tag`s length is used. Epochs starting before the first sample
+        or ending after the last one are skipped.
+        metadata is a dictionary with keys:
+        'names', 'desc' - lists with start tags` names and descriptions,
+        'start_timestamps', 'end_timestamps', 'start_samples' - arrays,
+        'indices' - array of smart tags` indices (in start timestamp order)."""
+        if p_tag_def is not None:
+            l_mgr = SmartTagsManager(p_tag_def, None, None, None, self._read_manager)
+            return l_mgr.get_epochs_array(None, p_len)
+
+        l_start_ts = numpy.array([st.get_start_timestamp() for st in self._smart_tags], dtype=float)
+        l_end_ts = numpy.array([st.get_end_timestamp() for st in self._smart_tags], dtype=float)
+        # the same truncation as in iter_smart_tags
+        l_starts = ((l_start_ts - self._first_sample_ts) * self.sampling_freq).astype(int)
+        l_ends = ((l_end_ts - self._first_sample_ts) * self.sampling_freq).astype(int)
+        if p_len is None:
+            p_len = int((l_ends - l_starts).min()) if len(self._smart_tags) > 0 else 0
+
+        l_data_len = self._read_manager.get_number_of_samples()
+        l_indices = numpy.flatnonzero((l_starts >= 0) & (l_starts + p_len <= l_data_len))
+        if len(l_indices) < len(self._smart_tags):
+            LOGGER.info("Epochs out of data range ignored: "+str(len(self._smart_tags) - len(l_indices)))
+        l_starts = l_starts[l_indices]
+
+        # for a file data source every epoch is a view of a contiguous part
+        # of the mapped file, so only pages with epochs are read
+        # (and slice copies are faster than a fancy-indexed gather)
+        l_epochs = None
+        for i, i_start in enumerate(l_starts):
+            l_data = self._read_manager.get_samples(i_start, p_len)
+            if l_epochs is None:
+                l_epochs = numpy.empty((len(l_starts),) + l_data.shape, dtype=l_data.dtype)
+            l_epochs[i] = l_data
+        if l_epochs is None:
+            l_epochs = numpy.empty(
+                (0, int(self._read_manager.get_param('number_of_channels')), p_len))
+
+        l_tags = [self._smart_tags[i].get_start_tag() for i in l_indices]
+        l_metadata = {'names': [t['name'] for t in l_tags],
+                      'desc': [t['desc'] for t in l_tags],
+                      'start_timestamps': l_start_ts[l_indices],
+                      'end_timestamps': l_end_ts[l_indices],
+                      'start_samples': l_starts,
+                      'indices': l_indices}
+        return l_epochs, l_metadata
+
+    def get_epochs_smart_tags(self, p_tag_def=None, p_len=None):
+        """Return a list of smart tags for epochs from get_epochs_array,
+        every smart tag`s data is a view of the epochs array."""
+        if p_tag_def is not None:
+            l_mgr = SmartTagsManager(p_tag_def, None, None, None, self._read_manager)
+            return l_mgr.get_epochs_smart_tags(None, p_len)
+
+        l_epochs, l_metadata = self.get_epochs_array(None, p_len)
+        l_info = dict(self._read_manager.get_params())
+        l_info['number_of_samples'] = l_epochs.shape[2]*l_epochs.shape[1]
+        l_sts = []
+        for i, i_ind in enumerate(l_metadata['indices']):
+            l_start_ts = l_metadata['start_timestamps'][i]
+            l_end_ts = l_metadata['end_timestamps'][i]
+            l_tags = self._read_manager.get_tags(None, l_start_ts, (l_end_ts - l_start_ts))
+            l_sts.append(self._smart_tags[i_ind].get_view(l_epochs[i], l_info, l_tags))
+        return l_sts
+
     def __iter__(self):
         return self.iter_smart_tags()
@@ -4,37 +4,80 @@
 # Author:
 #     Mateusz Kruszyński <mateusz.kruszynski@gmail.com>
 #
-import copy
+import copy, bisect
 import tags_file_reader
 import tags_logging as logger
 LOGGER = logger.get_logger("smart_tags_source", "info")
 
 
+class TagsIndex(object):
+    """Start-timestamp index of a tags list, for all tags and per tag name.
+    Tags positions are kept sorted by start_timestamp along with their
+    timestamps, so that a query for tags of given name starting in
+    [p_from, p_from+p_len] is a bisect plus a slice instead of
+    a linear scan. Returned tags keep their order in the indexed list.
+    The index must be rebuilt if tags are changed in place."""
+    def __init__(self, p_tags):
+        self._tags = p_tags
+        self._len = len(p_tags)
+        l_order = sorted(range(self._len), key=lambda i: p_tags[i]['start_timestamp'])
+        self._in_order = (l_order == range(self._len))
+        self._all = self._get_positions(l_order)
+        l_names = {}
+        for i in l_order:
+            l_names.setdefault(p_tags[i]['name'], []).append(i)
+        self._names = dict((i_name, self._get_positions(i_pos))
+                           for i_name, i_pos in l_names.iteritems())
+
+    def _get_positions(self, p_positions):
+        return [self._tags[i]['start_timestamp'] for i in p_positions], p_positions
+
+    def is_valid_for(self, p_tags):
+        return p_tags is self._tags and len(p_tags) == self._len
+
+    def get_tags(self, p_tag_type=None, p_from=None, p_len=None):
+        if p_tag_type is None:
+            l_starts, l_positions = self._all
+        else:
+            l_starts, l_positions = self._names.get(p_tag_type, ([], []))
+        if p_from is None:
+            l_selected = l_positions
+        else:
+            l_selected = l_positions[bisect.bisect_left(l_starts, p_from):
+                                     bisect.bisect_right(l_starts, p_from + p_len)]
+        if not self._in_order:
+            l_selected = sorted(l_selected)
+        return [self._tags[i] for i in l_selected]
+
+
 class TagsSource(object):
     def get_tags(self):
         LOGGER.error("The method must be subclassed")
 
     def _filter_tags(self, p_tags, p_tag_type=None, p_from=None, p_len=None, p_func=None):
         l_tags = p_tags
-        if not (p_tag_type is None):
-            l_tags = [i_tag for i_tag in l_tags if p_tag_type == i_tag['name']]
-
-        if not (p_from is None):
-            l_start = p_from
-            l_end = p_from + p_len
-            l_tags = [i_tag for i_tag in l_tags if 
-                      (l_start <= i_tag['start_timestamp'] and i_tag['start_timestamp'] <= l_end)]
+        if not (p_tag_type is None and p_from is None):
+            l_tags = self._get_index(p_tags).get_tags(p_tag_type, p_from, p_len)
 
         if not (p_func is None):
             l_tags = [i_tag for i_tag in l_tags if p_func(i_tag)]
 
         return l_tags
+
+    def _get_index(self, p_tags):
+        l_index = self._tags_index
+        if l_index is None or not l_index.is_valid_for(p_tags):
+            l_index = TagsIndex(p_tags)
+            self._tags_index = l_index
+        return l_index
+
     def __deepcopy__(self, memo):
         return MemoryTagsSource(copy.deepcopy(self.get_tags()))
 
 class MemoryTagsSource(TagsSource):
     def __init__(self, p_tags = None):
         self._tags = None
+        self._tags_index = None
         if not (p_tags is None):
             self.set_tags(p_tags)
     def set_tags(self, p_tags):
@@ -50,6 +93,7 @@ class MemoryTagsSource(TagsSource):
 class FileTagsSource(TagsSource):
     def __init__(self, p_file_path):
         self._memory_source = None
+        self._tags_index = None
         self._tags_proxy = tags_file_reader.TagsFileReader(p_file_path)
 
     def get_tags(self, p_tag_type=None, p_from=None, p_len=None, p_func=None):
@@ -58,7 +102,7 @@ class FileTagsSource(TagsSource):
                 self._tags_proxy.get_tags(),
                 p_tag_type, p_from, p_len, p_func)
         else:
-            self._memory_source.get_tags(p_tag_type, p_from, p_len, p_func)
+            return self._memory_source.get_tags(p_tag_type, p_from, p_len, p_func)
 
     def set_tags(self, p_tags):
         if self._memory_source is None:
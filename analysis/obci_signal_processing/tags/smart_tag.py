@@ -56,6 +56,19 @@ class SmartTag(read_manager.ReadManager):
 
     def is_initialised(self):
         return self._is_initialised
+
+    def get_view(self, p_samples, p_params, p_tags):
+        """Return a new, initialised smart tag of the same definition and
+        start tag, with p_samples (not copied) as its data."""
+        st = self._new_smart_tag()
+        st.data_source.set_samples(p_samples, False)
+        st.info_source.set_params(p_params)
+        st.tags_source.set_tags(p_tags)
+        st.set_initialised()
+        return st
+
+    def _new_smart_tag(self):
+        return self.__class__(self._tag_def, self._start_tag)
     
     def __getitem__(self, p_key):
         if p_key == 'start_timestamp':
@@ -99,6 +112,11 @@ class SmartTagEndTag(SmartTag):
     def get_end_tag(self):
         return self._end_tag
 
+    def _new_smart_tag(self):
+        st = super(SmartTagEndTag, self)._new_smart_tag()
+        st.set_end_tag(self._end_tag)
+        return st
+
 class SmartTagDuration(SmartTag):
     """Public interface:
     - get_data() <- this is the only method to be really used outside
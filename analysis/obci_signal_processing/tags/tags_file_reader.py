@@ -23,27 +23,131 @@
 #
 
 """Module provides a simple class that is able to read tags xml file and 
-give on demand subsequential tags."""
+give on demand subsequential tags.
 
-import xml.dom.minidom
-from Queue import Queue
+The xml file is parsed incrementally (see iter_tags). Tags read from a file
+are cached in a sidecar columnar index (tags file path + INDEX_SUFFIX),
+which is used instead of the xml file as long as the xml file is unchanged."""
+
+import os
+import operator
+import numpy
+try:
+    import xml.etree.cElementTree as ElementTree
+except ImportError:
+    import xml.etree.ElementTree as ElementTree
 import tag_utils
 import tags_logging as logger
 LOGGER = logger.get_logger('tags_file_reader')
 
+INDEX_SUFFIX = '.idx.npz'
+INDEX_VERSION = 1
+# Don`t bother writing an index for files with less tags
+INDEX_MIN_TAGS = 1000
+TAG_ATTRIBUTES = ['length', 'name', 'position', 'channelNumber']
+
+
+def iter_tags(p_tags_file):
+    """Yield subsequent tags (as dictionaries, see tag_utils.unpack_tag_from_dict)
+    from p_tags_file - xml tags file path or file object.
+    Parsed elements are cleared, so that memory usage doesn`t depend
+    on the number of tags."""
+    l_root = None
+    for i_event, i_elem in ElementTree.iterparse(p_tags_file, events=('start', 'end')):
+        if i_event == 'start':
+            if l_root is None:
+                l_root = i_elem
+            continue
+        if i_elem.tag != 'tag':
+            continue
+        l_raw_tag = {}
+        for i_key in TAG_ATTRIBUTES:
+            l_raw_tag[i_key] = i_elem.get(i_key, '')
+        for i_node in i_elem:
+            if i_node.text is not None:
+                l_raw_tag[i_node.tag] = i_node.text
+        yield tag_utils.unpack_tag_from_dict(l_raw_tag)
+        i_elem.clear()
+        l_root.clear()
+
+
+def get_index_path(p_tags_file_name):
+    return p_tags_file_name + INDEX_SUFFIX
+
+
+def write_tags_index(p_tags_file_name, p_tags):
+    """Write sorted p_tags read from p_tags_file_name to the sidecar index:
+    start and end timestamps, names, channels and every desc key
+    stored as separate arrays."""
+    l_stat = os.stat(p_tags_file_name)
+    l_desc_keys = sorted(set(i_key for i_tag in p_tags for i_key in i_tag['desc']))
+    l_columns = {
+        'version': numpy.array(INDEX_VERSION),
+        'source': numpy.array([l_stat.st_size, l_stat.st_mtime]),
+        'start_timestamp': numpy.array([t['start_timestamp'] for t in p_tags], dtype=float),
+        'end_timestamp': numpy.array([t['end_timestamp'] for t in p_tags], dtype=float),
+        'name': numpy.array([unicode(t['name']) for t in p_tags], dtype=unicode),
+        'channels': numpy.array([unicode(t['channels']) for t in p_tags], dtype=unicode),
+        'desc_keys': numpy.array(l_desc_keys, dtype=unicode)
+        }
+    for i, i_key in enumerate(l_desc_keys):
+        l_columns['desc_mask_%d' % i] = numpy.array([i_key in t['desc'] for t in p_tags], dtype=bool)
+        l_columns['desc_%d' % i] = numpy.array(
+            [unicode(t['desc'].get(i_key, u'')) for t in p_tags], dtype=unicode)
+
+    l_path = get_index_path(p_tags_file_name)
+    l_tmp_path = l_path + '.tmp'
+    with open(l_tmp_path, 'wb') as f:
+        numpy.savez(f, **l_columns)
+    os.rename(l_tmp_path, l_path)
+    return l_path
+
+
+def read_tags_index(p_tags_file_name):
+    """Return sorted tags from p_tags_file_name`s sidecar index or
+    None if there is no index or the tags file was modified since
+    the index was written."""
+    l_path = get_index_path(p_tags_file_name)
+    if not os.path.exists(l_path):
+        return None
+    l_stat = os.stat(p_tags_file_name)
+    l_index = numpy.load(l_path)
+    try:
+        if (int(l_index['version']) != INDEX_VERSION or
+            list(l_index['source']) != [l_stat.st_size, l_stat.st_mtime]):
+            LOGGER.info("Tags index is out of date, ignore it.")
+            return None
+        l_descs = [{} for i in range(len(l_index['start_timestamp']))]
+        for i, i_key in enumerate(l_index['desc_keys'].tolist()):
+            for i_desc, i_present, i_value in zip(l_descs,
+                                                  l_index['desc_mask_%d' % i].tolist(),
+                                                  l_index['desc_%d' % i].tolist()):
+                if i_present:
+                    i_desc[i_key] = i_value
+        return [{'start_timestamp': i_start, 'end_timestamp': i_end,
+                 'name': i_name, 'channels': i_channels, 'desc': i_desc}
+                for i_start, i_end, i_name, i_channels, i_desc in zip(
+                l_index['start_timestamp'].tolist(), l_index['end_timestamp'].tolist(),
+                l_index['name'].tolist(), l_index['channels'].tolist(), l_descs)]
+    finally:
+        l_index.close()
+
 
 class TagsFileReader(object):
     """A simple class that is able to read tags xml file and 
     give on demand subsequential tags."""
 
-    def __init__(self, p_tags_file_name):
+    def __init__(self, p_tags_file_name, p_use_index=True):
         """Init tags file path."""
         self._tags_file_name = p_tags_file_name
+        self._use_index = p_use_index
         self._tags = []
         self.start_tags_reading()
 
     def start_tags_reading(self):
         """Read tags file, store data in memory."""
+        if self._use_index and self._read_index():
+            return
         try:
             l_tags_file = open(self._tags_file_name, 'rt')
         except IOError:
@@ -52,10 +156,14 @@ class TagsFileReader(object):
             try:
             #Analyse xml info file, get what we want and close the file.
                 self._parse_tags_file(l_tags_file)
-            except xml.parsers.expat.ExpatError:
+            except SyntaxError:
+                # ElementTree.ParseError
                 LOGGER.error("An error occured while parsing tags xml file.")
+                return
             finally:
                 l_tags_file.close()
+            if self._use_index and len(self._tags) >= INDEX_MIN_TAGS:
+                self._write_index()
 
     def get_tags(self):
         """Return next tag or None if all tags were alredy returned by
@@ -64,34 +172,33 @@ class TagsFileReader(object):
 
     def _parse_tags_file(self, p_tags_file):
         """Parse p_tags_file xml tags file and store it in memory."""
-        l_tags_doc = xml.dom.minidom.parse(p_tags_file)
-        l_xml_root_element = l_tags_doc.getElementsByTagName("tags")[0]
-
-        for i_tag_node in l_xml_root_element.getElementsByTagName("tag"):
-             #Iterate over <tag> tags
-            l_raw_tag = {}
-            for i_key in ['length', 'name', 'position', 'channelNumber']:
-                l_raw_tag[i_key] = i_tag_node.getAttribute(i_key)
-
-            for i_node in i_tag_node.childNodes:
-                try:
-                    l_raw_tag[i_node.tagName] = i_node.firstChild.nodeValue
-                except AttributeError:
-                    pass
-            # TODO - in case tags aren`t sorted by start_timestamp, 
-            # sort them at the end of current method
-            self._tags.append(tag_utils.unpack_tag_from_dict(l_raw_tag))
-            
-
-        def cmp_tags(t1, t2):
-            ts1 = t1['start_timestamp']
-            ts2 = t2['start_timestamp']
-            if ts1 == ts2:
-                return 0
-            elif ts1 > ts2:
-                return 1
-            else:
-                return -1
-
-
-        self._tags.sort(cmp_tags)
+        l_tags = []
+        l_sorted = True
+        l_last_ts = None
+        for i_tag in iter_tags(p_tags_file):
+            l_ts = i_tag['start_timestamp']
+            if l_last_ts is not None and l_ts < l_last_ts:
+                l_sorted = False
+            l_last_ts = l_ts
+            l_tags.append(i_tag)
+
+        if not l_sorted:
+            l_tags.sort(key=operator.itemgetter('start_timestamp'))
+        self._tags = l_tags
+
+    def _read_index(self):
+        try:
+            l_tags = read_tags_index(self._tags_file_name)
+        except Exception, e:
+            LOGGER.info("Couldn`t read tags index: "+str(e))
+            return False
+        if l_tags is None:
+            return False
+        self._tags = l_tags
+        return True
+
+    def _write_index(self):
+        try:
+            write_tags_index(self._tags_file_name, self._tags)
+        except Exception, e:
+            LOGGER.info("Couldn`t write tags index: "+str(e))
@@ -0,0 +1,45 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""Measure time of reading a raw signal file with FileDataSource:
+whole data set, a number of short segments and a single channel.
+
+Usage: python benchmark_read_data_source.py [seconds] [channels] [sampling]
+"""
+
+import sys, os, time, tempfile
+import numpy
+
+from obci.analysis.obci_signal_processing.signal import read_data_source
+
+SEGMENTS = 100
+SEGMENT_LEN = 256
+
+def measure(func):
+    """Return time (in ms) of func()."""
+    start = time.time()
+    func()
+    return (time.time() - start)*1000
+
+def run(seconds=600, channels=32, sampling=512):
+    f = tempfile.mktemp('.obci.raw')
+    numpy.random.randn(seconds*sampling, channels).astype('<f4').tofile(f)
+    samples = seconds*sampling
+    starts = numpy.random.randint(0, samples - SEGMENT_LEN, SEGMENTS)
+    print("File of "+str(seconds)+"s, "+str(channels)+" channels, "+
+          str(sampling)+" Hz ("+str(os.path.getsize(f)/1024/1024)+" MB)")
+    try:
+        print("open + whole data set    %10.2f ms" % measure(
+                lambda: read_data_source.FileDataSource(f, channels, 'FLOAT').get_samples()))
+        src = read_data_source.FileDataSource(f, channels, 'FLOAT')
+        print("%d segments of %d samples %8.2f ms" % (SEGMENTS, SEGMENT_LEN, measure(
+                lambda: [src.get_samples(int(i), SEGMENT_LEN).mean() for i in starts])))
+        print("single channel mean      %10.2f ms" % measure(
+                lambda: src.get_samples()[channels//2].mean()))
+        print("DataReadProxy.get_all_values %6.2f ms" % measure(
+                lambda: src._data_proxy.get_all_values(channels)))
+    finally:
+        os.remove(f)
+
+if __name__ == '__main__':
+    args = [int(a) for a in sys.argv[1:4]]
+    run(*args)
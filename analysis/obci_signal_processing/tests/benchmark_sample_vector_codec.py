@@ -0,0 +1,71 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""Compare decoding/encoding one second of signal with protobuf loops
+and with sample_vector_codec, for 128/512/2048 Hz and 8/32/128 channels.
+
+Usage: python benchmark_sample_vector_codec.py [samples_per_packet] [repeats]
+"""
+
+import sys, time
+import numpy
+
+from obci.configs import variables_pb2
+from obci.analysis.obci_signal_processing.signal import sample_vector_codec
+
+SAMPLINGS = [128, 512, 2048]
+CHANNELS = [8, 32, 128]
+
+def get_sample_vector(channels, per):
+    vect = variables_pb2.SampleVector()
+    for i in range(per):
+        s = vect.samples.add()
+        s.channels.extend(list(numpy.random.randn(channels)))
+        s.timestamp = time.time()
+    return vect
+
+def protobuf_decode(msg):
+    vect = variables_pb2.SampleVector()
+    vect.ParseFromString(msg)
+    return [[ch for ch in s.channels] for s in vect.samples], \
+        [s.timestamp for s in vect.samples]
+
+def protobuf_encode(samples, timestamps):
+    vect = variables_pb2.SampleVector()
+    for i in range(samples.shape[1]):
+        s = vect.samples.add()
+        s.channels.extend(samples[:, i].tolist())
+        s.timestamp = timestamps[i]
+    return vect.SerializeToString()
+
+def measure(func, args, packets, repeats):
+    """Return time (in ms) needed to process packets packets."""
+    best = None
+    for r in range(repeats):
+        start = time.time()
+        for i in xrange(packets):
+            func(*args)
+        t = (time.time() - start)*1000
+        if best is None or t < best:
+            best = t
+    return best
+
+def run(per=16, repeats=3):
+    print("Time (ms) needed to handle 1s of signal, "+str(per)+" samples per packet")
+    print("sampling channels | pb decode | codec decode | pb encode | codec encode | dense")
+    for sampling in SAMPLINGS:
+        for channels in CHANNELS:
+            msg = get_sample_vector(channels, per).SerializeToString()
+            samples, timestamps = sample_vector_codec.decode(msg)
+            packets = sampling/per
+            res = [
+                measure(protobuf_decode, (msg,), packets, repeats),
+                measure(sample_vector_codec.decode, (msg,), packets, repeats),
+                measure(protobuf_encode, (samples, timestamps), packets, repeats),
+                measure(sample_vector_codec.encode, (samples, timestamps), packets, repeats),
+                measure(sample_vector_codec.to_dense, (msg,), packets, repeats)]
+            print("%8d %8d | %9.2f | %12.2f | %9.2f | %12.2f | %5.2f" %
+                  tuple([sampling, channels] + res))
+
+if __name__ == '__main__':
+    args = [int(a) for a in sys.argv[1:3]]
+    run(*args)
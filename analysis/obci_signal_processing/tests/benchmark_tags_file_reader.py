@@ -0,0 +1,88 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""Compare time and peak memory (max RSS) of reading a generated tags file
+with the old minidom-based parser, the streaming TagsFileReader
+and TagsFileReader using the sidecar index.
+Every reader is run in a separate (forked) process, so that
+max RSS values are not affected by each other.
+
+Usage: python benchmark_tags_file_reader.py [number_of_tags]
+"""
+
+import sys, os, time, tempfile, resource, pickle
+import xml.dom.minidom
+
+from obci.analysis.obci_signal_processing.tags import tags_file_writer
+from obci.analysis.obci_signal_processing.tags import tags_file_reader
+from obci.analysis.obci_signal_processing.tags import tag_utils
+
+def write_tags(path, number_of_tags):
+    px = tags_file_writer.TagsFileWriter(path)
+    for i in xrange(number_of_tags):
+        # diode tags are (almost) sorted, blinks are shifted a bit
+        ts = 1000.0 + i*0.1 + (0.25 if i % 10 == 0 else 0.0)
+        px.tag_received({'start_timestamp': ts, 'end_timestamp': ts + 0.05,
+                         'name': 'blink' if i % 10 == 0 else 'diode', 'channels': '',
+                         'desc': {'index': i, 'value': i % 8}})
+    px.finish_saving(1000.0)
+
+def minidom_read(path):
+    """Tags file reading as done by TagsFileReader before streaming parser."""
+    tags = []
+    root = xml.dom.minidom.parse(path).getElementsByTagName("tags")[0]
+    for node in root.getElementsByTagName("tag"):
+        raw = {}
+        for key in ['length', 'name', 'position', 'channelNumber']:
+            raw[key] = node.getAttribute(key)
+        for child in node.childNodes:
+            try:
+                raw[child.tagName] = child.firstChild.nodeValue
+            except AttributeError:
+                pass
+        tags.append(tag_utils.unpack_tag_from_dict(raw))
+    tags.sort(lambda t1, t2: cmp(t1['start_timestamp'], t2['start_timestamp']))
+    return tags
+
+def measure(func, path):
+    """Run func(path) in a child process, return (time in ms, max RSS in MB)."""
+    r, w = os.pipe()
+    pid = os.fork()
+    if pid == 0:
+        os.close(r)
+        start = time.time()
+        func(path)
+        t = (time.time() - start)*1000
+        rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss/1024.0
+        os.write(w, pickle.dumps((t, rss)))
+        os._exit(0)
+    os.close(w)
+    data = os.read(r, 1024)
+    os.close(r)
+    os.waitpid(pid, 0)
+    return pickle.loads(data)
+
+def run(number_of_tags=100000):
+    path = tempfile.mktemp('.obci.tag')
+    # write the file (and the index) in child processes, so that writer`s
+    # memory is not inherited by measured readers
+    measure(lambda p: write_tags(p, number_of_tags), path)
+    print(str(number_of_tags)+" tags, file size "+
+          str(os.path.getsize(path)/1024)+" KB")
+    print("reader            | time (ms) | max RSS (MB)")
+    try:
+        print("baseline process  | %9.2f | %12.2f" % measure(lambda p: None, path))
+        print("minidom           | %9.2f | %12.2f" % measure(minidom_read, path))
+        print("streaming         | %9.2f | %12.2f" % measure(
+                lambda p: tags_file_reader.TagsFileReader(p, False).get_tags(), path))
+        # first read with index enabled writes the index
+        measure(tags_file_reader.TagsFileReader, path)
+        print("sidecar index     | %9.2f | %12.2f" % measure(
+                lambda p: tags_file_reader.TagsFileReader(p).get_tags(), path))
+    finally:
+        os.remove(path)
+        if os.path.exists(tags_file_reader.get_index_path(path)):
+            os.remove(tags_file_reader.get_index_path(path))
+
+if __name__ == '__main__':
+    args = [int(a) for a in sys.argv[1:2]]
+    run(*args)
@@ -0,0 +1,34 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""Compare time of epoching-like tags queries (one time window query
+per tag) with linear filtering and with TagsSource`s index,
+on a synthetic oddball session.
+
+Usage: python benchmark_tags_index.py [number_of_tags]
+"""
+
+import sys, time
+
+from obci.analysis.obci_signal_processing.tags import read_tags_source
+from test_tags_index import get_oddball_tags, linear_filter
+
+def run(number_of_tags=50000):
+    tags = get_oddball_tags(number_of_tags)
+    targets = [t for t in tags if t['name'] == 'target']
+    print(str(number_of_tags)+" tags, window query for every one of "+
+          str(len(targets))+" targets")
+
+    start = time.time()
+    for t in targets:
+        linear_filter(tags, None, t['start_timestamp'] - 0.2, 1.2)
+    print("linear  %10.2f ms" % ((time.time() - start)*1000))
+
+    s = read_tags_source.MemoryTagsSource(tags)
+    start = time.time()
+    for t in targets:
+        s.get_tags(None, t['start_timestamp'] - 0.2, 1.2)
+    print("indexed %10.2f ms (including index building)" % ((time.time() - start)*1000))
+
+if __name__ == '__main__':
+    args = [int(a) for a in sys.argv[1:2]]
+    run(*args)
@@ -0,0 +1,98 @@
+# -*- coding: utf-8 -*-
+#!/usr/bin/env python
+#
+
+"""
+>>> from obci.analysis.obci_signal_processing.signal import data_write_proxy
+
+>>> import os, time, numpy
+
+>>> packets = [get_sample_vector(i, 7, 3) for i in range(100)]
+
+>>> for append_ts in [False, True]:
+...     for sample_type in ['FLOAT', 'DOUBLE']:
+...         px1 = data_write_proxy.get_proxy('./tescik1.obci.raw', append_ts, False, False, sample_type)
+...         px2 = data_write_proxy.get_proxy('./tescik2.obci.raw', append_ts, False, False, sample_type, True)
+...         px2._chunk_samples = 16
+...         for p in packets: px1.data_received(p); px2.data_received(p)
+...         f1 = px1.finish_saving()
+...         f2 = px2.finish_saving()
+...         print(f2[1], open(f1[0]).read() == open(f2[0]).read())
+(700, True)
+(700, True)
+(700, True)
+(700, True)
+
+>>> d = numpy.fromfile('./tescik2.obci.raw', 'float64').reshape(-1, 4)
+
+>>> d[15]
+array([ 3.,  4.,  5.,  2.])
+
+>>> px = data_write_proxy.get_proxy('./tescik2.obci.raw', False, False, False, 'FLOAT', True)
+
+>>> px._chunk_samples = 10
+
+>>> for p in packets: px.data_received(p)
+
+>>> px.finish_saving()[1]
+700
+
+>>> px.get_stats()['chunks_written']
+70
+
+>>> px.queue_high_water_mark > 0
+True
+
+>>> px = data_write_proxy.get_proxy('./tescik2.obci.raw', False, False, False, 'FLOAT', True)
+
+>>> px.data_received(packets[0])
+
+>>> px.data_received(get_sample_vector(0, 7, 4))
+Traceback (most recent call last):
+...
+BadSampleFormat: Error! Received data sample is not of 'float' type! Writing to file aborted!
+
+>>> nic = px.finish_saving()
+
+If writing fails, finish_saving returns the number of samples written
+before the error:
+
+>>> px = data_write_proxy.get_proxy('./tescik2.obci.raw', False, False, False, 'FLOAT', True)
+
+>>> px._chunk_samples = 70
+
+>>> for p in packets[:20]: px.data_received(p)
+
+>>> while px.chunks_written < 2: time.sleep(0.01)
+
+>>> px._file.close(); px._file = open('./tescik2.obci.raw', 'rb')
+
+>>> for p in packets[20:]: px.data_received(p)
+
+>>> px.finish_saving()[1]
+140
+
+>>> os.remove('./tescik1.obci.raw')
+
+>>> os.remove('./tescik2.obci.raw')
+
+"""
+
+from obci.configs import variables_pb2
+
+def get_sample_vector(ind, per, ch):
+    vect = variables_pb2.SampleVector()
+    for i in range(per):
+        s = vect.samples.add()
+        s.channels.extend([float(ind+i+j) for j in range(ch)])
+        s.timestamp = float(ind)
+    return vect.SerializeToString()
+
+def run():
+    import doctest, sys
+    res = doctest.testmod(sys.modules[__name__])
+    if res.failed == 0:
+        print("All tests succeeded!")
+
+if __name__ == '__main__':
+    run()
@@ -0,0 +1,105 @@
+# -*- coding: utf-8 -*-
+#!/usr/bin/env python
+#
+
+"""
+>>> from obci.analysis.obci_signal_processing.signal import read_data_source as s
+
+>>> import os, numpy
+
+>>> f = './tescik_memmap.obci.raw'
+
+>>> numpy.arange(30, dtype='<f4').tofile(f)
+
+>>> py = s.FileDataSource(f, 3, 'FLOAT')
+
+Partial data and single channels are read-only views of the mapped
+file, with the file`s sample type:
+
+>>> d = py.get_samples(2, 3)
+
+>>> d
+array([[  6.,   9.,  12.],
+       [  7.,  10.,  13.],
+       [  8.,  11.,  14.]], dtype=float32)
+
+>>> numpy.may_share_memory(d, py.get_samples())
+True
+
+>>> py.get_channels_samples(1)
+array([  1.,   4.,   7.,  10.,  13.,  16.,  19.,  22.,  25.,  28.], dtype=float32)
+
+>>> py.get_channels_samples([0, 2], 8, 2)
+array([[ 24.,  27.],
+       [ 26.,  29.]], dtype=float32)
+
+>>> py.get_samples(8, 3)
+Traceback (most recent call last):
+...
+NoNextValue
+
+>>> [list(samp) for samp in py.iter_samples()][-1]
+[27.0, 28.0, 29.0]
+
+Nothing can be modified in place, neither the data source nor the file:
+
+>>> d -= 1000 # doctest: +IGNORE_EXCEPTION_DETAIL
+Traceback (most recent call last):
+...
+ValueError: output array is read-only
+
+>>> py.get_channels_samples([0, 1])[0, 0] = 100.0 # doctest: +IGNORE_EXCEPTION_DETAIL
+Traceback (most recent call last):
+...
+ValueError: assignment destination is read-only
+
+>>> c = numpy.array(d, dtype=numpy.float64)
+
+>>> c -= 1000
+
+>>> c[0], py.get_samples(2, 1)[:, 0]
+(array([-994., -991., -988.]), array([ 6.,  7.,  8.], dtype=float32))
+
+load_samples reads the file to memory once, then samples can be modified:
+
+>>> py.load_samples()
+
+>>> py.get_samples().dtype
+dtype('float64')
+
+>>> py.get_samples()[0, 0] = 100.0
+
+>>> py.get_samples()[0, 0], numpy.fromfile(f, '<f4')[0]
+(100.0, 0.0)
+
+Samples set in memory are used instead of the file:
+
+>>> py.set_samples(numpy.ones((3, 2)), True)
+
+>>> py.get_channels_samples(2), [list(samp) for samp in py.iter_samples()]
+(array([ 1.,  1.]), [[1.0, 1.0, 1.0], [1.0, 1.0, 1.0]])
+
+Incomplete last sample is ignored, empty file gives empty data set:
+
+>>> numpy.arange(31, dtype='<f8').tofile(f)
+
+>>> s.FileDataSource(f, 3).get_samples().shape
+(3, 10)
+
+>>> open(f, 'wb').close()
+
+>>> s.FileDataSource(f, 3).get_samples().shape
+(3, 0)
+
+>>> os.remove(f)
+
+"""
+
+def run():
+    import doctest, sys
+    res = doctest.testmod(sys.modules[__name__])
+    if res.failed == 0:
+        print("All tests succeeded!")
+
+if __name__ == '__main__':
+    run()
@@ -0,0 +1,88 @@
+# -*- coding: utf-8 -*-
+#!/usr/bin/env python
+#
+
+"""
+>>> from obci.analysis.obci_signal_processing.signal import sample_vector_codec as C
+
+>>> msg = get_sample_vector(4, 3).SerializeToString()
+
+>>> samples, ts = C.decode(msg)
+
+>>> samples
+array([[   0.,    1.,    2.,    3.],
+       [  10.,   11.,   12.,   13.],
+       [ 100.,  101.,  102.,  103.]], dtype=float32)
+
+>>> ts
+array([ 10.5,  11.5,  12.5,  13.5])
+
+>>> C.encode(samples, ts) == msg
+True
+
+>>> all(check_roundtrip(per, ch) for per in [1, 5, 32] for ch in [0, 1, 23, 24, 32, 128])
+True
+
+>>> s, t = C.decode_dense(C.to_dense(msg))
+
+>>> numpy.array_equal(s, samples), numpy.array_equal(t, ts)
+(True, True)
+
+>>> C.decode('')[0].shape
+(0, 0)
+
+>>> C.decode(C.encode(samples[:, :0], ts[:0]))[0].shape
+(0, 0)
+
+Messages with packed channels do not match the fast layout
+and are decoded by protobuf fallback:
+
+>>> C.decode(get_packed_sample_vector([[1.0, 2.0], [3.0, 4.0]], [5.0, 6.0]))
+(array([[ 1.,  3.],
+       [ 2.,  4.]], dtype=float32), array([ 5.,  6.]))
+
+"""
+
+import numpy
+from obci.configs import variables_pb2
+
+def get_sample_vector(per, ch):
+    vect = variables_pb2.SampleVector()
+    for i in range(per):
+        s = vect.samples.add()
+        s.channels.extend([float(i + 10**j) if j else float(i) for j in range(ch)])
+        s.timestamp = 10.5 + i
+    return vect
+
+def get_packed_sample_vector(samples, timestamps):
+    import struct
+    msg = []
+    for sample, ts in zip(samples, timestamps):
+        channels = struct.pack('<'+'f'*len(sample), *sample)
+        s = '\x09' + struct.pack('<d', ts) + '\x12' + chr(len(channels)) + channels
+        msg.append('\x0a' + chr(len(s)) + s)
+    return ''.join(msg)
+
+def check_roundtrip(per, ch):
+    vect = variables_pb2.SampleVector()
+    for i in range(per):
+        s = vect.samples.add()
+        s.channels.extend(list(numpy.random.randn(ch)))
+        s.timestamp = 1234567890.123 + i
+    msg = vect.SerializeToString()
+    from obci.analysis.obci_signal_processing.signal import sample_vector_codec
+    samples, ts = sample_vector_codec.decode(msg)
+    generic, generic_ts = sample_vector_codec._decode_generic(msg)
+    return (samples.shape == (ch, per) and
+            numpy.array_equal(samples, generic) and
+            numpy.array_equal(ts, generic_ts) and
+            sample_vector_codec.encode(samples, ts) == msg)
+
+def run():
+    import doctest, sys
+    res = doctest.testmod(sys.modules[__name__])
+    if res.failed == 0:
+        print("All tests succeeded!")
+
+if __name__ == '__main__':
+    run()
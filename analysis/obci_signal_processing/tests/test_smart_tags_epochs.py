@@ -0,0 +1,108 @@
+# -*- coding: utf-8 -*-
+#!/usr/bin/env python
+#
+
+"""
+>>> from obci.analysis.obci_signal_processing import smart_tags_manager as mgr
+
+>>> from obci.analysis.obci_signal_processing.tags import smart_tag_definition as df
+
+>>> import os, numpy
+
+>>> rm = get_read_manager('./tescik_epochs.obci.raw')
+
+>>> d = df.SmartTagDurationDefinition(start_tag_name='target', start_offset=-0.1, end_offset=0, duration=0.4)
+
+>>> m = mgr.SmartTagsManager(d, None, None, None, rm)
+
+>>> epochs, meta = m.get_epochs_array()
+
+>>> epochs.shape
+(3, 4, 64)
+
+>>> meta['names'], meta['start_samples'], meta['indices']
+(['target', 'target', 'target'], array([115, 371, 627]), array([0, 1, 2]))
+
+>>> meta['desc'][1]
+{'i': 1}
+
+>>> sts = list(m.iter_smart_tags())
+
+>>> all(numpy.array_equal(e, st.get_samples()) for e, st in zip(epochs, sts))
+True
+
+Only the epochs are read from the data source:
+
+>>> reads = []
+
+>>> get_samples = rm.data_source.get_samples
+
+>>> rm.data_source.get_samples = lambda p_from=None, p_len=None: reads.append((p_from, p_len)) or get_samples(p_from, p_len)
+
+>>> m.get_epochs_array()[0].shape, reads
+((3, 4, 64), [(115, 64), (371, 64), (627, 64)])
+
+>>> del rm.data_source.get_samples
+
+No epoch fits in data:
+
+>>> m.get_epochs_array(None, 2000)[0].shape
+(0, 4, 2000)
+
+Epochs not fitting data are skipped, other definitions may be given:
+
+>>> d2 = df.SmartTagDurationDefinition(start_tag_name='nontarget', start_offset=0, end_offset=0, duration=1.0)
+
+>>> epochs, meta = m.get_epochs_array([d, d2], 128)
+
+>>> epochs.shape, meta['names']
+((6, 4, 128), ['nontarget', 'target', 'nontarget', 'target', 'nontarget', 'target'])
+
+>>> epochs[0, 0, :3], epochs[5, 3, :3]
+(array([ 0.,  4.,  8.]), array([ 2511.,  2515.,  2519.]))
+
+Smart tags are views of the epochs array:
+
+>>> sts = m.get_epochs_smart_tags()
+
+>>> len(sts), sts[0].get_samples().shape, sts[0].get_samples().base is not None
+(3, (4, 64), True)
+
+>>> sts[2].get_param('number_of_samples'), sts[2].get_start_tag()['desc']
+(256, {'i': 2})
+
+>>> [t['name'] for t in sts[1].get_tags()]
+['target']
+
+>>> os.remove('./tescik_epochs.obci.raw')
+
+"""
+
+def get_read_manager(path, channels=4, samples=1000):
+    import numpy
+    from obci.analysis.obci_signal_processing import read_manager
+    from obci.analysis.obci_signal_processing.signal import read_info_source
+    from obci.analysis.obci_signal_processing.signal import read_data_source
+    from obci.analysis.obci_signal_processing.tags import read_tags_source
+    numpy.arange(channels*samples, dtype='<f8').tofile(path)
+    info = read_info_source.MemoryInfoSource({
+            'number_of_channels': channels,
+            'sampling_frequency': '128.0',
+            'channels_names': [str(i) for i in range(channels)],
+            'first_sample_timestamp': 0.0})
+    tags = []
+    for i in range(3):
+        for name, ts in [('nontarget', 2.0*i), ('target', 2.0*i + 1.0)]:
+            tags.append({'start_timestamp': ts, 'end_timestamp': ts + 0.1, 'name': name,
+                         'channels': '', 'desc': {'i': i}})
+    return read_manager.ReadManager(info, read_data_source.FileDataSource(path, channels),
+                                    read_tags_source.MemoryTagsSource(tags))
+
+def run():
+    import doctest, sys
+    res = doctest.testmod(sys.modules[__name__])
+    if res.failed == 0:
+        print("All tests succeeded!")
+
+if __name__ == '__main__':
+    run()
@@ -0,0 +1,77 @@
+# -*- coding: utf-8 -*-
+#!/usr/bin/env python
+#
+
+"""
+>>> from obci.analysis.obci_signal_processing.tags import tags_file_writer as p
+
+>>> from obci.analysis.obci_signal_processing.tags import tags_file_reader as t
+
+>>> import os
+
+>>> write_tags('./tescik_index.obci.tag', [3, 1, 2])
+
+>>> [int(g['start_timestamp']) for g in t.iter_tags('./tescik_index.obci.tag')]
+[3, 1, 2]
+
+>>> [int(g['start_timestamp']) for g in t.TagsFileReader('./tescik_index.obci.tag').get_tags()]
+[1, 2, 3]
+
+Small files are not indexed:
+
+>>> os.path.exists(t.get_index_path('./tescik_index.obci.tag'))
+False
+
+>>> write_tags('./tescik_index.obci.tag', range(t.INDEX_MIN_TAGS, 0, -1))
+
+>>> tags = t.TagsFileReader('./tescik_index.obci.tag').get_tags()
+
+>>> os.path.exists(t.get_index_path('./tescik_index.obci.tag'))
+True
+
+>>> indexed = t.TagsFileReader('./tescik_index.obci.tag').get_tags()
+
+>>> indexed == tags
+True
+
+>>> indexed[0]['start_timestamp'], indexed[-1]['start_timestamp']
+(1.0, 1000.0)
+
+>>> indexed[4]['desc'] == {u'x': u'5', u'y': u'Q'} and indexed[5]['desc'] == {u'x': u'6'}
+True
+
+The index is ignored as soon as the tags file changes:
+
+>>> write_tags('./tescik_index.obci.tag', [7, 5])
+
+>>> [int(g['start_timestamp']) for g in t.TagsFileReader('./tescik_index.obci.tag').get_tags()]
+[5, 7]
+
+>>> os.system('rm tescik_index*')
+0
+
+"""
+
+def write_tags(path, timestamps):
+    from obci.analysis.obci_signal_processing.tags import tags_file_writer
+    import os
+    px = tags_file_writer.TagsFileWriter(path)
+    for ts in timestamps:
+        desc = {'x': ts}
+        if ts % 5 == 0:
+            desc['y'] = 'Q'
+        px.tag_received({'start_timestamp': 1000.0+ts, 'end_timestamp': 1000.5+ts,
+                         'name': 'nic', 'channels': '', 'desc': desc})
+    px.finish_saving(1000.0)
+    # make sure modification time changes
+    st = os.stat(path)
+    os.utime(path, (st.st_atime, st.st_mtime + len(timestamps)))
+
+def run():
+    import doctest, sys
+    res = doctest.testmod(sys.modules[__name__])
+    if res.failed == 0:
+        print("All tests succeeded!")
+
+if __name__ == '__main__':
+    run()
@@ -0,0 +1,95 @@
+# -*- coding: utf-8 -*-
+#!/usr/bin/env python
+#
+
+"""
+Indexed tags queries must give the same results as linear filtering.
+
+>>> from obci.analysis.obci_signal_processing.tags import read_tags_source
+
+>>> tags = get_oddball_tags(50000)
+
+>>> s = read_tags_source.MemoryTagsSource(tags)
+
+>>> len(s.get_tags('target')), len(s.get_tags('nontarget')), len(s.get_tags('nic'))
+(10000, 40000, 0)
+
+>>> all(s.get_tags(name, start, length) == linear_filter(tags, name, start, length)
+...     for name, start, length in get_queries(tags))
+True
+
+Window end is inclusive:
+
+>>> [t['start_timestamp'] for t in s.get_tags(None, 1001.0, 0.5)]
+[1001.0, 1001.25, 1001.5]
+
+Order of not sorted tags is preserved:
+
+>>> import random
+
+>>> random.seed(1)
+
+>>> random.shuffle(tags)
+
+>>> s = read_tags_source.MemoryTagsSource(tags)
+
+>>> all(s.get_tags(name, start, length) == linear_filter(tags, name, start, length)
+...     for name, start, length in get_queries(tags))
+True
+
+Index is rebuilt when tags change:
+
+>>> s.get_tags(None, 999.0, 0.5)
+[]
+
+>>> tags.append({'start_timestamp': 999.5, 'end_timestamp': 1000.0, 'name': 'target', 'channels': '', 'desc': {}})
+
+>>> s.get_tags('target', 999.0, 0.5)[0]['start_timestamp']
+999.5
+
+"""
+
+import random
+
+def get_oddball_tags(number_of_tags):
+    """Return tags of an oddball session - every 0.25s a 'target' (20%)
+    or 'nontarget' stimulus."""
+    rand = random.Random(0)
+    tags = []
+    for i in range(number_of_tags):
+        ts = 1000.0 + i*0.25
+        name = 'target' if i % 5 == 2 else 'nontarget'
+        tags.append({'start_timestamp': ts, 'end_timestamp': ts + 0.1, 'name': name,
+                     'channels': '', 'desc': {'index': str(rand.randint(0, 7))}})
+    return tags
+
+def get_queries(tags, number_of_queries=300):
+    rand = random.Random(1)
+    start, end = tags[0]['start_timestamp'], tags[-1]['start_timestamp']
+    queries = []
+    for i in range(number_of_queries):
+        name = rand.choice([None, 'target', 'nontarget', 'nic'])
+        if rand.random() < 0.5:
+            # window bounds exactly at tags timestamps
+            tag = rand.choice(tags)
+            queries.append((name, tag['start_timestamp'], rand.choice([0.0, 0.25, 1.0, 10.0])))
+        else:
+            queries.append((name, rand.uniform(start - 10, end + 10), rand.uniform(0, 50)))
+    return queries + [(name, None, None) for name in [None, 'target']]
+
+def linear_filter(tags, name, start, length):
+    """Tags filtering as done before indexing."""
+    if name is not None:
+        tags = [t for t in tags if name == t['name']]
+    if start is not None:
+        tags = [t for t in tags if start <= t['start_timestamp'] <= start + length]
+    return tags
+
+def run():
+    import doctest, sys
+    res = doctest.testmod(sys.modules[__name__])
+    if res.failed == 0:
+        print("All tests succeeded!")
+
+if __name__ == '__main__':
+    run()
@@ -85,6 +85,7 @@ def filter(mgr, wp, ws, gpass, gstop, analog=0, ftype='ellip', output='ba', unit
     if use_filtfilt:    
         import filtfilt
         #samples_source = read_data_source.MemoryDataSource(mgr.get_samples(), False)
+        mgr.load_samples()
         for i in range(int(mgr.get_param('number_of_channels'))):
             print("FILT FILT CHANNEL "+str(i))
             mgr.get_samples()[i,:] = filtfilt.filtfilt(b, a, mgr.get_samples()[i])
@@ -104,6 +105,7 @@ def normalize(mgr, norm):
     if norm == 0:
         return mgr
     new_mgr = copy.deepcopy(mgr)
+    new_mgr.load_samples()
     for i in range(len(new_mgr.get_samples())):
         n = linalg.norm(new_mgr.get_samples()[i, :], norm)
         new_mgr.get_samples()[i, :] /= n
@@ -0,0 +1,79 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Compare cost of spectrum monitors computing rfft of last 4 seconds of
+signal (and post-processing it in python loops) on every repaint with
+spectrum peer - WelchEstimator updated with every signal packet and
+a spectrum frame encoded frame_rate times a second, decoded by monitors.
+
+Costs are given in ms of cpu time per second of signal.
+
+Usage: python benchmark_welch.py [sampling] [channels] [monitors] [seconds]
+"""
+
+import sys
+import time
+import numpy
+
+from obci.analysis.spectrum import welch, spectrum_frame
+
+PACKET = 16
+REPAINTS = 4
+
+
+def legacy_paint(d, sampling_rate):
+    """Computation done by gui/monitors/spectrum.py paintEvent before
+    spectrum peer."""
+    d2 = d[-int(sampling_rate * 4):]
+    d2 = abs(numpy.fft.rfft(d2))
+    d2[0] = 0
+    d2[1] = 0
+    j = len(d2)
+    for i in range(j):
+        if i < 5 * 4 or i > 45 * 4:
+            d2[i] = 0
+    s = 0
+    for x in range(7 * 4, 15 * 4):
+        s += d2[x]
+    m = max(d2)
+    return s, [400. * x / m for x in d2]
+
+
+def run(sampling=512, channels=16, monitors=4, seconds=30):
+    x = numpy.random.randn(channels, sampling * seconds)
+    packets = [x[:, i:i + PACKET] for i in range(0, x.shape[1], PACKET)]
+    per_repaint = len(packets) // (seconds * REPAINTS)
+
+    # legacy: a monitor gets 4 s of samples of its channel as a list
+    start = time.time()
+    for k in range(per_repaint, len(packets) + 1, per_repaint):
+        end = k * PACKET
+        for ch in range(monitors):
+            d = x[ch, max(0, end - 4 * sampling):end].tolist()
+            legacy_paint(d, sampling)
+    t_legacy = time.time() - start
+
+    e = welch.WelchEstimator(channels, sampling, 2 * sampling, sampling, 4)
+    bins = (e.freqs <= 60).nonzero()[0]
+    start = time.time()
+    for packet in packets:
+        e.add(packet)
+    t_add = time.time() - start
+    start = time.time()
+    for k in range(seconds * REPAINTS):
+        frame = spectrum_frame.encode(k, e.freqs[0], e.freqs[1], e.psd()[:, bins])
+        for ch in range(monitors):
+            timestamp, freqs, psd = spectrum_frame.decode(frame)
+            psd[ch].max()
+    t_frames = time.time() - start
+
+    print("%d channels at %d Hz, %d samples packets, %d monitors repainted %d times a second"
+          % (channels, sampling, PACKET, monitors, REPAINTS))
+    print("legacy monitors (ms/s):           %8.2f" % (t_legacy / seconds * 1e3))
+    print("spectrum peer estimator (ms/s):   %8.2f" % (t_add / seconds * 1e3))
+    print("spectrum peer frames (ms/s):      %8.2f" % (t_frames / seconds * 1e3))
+    print("frame size (bytes):               %8d" % len(frame))
+
+if __name__ == '__main__':
+    args = [int(a) for a in sys.argv[1:5]]
+    run(*args)
@@ -0,0 +1,42 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""Compact binary spectrum frames (SPECTRUM_MESSAGE payload).
+
+A frame is a '<dIIff' header (timestamp of the last sample, number of
+channels, number of bins, frequency of the first bin, frequency step)
+followed by float32 power spectral density values stored channel
+after channel.
+
+>>> import numpy
+>>> psd = numpy.arange(6, dtype=numpy.float32).reshape(2, 3)
+>>> data = encode(12.5, 1.0, 0.25, psd)
+>>> len(data)
+48
+>>> timestamp, freqs, values = decode(data)
+>>> timestamp, freqs.tolist(), values.tolist()
+(12.5, [1.0, 1.25, 1.5], [[0.0, 1.0, 2.0], [3.0, 4.0, 5.0]])
+"""
+
+import struct
+import numpy
+
+HEADER = struct.Struct('<dIIff')
+
+
+def encode(timestamp, first_freq, freq_step, psd):
+    """Return frame for psd - array of shape (channels, bins)."""
+    num_of_channels, num_of_bins = psd.shape
+    return HEADER.pack(timestamp, num_of_channels, num_of_bins,
+                       first_freq, freq_step) + \
+        numpy.ascontiguousarray(psd, dtype='<f4').tostring()
+
+
+def decode(data):
+    """Return tuple (timestamp, freqs, psd) for frame data.
+    psd is a read-only view of data."""
+    timestamp, num_of_channels, num_of_bins, first_freq, freq_step = \
+        HEADER.unpack_from(data)
+    freqs = first_freq + freq_step*numpy.arange(num_of_bins)
+    psd = numpy.frombuffer(data, dtype='<f4', count=num_of_channels*num_of_bins,
+                           offset=HEADER.size)
+    return timestamp, freqs, psd.reshape(num_of_channels, num_of_bins)
@@ -0,0 +1,90 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import sys, time
+
+from multiplexer.multiplexer_constants import peers, types
+from obci.control.peer.configured_multiplexer_server import ConfiguredMultiplexerServer
+from obci.configs import settings
+from obci.analysis.spectrum import welch, spectrum_frame
+from obci.analysis.obci_signal_processing.signal import sample_vector_codec
+
+class SpectrumPeer(ConfiguredMultiplexerServer):
+    """Keep Welch power spectral density estimate of every channel
+    (see welch.WelchEstimator), updated with every received SampleVector.
+    At most frame_rate times a second the estimate (bins from min_freq
+    to max_freq) is stored as a spectrum frame (see spectrum_frame).
+    The last frame is sent as SPECTRUM_MESSAGE in response to every
+    SPECTRUM_REQUEST_MESSAGE, so any number of monitors share one
+    estimate. A request might contain indexes of channels separated
+    with ';' - then the frame contains only those channels (a frame
+    with no channels is sent for invalid indexes)."""
+    def __init__(self, addresses):
+        super(SpectrumPeer, self).__init__(addresses=addresses,
+                                           type=peers.SPECTRUM_ANALYSIS)
+        sampling = float(self.config.get_param('sampling_rate'))
+        channels_count = len(self.config.get_param('channel_names').split(';'))
+        self._signal_type = getattr(types, self.config.get_param('mx_signal_type'))
+
+        nperseg = int(round(float(self.config.get_param('window_len'))*sampling))
+        noverlap = int(round(float(self.config.get_param('overlap'))*nperseg))
+        self.estimator = welch.WelchEstimator(
+            channels_count, sampling, nperseg, noverlap,
+            int(self.config.get_param('averages')),
+            self.config.get_param('window'))
+        freqs = self.estimator.freqs
+        self._bins = ((freqs >= float(self.config.get_param('min_freq'))) &
+                      (freqs <= float(self.config.get_param('max_freq')))).nonzero()[0]
+        if len(self._bins) == 0:
+            self.logger.error("No frequency bins between min_freq and max_freq")
+            sys.exit(1)
+        self._frame_interval = 1.0/float(self.config.get_param('frame_rate'))
+        self._next_frame = 0.0
+        self._update_frame(0.0)
+        self.logger.info("Welch segment: "+str(nperseg)+" samples, step: "+
+                         str(self.estimator.step)+", bins: "+str(len(self._bins)))
+        self.ready()
+
+    def handle_message(self, mxmsg):
+        if mxmsg.type == self._signal_type:
+            samples, timestamps = sample_vector_codec.decode(mxmsg.message)
+            if self.estimator.add(samples) > 0:
+                now = time.time()
+                if now >= self._next_frame:
+                    self._next_frame = now + self._frame_interval
+                    self._update_frame(timestamps[-1])
+            self.no_response()
+        elif mxmsg.type == types.SPECTRUM_REQUEST_MESSAGE:
+            if len(mxmsg.message) == 0:
+                frame = self._frame
+            else:
+                frame = self._channels_frame(mxmsg.message)
+            self.send_message(message=frame, to=int(mxmsg.from_),
+                              type=types.SPECTRUM_MESSAGE, flush=True)
+        else:
+            self.logger.warning("Got unrecognised message type: "+str(mxmsg.type))
+            self.no_response()
+
+    def _channels_frame(self, request):
+        try:
+            channels = [int(ch) for ch in request.split(';')]
+        except ValueError:
+            channels = None
+        count = self._psd.shape[0]
+        if channels is None or not all(0 <= ch < count for ch in channels):
+            self.logger.warning("Invalid spectrum request channels: "+request)
+            channels = []
+        return spectrum_frame.encode(self._timestamp, self._freqs[0],
+                                     self.estimator.freqs[1],
+                                     self._psd[channels])
+
+    def _update_frame(self, timestamp):
+        self._timestamp = timestamp
+        self._freqs = self.estimator.freqs[self._bins]
+        self._psd = self.estimator.psd()[:, self._bins]
+        self._frame = spectrum_frame.encode(timestamp, self._freqs[0],
+                                            self.estimator.freqs[1],
+                                            self._psd)
+
+if __name__ == "__main__":
+    SpectrumPeer(settings.MULTIPLEXER_ADDRESSES).loop()
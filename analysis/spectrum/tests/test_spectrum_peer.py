@@ -0,0 +1,49 @@
+# -*- coding: utf-8 -*-
+#!/usr/bin/env python
+#
+
+"""
+>>> import logging, numpy
+
+>>> from obci.analysis.spectrum import spectrum_peer, spectrum_frame, welch
+
+>>> peer = spectrum_peer.SpectrumPeer.__new__(spectrum_peer.SpectrumPeer)
+
+>>> peer.logger = logging.getLogger('test_spectrum_peer')
+
+>>> peer.logger.addHandler(logging.NullHandler())
+
+>>> peer.estimator = welch.WelchEstimator(3, 128.0, 128)
+
+>>> peer._bins = numpy.arange(2, 6)
+
+>>> peer.estimator.add(numpy.random.randn(3, 256))
+3
+
+>>> peer._update_frame(2.0)
+
+Frame with chosen channels:
+
+>>> timestamp, freqs, psd = spectrum_frame.decode(peer._channels_frame('2;0'))
+
+>>> timestamp, freqs.tolist(), psd.shape
+(2.0, [2.0, 3.0, 4.0, 5.0], (2, 4))
+
+>>> numpy.allclose(psd, peer.estimator.psd()[[2, 0], 2:6])
+True
+
+Invalid channels give a frame with no channels:
+
+>>> [spectrum_frame.decode(peer._channels_frame(r))[2].shape for r in ['3', '-1', 'a;1', '']]
+[(0, 4), (0, 4), (0, 4), (0, 4)]
+
+"""
+
+def run():
+    import doctest, sys
+    res = doctest.testmod(sys.modules[__name__])
+    if res.failed == 0:
+        print("All tests succeeded!")
+
+if __name__ == '__main__':
+    run()
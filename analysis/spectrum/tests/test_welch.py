@@ -0,0 +1,63 @@
+# -*- coding: utf-8 -*-
+#!/usr/bin/env python
+#
+
+"""
+>>> from obci.analysis.spectrum import welch
+
+>>> import numpy, scipy.signal
+
+>>> sampling = 128.0
+
+>>> x = numpy.random.randn(3, 1000)
+
+Adding the signal block by block gives scipy.signal.welch estimate
+of the last `averages` segments:
+
+>>> e = welch.WelchEstimator(3, sampling, 128, 64, averages=5)
+
+>>> sum(e.add(x[:, i:i+13]) for i in range(0, 1000, 13))
+14
+
+>>> f, p = scipy.signal.welch(x[:, 9*64:15*64], sampling, nperseg=128, noverlap=64)
+
+>>> numpy.allclose(e.freqs, f), numpy.allclose(e.psd(), p)
+(True, True)
+
+Before `averages` segments are added, all of them are used:
+
+>>> e = welch.WelchEstimator(3, sampling, 128, 64, averages=20)
+
+>>> e.add(x[:, :100]), e.add(x[:, 100:600])
+(0, 8)
+
+>>> numpy.allclose(e.psd(), scipy.signal.welch(x[:, :576], sampling, nperseg=128, noverlap=64)[1])
+True
+
+Power of a 10 Hz sine is at 10 Hz:
+
+>>> t = numpy.arange(1024)/sampling
+
+>>> e = welch.WelchEstimator(1, sampling, 256)
+
+>>> e.add(numpy.sin(2*numpy.pi*10*t)[numpy.newaxis, :])
+7
+
+>>> e.freqs[e.psd()[0].argmax()]
+10.0
+
+>>> e.reset()
+
+>>> e.segments, e.psd().max()
+(0, 0.0)
+
+"""
+
+def run():
+    import doctest, sys
+    res = doctest.testmod(sys.modules[__name__])
+    if res.failed == 0:
+        print("All tests succeeded!")
+
+if __name__ == '__main__':
+    run()
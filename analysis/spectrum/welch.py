@@ -0,0 +1,82 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""Streaming Welch estimate of power spectral density of multichannel signal.
+
+Signal comes in blocks of shape (channels, samples). Every nperseg
+samples long segment (segments overlap by noverlap samples) is
+detrended (mean removed), multiplied by a precomputed window and
+transformed with one rfft for all channels and all segments completed
+by the block. Power of the last `averages` segments is kept in a ring,
+psd() returns its mean. So psd() of a signal added block by block
+is the same as scipy.signal.welch of the last segments of the signal.
+"""
+
+import numpy
+import scipy.signal as signal
+from numpy.lib.stride_tricks import as_strided
+
+
+class WelchEstimator(object):
+    """Stateful Welch estimator of (channels, samples) blocks.
+    Public interface:
+    - add(block) - add signal block, return number of new segments
+    - psd() - mean power spectral density of last segments, shape (channels, bins)
+    - freqs - frequencies of bins
+    - segments - number of segments added so far
+    - reset() - forget signal and estimate
+    """
+    def __init__(self, num_of_channels, sampling, nperseg, noverlap=None,
+                 averages=8, window='hann'):
+        if noverlap is None:
+            noverlap = nperseg // 2
+        if not 0 <= noverlap < nperseg:
+            raise ValueError("noverlap must be in [0, nperseg)")
+        self.num_of_channels = num_of_channels
+        self.sampling = float(sampling)
+        self.nperseg = nperseg
+        self.step = nperseg - noverlap
+        self.averages = averages
+        self.window = signal.get_window(window, nperseg)
+        self.freqs = numpy.fft.rfftfreq(nperseg, 1.0/self.sampling)
+        # one-sided density scaling, as in scipy.signal.welch
+        self._scale = numpy.full(len(self.freqs),
+                                 2.0/(self.sampling*(self.window**2).sum()))
+        self._scale[0] /= 2
+        if nperseg % 2 == 0:
+            self._scale[-1] /= 2
+        self.reset()
+
+    def reset(self):
+        # samples of not completed segments
+        self._tail = numpy.zeros((self.num_of_channels, 0))
+        self._powers = numpy.zeros((self.averages, self.num_of_channels, len(self.freqs)))
+        self._next = 0
+        self.segments = 0
+
+    def add(self, block):
+        data = numpy.hstack((self._tail, block))
+        count = (data.shape[1] - self.nperseg)//self.step + 1
+        if count <= 0:
+            self._tail = data
+            return 0
+        data = numpy.ascontiguousarray(data)
+        item = data.strides[1]
+        segs = as_strided(data, (count, self.num_of_channels, self.nperseg),
+                          (self.step*item, data.strides[0], item))
+        segs = segs - segs.mean(axis=-1)[..., numpy.newaxis]
+        spectra = numpy.fft.rfft(segs*self.window, axis=-1)
+        powers = (spectra.real**2 + spectra.imag**2)*self._scale
+        # only last `averages` segments are kept
+        for power in powers[-self.averages:]:
+            self._powers[self._next] = power
+            self._next = (self._next + 1) % self.averages
+        self.segments += count
+        self._tail = data[:, count*self.step:]
+        return count
+
+    def psd(self):
+        filled = min(self.segments, self.averages)
+        if filled == 0:
+            return numpy.zeros((self.num_of_channels, len(self.freqs)))
+        # the ring is filled from its beginning
+        return self._powers[:filled].mean(axis=0)
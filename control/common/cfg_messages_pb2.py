@@ -11,7 +11,7 @@ from google.protobuf import descriptor_pb2
 DESCRIPTOR = descriptor.FileDescriptor(
   name='cfg_messages.proto',
   package='cfg_messages',
-  serialized_pb='\n\x12\x63\x66g_messages.proto\x12\x0c\x63\x66g_messages\"$\n\x05Param\x12\x0c\n\x04name\x18\x01 \x02(\t\x12\r\n\x05value\x18\x02 \x02(\t\"u\n\x13\x43onfigParamsRequest\x12\x0e\n\x06sender\x18\x01 \x02(\t\x12\x10\n\x08receiver\x18\x02 \x02(\t\x12\x13\n\x0bparam_names\x18\x03 \x03(\t\x12\'\n\next_params\x18\x04 \x03(\x0b\x32\x13.cfg_messages.Param\"~\n\x0c\x43onfigParams\x12\x0e\n\x06sender\x18\x01 \x02(\t\x12\x10\n\x08receiver\x18\x02 \x01(\t\x12#\n\x06params\x18\x03 \x03(\x0b\x32\x13.cfg_messages.Param\x12\'\n\next_params\x18\x04 \x03(\x0b\x32\x13.cfg_messages.Param\"\x1f\n\x0cPeerIdentity\x12\x0f\n\x07peer_id\x18\x01 \x02(\t\".\n\x0ePeerReadyQuery\x12\x0e\n\x06sender\x18\x01 \x02(\t\x12\x0c\n\x04\x64\x65ps\x18\x02 \x03(\t\"8\n\x0fPeerReadyStatus\x12\x10\n\x08receiver\x18\x01 \x02(\t\x12\x13\n\x0bpeers_ready\x18\x02 \x02(\x08\"@\n\x0b\x43onfigError\x12\x0f\n\x07rq_type\x18\x01 \x01(\t\x12\x11\n\terror_str\x18\x02 \x01(\t\x12\r\n\x05\x65rrno\x18\x03 \x01(\t\"9\n\x0fLauncherCommand\x12\x0e\n\x06sender\x18\x01 \x02(\t\x12\x16\n\x0eserialized_msg\x18\x02 \x02(\t')
+  serialized_pb='\n\x12cfg_messages.proto\x12\x0ccfg_messages\"$\n\x05Param\x12\x0c\n\x04name\x18\x01 \x02(\t\x12\r\n\x05value\x18\x02 \x02(\t\"\x8b\x01\n\x13ConfigParamsRequest\x12\x0e\n\x06sender\x18\x01 \x02(\t\x12\x10\n\x08receiver\x18\x02 \x02(\t\x12\x13\n\x0bparam_names\x18\x03 \x03(\t\x12\'\n\next_params\x18\x04 \x03(\x0b2\x13.cfg_messages.Param\x12\x14\n\x0cwait_timeout\x18\x05 \x01(\x02\"~\n\x0cConfigParams\x12\x0e\n\x06sender\x18\x01 \x02(\t\x12\x10\n\x08receiver\x18\x02 \x01(\t\x12#\n\x06params\x18\x03 \x03(\x0b2\x13.cfg_messages.Param\x12\'\n\next_params\x18\x04 \x03(\x0b2\x13.cfg_messages.Param\"\x1f\n\x0cPeerIdentity\x12\x0f\n\x07peer_id\x18\x01 \x02(\t\"D\n\x0ePeerReadyQuery\x12\x0e\n\x06sender\x18\x01 \x02(\t\x12\x0c\n\x04deps\x18\x02 \x03(\t\x12\x14\n\x0cwait_timeout\x18\x03 \x01(\x02\"8\n\x0fPeerReadyStatus\x12\x10\n\x08receiver\x18\x01 \x02(\t\x12\x13\n\x0bpeers_ready\x18\x02 \x02(\x08\"@\n\x0bConfigError\x12\x0f\n\x07rq_type\x18\x01 \x01(\t\x12\x11\n\terror_str\x18\x02 \x01(\t\x12\r\n\x05errno\x18\x03 \x01(\t\"9\n\x0fLauncherCommand\x12\x0e\n\x06sender\x18\x01 \x02(\t\x12\x16\n\x0eserialized_msg\x18\x02 \x02(\t')
 
 
 
@@ -86,6 +86,13 @@ _CONFIGPARAMSREQUEST = descriptor.Descriptor(
       message_type=None, enum_type=None, containing_type=None,
       is_extension=False, extension_scope=None,
       options=None),
+    descriptor.FieldDescriptor(
+      name='wait_timeout', full_name='cfg_messages.ConfigParamsRequest.wait_timeout', index=4,
+      number=5, type=2, cpp_type=6, label=1,
+      has_default_value=False, default_value=0,
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      options=None),
   ],
   extensions=[
   ],
@@ -95,8 +102,8 @@ _CONFIGPARAMSREQUEST = descriptor.Descriptor(
   options=None,
   is_extendable=False,
   extension_ranges=[],
-  serialized_start=74,
-  serialized_end=191,
+  serialized_start=75,
+  serialized_end=214,
 )
 
 
@@ -144,8 +151,8 @@ _CONFIGPARAMS = descriptor.Descriptor(
   options=None,
   is_extendable=False,
   extension_ranges=[],
-  serialized_start=193,
-  serialized_end=319,
+  serialized_start=216,
+  serialized_end=342,
 )
 
 
@@ -172,8 +179,8 @@ _PEERIDENTITY = descriptor.Descriptor(
   options=None,
   is_extendable=False,
   extension_ranges=[],
-  serialized_start=321,
-  serialized_end=352,
+  serialized_start=344,
+  serialized_end=375,
 )
 
 
@@ -198,6 +205,13 @@ _PEERREADYQUERY = descriptor.Descriptor(
       message_type=None, enum_type=None, containing_type=None,
       is_extension=False, extension_scope=None,
       options=None),
+    descriptor.FieldDescriptor(
+      name='wait_timeout', full_name='cfg_messages.PeerReadyQuery.wait_timeout', index=2,
+      number=3, type=2, cpp_type=6, label=1,
+      has_default_value=False, default_value=0,
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      options=None),
   ],
   extensions=[
   ],
@@ -207,8 +221,8 @@ _PEERREADYQUERY = descriptor.Descriptor(
   options=None,
   is_extendable=False,
   extension_ranges=[],
-  serialized_start=354,
-  serialized_end=400,
+  serialized_start=377,
+  serialized_end=445,
 )
 
 
@@ -242,8 +256,8 @@ _PEERREADYSTATUS = descriptor.Descriptor(
   options=None,
   is_extendable=False,
   extension_ranges=[],
-  serialized_start=402,
-  serialized_end=458,
+  serialized_start=447,
+  serialized_end=503,
 )
 
 
@@ -284,8 +298,8 @@ _CONFIGERROR = descriptor.Descriptor(
   options=None,
   is_extendable=False,
   extension_ranges=[],
-  serialized_start=460,
-  serialized_end=524,
+  serialized_start=505,
+  serialized_end=569,
 )
 
 
@@ -319,8 +333,8 @@ _LAUNCHERCOMMAND = descriptor.Descriptor(
   options=None,
   is_extendable=False,
   extension_ranges=[],
-  serialized_start=526,
-  serialized_end=583,
+  serialized_start=571,
+  serialized_end=628,
 )
 
 _CONFIGPARAMSREQUEST.fields_by_name['ext_params'].message_type = _PARAM
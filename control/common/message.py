@@ -4,6 +4,8 @@
 import json
 import zmq
 
+import message_codec
+
 
 BASIC_MSG = dict(type='', sender='', receiver='', sender_ip='')
 #BasicMessage = namedtuple('BasicMessage', 'type sender receiver')
@@ -26,38 +28,80 @@ common_errors = ["invalid_msg_format",
                 "no_pub_sock"]
 
 class OBCIMessageTool(object):
-    def __init__(self, msg_templates, errors=[]):
+    def __init__(self, msg_templates, errors=[], codec=None):
         self.templates = common_templates
         self.templates.update(msg_templates)
         self.errors = common_errors
         self.errors.append(errors)
+        self.codec = message_codec.get_codec(codec)
+        self._compiled = {}
 
     def add_templates(self, msg_templates):
         self.templates.update(msg_templates)
 
+    def compiled_template(self, msg_type):
+        """Return _CompiledTemplate of msg_type or None for unknown types.
+        Templates are compiled once (and again only if replaced)."""
+        template = self.templates.get(msg_type)
+        compiled = self._compiled.get(msg_type)
+        if compiled is None or compiled.template is not template:
+            if template is None:
+                return None
+            compiled = self._compiled[msg_type] = _CompiledTemplate(msg_type, template)
+        return compiled
+
     def fill_msg(self, msg_type, **kwargs):
-        if msg_type not in self.templates:
+        compiled = self.compiled_template(msg_type)
+        if compiled is None:
             raise OBCIMessageError()
-        msg = self.templates[msg_type].copy()
-        msg.update(BASIC_MSG)
-        msg['type'] = msg_type
-
-        for key, value in kwargs.iteritems():
-            if key not in msg:
-                raise OBCIMessageError(
+        if not compiled.fields.issuperset(kwargs):
+            key = [key for key in kwargs if key not in compiled.fields][0]
+            raise OBCIMessageError(
                         "Key {0} not defined for message {1}".format(
                                                             key, msg_type))
-            msg[key] = value
-        return json.dumps(msg)
+        msg = compiled.defaults.copy()
+        msg.update(kwargs)
+        return self.codec.encode(msg)
 
     def decode_msg(self, msg):
-        return json.loads(msg)
+        return message_codec.decode(msg)
+
+    def json_msg(self, msg):
+        """Return msg (encoded with any codec) as json - for clients which
+        do not understand other formats (TCP proxies)."""
+        return message_codec.to_json(msg)
 
     def unpack_msg(self, msg):
+        data = message_codec.decode(msg)
+        compiled = self.compiled_template(data.get('type'))
+        if compiled is not None:
+            m = compiled.message_class()
+            try:
+                for key, value in data.iteritems():
+                    setattr(m, key, value)
+                return m
+            except AttributeError:
+                # a field not in the template
+                pass
         m = LauncherMessage()
-        m.ParseFromString(msg)
+        for key, value in data.iteritems():
+            setattr(m, key, value)
         return m
 
+
+class _CompiledTemplate(object):
+    """Defaults (with basic fields), field set and a message class with
+    __slots__ of one message type."""
+    __slots__ = ('template', 'defaults', 'fields', 'message_class')
+
+    def __init__(self, msg_type, template):
+        self.template = template
+        self.defaults = template.copy()
+        self.defaults.update(BASIC_MSG)
+        self.defaults['type'] = msg_type
+        self.fields = frozenset(self.defaults)
+        self.message_class = _message_class(self.fields)
+
 class PollingObject(object):
     def __init__(self):
         self.poller = zmq.Poller()
@@ -82,39 +126,73 @@ class PollingObject(object):
 
 
 def send_msg(sock, message, flags=0):
+    if message_codec.is_binary(message):
+        return sock.send(message, flags=flags)
     return sock.send_unicode(message, flags=flags)
 
 def recv_msg(sock, flags=0):
-    return sock.recv_unicode(flags=flags)
+    message = sock.recv(flags=flags)
+    if message_codec.is_binary(message):
+        return message
+    return message.decode('utf-8')
+
 
 class LauncherMessage(object):
+    """Unpacked message - message fields are its attributes.
+    Messages of known types with fields matching their templates are
+    instances of subclasses with __slots__, others (and messages created
+    with LauncherMessage()) keep any attributes in __dict__."""
+    __slots__ = ()
+
+    def __new__(cls, *args, **kwargs):
+        if cls is LauncherMessage:
+            cls = _DictMessage
+        return object.__new__(cls)
+
     def SerializeToString(self):
-        return json.dumps(vars(self))
+        return json.dumps(self.dict())
 
     def __repr__(self):
         return str(self.dict())
 
     def raw(self):
-        return json.dumps(vars(self), sort_keys=True, indent=4)
+        return json.dumps(self.dict(), sort_keys=True, indent=4)
 
     def ParseFromString(self, string):
-        message = json.loads(string)
-        if not isinstance(message, dict): #TODO more general keyed collection?
-            raise OBCIMessageError()
-        for key in message:
-            setattr(self, key, message[key])
+        message = message_codec.decode(string)
+        try:
+            for key in message:
+                setattr(self, key, message[key])
+        except AttributeError, e:
+            raise OBCIMessageError("Field not defined for message: " + str(e))
 
     def keys(self):
-        return vars(self).keys()
+        return self.dict().keys()
 
     def dict(self):
         d = {}
-        for attr, val in vars(self).iteritems():
-            d[attr] = val
+        for attr in self.__slots__:
+            try:
+                d[attr] = getattr(self, attr)
+            except AttributeError:
+                pass
         return d
-        
 
 
+class _DictMessage(LauncherMessage):
+    def dict(self):
+        return dict(vars(self))
+
+
+_message_classes = {}
+
+def _message_class(fields):
+    cls = _message_classes.get(fields)
+    if cls is None:
+        cls = _message_classes[fields] = type('LauncherMessage', (LauncherMessage,),
+                                            {'__slots__': tuple(sorted(fields))})
+    return cls
+
 
 class OBCIMessageError(Exception):
     pass
\ No newline at end of file
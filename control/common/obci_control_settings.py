@@ -12,6 +12,9 @@ OBCI_CONTROL_LOG_DIR = os.path.join(CONFIG_DEFAULTS["log_dir"], "control")
 
 USE_ZMQ = False
 
+# fork peers from a warm zygote process (see launcher/peer_zygote.py)
+USE_PEER_ZYGOTE = False
+
 PORT_RANGE = (30000, 60000)
 
 OBCI_HOME_DIR = os.path.join(os.path.expanduser('~'), '.obci')
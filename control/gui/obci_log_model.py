@@ -56,22 +56,34 @@ class LogModel(QtCore.QObject):
             self.update_log.emit(log)
         self._mutex.unlock()
 
+    def next_logs(self):
+        """Return list of (peer_id, log) pairs received since the last call."""
+        peer_id, log = self.next_log()
+        if peer_id is None:
+            return []
+        return [(peer_id, log)]
+
     def run(self):
         print("model start running ")
         while self._run:
-            peer_id, log = self.next_log()
-            if peer_id is None:
+            logs = self.next_logs()
+            if not logs:
                 #print ("obci_log_model - ERROR IN RECEIVING LOG ON SOCKET OR TIMEOUT!")
                 time.sleep(0.1)
             else:
+                # one update per peer for every received batch of logs
+                by_peer = {}
+                for peer_id, log in logs:
+                    by_peer.setdefault(peer_id, []).append(log)
                 self._mutex.lock()
-                if not self._peers_log.has_key(peer_id):
-                    self._peers_log[peer_id] = {'peer_id':peer_id,
-                                                'logs':[]}
-                self._peers_log[peer_id]['logs'].append(log)
-                if self._emmit:
-                    e = {'peer_id':peer_id, 'logs':[log]}
-                    self.update_log.emit(e)
+                for peer_id, peer_logs in by_peer.iteritems():
+                    if not self._peers_log.has_key(peer_id):
+                        self._peers_log[peer_id] = {'peer_id':peer_id,
+                                                    'logs':[]}
+                    self._peers_log[peer_id]['logs'].extend(peer_logs)
+                    if self._emmit:
+                        e = {'peer_id':peer_id, 'logs':peer_logs}
+                        self.update_log.emit(e)
                 self._mutex.unlock()
 
         print ("obci log model - model stoped running ")
@@ -6,6 +6,8 @@ import socket
 import select
 import json
 
+from obci.utils.log_mx_handler import unpack_records
+
 BUF = 2**15
 class RealLogModel(obci_log_model.LogModel):
     def __init__(self, srv_client):
@@ -14,33 +16,40 @@ class RealLogModel(obci_log_model.LogModel):
         self.exp_name = ''
         self.peer_name = ''
 
-    def next_log(self):
+    def next_logs(self):
         try:
             #print("log model real - waiting on socket ...")
             ready = select.select([self.socket], [], [], 0.5)
             if ready[0]:
-                data = self.socket.recv(BUF)  
+                data = self.socket.recv(BUF)
                 #print("log model real - got log!!!!!! "+str(data))
                 #print("log model real - got log")
                 return self._process_log(data)
             else:
                 raise Exception("Socket timeout!")
         except Exception, e:
-            return None, None
+            return []
 
     def _process_log(self, data):
+        """Return list of (peer_id, log) for every record in data."""
         try:
-            d = json.loads(data)
+            records = unpack_records(data)
         except Exception:
             print("Error while loading log as json....!")
-            return None, None
+            return []
         else:
             try:
-                return d['name'], ' - '.join([str(d['asctime']), str(d['message'])])#'amplifier', data
+                return [(d['name'], self._format_log(d)) for d in records]
             except Exception:
                 print("Error while reading logs fields: name, asctime, message!")
-                return None, None
-                
+                return []
+
+    def _format_log(self, d):
+        log = ' - '.join([str(d['asctime']), str(d['message'])])#'amplifier', data
+        if d.get('count', 1) > 1:
+            log += ' (x' + str(d['count']) + ', last ' + str(d.get('last_asctime')) + ')'
+        return log
+
     def stop_running(self):
         self.srv_client.kill_peer(self.exp_name, self.peer_name, remove_config=True) 
         super(RealLogModel, self).stop_running()
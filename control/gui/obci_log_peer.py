@@ -1,19 +1,32 @@
 #!/usr/bin/env python
 # -*- coding: utf-8 -*-
 
+import time
 import socket
+import threading
 from multiplexer.multiplexer_constants import peers, types
 from obci.control.peer.configured_multiplexer_server import ConfiguredMultiplexerServer
 from obci.configs import settings
+from obci.utils.log_mx_handler import pack_batches, unpack_records
+from obci.utils.log_coalescer import LogCoalescer
 
 class OBCILogCollector(ConfiguredMultiplexerServer):
+    """Forward log records of all peers to the gui (udp on 127.0.0.1:port),
+    coalesced and in compressed batches, every push_interval seconds.
+    The gui keeps all received records, so none are kept here for replay."""
     def __init__(self, addresses):
         self.socket = None
         super(OBCILogCollector, self).__init__(addresses=addresses, 
                                             type=peers.OBCI_LOG_COLLECTOR)   
         self.ip = '127.0.0.1'
         self.port = int(self.get_param('port'))
+        self.coalescer = LogCoalescer(0, int(self.get_param('max_batch')))
+        self.push_interval = float(self.get_param('push_interval'))
+        self.compress = self.config.true_val(self.get_param('compress'))
         self.socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.pusher = threading.Thread(target=self._push_batches)
+        self.pusher.daemon = True
+        self.pusher.start()
         self.ready()
 
     def handle_message(self, mxmsg):
@@ -22,17 +35,32 @@ class OBCILogCollector(ConfiguredMultiplexerServer):
             return
 
         if mxmsg.type == types.OBCI_LOG_MESSAGE:
-            self.logger.debug("obci collector - GOT log, sending to socket...")
             try:
-                self.socket.sendto(mxmsg.message, 
-                                   (self.ip, self.port))
-            except Exception, l_exc:
-                self.logger.error("An error occured while sending log to socket")
-                self.socket.close()
+                records = unpack_records(mxmsg.message)
+            except ValueError:
+                self.logger.warning("Bad log message: " + repr(mxmsg.message[:100]))
+            else:
+                with self.coalescer.lock:
+                    for record in records:
+                        self.coalescer.add(record)
         else:
             self.logger.warning("Warning! unrecognised message type "+str(mxmsg.type))
         self.no_response() 
 
+    def _push_batches(self):
+        while True:
+            time.sleep(self.push_interval)
+            self._push()
+
+    def _push(self):
+        with self.coalescer.lock:
+            batch = self.coalescer.take_batch()
+        try:
+            for data in pack_batches(batch, compress=self.compress):
+                self.socket.sendto(data, (self.ip, self.port))
+        except Exception, l_exc:
+            self.logger.error("An error occured while sending log to socket")
+
 
 if __name__ == '__main__':
     OBCILogCollector(settings.MULTIPLEXER_ADDRESSES).loop()
@@ -50,6 +50,9 @@ message_templates = {
 
     "launch_error" : dict(err_code='', details=''),
     "all_peers_launched": dict(machine=''),
+    "_process_spawned" : dict(name='', proc_type='', path='', args='', pid='',
+                                    details='', spawned=''),
+    "_launch_finished" : dict(success='', path='', args='', details=''),
     "obci_launch_failed" : dict(machine='', path='', args='', details=''),
 
     "start_experiment" : dict(),
@@ -69,7 +72,7 @@ message_templates = {
     "stop_all" : dict(),
 
     "get_tail" : dict(peer_id='', len=''),
-    "tail" : dict(txt='', experiment_id='', peer_id=''),
+    "tail" : dict(txt='', experiment_id='', peer_id='', dropped_bytes=''),
 
     "join_experiment" : dict(peer_id='', peer_type='', path=''),
     "leave_experiment" : dict(peer_id=''),
@@ -84,7 +87,7 @@ message_templates = {
     "obci_peer_params_changed" : dict(peer_id='', params=''),
     "obci_peer_registered" : dict(peer_id='', params=''),
     "obci_peer_unregistered" : dict(peer_id=''),
-    "obci_peer_ready" : dict(peer_id=''),
+    "obci_peer_ready" : dict(peer_id='', timings=''),
 
     "update_peer_config" : dict(peer_id='', local_params='',
                             external_params='', launch_dependencies='', config_sources=''),
@@ -40,6 +40,11 @@ class LocalProcess(process.Process):
         else:
             return self.io_handler.tail_stdout(int(lines))
 
+    def stdio_dropped_bytes(self):
+        if not self.io_handler:
+            return 0
+        return self.io_handler.dropped_bytes
+
     def kill(self):
         self.stop_monitoring()
 
@@ -447,7 +447,7 @@ class OBCIControlPeer(object):
     def handle_register_peer(self, message, sock):
         """Subclass this."""
         result = self.mtool.fill_msg("rq_error",
-            request=vars(message), err_code="unsupported_peer_type")
+            request=message.dict(), err_code="unsupported_peer_type")
         send_msg(sock, result)
 
     @msg_handlers.handler("ping")
@@ -464,14 +464,16 @@ class OBCIControlPeer(object):
     def unsupported_msg_handler(self, message, sock):
         if sock.socket_type in [zmq.REP, zmq.ROUTER]:
             msg = self.mtool.fill_msg("rq_error",
-                    request=vars(message), err_code="unsupported_msg_type", sender=self.uuid)
+                    request=message.dict(), err_code="unsupported_msg_type", sender=self.uuid)
             send_msg(sock, msg)
         # print "--"
 
     @msg_handlers.error_handler()
     def bad_msg_handler(self, message, sock):
+        # undecodable binary data can't be put into a (json) message
+        request = message if isinstance(message, unicode) else repr(message)
         msg = self.mtool.fill_msg("rq_error",
-                    request=message, err_code="invalid_msg_format")
+                    request=request, err_code="invalid_msg_format")
         send_msg(sock, msg)
 
     @msg_handlers.handler("kill")
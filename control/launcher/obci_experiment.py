@@ -342,7 +342,7 @@ class OBCIExperiment(OBCIControlPeer):
                                                 sender=self.uuid, details=(status, details),
                                                 err_code='registration_error'))
                 return
-            self.logger.info("exp registration message  " + str(vars(message)))
+            self.logger.info("exp registration message  " + str(message.dict()))
             adr_list = [message.rep_addrs, message.pub_addrs]
             if machine != socket.gethostname():
                 ip = self._nearby_machines.ip(machine)
@@ -734,8 +734,10 @@ class OBCIExperiment(OBCIControlPeer):
         if not peer_id in self.exp_config.peers:
             self.logger.error("Unknown Peer update!!! {0}".format(peer_id))
             return
+        timings = getattr(message, 'timings', None)
         self.status.peer_status(peer_id).set_status(
-                                            launcher_tools.RUNNING)
+                                            launcher_tools.RUNNING,
+                        details=dict(launch_timings=timings) if timings else ())
         self._ready_register -= 1
         self.logger.info("{0} peer ready! {1} to go".format(peer_id,
                                 self._ready_register))
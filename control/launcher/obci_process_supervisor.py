@@ -7,6 +7,9 @@ import uuid
 import subprocess
 import argparse
 import time
+import tempfile
+import threading
+from multiprocessing.pool import ThreadPool
 
 import zmq
 import socket
@@ -23,9 +26,15 @@ import obci.control.launcher.launcher_tools as launcher_tools
 from subprocess_monitor import SubprocessMonitor, TimeoutDescription,\
 STDIN, STDOUT, STDERR, NO_STDIO, RETURNCODE
 from process_io_handler import DEFAULT_TAIL_RQ
+from peer_zygote import PeerZygote
 
 TEST_PACKS = 100000
 
+# how many peers of one launch level can be spawned at the same time
+LAUNCH_CONCURRENCY = 4
+# time to give config server before launching peers which will query it
+CONFIG_SERVER_WAIT = 0.4
+
 class OBCIProcessSupervisor(OBCIControlPeer):
     msg_handlers = OBCIControlPeer.msg_handlers.copy()
 
@@ -35,7 +44,9 @@ class OBCIProcessSupervisor(OBCIControlPeer):
                                         rep_addresses=None,
                                         pub_addresses=None,
                                         experiment_uuid='',
-                                        name='obci_process_supervisor'):
+                                        name='obci_process_supervisor',
+                                        launch_concurrency=LAUNCH_CONCURRENCY,
+                                        use_zygote=settings.USE_PEER_ZYGOTE):
 
         self.peers = {}
         self.status = launcher_tools.READY_TO_LAUNCH
@@ -55,6 +66,11 @@ class OBCIProcessSupervisor(OBCIControlPeer):
         self.restarting = []
         self.rqs = 0
         self._nearby_machines = net.DNS()
+        self.launch_concurrency = max(1, int(launch_concurrency))
+        self._launch_start = None
+        self.launch_timings = {}
+        self.use_zygote = use_zygote
+        self.zygote = None
 
         self.test_count = 0
 
@@ -64,6 +80,8 @@ class OBCIProcessSupervisor(OBCIControlPeer):
                                             pub_addresses=pub_addresses,
                                             name=name)
         self.subprocess_mgr = SubprocessMonitor(self.ctx, self.uuid, logger=self.logger)
+        # preload modules while waiting for the experiment`s start_peers
+        self._ensure_zygote()
 
 
     def peer_type(self):
@@ -218,78 +236,196 @@ class OBCIProcessSupervisor(OBCIControlPeer):
 
         self._launch_processes(message.start_peers_data, restore_config=restore_config)
 
-    def _launch_processes(self, launch_data, restore_config=[]):
-        proc, details = None, None
-        success = True
-        path, args = None, None
+    def _launch_levels(self, launch_data):
+        """Split peers from launch_data into levels of the launch dependencies
+        graph - peers of a level depend only on peers from previous levels.
+        Peers missing from peer_order (eg. in a dependency cycle, which
+        ends the topological order) are launched in the last level."""
+        levels = []
+        ordered = set()
+        for part in self.peer_order:
+            level = [peer for peer in part if peer in launch_data and \
+                                                peer not in ordered and \
+                                                not peer.startswith('mx')]
+            if level:
+                levels.append(level)
+                ordered.update(level)
+        rest = [peer for peer in launch_data if peer not in ordered and \
+                                                not peer.startswith('mx')]
+        if 'config_server' in rest:
+            rest.remove('config_server')
+            levels.insert(0, ['config_server'])
+        if rest:
+            levels.append(rest)
+        return levels
+
+    def _prepare_launch(self, peer, data, restore_config):
+        p = os.path.expanduser(data['path'])
+        if not os.path.isabs(p):
+            path = os.path.join(launcher_tools.obci_root(), p)
+        else:
+            path = os.path.realpath(p)
+
+        dirname = os.path.dirname(path)
+        if not launcher_tools.obci_root() in dirname:
+            launcher_tools.update_pythonpath(dirname)
+            launcher_tools.update_obci_syspath(dirname)
+            self.env.update({"PYTHONPATH" : os.environ["PYTHONPATH"]})
+
+            self.logger.info("PYTHONPATH UPDATED  for " + peer +\
+                     "!!!!!!!!   " + str(self.env["PYTHONPATH"]))
+        args = data['args']
+        if peer.startswith('config_server'):
+            args += ['-p', 'launcher_socket_addr', self.cs_addr]
+            args += ['-p', 'experiment_uuid', self.experiment_uuid]
+
+            if restore_config:
+                args += ['-p', 'restore_peers', ' '.join(restore_config)]
+        if "log_dir" in args:
+            idx = args.index("log_dir") + 1
+            log_dir = args[idx]
+            log_dir = os.path.join(log_dir, self.name)
+            args[idx] = log_dir
+        else:
+            log_dir = os.path.join(CONFIG_DEFAULTS["log_dir"], self.name)
+            args += ['-p', 'log_dir', log_dir]
+        if not os.path.exists(log_dir):
+            os.makedirs(log_dir)
+        return path, args
+
+    def _ensure_zygote(self):
+        """Start the zygote (if enabled), or restart it if peers`
+        environment has changed since it was started."""
+        if not self.use_zygote or self.env is None:
+            return
+        if self.zygote is not None:
+            if self.zygote.running() and self.zygote.env_matches(self.env):
+                return
+            self.zygote.stop()
+        sock_path = os.path.join(tempfile.gettempdir(),
+                                'obci_zygote_' + self.uuid.split('-')[0] + '.sock')
+        self.zygote = PeerZygote(sock_path, env=self.env)
+        self.zygote.start()
+        self.subprocess_mgr.zygote = self.zygote
+        self.logger.info("zygote started, socket: %s", sock_path)
+
+    def _stop_zygote(self):
+        if self.zygote is not None:
+            self.subprocess_mgr.zygote = None
+            self.zygote.stop()
+            self.zygote = None
 
+    def _launch_processes(self, launch_data, restore_config=[]):
+        """Launch peers in a separate thread, so that the supervisor keeps
+        handling messages (and measuring peers` registration) meanwhile.
+        Peers of each launch level are spawned concurrently
+        (at most launch_concurrency at once)."""
         self.status = launcher_tools.LAUNCHING
-
-        ldata = []
-        if 'config_server' in launch_data:
-            ldata.append(('config_server', launch_data['config_server']))
-        if 'amplifier' in launch_data:
-            ldata.append(('amplifier', launch_data['amplifier']))
-        for peer, data in launch_data.iteritems():
-            if (peer, data) not in ldata:
-                ldata.append((peer, data))
-
-        for peer, data in ldata:#self.launch_data.iteritems():
-            wait = 0
-            if peer.startswith('mx'):
-                continue
-            p = os.path.expanduser(data['path'])
-            if not os.path.isabs(p):
-                path = os.path.join(launcher_tools.obci_root(), p)
-            else:
-                path = os.path.realpath(p)
-
-            dirname = os.path.dirname(path)
-            if not launcher_tools.obci_root() in dirname:
-                launcher_tools.update_pythonpath(dirname)
-                launcher_tools.update_obci_syspath(dirname)
-                self.env.update({"PYTHONPATH" : os.environ["PYTHONPATH"]})
-
-                self.logger.info("PYTHONPATH UPDATED  for " + peer +\
-                         "!!!!!!!!   " + str(self.env["PYTHONPATH"]))
-            args = data['args']
-            if peer.startswith('config_server'):
-                args += ['-p', 'launcher_socket_addr', self.cs_addr]
-                args += ['-p', 'experiment_uuid', self.experiment_uuid]
-
-                if restore_config:
-                    args += ['-p', 'restore_peers', ' '.join(restore_config)]
-                wait = 0.4
-            if "log_dir" in args:
-                idx = args.index("log_dir") + 1
-                log_dir = args[idx]
-                log_dir = os.path.join(log_dir, self.name)
-                args[idx] = log_dir
-            else:
-                log_dir = os.path.join(CONFIG_DEFAULTS["log_dir"], self.name)
-                args += ['-p', 'log_dir', log_dir]
-            if not os.path.exists(log_dir):
-                os.makedirs(log_dir)
-
-            proc, details = self._launch_process(path, args, data['peer_type'],
-                                                        peer, env=self.env, capture_io=NO_STDIO)
-            if proc is not None:
-                self.processes[peer] = proc
-            else:
-                success = False
-                break
-            time.sleep(wait)
-        if success:
+        self._ensure_zygote()
+        self._launch_start = time.time()
+
+        launch = []
+        for level in self._launch_levels(launch_data):
+            launch.append([(peer, launch_data[peer]['peer_type']) + \
+                            self._prepare_launch(peer, launch_data[peer], restore_config)
+                            for peer in level])
+            # a peer may register before its _process_spawned is handled
+            for peer in level:
+                self.launch_timings[peer] = {}
+        thr = threading.Thread(target=self._launch_thread, args=[launch])
+        thr.daemon = True
+        thr.start()
+
+    def _launch_thread(self, launch):
+        # zmq sockets can`t be shared between threads - results are sent
+        # to the main thread and handled there
+        push_sock = self._push_sock(self.ctx, self._subpr_push_addr)
+        pool = ThreadPool(self.launch_concurrency)
+        failed = (None, None, None)
+
+        def spawn(peer_data):
+            peer, peer_type, path, args = peer_data
+            self.logger.debug("launching..... %s %s", path, args)
+            try:
+                proc, details = self.subprocess_mgr.new_local_process(path, args,
+                                                        proc_type=peer_type,
+                                                        name=peer,
+                                                        monitoring_optflags=RETURNCODE,
+                                                        capture_io=NO_STDIO,
+                                                        env=self.env)
+            except Exception, e:
+                proc, details = None, str(e)
+            return proc, details, time.time() - self._launch_start
+
+        try:
+            for level in launch:
+                results = pool.map(spawn, level)
+                for (peer, peer_type, path, args), (proc, details, spawned) in \
+                                                            zip(level, results):
+                    send_msg(push_sock, self.mtool.fill_msg("_process_spawned",
+                                            name=peer, proc_type=peer_type,
+                                            path=path, args=args, details=details,
+                                            pid=proc.pid if proc is not None else None,
+                                            spawned=spawned))
+                    if proc is None and failed[0] is None:
+                        failed = (path, args, details)
+                if failed[0] is not None:
+                    break
+                if 'config_server' in [peer_data[0] for peer_data in level]:
+                    time.sleep(CONFIG_SERVER_WAIT)
+        finally:
+            pool.close()
+            path, args, details = failed
+            send_msg(push_sock, self.mtool.fill_msg("_launch_finished",
+                                    success=path is None, path=path, args=args,
+                                    details=details))
+            push_sock.close()
+
+    @msg_handlers.handler("_process_spawned")
+    def handle_process_spawned(self, message, sock):
+        if message.pid is None:
+            self.launch_timings.pop(message.name, None)
+            self.logger.error("process launch FAILED: %s --- %s",
+                                            message.path, str(message.args))
+            send_msg(self._publish_socket, self.mtool.fill_msg("launch_error",
+                                            sender=self.uuid,
+                                            details=dict(machine=self.machine,
+                                                        path=message.path,
+                                                        args=message.args,
+                                                        error=message.details,
+                                                        peer_id=message.name)))
+            return
+        proc = self.subprocess_mgr.process(self.machine, message.pid)
+        self.processes[message.name] = proc
+        self.launch_timings.setdefault(message.name, {})['spawned'] = message.spawned
+        self.logger.info("process launch success:" +\
+                             message.path + str(message.args) + str(message.pid))
+        send_msg(self._publish_socket, self.mtool.fill_msg("launched_process_info",
+                                        sender=self.uuid,
+                                        machine=self.machine,
+                                        pid=message.pid,
+                                        proc_type=message.proc_type, name=message.name,
+                                        path=message.path,
+                                        args=message.args))
+
+    @msg_handlers.handler("_launch_finished")
+    def handle_launch_finished(self, message, sock):
+        if message.success:
             send_msg(self._publish_socket, self.mtool.fill_msg("all_peers_launched",
                                                     machine=self.machine))
         else:
             self.logger.error("OBCI LAUNCH FAILED")
             send_msg(self._publish_socket, self.mtool.fill_msg("obci_launch_failed",
-                                                    machine=self.machine, path=path,
-                                                    args=args, details=details))
+                                                    machine=self.machine, path=message.path,
+                                                    args=message.args, details=message.details))
             self.processes = {}
             self.subprocess_mgr.killall(force=True)
 
+    def _launch_time(self, peer_id, stage):
+        if peer_id in self.launch_timings and self._launch_start is not None:
+            self.launch_timings[peer_id][stage] = time.time() - self._launch_start
+        return self.launch_timings.get(peer_id, None)
+
 
     def _launch_process(self, path, args, proc_type, name,
                                     env=None, capture_io=NO_STDIO):
@@ -327,11 +463,13 @@ class OBCIProcessSupervisor(OBCIControlPeer):
         if peer not in self.launch_data:
             return
         experiment_id = self.launch_data[peer]['experiment_id']
-        txt = self.processes[peer].tail_stdout(lines=lines)
+        proc = self.processes[peer]
+        txt = proc.tail_stdout(lines=lines)
         send_msg(self._publish_socket, self.mtool.fill_msg("tail", txt=txt,
                                                     sender=self.uuid,
                                                     experiment_id=experiment_id,
-                                                peer_id=peer))
+                                                peer_id=peer,
+                                                dropped_bytes=proc.stdio_dropped_bytes()))
 
 
     @msg_handlers.handler("experiment_finished")
@@ -393,6 +531,7 @@ class OBCIProcessSupervisor(OBCIControlPeer):
 
     @msg_handlers.handler("obci_peer_registered")
     def handle_obci_peer_registered(self, message, sock):
+        self._launch_time(message.peer_id, 'registered')
         send_msg(self._publish_socket, message.SerializeToString())
 
     @msg_handlers.handler("obci_peer_params_changed")
@@ -402,6 +541,10 @@ class OBCIProcessSupervisor(OBCIControlPeer):
     @msg_handlers.handler("obci_peer_ready")
     def handle_obci_peer_ready(self, message, sock):
         self.logger.info("got! " + message.type)
+        timings = self._launch_time(message.peer_id, 'ready')
+        if timings is not None:
+            self.logger.info("peer %s launch timings (s): %s", message.peer_id, str(timings))
+            message.timings = timings
         send_msg(self._publish_socket, message.SerializeToString())
 
 
@@ -423,6 +566,7 @@ class OBCIProcessSupervisor(OBCIControlPeer):
     def cleanup_before_net_shutdown(self, kill_message, sock=None):
         self.processes = {}
         self.subprocess_mgr.killall(force=True)
+        self._stop_zygote()
 
     def clean_up(self):
         self.logger.info("cleaning up")
@@ -430,6 +574,7 @@ class OBCIProcessSupervisor(OBCIControlPeer):
         self.processes = {}
         self.subprocess_mgr.killall(force=True)
         self.subprocess_mgr.delete_all()
+        self._stop_zygote()
 
 
 def process_supervisor_arg_parser():
@@ -443,6 +588,10 @@ def process_supervisor_arg_parser():
     parser.add_argument('--name', default='obci_process_supervisor',
                     help='Human readable name of this process')
     parser.add_argument('--experiment-uuid', help='UUID of the parent obci_experiment')
+    parser.add_argument('--launch-concurrency', type=int, default=LAUNCH_CONCURRENCY,
+                    help='How many peers can be spawned at the same time')
+    parser.add_argument('--zygote', action='store_true', default=settings.USE_PEER_ZYGOTE,
+                    help='Fork peers from a process with preloaded common modules')
     return parser
 
 
@@ -456,5 +605,7 @@ if __name__ == '__main__':
                             rep_addresses=args.rep_addresses,
                             pub_addresses=args.pub_addresses,
                             experiment_uuid=args.experiment_uuid,
-                            name=args.name)
+                            name=args.name,
+                            launch_concurrency=args.launch_concurrency,
+                            use_zygote=args.zygote)
     process_sv.run()
@@ -263,7 +263,7 @@ class OBCIServer(OBCIControlPeer):
         rq_sock = self.client_rq[1]
         send_msg(rq_sock, self.mtool.fill_msg("rq_error",
                                                 err_code="create_experiment_error",
-                                                request=vars(self.client_rq[0])))
+                                                request=self.client_rq[0].dict()))
 
 
     @msg_handlers.handler("register_peer")
@@ -297,9 +297,9 @@ class OBCIServer(OBCIControlPeer):
 
         if exp is None:
             self.logger.error("failed to launch experiment "
-                                "process, request: " + str(vars(message)))
+                                "process, request: " + str(message.dict()))
             send_msg(sock, self.mtool.fill_msg("rq_error", 
-                                        request=vars(message),
+                                        request=message.dict(),
                                 err_code='launch_error', details=details))
         else:
             self.logger.info("experiment process "
@@ -339,18 +339,18 @@ class OBCIServer(OBCIControlPeer):
         match = None
         msg = None
         if not matches:
-            msg = self.mtool.fill_msg("rq_error", request=vars(message),
+            msg = self.mtool.fill_msg("rq_error", request=message.dict(),
                             err_code='experiment_not_found')
 
         elif len(matches) > 1:
             matches = [(exp.uuid, exp.name) for exp in matches]
-            msg = self.mtool.fill_msg("rq_error", request=vars(message),
+            msg = self.mtool.fill_msg("rq_error", request=message.dict(),
                             err_code='ambiguous_exp_name',
                             details=matches)
         else:
             match = matches.pop()
             if this_machine and match.origin_machine != self.machine:
-                msg = self.mtool.fill_msg("rq_error", request=vars(message),
+                msg = self.mtool.fill_msg("rq_error", request=message.dict(),
                             err_code='exp_not_on_this_machine', details=match.origin_machine)
                 match = None
         if msg and sock.socket_type in [zmq.REP, zmq.ROUTER]:
@@ -0,0 +1,420 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+"""
+A warm "zygote" process forking peers instead of exec-ing a new python
+interpreter for each of them.
+
+The zygote is started once per process supervisor. It imports modules
+common to (almost) all peers (numpy, protobuf, multiplexer client,
+obci peer base classes...) and waits for spawn requests on a unix socket.
+For every request it forks a child which takes over the requester`s stdio
+descriptors (passed through the socket), environment, working directory
+and argv, and runs the peer`s script as __main__. The child`s pid is sent
+back; when the child exits, its return code is sent on the same connection.
+
+On the supervisor`s side PeerZygote starts the zygote and spawns processes
+through it. ZygoteChild mimics subprocess.Popen, so a forked peer can be
+monitored by LocalProcess and ProcessIOHandler like any other.
+
+The zygote must stay single-threaded - only modules which do not start
+threads at import can be preloaded.
+"""
+
+import os
+import sys
+import json
+import time
+import errno
+import select
+import signal
+import socket
+import argparse
+import subprocess
+import threading
+
+from _multiprocessing import sendfd, recvfd
+
+PRELOAD_MODULES = ['numpy',
+                   'google.protobuf',
+                   'multiplexer.clients',
+                   'obci.configs.variables_pb2',
+                   'obci.control.peer.configured_multiplexer_server',
+                   'obci.control.peer.configured_client',
+                   'obci.utils.openbci_logging']
+
+# modules read these at import - children of a zygote started with
+# a different environment would see stale values
+ENV_SENSITIVE = ['MULTIPLEXER_ADDRESSES', 'MULTIPLEXER_PASSWORD',
+                 'MULTIPLEXER_RULES']
+
+ZYGOTE_START_TIMEOUT = 10
+REAP_INTERVAL = 0.1
+LISTEN_BACKLOG = 16
+UNKNOWN_RETURNCODE = 255
+
+
+class ZygoteError(Exception):
+    pass
+
+
+def _str(value):
+    # json gives unicode, argv and environment of a python 2 process are str
+    if isinstance(value, unicode):
+        return value.encode('utf-8')
+    return value
+
+
+def _recv_line(sock):
+    data = ''
+    while not data.endswith('\n'):
+        chunk = sock.recv(4096)
+        if not chunk:
+            raise ZygoteError("Connection closed by the zygote")
+        data += chunk
+    return data
+
+
+class PeerZygote(object):
+    """Supervisor`s handle of a zygote process."""
+    def __init__(self, socket_path, env=None, preload=PRELOAD_MODULES):
+        self.socket_path = socket_path
+        self.env = env
+        self.preload = preload
+        self._popen = None
+        self._started = None
+        self.spawned = 0
+
+    def start(self):
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+        args = ['python', os.path.abspath(__file__.rsplit('.', 1)[0] + '.py'),
+                '--socket', self.socket_path, '--preload'] + self.preload
+        self._popen = subprocess.Popen(args, env=self.env, close_fds=True)
+        self._started = time.time()
+
+    def running(self):
+        return self._popen is not None and self._popen.poll() is None
+
+    def env_matches(self, env):
+        own, other = self.env or os.environ, env or os.environ
+        return all(own.get(key) == other.get(key) for key in ENV_SENSITIVE)
+
+    def stop(self):
+        if self.running():
+            self._popen.terminate()
+            self._popen.wait()
+        self._popen = None
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+
+    def _connect(self):
+        while True:
+            if not self.running():
+                raise ZygoteError("Zygote is not running")
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            try:
+                sock.connect(self.socket_path)
+                return sock
+            except socket.error, e:
+                sock.close()
+                if e.errno not in [errno.ENOENT, errno.ECONNREFUSED]:
+                    raise ZygoteError("Could not connect to zygote: " + str(e))
+            if time.time() - self._started > ZYGOTE_START_TIMEOUT:
+                raise ZygoteError("Zygote did not start in " +\
+                                        str(ZYGOTE_START_TIMEOUT) + " s")
+            time.sleep(REAP_INTERVAL)
+
+    def spawn(self, path, args, stdio_actions, env=None, cwd=None):
+        """Fork a process running python script *path* with *args*.
+        stdio_actions is a (stdout, stderr, stdin) tuple of subprocess.PIPE,
+        subprocess.STDOUT or None, as passed to subprocess.Popen.
+        Returns a ZygoteChild, raises ZygoteError on failure."""
+        if env is not None and not self.env_matches(env):
+            raise ZygoteError("Environment differs from the zygote`s one")
+        out, err, stdin = stdio_actions
+        child_fds, parent_files, to_close = [], {}, []
+
+        def pipe(name, child_reads):
+            r, w = os.pipe()
+            child_fd, parent_fd = (r, w) if child_reads else (w, r)
+            parent_files[name] = os.fdopen(parent_fd, 'wb' if child_reads else 'rb', 1)
+            to_close.append(child_fd)
+            return child_fd
+
+        child_fds.append(pipe('stdin', True) if stdin == subprocess.PIPE else 0)
+        child_fds.append(pipe('stdout', False) if out == subprocess.PIPE else 1)
+        if err == subprocess.PIPE:
+            child_fds.append(pipe('stderr', False))
+        elif err == subprocess.STDOUT:
+            child_fds.append(child_fds[1])
+        else:
+            child_fds.append(2)
+
+        request = dict(path=path, args=args,
+                       env=dict(env if env is not None else os.environ),
+                       cwd=cwd or os.getcwd())
+        sock = None
+        try:
+            sock = self._connect()
+            for fd in child_fds:
+                sendfd(sock.fileno(), fd)
+            sock.sendall(json.dumps(request) + '\n')
+            reply = json.loads(_recv_line(sock))
+        except (socket.error, ValueError, OSError), e:
+            reply = dict(error=str(e))
+        except ZygoteError, e:
+            reply = dict(error=str(e))
+        finally:
+            for fd in to_close:
+                os.close(fd)
+
+        if 'error' in reply:
+            if sock is not None:
+                sock.close()
+            for f in parent_files.values():
+                f.close()
+            raise ZygoteError(reply['error'])
+        self.spawned += 1
+        return ZygoteChild(sock, reply['pid'], **parent_files)
+
+
+class ZygoteChild(object):
+    """Popen-like handle of a process forked by the zygote."""
+    def __init__(self, sock, pid, stdin=None, stdout=None, stderr=None):
+        self._sock = sock
+        self._buf = ''
+        self._lock = threading.Lock()
+        self.pid = pid
+        self.stdin = stdin
+        self.stdout = stdout
+        self.stderr = stderr
+        self.returncode = None
+
+    def _read_returncode(self, block):
+        self._sock.setblocking(block)
+        try:
+            chunk = self._sock.recv(64)
+        except socket.error, e:
+            if e.errno in [errno.EAGAIN, errno.EWOULDBLOCK]:
+                return
+            chunk = ''
+        if chunk:
+            self._buf += chunk
+            if self._buf.endswith('\n'):
+                self.returncode = int(self._buf)
+                self._sock.close()
+        elif not self._alive():
+            # the zygote died before the child - its exit status is lost
+            self.returncode = UNKNOWN_RETURNCODE
+            self._sock.close()
+        elif block:
+            time.sleep(REAP_INTERVAL)
+
+    def _alive(self):
+        try:
+            os.kill(self.pid, 0)
+        except OSError, e:
+            return e.errno != errno.ESRCH
+        return True
+
+    def poll(self):
+        with self._lock:
+            if self.returncode is None:
+                self._read_returncode(False)
+            return self.returncode
+
+    def wait(self):
+        with self._lock:
+            while self.returncode is None:
+                self._read_returncode(True)
+            return self.returncode
+
+    def send_signal(self, sig):
+        if self.poll() is None:
+            try:
+                os.kill(self.pid, sig)
+            except OSError, e:
+                if e.errno != errno.ESRCH:
+                    raise
+
+    def terminate(self):
+        self.send_signal(signal.SIGTERM)
+
+    def kill(self):
+        self.send_signal(signal.SIGKILL)
+
+    def communicate(self, input=None):
+        if input and self.stdin is not None:
+            self.stdin.write(input)
+        out = self.stdout.read() if self.stdout is not None else None
+        err = self.stderr.read() if self.stderr is not None else None
+        self.wait()
+        return out, err
+
+
+class ZygoteServer(object):
+    """The zygote process` main loop."""
+    def __init__(self, socket_path, preload=PRELOAD_MODULES):
+        self.socket_path = socket_path
+        self.preload = preload
+        self.children = {}
+        self._ppid = os.getppid()
+        self._env = dict(os.environ)
+        self._sys_path = list(sys.path)
+        self._sock = None
+
+    def preload_modules(self):
+        for module in self.preload:
+            try:
+                __import__(module)
+            except Exception, e:
+                sys.stderr.write("zygote: could not preload %s: %s\n" % (module, e))
+
+    def run(self):
+        self.preload_modules()
+        self._sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self._sock.bind(self.socket_path)
+        self._sock.listen(LISTEN_BACKLOG)
+        try:
+            # exit with the supervisor
+            while os.getppid() == self._ppid:
+                ready, _, _ = select.select([self._sock], [], [], REAP_INTERVAL)
+                if ready:
+                    conn, _ = self._sock.accept()
+                    self._handle_request(conn)
+                self._reap()
+        finally:
+            self._sock.close()
+            if os.path.exists(self.socket_path):
+                os.unlink(self.socket_path)
+
+    def _handle_request(self, conn):
+        fds = []
+        try:
+            for i in range(3):
+                fds.append(recvfd(conn.fileno()))
+            request = json.loads(_recv_line(conn))
+            env = request['env']
+            if any(env.get(key) != self._env.get(key) for key in ENV_SENSITIVE):
+                raise ZygoteError("Environment differs from the zygote`s one")
+            pid = os.fork()
+        except Exception, e:
+            self._reply(conn, dict(error=str(e)))
+            conn.close()
+        else:
+            if pid == 0:
+                self._sock.close()
+                conn.close()
+                self._run_child(request, fds)
+            self.children[pid] = conn
+            self._reply(conn, dict(pid=pid))
+        finally:
+            for fd in fds:
+                os.close(fd)
+
+    def _reply(self, conn, data):
+        try:
+            conn.sendall(json.dumps(data) + '\n')
+        except socket.error:
+            pass
+
+    def _reap(self):
+        while self.children:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except OSError, e:
+                if e.errno == errno.ECHILD:
+                    break
+                raise
+            if pid == 0:
+                break
+            conn = self.children.pop(pid, None)
+            if conn is None:
+                continue
+            if os.WIFSIGNALED(status):
+                code = -os.WTERMSIG(status)
+            else:
+                code = os.WEXITSTATUS(status)
+            try:
+                conn.sendall(str(code) + '\n')
+            except socket.error:
+                pass
+            conn.close()
+
+    def _run_child(self, request, fds):
+        """Become the requested process. Never returns."""
+        code = 1
+        try:
+            for conn in self.children.values():
+                conn.close()
+            for sig in [signal.SIGTERM, signal.SIGINT, signal.SIGCHLD]:
+                signal.signal(sig, signal.SIG_DFL)
+            for target, fd in enumerate(fds):
+                os.dup2(fd, target)
+            for fd in set(fds):
+                if fd > 2:
+                    os.close(fd)
+            sys.stdin = os.fdopen(0, 'r')
+            sys.stdout = os.fdopen(1, 'w')
+            sys.stderr = os.fdopen(2, 'w')
+
+            env = dict((_str(key), _str(val)) for key, val in request['env'].iteritems())
+            os.chdir(_str(request['cwd']))
+            os.environ.clear()
+            os.environ.update(env)
+            path = _str(request['path'])
+            sys.argv = [path] + [_str(arg) for arg in request['args']]
+            python_path = [p for p in env.get('PYTHONPATH', '').split(os.pathsep)
+                           if p and p not in self._sys_path]
+            sys.path = [os.path.dirname(os.path.abspath(path))] + python_path +\
+                        self._sys_path[1:]
+
+            # forked children would share the zygote`s random state
+            import random
+            random.seed()
+            if 'numpy' in sys.modules:
+                sys.modules['numpy'].random.seed()
+
+            code = self._exec_script(path)
+        finally:
+            try:
+                sys.stdout.flush()
+                sys.stderr.flush()
+            finally:
+                os._exit(code)
+
+    def _exec_script(self, path):
+        import runpy
+        import atexit
+        import traceback
+        try:
+            runpy.run_path(path, run_name='__main__')
+            code = 0
+        except SystemExit, e:
+            if e.code is None:
+                code = 0
+            elif isinstance(e.code, int):
+                code = e.code
+            else:
+                sys.stderr.write(str(e.code) + '\n')
+                code = 1
+        except:
+            traceback.print_exc()
+            code = 1
+        atexit._run_exitfuncs()
+        return code
+
+
+def zygote_arg_parser():
+    parser = argparse.ArgumentParser(
+                    description='Preload common peer modules and fork peers on request')
+    parser.add_argument('--socket', required=True,
+                    help='Path of the unix socket to listen on')
+    parser.add_argument('--preload', nargs='*', default=PRELOAD_MODULES,
+                    help='Modules to import before forking')
+    return parser
+
+
+if __name__ == '__main__':
+    args = zygote_arg_parser().parse_args()
+    ZygoteServer(args.socket, args.preload).run()
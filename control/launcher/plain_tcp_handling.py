@@ -23,7 +23,7 @@ class OBCIPeerTCP( SocketServer.TCPServer):#, SocketServer.ThreadingMixIn):
         daemon_threads = True
         server_timeout = 45
         SocketServer.TCPServer.__init__(self,server_address, handler_class, bind_and_activate)
-        self.mtool = OBCIMessageTool(message_templates)
+        self.mtool = OBCIMessageTool(message_templates, codec='json')
         self.pl = PollingObject()
         self.ctx = zmq_ctx
         self.rep_addr = zmq_rep_addr
@@ -137,7 +137,7 @@ class OBCIPeerRequestHandler(SocketServer.StreamRequestHandler):
             srv_sock.close()
         if not response:
             self.bad_response(self.wfile, det)
-        self.rfile.write(make_unicode_netstring(response))
+        self.rfile.write(make_unicode_netstring(self.server.mtool.json_msg(response)))
 
     def bad_response(self, rstream, details):
         print "baaaad", request, details
@@ -175,7 +175,7 @@ class OBCIServerRequestHandler(OBCIPeerRequestHandler):
                 self.bad_response(self.wfile, det)
                 return
 
-        data = make_unicode_netstring(response)
+        data = make_unicode_netstring(self.server.mtool.json_msg(response))
         self.wfile.write(data)
 
 
@@ -1,25 +1,32 @@
 #!/usr/bin/python
 # -*- coding: utf-8 -*-
 
-import threading
+import os
 import time
+import errno
+import fcntl
+import select
+import threading
 import subprocess
 
 from collections import deque
-try:
-    from Queue import Queue, Empty, Full
-except ImportError:
-    from queue import Queue, Empty, Full  # python 3.x
 
 
-STDIO_QUEUE_MAX_SIZE = 8192
 STDIO_TAIL_LEN = 128
 DEFAULT_TAIL_RQ = 10
 
-LINES_TO_GET = 5
-IO_WAIT = 0.5
+READ_SIZE = 65536
+# longer lines are split
+MAX_LINE_LEN = 65536
 
-def start_stdio_handler(popen_obj, stdio_actions, name, 
+# log data is written in batches of at least LOG_BATCH_SIZE bytes or
+# at least every LOG_FLUSH_INTERVAL s
+LOG_BATCH_SIZE = 65536
+LOG_FLUSH_INTERVAL = 0.5
+# log data waiting for write (of all processes) above this is dropped
+LOG_MEMORY_BUDGET = 8 * 1024 * 1024
+
+def start_stdio_handler(popen_obj, stdio_actions, name,
                                             stdout_log, stderr_log):
     io_handler = None
     if stdio_actions != (None, None, None):
@@ -40,49 +47,58 @@ def start_stdio_handler(popen_obj, stdio_actions, name,
         io_handler.start_output_handler()
     return io_handler
 
+
+_multiplexer = None
+_multiplexer_lock = threading.Lock()
+
+def io_multiplexer():
+    """Return the StdioMultiplexer shared by all handlers of this process."""
+    global _multiplexer
+    with _multiplexer_lock:
+        if _multiplexer is None:
+            _multiplexer = StdioMultiplexer()
+        return _multiplexer
+
+
 class ProcessIOHandler(object):
-    """Processes data from descriptors (stdout, stderr) in separate threads.
-    Access to the tail is available through attributes *out_tail* and *err_tail*.
+    """Processes data from descriptors (stdout, stderr) of a child process.
+    Descriptors of all handlers are read by one thread of the shared
+    StdioMultiplexer. Access to the tail is available through attributes
+    *out_tail* and *err_tail* (last STDIO_TAIL_LEN lines).
     Communication through stdin, if given, is possible by *communicate()* method.
     Data is saved to log files if the handles were given in init.
+    Log data which did not fit into LOG_MEMORY_BUDGET is counted
+    in *dropped_bytes*.
     """
     def __init__(self, name, stdout=None, stderr=None, stdin=None,
-                            out_log=None, err_log=None):
+                            out_log=None, err_log=None, multiplexer=None):
         self.name = name
         self.stdout = stdout
         self.stdin = stdin
         self.stderr = stderr
 
-        self._output_handler_thread = None
-        self._stop = False
-
-        self._out_q, self._stdout_thread, self._out_log = \
-                                self.__init_io(self.stdout, out_log)
-
         self.out_tail = deque(maxlen=STDIO_TAIL_LEN)
         self.err_tail = deque(maxlen=STDIO_TAIL_LEN)
+        self.dropped_bytes = 0
 
-
-        self._err_q, self._stderr_thread, self._err_log = \
-                                    self.__init_io(self.stderr, err_log)
-
-        if self.stdout or self.stderr:
-            self._start_background_io_reading()
-
-    def __init_io(self, stream, log_name):
-
-        q, thr, log = None, None, None
-        if stream is not None:
-            q = Queue(maxsize=STDIO_QUEUE_MAX_SIZE)
-            thr = threading.Thread(target=self._read, args=(stream, q))
-            thr.daemon = True
-
-            if log_name:
-                try:
-                    log = open(log_name, 'w', buffering=0)
-                except IOError:
-                    print "{0} : Could not open log {1}".format(self.name, log_name)
-        return q, thr, log
+        self._multiplexer = multiplexer or io_multiplexer()
+        self._stop = False
+        self._streams = []
+        if self.stdout is not None:
+            self._streams.append(_Stream(self, self.stdout, self.out_tail,
+                                         self.__open_log(out_log)))
+        if self.stderr is not None:
+            self._streams.append(_Stream(self, self.stderr, self.err_tail,
+                                         self.__open_log(err_log)))
+
+    def __open_log(self, log_name):
+        log = None
+        if log_name:
+            try:
+                log = open(log_name, 'w', buffering=0)
+            except IOError:
+                print "{0} : Could not open log {1}".format(self.name, log_name)
+        return log
 
     def communicate(self, input, response_timeout=None):
         #TODO :)
@@ -97,103 +113,255 @@ class ProcessIOHandler(object):
                 break
         return list(reversed(data))
 
-    def process_output(self, lines=None, timeout=None):
-        """Check if there is data from stdout and stderr (if it is monitored).
-        Update tail and save data to logs, if they were given in init.
-        Timeout (s) means blocking queue reads, no timeout - non blocking.
-        """
-        if self.stdout:
-            self._handle_stdout(lines=lines, timeout=timeout)
-        if self.stderr:
-            self._handle_stderr(lines=lines, timeout=timeout)
-
     def start_output_handler(self):
-        self._output_handler_thread = threading.Thread(
-                                        target=self._output_handler)
-        self._output_handler_thread.deamon = True
-        self._output_handler_thread.start()
+        for stream in self._streams:
+            self._multiplexer.add(stream)
 
     def stop_output_handler(self):
         self._stop = True
-        self._output_handler_thread.join(timeout=0.1)
-        if self.stdout:
-            self._stdout_thread.join(timeout=0.1)
-        if self.stderr:
-            self._stderr_thread.join(timeout=0.1)
+        for stream in self._streams:
+            self._multiplexer.remove(stream)
+        for stream in self._streams:
+            stream.closed.wait(0.1)
         return self.finished()
 
     def is_running(self):
         return self._stop == False and self.__io_readers_alive()
 
     def finished(self):
-        return (not self.__io_readers_alive()) and \
-                (not self._output_handler_thread.is_alive())
+        return not self.__io_readers_alive()
 
     def __io_readers_alive(self):
-        alive = False
-        if self.stdout:
-            alive = self._stdout_thread.is_alive()
-        if self.stderr:
-            alive = alive or self._stderr_thread.is_alive()
-        return alive
-
-    def _output_handler(self):
-        while self.__io_readers_alive() and not self._stop:
-            self.process_output(lines=LINES_TO_GET, timeout=IO_WAIT)
-            time.sleep(0.1)#IO_WAIT)
-
-    def _start_background_io_reading(self):
-        if self.stdout:
-            self._stdout_thread.start()
-        if self.stderr:
-            self._stderr_thread.start()
-
-    def _read(self, stream, queue):
-        print "reading... ", stream
-        for line in iter(stream.readline, ''):
-            try:
-                queue.put(line)
-                if self._stop:
-                    break
-            except Full:
-                #drop it :/
-                print "Queue full for stream {0} of {1}".format(stream, self.name)
-                print "Dropping line."
-
-        stream.close()
-
-
-    def _get_lines(self, stream, q, lines=None, timeout=None):
-        lines = lines if lines else 1
-        out = []
-        for num in range(lines):
-            try:
-                if timeout:
-                    line = q.get(block=True, timeout=timeout)
-                else:
-                    line = q.get(block=False)
-            except Empty:
-                return out
-            else: # got line
-                out.append(line)
-        return out
-
-
-    def _handle_stdout(self, lines=None, timeout=None):
-        self._handle_stdio(self.stdout, self._out_q,
-                            self._out_log, self.out_tail, lines, timeout)
-
-
-    def _handle_stdio(self, stream, q, log, tail, lines=None, timeout=None):
-        out = self._get_lines(stream, q, lines, timeout)
-        tail.extend(out)
-        if log is not None:
+        return any(not stream.closed.is_set() for stream in self._streams)
+
+    def _stream_closed(self, stream):
+        if self.dropped_bytes and not self.__io_readers_alive():
+            print "{0} : dropped {1} bytes of output (logs too slow)".format(
+                                                    self.name, self.dropped_bytes)
+
+
+class _Stream(object):
+    """Output descriptor of a child process: tail, log and unfinished line."""
+    def __init__(self, handler, stream, tail, log):
+        self.handler = handler
+        self.stream = stream
+        self.fd = stream.fileno()
+        self.tail = tail
+        self.log = log
+        self.partial = ''
+        self.closed = threading.Event()
+
+    def feed(self, data):
+        lines = (self.partial + data).split('\n')
+        self.partial = lines.pop()
+        lines = [line + '\n' for line in lines]
+        if len(self.partial) >= MAX_LINE_LEN:
+            lines.append(self.partial)
+            self.partial = ''
+        self.tail.extend(lines)
+        return ''.join(lines)
+
+    def finish(self):
+        data, self.partial = self.partial, ''
+        if data:
+            self.tail.append(data)
+        return data
+
+
+class StdioMultiplexer(object):
+    """Reads output of all child processes in one thread (epoll or poll).
+    Complete lines go to tails of the handlers, log data is passed to
+    a _LogWriter thread in batches.
+    """
+    def __init__(self, log_budget=LOG_MEMORY_BUDGET):
+        self._streams = {}
+        self._changes = []
+        self._lock = threading.Lock()
+        self._writer = _LogWriter(log_budget)
+        self._poller = select.epoll() if hasattr(select, 'epoll') else _Poll()
+        self._wakeup_r, self._wakeup_w = os.pipe()
+        for fd in [self._wakeup_r, self._wakeup_w]:
+            _set_nonblocking(fd)
+        self._poller.register(self._wakeup_r, select.POLLIN)
+        self._thread = None
+
+    def add(self, stream):
+        _set_nonblocking(stream.fd)
+        self._change(stream, True)
+
+    def remove(self, stream):
+        self._change(stream, False)
+
+    def _change(self, stream, add):
+        with self._lock:
+            self._changes.append((stream, add))
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._loop)
+                self._thread.daemon = True
+                self._thread.start()
+        self._wakeup()
+
+    def _wakeup(self):
+        try:
+            os.write(self._wakeup_w, 'x')
+        except OSError, e:
+            if e.errno != errno.EAGAIN:
+                raise
+
+    def _apply_changes(self):
+        with self._lock:
+            changes, self._changes = self._changes, []
+        for stream, add in changes:
+            if add and not stream.closed.is_set():
+                self._streams[stream.fd] = stream
+                self._poller.register(stream.fd, select.POLLIN)
+            elif not add and self._streams.get(stream.fd) is stream:
+                self._close(stream)
+
+    def _loop(self):
+        next_flush = None
+        while True:
+            timeout = -1 if next_flush is None else max(0, next_flush - time.time())
             try:
-                log.writelines(out)
-            except Exception, e:
-                print e, e.args
-
-
-    def _handle_stderr(self, lines=None, timeout=None):
-        self._handle_stdio(self.stderr, self._err_q,
-                            self._err_log, self.err_tail, lines, timeout)
\ No newline at end of file
+                events = self._poller.poll(timeout)
+            except (IOError, select.error), e:
+                if e.args[0] == errno.EINTR:
+                    continue
+                raise
+            for fd, event in events:
+                if fd == self._wakeup_r:
+                    self._drain_wakeup()
+                elif fd in self._streams:
+                    self._read(self._streams[fd])
+            self._apply_changes()
+
+            # logs are written when a batch is big enough or (here) when
+            # the oldest pending data waits longer than LOG_FLUSH_INTERVAL
+            if not self._writer.has_pending():
+                next_flush = None
+            elif next_flush is None:
+                next_flush = time.time() + LOG_FLUSH_INTERVAL
+            elif time.time() >= next_flush:
+                self._writer.flush()
+                next_flush = None
+
+    def _drain_wakeup(self):
+        try:
+            while os.read(self._wakeup_r, 512):
+                pass
+        except OSError, e:
+            if e.errno != errno.EAGAIN:
+                raise
+
+    def _read(self, stream):
+        try:
+            data = os.read(stream.fd, READ_SIZE)
+        except OSError, e:
+            if e.errno in [errno.EAGAIN, errno.EINTR]:
+                return
+            data = ''
+        if data:
+            self._log(stream, stream.feed(data))
+        else:
+            self._close(stream)
+
+    def _log(self, stream, data):
+        if data and stream.log is not None:
+            if not self._writer.write(stream.log, data):
+                stream.handler.dropped_bytes += len(data)
+
+    def _close(self, stream):
+        self._log(stream, stream.finish())
+        self._poller.unregister(stream.fd)
+        del self._streams[stream.fd]
+        if stream.log is not None:
+            self._writer.close(stream.log)
+        stream.stream.close()
+        stream.closed.set()
+        stream.handler._stream_closed(stream)
+
+
+class _LogWriter(object):
+    """Writes log data in a separate thread, so that a slow disk does not
+    stop reading of the pipes. At most *budget* bytes wait for write."""
+    def __init__(self, budget):
+        self.budget = budget
+        self.pending_bytes = 0
+        self._pending = []
+        self._cond = threading.Condition()
+        self._flush_rq = False
+        self._thread = None
+
+    def write(self, log, data):
+        with self._cond:
+            if self.pending_bytes + len(data) > self.budget:
+                return False
+            self._pending.append((log, data))
+            self.pending_bytes += len(data)
+            if self.pending_bytes >= LOG_BATCH_SIZE:
+                self._notify()
+        return True
+
+    def close(self, log):
+        with self._cond:
+            self._pending.append((log, None))
+            self._notify()
+
+    def has_pending(self):
+        return bool(self._pending) and not self._flush_rq
+
+    def flush(self):
+        with self._cond:
+            if self._pending:
+                self._notify()
+
+    def _notify(self):
+        self._flush_rq = True
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._loop)
+            self._thread.daemon = True
+            self._thread.start()
+        self._cond.notify()
+
+    def _loop(self):
+        while True:
+            with self._cond:
+                while not self._flush_rq:
+                    self._cond.wait()
+                self._flush_rq = False
+                pending, self._pending = self._pending, []
+            batches, order, written = {}, [], 0
+            for log, data in pending:
+                if log not in batches:
+                    batches[log] = []
+                    order.append(log)
+                batches[log].append(data)
+            for log in order:
+                chunks = batches[log]
+                data = ''.join(chunk for chunk in chunks if chunk is not None)
+                try:
+                    if data:
+                        log.write(data)
+                    if None in chunks:
+                        log.close()
+                except Exception, e:
+                    print e, e.args
+                written += len(data)
+            with self._cond:
+                self.pending_bytes -= written
+
+
+class _Poll(object):
+    """select.poll with epoll`s timeout (s) convention."""
+    def __init__(self):
+        self._poll = select.poll()
+        self.register = self._poll.register
+        self.unregister = self._poll.unregister
+
+    def poll(self, timeout=-1):
+        return self._poll.poll(None if timeout < 0 else int(timeout * 1000))
+
+
+def _set_nonblocking(fd):
+    flags = fcntl.fcntl(fd, fcntl.F_GETFL)
+    fcntl.fcntl(fd, fcntl.F_SETFL, flags | os.O_NONBLOCK)
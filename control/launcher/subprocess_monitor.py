@@ -15,6 +15,7 @@ from obci.control.launcher.launcher_messages import message_templates
 from obci.utils.openbci_logging import get_logger
 
 from process_io_handler import start_stdio_handler
+from peer_zygote import ZygoteError
 from local_process import LocalProcess
 from remote_process import RemoteProcess
 from process import FAILED, FINISHED, TERMINATED, UNKNOWN,\
@@ -48,6 +49,8 @@ class SubprocessMonitor(object):
         self._mtool = OBCIMessageTool(message_templates)
         self.poller = PollingObject()
         self._proc_lock = threading.RLock()
+        # PeerZygote forking python processes, if set
+        self.zygote = None
 
     def not_running_processes(self):
         status = {}
@@ -141,6 +144,17 @@ class SubprocessMonitor(object):
             self.logger.error(details)
             return None, details
 
+    def _zygote_launch(self, path, args, stdio_actions, env):
+        try:
+            popen_obj = self.zygote.spawn(path, args, stdio_actions, env=env)
+            details = "Zygote forked " + str([path] + args[:2]) + "(...)"
+            self.logger.info(details)
+            return popen_obj, details
+        except ZygoteError as e:
+            details = "Zygote launch failed for {0} [{1}], falling back to exec".format(
+                                                                        path, e)
+            self.logger.warning(details)
+            return None, details
 
     def new_local_process(self, path, args, proc_type='', name='',
                                 capture_io= STDOUT | STDIN,
@@ -158,7 +172,11 @@ class SubprocessMonitor(object):
         timeout_desc = register_timeout_desc
 
         self.logger.debug('process launch arg list:  %s', launch_args)
-        popen_obj, details = self._local_launch(launch_args, std_actions, env)
+        popen_obj = None
+        if self.zygote is not None and path.endswith('.py'):
+            popen_obj, details = self._zygote_launch(path, args, std_actions, env)
+        if popen_obj is None:
+            popen_obj, details = self._local_launch(launch_args, std_actions, env)
 
         if popen_obj is None:
             return None, details
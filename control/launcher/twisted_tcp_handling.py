@@ -53,7 +53,7 @@ class OBCIProxy(NetstringReceiver):
                     msg = self.factory.mtool.fill_msg("rq_error", details=det)
                     return
 
-        encmsg = msg.encode('utf-8')
+        encmsg = self.factory.mtool.json_msg(msg).encode('utf-8')
         self.sendString(encmsg)
         reactor.callFromThread(self.sendString, encmsg)
 
@@ -74,7 +74,7 @@ class OBCIProxyFactory(Factory):
                         "start_eeg_signal"]:
             self.long_rqs[msgtype] = self._make_pull_sock()
 
-        self.mtool = OBCIMessageTool(message_templates)
+        self.mtool = OBCIMessageTool(message_templates, codec='json')
 
     def _make_pull_sock(self):
         sock = self.ctx.socket(zmq.PULL)
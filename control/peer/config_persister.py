@@ -0,0 +1,120 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import os
+import time
+import threading
+
+FLUSH_DELAY = 0.5
+MAX_RETRY_DELAY = 30.0
+
+class WriteBehindPersister(object):
+    """
+    Coalesces save requests and writes them from a timer thread.
+
+    mark_dirty() only records that the state changed and (if no flush
+    is scheduled yet) starts a timer, so many changes in a short time
+    end up in one write. The state is taken by snapshot() with lock held -
+    the owner should hold the same lock while changing the state.
+    write(snapshot) is called without the lock, outside the owner`s thread.
+    flush() writes pending changes at once, close() flushes and disables
+    further timers (to be called at shutdown). A failed write is retried
+    from a timer, the delay doubles with every consecutive failure (up to
+    MAX_RETRY_DELAY or delay, whichever is greater).
+    """
+    def __init__(self, snapshot, write, delay=FLUSH_DELAY, logger=None, lock=None):
+        self._snapshot = snapshot
+        self._write = write
+        self._delay = float(delay)
+        self._logger = logger
+        self.lock = lock if lock is not None else threading.RLock()
+        self._flush_lock = threading.Lock()
+        self._timer = None
+        self._closed = False
+        self._failures = 0
+
+        self.pending_writes = 0
+        self.flushes = 0
+        self.coalesced_writes = 0
+        self.failed_flushes = 0
+        self.last_flush_latency = 0.0
+        self.max_flush_latency = 0.0
+
+    def mark_dirty(self):
+        with self.lock:
+            self.pending_writes += 1
+            if self._closed or self._timer is not None:
+                timer = None
+            else:
+                self._timer = timer = threading.Timer(self._delay, self.flush)
+                timer.daemon = True
+        if timer is not None:
+            timer.start()
+        elif self._closed:
+            self.flush()
+
+    def flush(self):
+        with self._flush_lock:
+            with self.lock:
+                if self._timer is not None:
+                    self._timer.cancel()
+                    self._timer = None
+                pending = self.pending_writes
+                if not pending:
+                    return
+                self.pending_writes = 0
+                data = self._snapshot()
+            start = time.time()
+            try:
+                self._write(data)
+            except Exception, e:
+                self.failed_flushes += 1
+                self._failures += 1
+                retry = min(self._delay * 2 ** self._failures,
+                            max(self._delay, MAX_RETRY_DELAY))
+                with self.lock:
+                    self.pending_writes += pending
+                    if self._closed or self._timer is not None:
+                        timer = None
+                    else:
+                        self._timer = timer = threading.Timer(retry, self.flush)
+                        timer.daemon = True
+                if timer is not None:
+                    timer.start()
+                if self._logger is not None:
+                    self._logger.error("failed to save config: " + str(e) +
+                                       (", retry in " + str(retry) + " s" if timer else ""))
+                return
+            self._failures = 0
+            latency = time.time() - start
+            self.flushes += 1
+            self.coalesced_writes += pending - 1
+            self.last_flush_latency = latency
+            self.max_flush_latency = max(self.max_flush_latency, latency)
+
+    def close(self):
+        with self.lock:
+            self._closed = True
+        self.flush()
+
+    def get_stats(self):
+        return {'pending_writes': self.pending_writes,
+                'flushes': self.flushes,
+                'coalesced_writes': self.coalesced_writes,
+                'failed_flushes': self.failed_flushes,
+                'last_flush_latency': self.last_flush_latency,
+                'max_flush_latency': self.max_flush_latency}
+
+
+def atomic_write(path, data, mode=None):
+    """Write data to path through a temporary file in the same directory
+    renamed over path, so readers never see a partially written file."""
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w') as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    if mode is not None:
+        os.chmod(tmp_path, mode)
+    os.rename(tmp_path, path)
+
@@ -8,11 +8,17 @@ import signal
 import ConfigParser
 import inspect
 import os
+import sys
+import atexit
+import threading
+import StringIO
 
 
 from multiplexer.multiplexer_constants import peers, types
 from multiplexer.clients import BaseMultiplexerServer, connect_client
 from obci.control.peer.peer_cmd import PeerCmd
+from obci.control.peer.config_persister import WriteBehindPersister, atomic_write, \
+                                                FLUSH_DELAY
 from obci.configs import settings
 
 
@@ -28,10 +34,7 @@ class ConfigServer(BaseMultiplexerServer):
 
     def __init__(self, addresses):
         super(ConfigServer, self).__init__(addresses=addresses, type=peers.CONFIG_SERVER)
-        self._configs = {}
-        self._ext_configs = {}
-        self._ready_peers = []
-        self.__to_all = False
+        self._init_state()
         self.spare_conn = connect_client(addresses=addresses, type=peers.CONFIGURER)
         self.mtool = OBCIMessageTool(message_templates)
         self.launcher_sock = None
@@ -46,6 +49,14 @@ class ConfigServer(BaseMultiplexerServer):
                                 file_level=params['local_params'].get('file_log_level', None),
                                 mx_level=params['local_params'].get('mx_log_level', None),
                                 stream_level=params['local_params'].get('console_log_level', None))
+        self._persister = WriteBehindPersister(self._config_snapshot,
+                                self._write_config,
+                                delay=params['local_params'].get('config_flush_delay', FLUSH_DELAY),
+                                logger=self.logger, lock=self._state_lock)
+        atexit.register(self._close_persister)
+        signal.signal(signal.SIGTERM, self._signal_handler)
+        signal.signal(signal.SIGINT, self._signal_handler)
+
         self._old_configs = self._stored_config()
         self._restore_peers = params['local_params'].get('restore_peers', '').split()
 
@@ -56,6 +67,7 @@ class ConfigServer(BaseMultiplexerServer):
                 self._ready_peers.append(peer)
             if peer in self._old_configs["ext"]:
                 self._ext_configs[peer] = dict(self._old_configs["ext"][peer])
+                self._index_ext_params(peer)
 
         if self.addr != '':
             self.ctx = zmq.Context()
@@ -69,6 +81,37 @@ class ConfigServer(BaseMultiplexerServer):
             else:
                 self.logger.info("OK: connected to " + self.addr)
                 
+    def _init_state(self):
+        self._configs = {}
+        self._ext_configs = {}
+        self._ready_peers = []
+
+        # (owner, param) -> set of (peer, local param name) referencing
+        # it in their external params, and a cache of resolved references:
+        # (peer, param) -> (owner of the value, its name), or None when the
+        # reference leads to a not registered peer
+        self._consumers = {}
+        self._resolved = {}
+        # multiplexer instance ids of registered peers, used to send
+        # PARAMS_CHANGED to interested peers only
+        self._peer_addresses = {}
+        self._recipients = None
+        # held while handling a message, config snapshots for
+        # the persister are taken under the same lock
+        self._state_lock = threading.RLock()
+
+        # Peers waiting for their launch dependencies (PEERS_READY_QUERY with
+        # wait_timeout) and for external params (GET_CONFIG_PARAMS with
+        # wait_timeout). Queries are not answered until the condition is met,
+        # the reply is pushed from handle_peer_ready/handle_register_peer_config.
+        # A subscriber which times out simply asks again, replacing
+        # its old subscription.
+        self._ready_subscribers = {} # peer_id -> (unready deps, reply address)
+        self._dep_subscribers = {} # dep peer_id -> set of waiting peer_ids
+        self._params_subscribers = {} # (peer_id, param owner) -> (request, reply address)
+        self._pushes = []
+        self._current_mxmsg = None
+
     def _config_path(self):
         peer_file = inspect.getfile(self.__init__)
         base_name = os.path.basename(peer_file).rsplit('.', 1)[0]
@@ -94,6 +137,14 @@ class ConfigServer(BaseMultiplexerServer):
         return json.loads(stored)
 
     def _save_config(self):
+        """Schedule saving configs - they are written by the persister`s
+        thread, many changes in a short time are saved at once."""
+        self._persister.mark_dirty()
+
+    def _config_snapshot(self):
+        return json.dumps({"local":self._configs, "ext":self._ext_configs})
+
+    def _write_config(self, stored_config):
         base_config_path = self._config_path()
         parser = ConfigParser.RawConfigParser()
         # print "CONFIG_SERVER save path", base_config_path
@@ -103,36 +154,53 @@ class ConfigServer(BaseMultiplexerServer):
         if not parser.has_section('local_params'):
             parser.add_section('local_params')
 
-        parser.set('local_params', 'stored_config', json.dumps({"local":self._configs, "ext":self._ext_configs}))
+        parser.set('local_params', 'stored_config', stored_config)
         parser.set('local_params', 'launcher_socket_addr', '')
         parser.set('local_params', 'experiment_uuid', '')
         parser.set('local_params', 'restore_peers', '')
 
-        with open(base_config_path, 'w') as f:
-            parser.write(f)
-        try:
-            os.chmod(base_config_path, 0777)
-        except OSError, e:
-            self.logger.error("tried to change permissions to" + \
-                                    base_config_path + "to 777 but" + str(e))
-        else:
-            self.logger.info("changed permissions to " + base_config_path + " to 777")
+        data = StringIO.StringIO()
+        parser.write(data)
+        atomic_write(base_config_path, data.getvalue(), 0777)
+
+    def persistence_stats(self):
+        return self._persister.get_stats()
+
+    def _close_persister(self):
+        self._persister.close()
+        self.logger.info("config saved, persistence stats: %s",
+                                            str(self.persistence_stats()))
+
+    def _signal_handler(self, signum, frame):
+        # exit here, configs are flushed by the atexit handler
+        # when no message is being handled
+        self.logger.info("got signal %s, exiting", str(signum))
+        sys.exit(0)
 
 
     def handle_message(self, mxmsg):
 
         message = cmsg.unpack_msg(mxmsg.type, mxmsg.message)
 
-        msg, mtype, launcher_msg = self._call_handler(mxmsg.type, message)
+        with self._state_lock:
+            self._current_mxmsg = mxmsg
+            msg, mtype, launcher_msg = self._call_handler(mxmsg.type, message)
+            self._current_mxmsg = None
         if msg is None:
             self.no_response()
         else:
             msg = cmsg.pack_msg(msg)
-            if self.__to_all:
+            recipients, self._recipients = self._recipients, None
+            if recipients is None:
+                self.send_message(message=msg, to=int(mxmsg.from_), type=mtype, flush=True)
+            elif None in recipients:
+                # a peer with unknown address (eg. restored) is interested
                 self.send_message(message=msg, to=0, type=mtype, flush=True)
-                self.__to_all = False
             else:
-                self.send_message(message=msg, to=int(mxmsg.from_), type=mtype, flush=True)
+                recipients.add(int(mxmsg.from_))
+                for to in recipients:
+                    self.send_message(message=msg, to=to, type=mtype, flush=True)
+        self._send_pushes()
         if launcher_msg is not None and self.launcher_sock is not None:
             self.logger.info('SENDING msg ' + launcher_msg[:100] + '[...]')
             send_msg(self.launcher_sock, launcher_msg)
@@ -146,10 +214,7 @@ class ConfigServer(BaseMultiplexerServer):
         elif mtype == types.UNREGISTER_PEER_CONFIG:
             return self.handle_unregister_peer_config(message)
         elif mtype == types.UPDATE_PARAMS:
-            msg, mtype, launcher_msg =  self.handle_update_params(message)
-            if mtype != types.CONFIG_ERROR:
-                self.__to_all = True
-            return msg, mtype, launcher_msg
+            return self.handle_update_params(message)
         elif mtype == types.PEER_READY:
             return self.handle_peer_ready(message)
         elif mtype == types.PEERS_READY_QUERY:
@@ -159,11 +224,31 @@ class ConfigServer(BaseMultiplexerServer):
         else:
             return None, None, None
 
+    def _reply_address(self):
+        mxmsg = self._current_mxmsg
+        return int(mxmsg.from_), mxmsg.id, mxmsg.workflow
+
+    def _push(self, msg, mtype, address):
+        self._pushes.append((msg, mtype, address))
+
+    def _send_pushes(self):
+        pushes, self._pushes = self._pushes, []
+        for msg, mtype, (to, references, workflow) in pushes:
+            self.send_message(message=cmsg.pack_msg(msg), to=to, type=mtype,
+                              references=references, workflow=workflow,
+                              flush=True)
+
     def handle_get_config_params(self, message_obj):
         param_owner = message_obj.receiver
         names = message_obj.param_names
         if param_owner == 'config_server':
             params = dict(experiment_uuid=self.exp_uuid)
+        elif message_obj.wait_timeout > 0 and self._current_mxmsg is not None:
+            params = self._get_params(param_owner, names)
+            if isinstance(params, tuple):
+                self._params_subscribers[(message_obj.sender, param_owner)] = \
+                                        (message_obj, self._reply_address())
+                return None, None, None
 
         # elif param_owner not in self._configs:
         #     return cmsg.fill_msg(types.CONFIG_ERROR), types.CONFIG_ERROR, None
@@ -177,27 +262,104 @@ class ConfigServer(BaseMultiplexerServer):
             if isinstance(params, tuple):
                 return params
 
+        return self._config_params_msg(param_owner, params)
+
+    def _config_params_msg(self, param_owner, params):
         mtype = types.CONFIG_PARAMS
         msg = cmsg.fill_msg(mtype, sender=param_owner)
         cmsg.dict2params(params, msg)
         return msg, mtype, None
 
+    def _notify_params_subscribers(self):
+        for key, (message_obj, address) in self._params_subscribers.items():
+            params = self._get_params(message_obj.receiver, message_obj.param_names)
+            if not isinstance(params, tuple):
+                del self._params_subscribers[key]
+                msg, mtype, _ = self._config_params_msg(message_obj.receiver, params)
+                self._push(msg, mtype, address)
+
     def _get_params(self, param_owner, names, params=None):
         if params is None:
             params = {}
         self.logger.info("looking for %s, param names=%s" % (param_owner, str(names)))
         if param_owner not in self._configs:
-            self.logger.info("%s not in %s" % (param_owner, str(self._configs)))
+            self.logger.info("%s not registered" % param_owner)
             return cmsg.fill_msg(types.CONFIG_ERROR), types.CONFIG_ERROR, None
 
         for name in names:
             if name in self._configs[param_owner]:
                 params[name] = self._configs[param_owner][name]
             elif name in self._ext_configs[param_owner]:
-                owner, name = self._ext_configs[param_owner][name]
-                params = self._get_params(owner, [name], params)
+                source = self._resolve(param_owner, name)
+                if source is None:
+                    self.logger.info("%s.%s refers to a not registered peer" % \
+                                                        (param_owner, name))
+                    return cmsg.fill_msg(types.CONFIG_ERROR), types.CONFIG_ERROR, None
+                owner, src_name = source
+                if src_name in self._configs[owner]:
+                    params[name] = self._configs[owner][src_name]
         return params
 
+    def _resolve(self, peer_id, name):
+        """Return (owner, name) of the local param which external param
+        name of peer_id refers to (through any number of peers)
+        or None if some peer on the way is not registered yet."""
+        key = (peer_id, name)
+        try:
+            return self._resolved[key]
+        except KeyError:
+            pass
+        owner, src_name = self._ext_configs[peer_id][name]
+        if owner not in self._configs:
+            return None
+        if src_name in self._configs[owner] or \
+                src_name not in self._ext_configs.get(owner, {}):
+            source = (owner, src_name)
+        else:
+            source = self._resolve(owner, src_name)
+        if source is not None:
+            self._resolved[key] = source
+        return source
+
+    def _find_cycle(self, peer_id):
+        """Return a list of params forming a reference cycle
+        through external params of peer_id or None."""
+        for name in self._ext_configs[peer_id]:
+            path = [(peer_id, name)]
+            owner, src_name = self._ext_configs[peer_id][name]
+            while src_name not in self._configs.get(owner, {}) and \
+                    src_name in self._ext_configs.get(owner, {}):
+                if (owner, src_name) in path:
+                    return path
+                path.append((owner, src_name))
+                owner, src_name = self._ext_configs[owner][src_name]
+        return None
+
+    def _index_ext_params(self, peer_id):
+        for name, (owner, src_name) in self._ext_configs[peer_id].iteritems():
+            self._consumers.setdefault((owner, src_name), set()).add((peer_id, name))
+        self._resolved = {}
+
+    def _unindex_ext_params(self, peer_id):
+        for name, (owner, src_name) in self._ext_configs.get(peer_id, {}).iteritems():
+            consumers = self._consumers.get((owner, src_name), set())
+            consumers.discard((peer_id, name))
+            if not consumers:
+                self._consumers.pop((owner, src_name), None)
+        self._resolved = {}
+
+    def _param_consumers(self, param_owner, names):
+        """Return a set of peers which refer (directly or through other peers)
+        to any of param_owner`s params names."""
+        found = set()
+        todo = [(param_owner, name) for name in names]
+        while todo:
+            for consumer in self._consumers.get(todo.pop(), ()):
+                if consumer not in found:
+                    found.add(consumer)
+                    todo.append(consumer)
+        return set([peer_id for peer_id, name in found])
+
 
     def handle_register_peer_config(self, message_obj):
         params = cmsg.params2dict(message_obj)
@@ -210,21 +372,39 @@ class ConfigServer(BaseMultiplexerServer):
             mtype = types.CONFIG_ERROR
             msg = cmsg.fill_msg(mtype)
         else:
+            self._unindex_ext_params(peer_id)
             self._configs[peer_id] = params
             self._ext_configs[peer_id] = ext_params
+            cycle = self._find_cycle(peer_id)
+            if cycle is not None:
+                del self._configs[peer_id]
+                del self._ext_configs[peer_id]
+                mtype = types.CONFIG_ERROR
+                msg = cmsg.fill_msg(mtype, error_str="External params cycle: {0}".format(
+                                    ' -> '.join(['.'.join(p) for p in cycle])))
+                self.logger.error(msg.error_str)
+                return msg, mtype, None
+
+            self._index_ext_params(peer_id)
+            if self._current_mxmsg is not None:
+                self._peer_addresses[peer_id] = int(self._current_mxmsg.from_)
             mtype = types.PEER_REGISTERED
             msg = cmsg.fill_msg(mtype, peer_id=peer_id)
             launcher_msg = self.mtool.fill_msg('obci_peer_registered',
                                             peer_id=peer_id, params=params)
+            self._notify_params_subscribers()
         self._save_config()
         return msg, mtype, launcher_msg
 
 
     def handle_unregister_peer_config(self, message_obj):
         self._configs.pop(message_obj.peer_id)
+        self._unindex_ext_params(message_obj.peer_id)
+        self._peer_addresses.pop(message_obj.peer_id, None)
 
         if message_obj.peer_id in self._ready_peers:
             self._ready_peers.remove(message_obj.peer_id)
+        self._unsubscribe(message_obj.peer_id)
         self._save_config()
         return None, None, None #TODO confirm unregister...
 
@@ -249,6 +429,10 @@ class ConfigServer(BaseMultiplexerServer):
             cmsg.dict2params(updated, msg)
             launcher_msg = self.mtool.fill_msg('obci_peer_params_changed',
                                         peer_id=param_owner, params=updated)
+            interested = self._param_consumers(param_owner, updated.keys())
+            interested.add(param_owner)
+            self._recipients = set([self._peer_addresses.get(peer_id) \
+                                                for peer_id in interested])
             self._save_config()
             return msg, mtype, launcher_msg
         return None, None, None
@@ -258,6 +442,7 @@ class ConfigServer(BaseMultiplexerServer):
         if peer_id not in self._configs:
             return cmsg.fill_msg(types.CONFIG_ERROR), types.CONFIG_ERROR, None
         self._ready_peers.append(peer_id)
+        self._notify_ready_subscribers(peer_id)
         launcher_msg = self.mtool.fill_msg('obci_peer_ready', peer_id=peer_id)
         return message_obj, types.PEER_READY, launcher_msg
 
@@ -267,14 +452,40 @@ class ConfigServer(BaseMultiplexerServer):
         if peer_id not in self._configs:
             return cmsg.fill_msg(types.CONFIG_ERROR), types.CONFIG_ERROR, None
 
-        green_light = True
-        for dep in message_obj.deps:
-            if not dep in self._ready_peers:
-                green_light = False
+        waiting_for = set([dep for dep in message_obj.deps \
+                                        if dep not in self._ready_peers])
+        green_light = not waiting_for
+
+        if not green_light and message_obj.wait_timeout > 0 and \
+                                            self._current_mxmsg is not None:
+            self._unsubscribe(peer_id)
+            self._ready_subscribers[peer_id] = (waiting_for, self._reply_address())
+            for dep in waiting_for:
+                self._dep_subscribers.setdefault(dep, set()).add(peer_id)
+            return None, None, None
 
         return cmsg.fill_msg(types.READY_STATUS,
                             receiver=peer_id, peers_ready=green_light), types.READY_STATUS, None
 
+    def _notify_ready_subscribers(self, ready_peer):
+        for peer_id in self._dep_subscribers.pop(ready_peer, ()):
+            waiting_for, address = self._ready_subscribers[peer_id]
+            waiting_for.discard(ready_peer)
+            if not waiting_for:
+                del self._ready_subscribers[peer_id]
+                self._push(cmsg.fill_msg(types.READY_STATUS, receiver=peer_id,
+                                        peers_ready=True),
+                            types.READY_STATUS, address)
+
+    def _unsubscribe(self, peer_id):
+        waiting_for, _ = self._ready_subscribers.pop(peer_id, ((), None))
+        for dep in waiting_for:
+            self._dep_subscribers[dep].discard(peer_id)
+            if not self._dep_subscribers[dep]:
+                del self._dep_subscribers[dep]
+        for key in [key for key in self._params_subscribers if key[0] == peer_id]:
+            del self._params_subscribers[key]
+
     def handle_launcher_command(self, message_obj):
         return None, None, message_obj.serialized_msg
 
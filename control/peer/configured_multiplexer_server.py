@@ -23,7 +23,8 @@ class ConfiguredMultiplexerServer(BaseMultiplexerServer):
                             stream_level=self.get_param('console_log_level'),
                             mx_level=self.get_param('mx_log_level'),
                             conn=self.conn,
-                            log_dir=self.get_param('log_dir'))
+                            log_dir=self.get_param('log_dir'),
+                            mx_addresses=addresses)
         self.config.logger = self.logger
 
         self.config.connection = self.conn
@@ -26,6 +26,14 @@ WAIT_READY_SIGNAL = "wait_ready_signal"
 CONFIG_FILE = "config_file"
 PEER_ID = "peer_id"
 
+# How long (s) a single subscription for dependencies' readiness or external
+# params waits for config server's push before it is renewed.
+# 0 means plain polling (the config server replies immediately).
+WAIT_TIMEOUT = 5.0
+EXT_PARAMS_TIMEOUT = 120
+POLL_INTERVAL = 0.4
+READY_POLL_INTERVAL = 2
+
 LOGGER = logging.getLogger("peer_control_default_logger")
 
 class PeerControl(object):
@@ -38,6 +46,7 @@ class PeerControl(object):
         self.peer_params_changed = param_change_method
 
         self.peer_id = None
+        self.wait_timeout = WAIT_TIMEOUT
         self.connection = connection
         self.query_conn = conn = connect_client(type=peers.CONFIGURER,
                                             addresses=settings.MULTIPLEXER_ADDRESSES)
@@ -267,35 +276,40 @@ class PeerControl(object):
                                                             str(reply))
 
 
-    def _request_ext_params(self, connection, retries=300):
-        #TODO set timeout and retry count
+    def _request_ext_params(self, connection, timeout=EXT_PARAMS_TIMEOUT):
+        """Get values of external params from the config server.
+        With wait_timeout set the config server answers a request only when
+        all requested params are known, so every source is asked once
+        (and again only if the subscription expires)."""
         self.logger.info("requesting external parameters")
         if self.peer is None:
             raise NoPeerError
 
-        def _unset_param_count():
-            return reduce(lambda x, y: x + y,
-                            [len(self.core.unset_params_for_source(src)) \
-                                for src in self.core.used_config_sources()], 0)
-
+        deadline = time.time() + timeout
         ready, details = self.core.config_ready()
-        while not ready and retries:
+        while not ready and time.time() < deadline:
+            progress, answered, queried = False, False, False
             for src in self.core.used_config_sources():
                 params = self.core.unset_params_for_source(src).keys()
+                if not params:
+                    continue
+                queried = True
 
                 msg = cmsg.fill_msg(types.GET_CONFIG_PARAMS,
                                     sender=self.peer_id,
                                     param_names=params,
-                                    receiver=self.core.config_sources[src])
+                                    receiver=self.core.config_sources[src],
+                                    wait_timeout=self.wait_timeout)
 
                 #print "requesting: {0}".format(msg)
-                reply = self.__query(connection, cmsg.pack_msg(msg),
+                reply = self._wait_query(connection, cmsg.pack_msg(msg),
                                     types.GET_CONFIG_PARAMS)
 
                 if reply == None:
                     # raise something?
                     continue
 
+                answered = True
                 if reply.type == types.CONFIG_ERROR:
                     self.logger.warning("peer {0} has not yet started".format(msg.receiver))
 
@@ -305,13 +319,15 @@ class PeerControl(object):
 
                     for par, val in params.iteritems():
                         self.core.set_param_from_source(reply_msg.sender, par, val)
+                    progress = progress or len(params) > 0
                 else:
                     self.logger.error("WTF? {0}".format(reply.message))
 
-            # print '.',#"{0} external params still unset".format(_unset_param_count())
-            time.sleep(0.4)
             ready, details = self.core.config_ready()
-            retries -= 1
+            # nothing to ask for (e.g. no ids of launch dependencies yet)
+            # or nothing new in the answers - wait before asking again
+            if not ready and not progress and (answered or not queried):
+                time.sleep(POLL_INTERVAL)
 
         if ready:
             self.logger.info("External parameters initialised %s",
@@ -339,11 +355,11 @@ class PeerControl(object):
         others = self.core.launch_deps.values()
         self.logger.info('waiting for other peers %s: ', str(others))
         msg = cmsg.fill_and_pack(types.PEERS_READY_QUERY, sender=self.peer_id,
-                                                            deps=others)
+                                deps=others, wait_timeout=self.wait_timeout)
 
         ready = False
         while not ready:
-            reply = self.__query(connection, msg, types.PEERS_READY_QUERY)
+            reply = self._wait_query(connection, msg, types.PEERS_READY_QUERY)
             # print 'got!', reply, cmsg.unpack_msg(reply.type, reply.message)
             if reply is None:
                 #TODO sth bad happened, raise exception?
@@ -354,9 +370,26 @@ class PeerControl(object):
 
                 ready = rmsg.peers_ready
             if not ready:
-                time.sleep(2)
+                # not a pushed reply - config server was polled
+                time.sleep(READY_POLL_INTERVAL)
         self.logger.info("Dependencies are ready, I can start working")
 
+    def _wait_query(self, conn, msg, msgtype):
+        """Query the config server and block until it pushes the reply.
+        Return None when the subscription expired."""
+        if not self.wait_timeout:
+            return self.__query(conn, msg, msgtype)
+        try:
+            reply = conn.query(message=msg, type=msgtype,
+                                    timeout=self.wait_timeout)
+        except OperationFailed:
+            self.logger.error("Could not connect to config server")
+            time.sleep(POLL_INTERVAL)
+            reply = None
+        except OperationTimedOut:
+            self.logger.info("still waiting for config server (%s)", str(msgtype))
+            reply = None
+        return reply
 
     def __query(self, conn, msg, msgtype):
         try:
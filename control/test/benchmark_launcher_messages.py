@@ -0,0 +1,75 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""Round-trip (fill_msg + unpack_msg) time of all launcher message
+templates: the old json implementation (template copy, json, setattr on
+a plain object), and OBCIMessageTool with json and binary codecs.
+Messages are filled with a few typical values.
+
+Usage: python benchmark_launcher_messages.py [repeats]
+"""
+
+import sys
+import json
+import time
+
+from obci.control.common.message import OBCIMessageTool, BASIC_MSG
+from obci.control.launcher.launcher_messages import message_templates
+
+VALUES = dict(sender='5f3a8c2e-1b7d-4e55-9a0c-3d2b8e6f1a47',
+              peer_id='amplifier',
+              params={'sampling_rate': '256', 'channels_info': '1;2;3;4;5;6;7;8'},
+              machine='localhost', pid=12345, status_name='running',
+              details={'launch_timings': {'spawned': 0.1, 'ready': 1.2}})
+
+class LegacyMessage(object):
+    pass
+
+def legacy_round_trip(templates, msg_type, kwargs):
+    msg = templates[msg_type].copy()
+    msg.update(BASIC_MSG)
+    msg['type'] = msg_type
+    for key, value in kwargs.iteritems():
+        msg[key] = value
+    packed = json.dumps(msg)
+    m = LegacyMessage()
+    for key, value in json.loads(packed).iteritems():
+        setattr(m, key, value)
+    return m
+
+def messages(templates):
+    return [(msg_type, dict((key, value) for key, value in VALUES.iteritems()
+                            if key in templates[msg_type] or key in BASIC_MSG))
+            for msg_type in sorted(templates)]
+
+def measure(round_trip, msgs, repeats):
+    start = time.time()
+    for i in xrange(repeats):
+        for msg_type, kwargs in msgs:
+            round_trip(msg_type, kwargs)
+    return (time.time() - start) / (repeats * len(msgs))
+
+def run(repeats=2000):
+    tools = [(codec, OBCIMessageTool(message_templates, codec=codec))
+             for codec in ['json', 'binary']]
+    templates = tools[0][1].templates
+    msgs = messages(templates)
+
+    results = [('legacy', measure(lambda t, kw: legacy_round_trip(templates, t, kw),
+                                  msgs, repeats), None)]
+    for codec, tool in tools:
+        size = sum(len(tool.fill_msg(t, **kw)) for t, kw in msgs)
+        results.append((codec, measure(
+                        lambda t, kw: tool.unpack_msg(tool.fill_msg(t, **kw)),
+                        msgs, repeats), size))
+    legacy_size = sum(len(json.dumps(legacy_round_trip(templates, t, kw).__dict__))
+                      for t, kw in msgs)
+    results[0] = results[0][:2] + (legacy_size,)
+
+    print("Round trip of "+str(len(msgs))+" message templates, "+str(repeats)+" times")
+    print("codec  | us / message | bytes (all templates)")
+    for codec, t, size in results:
+        print("%-6s | %12.2f | %d" % (codec, t * 1e6, size))
+
+if __name__ == '__main__':
+    args = [int(a) for a in sys.argv[1:2]]
+    run(*args)
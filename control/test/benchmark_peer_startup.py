@@ -0,0 +1,186 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""Measure how long it takes N dummy peers to get their external params
+and synchronize readiness through the config server, with polling
+(wait_timeout = 0, the old behaviour) and with config server`s pushes.
+
+Peers form a chain: peer_i takes its param from peer_{i-1} and depends on it,
+peer_0 depends on the last peer. Peers are started at the same moment in
+random order. The multiplexer is replaced by an in-process stand-in routing
+queries to the config server and its (possibly delayed) replies back.
+
+Usage: python benchmark_peer_startup.py [number_of_peers] [repeats]
+"""
+
+import sys, time, random, logging, threading, itertools, Queue
+
+from multiplexer.multiplexer_constants import types
+from azouk._allinone import OperationTimedOut
+
+from obci.control.peer import peer_config
+from obci.control.peer.peer_control import PeerControl
+from obci.control.peer.config_server import ConfigServer
+from obci.control.common.message import OBCIMessageTool
+from obci.control.launcher.launcher_messages import message_templates
+
+LOGGER = logging.getLogger("benchmark_peer_startup")
+LOGGER.addHandler(logging.NullHandler())
+LOGGER.propagate = False
+
+PUSH_WAIT_TIMEOUT = 5.0
+
+class LocalMessage(object):
+    def __init__(self, id, from_, type, message, references=0, workflow=''):
+        self.id = id
+        self.from_ = from_
+        self.type = type
+        self.message = message
+        self.references = references
+        self.workflow = workflow
+
+class LocalMultiplexer(object):
+    """Routes queries of LocalConnections to one LocalConfigServer."""
+    def __init__(self):
+        self._ids = itertools.count(1)
+        self._inbox = Queue.Queue()
+        self._pending = {}
+        self._lock = threading.Lock()
+        self.queries = 0
+
+    def connect(self):
+        return LocalConnection(self, self._ids.next())
+
+    def query(self, from_, message, type, timeout):
+        mxmsg = LocalMessage(self._ids.next(), from_, type, message)
+        slot = [threading.Event(), None]
+        with self._lock:
+            self._pending[mxmsg.id] = slot
+            self.queries += 1
+        # Event.wait with a timeout polls in python 2, a timer does not
+        timer = threading.Timer(timeout, slot[0].set)
+        timer.daemon = False
+        timer.start()
+        self._inbox.put(mxmsg)
+        slot[0].wait()
+        timer.cancel()
+        with self._lock:
+            del self._pending[mxmsg.id]
+        if slot[1] is None:
+            raise OperationTimedOut()
+        return slot[1]
+
+    def deliver(self, message, type, to, references, workflow):
+        with self._lock:
+            slot = self._pending.get(references)
+            if slot is not None:
+                slot[1] = LocalMessage(self._ids.next(), 0, type, message,
+                                       references, workflow)
+                slot[0].set()
+
+    def serve(self, server):
+        while True:
+            mxmsg = self._inbox.get()
+            if mxmsg is None:
+                break
+            server.last_mxmsg = mxmsg
+            server.handle_message(mxmsg)
+
+    def stop(self):
+        self._inbox.put(None)
+
+class LocalConnection(object):
+    def __init__(self, mx, instance_id):
+        self.mx = mx
+        self.instance_id = instance_id
+
+    def query(self, message, type, timeout=10.0):
+        return self.mx.query(self.instance_id, message, type, timeout)
+
+class LocalConfigServer(ConfigServer):
+    def __init__(self, mx):
+        self._init_state()
+        self.mx = mx
+        self.mtool = OBCIMessageTool(message_templates)
+        self.launcher_sock = None
+        self.exp_uuid = ''
+        self.logger = LOGGER
+        self.last_mxmsg = None
+
+    def send_message(self, message, type, to=0, references=None,
+                     workflow=None, flush=False):
+        if references is None:
+            references = self.last_mxmsg.id
+            workflow = self.last_mxmsg.workflow
+        self.mx.deliver(message, type, to, references, workflow)
+
+    def no_response(self):
+        pass
+
+    def _save_config(self):
+        pass
+
+class DummyPeer(object):
+    pass
+
+def dummy_peer_control(peer_id, source, dep, wait_timeout):
+    ctl = PeerControl.__new__(PeerControl)
+    ctl.core = peer_config.PeerConfig(peer_id)
+    ctl.peer_id = peer_id
+    ctl.peer = DummyPeer()
+    ctl.logger = LOGGER
+    ctl.wait_timeout = wait_timeout
+    ctl.core.add_local_param('value', peer_id)
+    if source is not None:
+        ctl.core.set_config_source('src', source)
+        ctl.core.add_external_param_def('src_value', 'src.value')
+    ctl.core.set_launch_dependency('dep', dep)
+    return ctl
+
+def start_peer(ctl, conn, done):
+    ready, details = ctl._request_ext_params(conn)
+    assert ready, details
+    ctl.register_config(conn)
+    ctl.send_peer_ready(conn)
+    done[ctl.peer_id] = time.time()
+
+def measure(num_of_peers, wait_timeout, seed=0):
+    """Return time (s) needed to start all peers and number of queries
+    the config server had to handle."""
+    mx = LocalMultiplexer()
+    server = threading.Thread(target=mx.serve, args=(LocalConfigServer(mx),))
+    server.daemon = True
+    server.start()
+
+    names = ['peer_%d' % i for i in range(num_of_peers)]
+    peers = [dummy_peer_control(name,
+                                names[i-1] if i > 0 else None,
+                                names[i-1],
+                                wait_timeout) for i, name in enumerate(names)]
+    random.Random(seed).shuffle(peers)
+    done = {}
+    threads = [threading.Thread(target=start_peer, args=(ctl, mx.connect(), done))
+               for ctl in peers]
+    for t in threads:
+        t.daemon = True
+
+    start = time.time()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    mx.stop()
+    server.join()
+    assert len(done) == num_of_peers
+    return max(done.values()) - start, mx.queries
+
+def run(num_of_peers=20, repeats=1):
+    print("Startup of "+str(num_of_peers)+" chained peers")
+    print("mode    | time (s) | config server queries")
+    for mode, wait_timeout in [('polling', 0), ('push', PUSH_WAIT_TIMEOUT)]:
+        for r in range(repeats):
+            t, queries = measure(num_of_peers, wait_timeout, r)
+            print("%-7s | %8.3f | %d" % (mode, t, queries))
+
+if __name__ == '__main__':
+    args = [int(a) for a in sys.argv[1:3]]
+    run(*args)
@@ -0,0 +1,80 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""Compare startup-to-ready time of peers launched with a plain exec
+of a python interpreter (cold) and forked from a warm PeerZygote.
+
+The dummy peer imports the modules a zygote preloads and writes 'ready'
+to its stdout, which is read through a pipe by the launcher - the same
+way process_io_handler reads peers` output. Peers are launched one after
+another, the zygote is started (and warmed up) before measurement.
+
+Usage: python benchmark_zygote_startup.py [number_of_peers]
+"""
+
+import os
+import sys
+import time
+import shutil
+import tempfile
+import subprocess
+
+from obci.control.launcher.peer_zygote import PeerZygote, PRELOAD_MODULES
+
+PEER_SCRIPT = """
+import sys
+for module in %r:
+    try:
+        __import__(module)
+    except ImportError:
+        pass
+sys.stdout.write('ready ' + ' '.join(sys.argv[1:]) + '\\n')
+sys.stdout.flush()
+"""
+
+def startup_time(launch):
+    start = time.time()
+    proc = launch()
+    line = proc.stdout.readline()
+    ready = time.time() - start
+    assert line.startswith('ready'), line
+    proc.wait()
+    assert proc.returncode == 0, proc.returncode
+    return ready
+
+def measure(num_of_peers, tmp_dir):
+    path = os.path.join(tmp_dir, 'dummy_peer.py')
+    with open(path, 'w') as f:
+        f.write(PEER_SCRIPT % PRELOAD_MODULES)
+    stdio = (subprocess.PIPE, subprocess.STDOUT, None)
+
+    cold = [startup_time(lambda: subprocess.Popen(['python', path, str(i)],
+                                                  stdout=subprocess.PIPE,
+                                                  stderr=subprocess.STDOUT,
+                                                  close_fds=True))
+            for i in range(num_of_peers)]
+
+    zygote = PeerZygote(os.path.join(tmp_dir, 'zygote.sock'))
+    zygote.start()
+    try:
+        startup_time(lambda: zygote.spawn(path, ['warmup'], stdio))
+        warm = [startup_time(lambda: zygote.spawn(path, [str(i)], stdio))
+                for i in range(num_of_peers)]
+    finally:
+        zygote.stop()
+    return cold, warm
+
+def run(num_of_peers=10):
+    tmp_dir = tempfile.mkdtemp()
+    try:
+        cold, warm = measure(num_of_peers, tmp_dir)
+    finally:
+        shutil.rmtree(tmp_dir)
+    print("Startup-to-ready time of "+str(num_of_peers)+" peers")
+    print("mode   | mean (ms) | max (ms)")
+    for mode, times in [('cold', cold), ('zygote', warm)]:
+        print("%-6s | %9.1f | %8.1f" % (mode, 1000 * sum(times) / len(times),
+                                         1000 * max(times)))
+
+if __name__ == '__main__':
+    args = [int(a) for a in sys.argv[1:2]]
+    run(*args)
@@ -0,0 +1,101 @@
+#!/usr/bin/python
+
+import os
+import time
+import tempfile
+import shutil
+
+from obci.control.peer.config_persister import WriteBehindPersister, atomic_write
+
+
+class TestWriteBehindPersister(object):
+
+    def setup(self):
+        self.state = {'a': 0}
+        self.written = []
+
+    def _persister(self, delay):
+        return WriteBehindPersister(lambda: dict(self.state),
+                                    self.written.append, delay=delay)
+
+    def test_changes_are_coalesced(self):
+        p = self._persister(60)
+        for i in range(10):
+            with p.lock:
+                self.state['a'] = i
+            p.mark_dirty()
+        assert self.written == []
+        assert p.get_stats()['pending_writes'] == 10
+
+        p.flush()
+        assert self.written == [{'a': 9}]
+        stats = p.get_stats()
+        assert stats['pending_writes'] == 0
+        assert stats['flushes'] == 1
+        assert stats['coalesced_writes'] == 9
+
+    def test_flush_without_changes_does_not_write(self):
+        p = self._persister(60)
+        p.flush()
+        assert self.written == []
+
+    def test_timer_flush(self):
+        p = self._persister(0.01)
+        p.mark_dirty()
+        p.mark_dirty()
+        time.sleep(0.3)
+        assert len(self.written) == 1
+        assert p.get_stats()['pending_writes'] == 0
+
+    def test_close_flushes_and_writes_synchronously_later(self):
+        p = self._persister(60)
+        p.mark_dirty()
+        p.close()
+        assert len(self.written) == 1
+        p.mark_dirty()
+        assert len(self.written) == 2
+
+    def test_failed_write_keeps_changes_pending(self):
+        def fail(data):
+            raise IOError("disk full")
+        p = WriteBehindPersister(lambda: dict(self.state), fail, delay=60)
+        p.mark_dirty()
+        p.flush()
+        stats = p.get_stats()
+        assert stats['pending_writes'] == 1
+        assert stats['failed_flushes'] == 1
+        p.close()
+
+    def test_failed_write_is_retried(self):
+        failures = [IOError("disk full"), IOError("disk full")]
+        def write(data):
+            if failures:
+                raise failures.pop()
+            self.written.append(data)
+        p = WriteBehindPersister(lambda: dict(self.state), write, delay=0.01)
+        p.mark_dirty()
+        deadline = time.time() + 2.0
+        while not self.written and time.time() < deadline:
+            time.sleep(0.01)
+        assert self.written == [{'a': 0}]
+        stats = p.get_stats()
+        assert stats['pending_writes'] == 0
+        assert stats['failed_flushes'] == 2
+        assert stats['flushes'] == 1
+
+
+class TestAtomicWrite(object):
+
+    def setup(self):
+        self.dir = tempfile.mkdtemp()
+
+    def teardown(self):
+        shutil.rmtree(self.dir)
+
+    def test_atomic_write(self):
+        path = os.path.join(self.dir, 'config_server.ini')
+        atomic_write(path, 'old')
+        atomic_write(path, 'new', 0644)
+        assert open(path).read() == 'new'
+        assert os.stat(path).st_mode & 0777 == 0644
+        assert os.listdir(self.dir) == ['config_server.ini']
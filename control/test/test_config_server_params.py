@@ -0,0 +1,99 @@
+#!/usr/bin/python
+
+import logging
+
+from multiplexer.multiplexer_constants import types
+
+import obci.control.common.config_message as cmsg
+from obci.control.common.message import OBCIMessageTool
+from obci.control.launcher.launcher_messages import message_templates
+from obci.control.peer.config_server import ConfigServer
+
+
+class MxMessage(object):
+    def __init__(self, from_):
+        self.from_ = from_
+        self.id = 0
+        self.workflow = ''
+
+
+class TestConfigServerParams(object):
+
+    def setup(self):
+        srv = self.srv = ConfigServer.__new__(ConfigServer)
+        srv._init_state()
+        srv.logger = logging.getLogger("test_config_server_params")
+        srv.mtool = OBCIMessageTool(message_templates)
+        srv._save_config = lambda: None
+
+    def register(self, peer_id, params, ext_params={}, address=1):
+        msg = cmsg.fill_msg(types.REGISTER_PEER_CONFIG, sender=peer_id)
+        cmsg.dict2params(params, msg)
+        cmsg.dict2params(ext_params, msg, field_name="ext_params")
+        self.srv._current_mxmsg = MxMessage(address)
+        reply = self.srv.handle_register_peer_config(msg)
+        self.srv._current_mxmsg = None
+        return reply
+
+    def get_params(self, owner, names):
+        msg = cmsg.fill_msg(types.GET_CONFIG_PARAMS, sender='x',
+                            receiver=owner, param_names=names)
+        reply, mtype, _ = self.srv.handle_get_config_params(msg)
+        if mtype == types.CONFIG_PARAMS:
+            return cmsg.params2dict(reply)
+        return mtype
+
+    def update(self, owner, params):
+        msg = cmsg.fill_msg(types.UPDATE_PARAMS, sender=owner)
+        cmsg.dict2params(params, msg)
+        return self.srv.handle_update_params(msg)
+
+    def test_ext_params_resolved_through_peers(self):
+        self.register('amp', dict(sampling_rate=256), address=11)
+        self.register('filter', dict(order=2),
+                      dict(fs=('amp', 'sampling_rate')), address=12)
+        self.register('analysis', dict(),
+                      dict(rate=('filter', 'fs')), address=13)
+
+        assert self.get_params('filter', ['fs', 'order']) == dict(fs=256, order=2)
+        assert self.get_params('analysis', ['rate']) == dict(rate=256)
+
+    def test_unregistered_source(self):
+        self.register('analysis', dict(), dict(rate=('filter', 'fs')))
+        assert self.get_params('analysis', ['rate']) == types.CONFIG_ERROR
+        assert self.get_params('filter', ['fs']) == types.CONFIG_ERROR
+
+    def test_cycle_rejected(self):
+        self.register('a', dict(), dict(x=('b', 'y')))
+        self.register('b', dict(), dict(y=('c', 'z')))
+        msg, mtype, _ = self.register('c', dict(), dict(z=('a', 'x')))
+        assert mtype == types.CONFIG_ERROR
+        assert 'cycle' in msg.error_str
+        assert 'c' not in self.srv._configs
+        assert self.srv._consumers[('c', 'z')] == set([('b', 'y')])
+
+    def test_update_sent_to_consumers_only(self):
+        self.register('amp', dict(sampling_rate=256, gain=1), address=11)
+        self.register('filter', dict(),
+                      dict(fs=('amp', 'sampling_rate')), address=12)
+        self.register('analysis', dict(),
+                      dict(rate=('filter', 'fs')), address=13)
+        self.register('logic', dict(), dict(g=('amp', 'gain')), address=14)
+        self.register('other', dict(p=1), address=15)
+
+        msg, mtype, _ = self.update('amp', dict(sampling_rate=512))
+        assert mtype == types.PARAMS_CHANGED
+        assert self.srv._recipients == set([11, 12, 13])
+        assert self.get_params('analysis', ['rate']) == dict(rate=512)
+
+        self.update('amp', dict(gain=2))
+        assert self.srv._recipients == set([11, 14])
+
+    def test_update_broadcast_for_unknown_address(self):
+        self.srv._configs['restored'] = dict()
+        self.srv._ext_configs['restored'] = dict(fs=['amp', 'sampling_rate'])
+        self.srv._index_ext_params('restored')
+        self.register('amp', dict(sampling_rate=256), address=11)
+
+        self.update('amp', dict(sampling_rate=512))
+        assert None in self.srv._recipients
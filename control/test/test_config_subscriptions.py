@@ -0,0 +1,204 @@
+#!/usr/bin/python
+
+import logging
+
+from multiplexer.multiplexer_constants import types
+
+import obci.control.common.config_message as cmsg
+from obci.control.common.message import OBCIMessageTool
+from obci.control.launcher.launcher_messages import message_templates
+from obci.control.peer.config_server import ConfigServer
+from obci.control.peer import peer_control
+
+
+class MxMessage(object):
+    def __init__(self, from_, id=0):
+        self.from_ = from_
+        self.id = id
+        self.workflow = ''
+
+
+class TestConfigServerSubscriptions(object):
+
+    def setup(self):
+        srv = self.srv = ConfigServer.__new__(ConfigServer)
+        srv._init_state()
+        srv.logger = logging.getLogger("test_config_subscriptions")
+        srv.mtool = OBCIMessageTool(message_templates)
+        srv._save_config = lambda: None
+
+    def handle(self, handler, msg, address=1, id=0):
+        self.srv._current_mxmsg = MxMessage(address, id)
+        reply = handler(msg)
+        self.srv._current_mxmsg = None
+        return reply
+
+    def register(self, peer_id, params, ext_params={}, address=1):
+        msg = cmsg.fill_msg(types.REGISTER_PEER_CONFIG, sender=peer_id)
+        cmsg.dict2params(params, msg)
+        cmsg.dict2params(ext_params, msg, field_name="ext_params")
+        return self.handle(self.srv.handle_register_peer_config, msg, address)
+
+    def ready(self, peer_id):
+        msg = cmsg.fill_msg(types.PEER_READY, peer_id=peer_id)
+        return self.srv.handle_peer_ready(msg)
+
+    def ready_query(self, peer_id, deps, address=1, id=0):
+        msg = cmsg.fill_msg(types.PEERS_READY_QUERY, sender=peer_id,
+                            deps=deps, wait_timeout=5.0)
+        return self.handle(self.srv.handle_peers_ready_query, msg, address, id)
+
+    def params_query(self, peer_id, owner, names, address=1, id=0):
+        msg = cmsg.fill_msg(types.GET_CONFIG_PARAMS, sender=peer_id,
+                            receiver=owner, param_names=names, wait_timeout=5.0)
+        return self.handle(self.srv.handle_get_config_params, msg, address, id)
+
+    def unregister(self, peer_id):
+        msg = cmsg.fill_msg(types.UNREGISTER_PEER_CONFIG, peer_id=peer_id)
+        return self.srv.handle_unregister_peer_config(msg)
+
+    def pushes(self):
+        pushes, self.srv._pushes = self.srv._pushes, []
+        return pushes
+
+    def test_ready_pushed_when_all_deps_ready(self):
+        for peer_id in ['amp', 'filter', 'logic']:
+            self.register(peer_id, dict())
+        assert self.ready_query('logic', ['amp', 'filter'], 13, 7) == (None, None, None)
+        assert self.srv._dep_subscribers == dict(amp=set(['logic']),
+                                                 filter=set(['logic']))
+
+        self.ready('amp')
+        assert self.pushes() == []
+        assert self.srv._ready_subscribers['logic'][0] == set(['filter'])
+
+        self.ready('filter')
+        [(msg, mtype, address)] = self.pushes()
+        assert mtype == types.READY_STATUS
+        assert msg.receiver == 'logic' and msg.peers_ready
+        assert address == (13, 7, '')
+        assert self.srv._ready_subscribers == {}
+        assert self.srv._dep_subscribers == {}
+
+    def test_ready_query_answered_at_once(self):
+        self.register('amp', dict())
+        self.register('logic', dict())
+        self.ready('amp')
+        msg, mtype, _ = self.ready_query('logic', ['amp'])
+        assert mtype == types.READY_STATUS and msg.peers_ready
+        assert self.srv._ready_subscribers == {}
+
+    def test_ready_pushed_to_every_subscriber(self):
+        for peer_id in ['amp', 'filter', 'logic']:
+            self.register(peer_id, dict())
+        self.ready_query('filter', ['amp'], 12)
+        self.ready_query('logic', ['amp'], 13)
+        self.ready('amp')
+        pushes = self.pushes()
+        assert sorted((msg.receiver, address[0]) for msg, _, address in pushes) == \
+                    [('filter', 12), ('logic', 13)]
+
+    def test_renewed_ready_query_replaces_subscription(self):
+        for peer_id in ['amp', 'filter', 'logic']:
+            self.register(peer_id, dict())
+        self.ready_query('logic', ['amp', 'filter'], 13, 1)
+        self.ready('amp')
+        self.ready_query('logic', ['filter'], 13, 2)
+        assert self.srv._dep_subscribers == dict(filter=set(['logic']))
+
+        self.ready('filter')
+        [(msg, mtype, address)] = self.pushes()
+        assert address == (13, 2, '')
+
+    def test_params_pushed_when_source_registers(self):
+        self.register('filter', dict(), dict(fs=('amp', 'sampling_rate')))
+        assert self.params_query('filter', 'filter', ['fs'], 12, 3) == (None, None, None)
+        assert ('filter', 'filter') in self.srv._params_subscribers
+
+        self.register('other', dict(p=1))
+        assert self.pushes() == []
+
+        self.register('amp', dict(sampling_rate=256))
+        [(msg, mtype, address)] = self.pushes()
+        assert mtype == types.CONFIG_PARAMS
+        assert msg.sender == 'filter'
+        assert cmsg.params2dict(msg) == dict(fs=256)
+        assert address == (12, 3, '')
+        assert self.srv._params_subscribers == {}
+
+    def test_params_query_answered_at_once(self):
+        self.register('amp', dict(sampling_rate=256))
+        msg, mtype, _ = self.params_query('filter', 'amp', ['sampling_rate'])
+        assert mtype == types.CONFIG_PARAMS
+        assert cmsg.params2dict(msg) == dict(sampling_rate=256)
+        assert self.srv._params_subscribers == {}
+
+    def test_unregister_removes_subscriptions(self):
+        for peer_id in ['amp', 'filter', 'logic']:
+            self.register(peer_id, dict())
+        self.ready_query('logic', ['amp'])
+        self.ready_query('filter', ['amp'])
+        self.params_query('logic', 'saver', ['path'])
+
+        self.unregister('logic')
+        assert self.srv._ready_subscribers.keys() == ['filter']
+        assert self.srv._dep_subscribers == dict(amp=set(['filter']))
+        assert self.srv._params_subscribers == {}
+
+        self.unregister('filter')
+        assert self.srv._ready_subscribers == {}
+        assert self.srv._dep_subscribers == {}
+        self.ready('amp')
+        assert self.pushes() == []
+
+
+class Clock(object):
+    """Fake time module - time passes only in sleep() (and a little
+    with every time() call)."""
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = 0
+        self.calls = 0
+
+    def time(self):
+        self.calls += 1
+        self.now += 0.001
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps += 1
+        self.now += seconds
+
+
+class NotReadyConfig(object):
+    """PeerConfig waiting for ids of launch dependencies - there are
+    no external params to ask for."""
+    def config_ready(self):
+        return False, dict(launch_deps=['amplifier'])
+
+    def used_config_sources(self):
+        return ['amplifier']
+
+    def unset_params_for_source(self, src):
+        return {}
+
+
+class TestRequestExtParams(object):
+
+    def setup(self):
+        self.clock = Clock()
+        self.time = peer_control.time
+        peer_control.time = self.clock
+
+    def teardown(self):
+        peer_control.time = self.time
+
+    def test_sleeps_when_nothing_to_ask_for(self):
+        pc = peer_control.PeerControl.__new__(peer_control.PeerControl)
+        pc.core = NotReadyConfig()
+        pc.peer = object()
+        pc.logger = logging.getLogger("test_config_subscriptions")
+        ready, details = pc._request_ext_params(None, timeout=2.0)
+        assert not ready
+        assert self.clock.sleeps == 5
+        assert self.clock.calls < 10
@@ -0,0 +1,135 @@
+#!/usr/bin/python
+
+import logging
+
+from obci.control.launcher import obci_process_supervisor
+from obci.control.launcher.obci_process_supervisor import OBCIProcessSupervisor
+from obci.control.launcher.system_config import OBCIExperimentConfig
+from obci.control.launcher.launcher_messages import message_templates
+from obci.control.common.message import OBCIMessageTool
+
+
+class Peer(object):
+    def __init__(self, peer_id, deps):
+        self.peer_id = peer_id
+        self.deps = deps
+
+    def list_launch_deps(self):
+        return self.deps
+
+
+def peer_order(deps):
+    """Return peer_order as sent by obci_experiment for launch
+    dependencies deps (peer_id -> list of peer_ids)."""
+    exp_config = OBCIExperimentConfig.__new__(OBCIExperimentConfig)
+    exp_config.peers = dict([(peer_id, Peer(peer_id, peer_deps)) \
+                                for peer_id, peer_deps in deps.iteritems()])
+    return exp_config.peer_order()
+
+
+def launch_data(peers):
+    return dict([(peer, dict(peer_type='obci_peer')) for peer in peers])
+
+
+class Message(object):
+    def __init__(self, **kwargs):
+        self.__dict__.update(kwargs)
+
+
+class TestLaunchLevels(object):
+
+    def setup(self):
+        self.sv = OBCIProcessSupervisor.__new__(OBCIProcessSupervisor)
+        self.sv.logger = logging.getLogger("test_launch_levels")
+
+    def levels(self, deps, peers=None):
+        self.sv.peer_order = peer_order(deps)
+        if peers is None:
+            peers = deps.keys()
+        levels = self.sv._launch_levels(launch_data(peers))
+        return [sorted(level) for level in levels]
+
+    def test_dependency_levels(self):
+        deps = dict(mx=[], config_server=[], amplifier=[],
+                    saver=['amplifier'], filter=['amplifier'],
+                    analysis=['filter'], logic=['analysis', 'saver'])
+        assert self.levels(deps) == [['config_server'], ['amplifier'],
+                                     ['filter', 'saver'], ['analysis'], ['logic']]
+
+    def test_independent_peers_in_one_level(self):
+        deps = dict(mx=[], config_server=[], amplifier=[], a=[], b=['amplifier'])
+        assert self.levels(deps) == [['config_server'], ['a', 'amplifier'], ['b']]
+
+    def test_explicit_config_server_dependency(self):
+        deps = dict(mx=[], config_server=['mx'], amplifier=['config_server'],
+                    logic=['amplifier'])
+        assert self.levels(deps) == [['config_server'], ['amplifier'], ['logic']]
+
+    def test_only_local_peers(self):
+        deps = dict(mx=[], config_server=[], amplifier=[],
+                    remote=['amplifier'], logic=['remote'])
+        assert self.levels(deps, ['config_server', 'amplifier', 'logic']) == \
+                                    [['config_server'], ['amplifier'], ['logic']]
+
+    def test_cycle_peers_launched_last(self):
+        deps = dict(mx=[], config_server=[], amplifier=[],
+                    a=['amplifier', 'b'], b=['a'], c=['b'])
+        assert self.levels(deps) == [['config_server'], ['amplifier'], ['a', 'b', 'c']]
+
+    def test_peers_without_order(self):
+        self.sv.peer_order = []
+        levels = self.sv._launch_levels(launch_data(['mx', 'amplifier',
+                                                     'config_server', 'logic']))
+        assert levels[0] == ['config_server']
+        assert sorted(levels[1]) == ['amplifier', 'logic']
+        assert len(levels) == 2
+
+
+class TestLaunchTimings(object):
+
+    def setup(self):
+        sv = self.sv = OBCIProcessSupervisor.__new__(OBCIProcessSupervisor)
+        sv.logger = logging.getLogger("test_launch_levels")
+        sv.logger.addHandler(logging.NullHandler())
+        sv.mtool = OBCIMessageTool(message_templates)
+        sv.uuid = 'uuid'
+        sv.machine = 'localhost'
+        sv.processes = {}
+        sv.launch_timings = dict(amplifier={}, logic={})
+        sv._launch_start = 0.0
+        sv._publish_socket = None
+        sv.subprocess_mgr = Message(process=lambda machine, pid: pid)
+        self.sent = []
+        self.send_msg = obci_process_supervisor.send_msg
+        obci_process_supervisor.send_msg = lambda sock, msg: self.sent.append(msg)
+
+    def teardown(self):
+        obci_process_supervisor.send_msg = self.send_msg
+
+    def spawned(self, name, pid, spawned):
+        self.sv.handle_process_spawned(Message(name=name, pid=pid, spawned=spawned,
+                                               path='path', args=[], proc_type='obci_peer',
+                                               details=None), None)
+
+    def test_registered_before_spawned_handled(self):
+        sv = self.sv
+        sv.launch_timings = {}
+        sv.peer_order = []
+        sv._ensure_zygote = lambda: None
+        sv._prepare_launch = lambda peer, data, restore_config: ('path', [])
+        sv._launch_thread = lambda launch: None
+        sv._launch_processes(launch_data(['config_server', 'amplifier']))
+        assert sv.launch_timings == dict(config_server={}, amplifier={})
+
+        sv._launch_start = 0.0
+        sv._launch_time('amplifier', 'registered')
+        self.spawned('amplifier', 123, 0.5)
+        timings = self.sv._launch_time('amplifier', 'ready')
+        assert sorted(timings.keys()) == ['ready', 'registered', 'spawned']
+        assert timings['spawned'] == 0.5
+        assert self.sv.processes['amplifier'] == 123
+
+    def test_failed_spawn_has_no_timings(self):
+        self.spawned('logic', None, 0.5)
+        assert 'logic' not in self.sv.launch_timings
+        assert self.sv._launch_time('logic', 'ready') is None
@@ -0,0 +1,72 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+import json
+
+from obci.control.common.message import OBCIMessageTool, LauncherMessage, \
+    OBCIMessageError
+from obci.control.common import message_codec
+from obci.control.launcher.launcher_messages import message_templates
+
+
+class TestMessageCodec(object):
+
+    def setup(self):
+        self.json_tool = OBCIMessageTool(message_templates, codec='json')
+        self.bin_tool = OBCIMessageTool(message_templates, codec='binary')
+
+    def test_round_trip_all_templates(self):
+        for tool in [self.json_tool, self.bin_tool]:
+            for msg_type in sorted(tool.templates):
+                packed = tool.fill_msg(msg_type, sender='sender')
+                for decoder in [self.json_tool, self.bin_tool]:
+                    msg = decoder.unpack_msg(packed)
+                    assert isinstance(msg, LauncherMessage)
+                    assert not hasattr(msg, '__dict__')
+                    assert msg.type == msg_type
+                    assert msg.sender == 'sender'
+                    assert msg.dict() == json.loads(self.json_tool.fill_msg(
+                                                    msg_type, sender='sender'))
+
+    def test_binary_frames(self):
+        packed = self.bin_tool.fill_msg('rq_ok', params=dict(a=[1, 2.5, u'ż']))
+        assert message_codec.is_binary(packed)
+        assert not message_codec.is_binary(self.json_tool.fill_msg('rq_ok'))
+        assert self.json_tool.unpack_msg(packed).params == dict(a=[1, 2.5, u'ż'])
+
+        as_json = self.bin_tool.json_msg(packed)
+        assert json.loads(as_json)['params'] == dict(a=[1, 2.5, u'ż'])
+
+    def test_unknown_fields_and_types(self):
+        msg = self.bin_tool.unpack_msg(json.dumps(dict(type='rq_ok', extra=1)))
+        assert msg.extra == 1
+        msg.another = 2
+        assert msg.dict() == dict(type='rq_ok', extra=1, another=2)
+
+        msg = self.bin_tool.unpack_msg(json.dumps(dict(type='no_such_type')))
+        assert msg.type == 'no_such_type'
+
+        msg = LauncherMessage()
+        msg.ParseFromString(self.bin_tool.fill_msg('ping'))
+        assert msg.type == 'ping'
+
+    def test_fill_msg_errors(self):
+        for tool in [self.json_tool, self.bin_tool]:
+            try:
+                tool.fill_msg('rq_ok', no_such_field=1)
+                assert False
+            except OBCIMessageError:
+                pass
+            try:
+                tool.fill_msg('no_such_type')
+                assert False
+            except OBCIMessageError:
+                pass
+
+    def test_bad_messages(self):
+        for data in ['\x00\x01garbage', '\x00\x09', '\x00\x01' + '\x00' * 3, '[1, 2]']:
+            try:
+                self.bin_tool.unpack_msg(data)
+                assert False, data
+            except ValueError:
+                pass
@@ -0,0 +1,107 @@
+#!/usr/bin/python
+
+import json
+import zlib
+import socket
+import logging
+
+from multiplexer.multiplexer_constants import types
+
+from obci.control.gui.obci_log_peer import OBCILogCollector
+from obci.utils.log_coalescer import LogCoalescer
+from obci.utils.log_mx_handler import pack_records, unpack_records, BATCH_BYTES
+
+
+class MxMessage(object):
+    def __init__(self, message, type=types.OBCI_LOG_MESSAGE):
+        self.message = message
+        self.type = type
+
+
+def record(name, message, levelno=20):
+    return {'name': name, 'message': message, 'levelno': levelno,
+            'levelname': logging.getLevelName(levelno), 'asctime': '12:00'}
+
+
+class TestOBCILogPeer(object):
+
+    def setup(self):
+        self.gui = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.gui.bind(('127.0.0.1', 0))
+        self.gui.settimeout(1.0)
+        peer = self.peer = OBCILogCollector.__new__(OBCILogCollector)
+        peer.logger = logging.getLogger("test_obci_log_peer")
+        peer.logger.addHandler(logging.NullHandler())
+        peer.no_response = lambda: None
+        peer.ip = '127.0.0.1'
+        peer.port = self.gui.getsockname()[1]
+        peer.coalescer = LogCoalescer(0, 500)
+        peer.compress = True
+        peer.socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+
+    def teardown(self):
+        self.peer.socket.close()
+        self.gui.close()
+
+    def handle(self, message, type=types.OBCI_LOG_MESSAGE):
+        self.peer.handle_message(MxMessage(message, type))
+
+    def received(self):
+        """Payloads of all datagrams sent to the gui."""
+        self.gui.setblocking(0)
+        datagrams = []
+        try:
+            while True:
+                datagrams.append(self.gui.recv(2 ** 16))
+        except socket.error:
+            pass
+        return datagrams
+
+    def test_coalesced_compressed_batch(self):
+        self.handle(pack_records([record('amp', 'a'), record('amp', 'b')]))
+        self.handle(pack_records([record('amp', 'b'), record('saver', 'b')]))
+        self.handle(pack_records([record('amp', 'b', 30)]))
+        self.peer._push()
+        [data] = self.received()
+        assert data[:1] == 'x'
+        records = unpack_records(data)
+        assert [(r['name'], r['message'], r['levelno'], r['count']) for r in records] == \
+            [('amp', 'a', 20, 1), ('amp', 'b', 20, 2), ('saver', 'b', 20, 1),
+             ('amp', 'b', 30, 1)]
+
+    def test_single_record_messages(self):
+        # peers with the old handler send one json encoded record
+        self.handle(json.dumps(record('amp', 'a')))
+        self.peer.compress = False
+        self.peer._push()
+        [data] = self.received()
+        assert data[:1] == '['
+        assert [r['message'] for r in unpack_records(data)] == ['a']
+
+    def test_rate_limit(self):
+        self.peer.coalescer.max_batch = 2
+        self.handle(pack_records([record('amp', str(i)) for i in range(5)]))
+        self.peer._push()
+        records = unpack_records(self.received()[0])
+        assert [r['message'] for r in records] == \
+            ['0', '1', '3 log records not forwarded (rate limit)']
+
+    def test_batches_split_into_datagrams(self):
+        long_message = 'x' * 1000
+        self.handle(pack_records([record('amp', long_message + str(i))
+                                  for i in range(100)]))
+        self.peer._push()
+        datagrams = self.received()
+        assert len(datagrams) > 1
+        records = []
+        for data in datagrams:
+            assert len(zlib.decompress(data)) <= BATCH_BYTES
+            records += unpack_records(data)
+        assert [r['message'] for r in records] == \
+            [long_message + str(i) for i in range(100)]
+
+    def test_nothing_to_push(self):
+        self.handle('not a log record')
+        self.handle(pack_records([record('amp', 'a')]), types.AMPLIFIER_SIGNAL_MESSAGE)
+        self.peer._push()
+        assert self.received() == []
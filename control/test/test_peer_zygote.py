@@ -0,0 +1,120 @@
+#!/usr/bin/python
+
+import os
+import shutil
+import signal
+import tempfile
+import subprocess
+
+from obci.control.launcher.peer_zygote import PeerZygote, ZygoteError, \
+    ENV_SENSITIVE
+
+PEER_SCRIPT = """
+import os
+import sys
+sys.stdout.write(repr((sys.argv, os.getcwd(), os.environ.get('ZYGOTE_TEST'))) + '\\n')
+sys.stdout.flush()
+sys.stderr.write('error output\\n')
+sys.stderr.flush()
+sys.stdout.write(sys.stdin.readline())
+sys.exit(int(sys.argv[1]))
+"""
+
+SLEEPING_SCRIPT = """
+import time
+print 'started'
+time.sleep(60)
+"""
+
+FAILING_SCRIPT = """
+raise RuntimeError('peer failed')
+"""
+
+
+class TestPeerZygote(object):
+
+    def setup(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.env = dict(os.environ, ZYGOTE_TEST='zygote')
+        self.zygote = PeerZygote(os.path.join(self.tmp_dir, 'zygote.sock'),
+                                 env=self.env, preload=[])
+        self.zygote.start()
+
+    def teardown(self):
+        self.zygote.stop()
+        shutil.rmtree(self.tmp_dir)
+
+    def script(self, name, source):
+        path = os.path.join(self.tmp_dir, name)
+        with open(path, 'w') as f:
+            f.write(source)
+        return path
+
+    def test_spawn(self):
+        path = self.script('peer.py', PEER_SCRIPT)
+        cwd = os.path.join(self.tmp_dir, 'cwd')
+        os.mkdir(cwd)
+        proc = self.zygote.spawn(path, ['3', 'arg'],
+                                 (subprocess.PIPE, subprocess.PIPE, subprocess.PIPE),
+                                 env=self.env, cwd=cwd)
+        assert proc.pid != os.getpid()
+        out, err = proc.communicate('input\n')
+        assert out.splitlines() == [repr(([path, '3', 'arg'], cwd, 'zygote')),
+                                    'input']
+        assert err == 'error output\n'
+        assert proc.returncode == 3
+        assert proc.poll() == 3
+        assert self.zygote.spawned == 1
+
+    def test_stderr_to_stdout(self):
+        path = self.script('peer.py', PEER_SCRIPT)
+        proc = self.zygote.spawn(path, ['0'],
+                                 (subprocess.PIPE, subprocess.STDOUT, subprocess.PIPE),
+                                 env=self.env, cwd=self.tmp_dir)
+        out, err = proc.communicate('\n')
+        assert err is None
+        assert 'error output\n' in out
+        assert proc.returncode == 0
+
+    def test_failing_script(self):
+        path = self.script('failing.py', FAILING_SCRIPT)
+        proc = self.zygote.spawn(path, [], (subprocess.PIPE, subprocess.PIPE, None))
+        out, err = proc.communicate()
+        assert proc.returncode == 1
+        assert 'RuntimeError: peer failed' in err
+
+    def test_terminate(self):
+        path = self.script('sleeping.py', SLEEPING_SCRIPT)
+        proc = self.zygote.spawn(path, [], (subprocess.PIPE, subprocess.STDOUT, None))
+        assert proc.stdout.readline() == 'started\n'
+        assert proc.poll() is None
+        proc.terminate()
+        assert proc.wait() == -signal.SIGTERM
+
+    def test_env_mismatch_rejected(self):
+        path = self.script('peer.py', PEER_SCRIPT)
+        env = dict(self.env)
+        env[ENV_SENSITIVE[0]] = 'other:1980'
+        assert not self.zygote.env_matches(env)
+        try:
+            self.zygote.spawn(path, ['0'], (None, None, None), env=env)
+        except ZygoteError:
+            pass
+        else:
+            assert False, "Spawned with a mismatched environment"
+        assert self.zygote.spawned == 0
+
+    def test_env_mismatch_rejected_by_zygote(self):
+        path = self.script('peer.py', PEER_SCRIPT)
+        env = dict(self.env)
+        env[ENV_SENSITIVE[0]] = 'other:1980'
+        self.zygote.env_matches = lambda env: True
+        try:
+            self.zygote.spawn(path, ['0'], (subprocess.PIPE, subprocess.PIPE, None),
+                              env=env)
+        except ZygoteError, e:
+            assert 'Environment differs' in str(e)
+        else:
+            assert False, "Zygote forked with a mismatched environment"
+        assert self.zygote.spawned == 0
+        assert self.zygote.running()
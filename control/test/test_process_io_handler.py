@@ -0,0 +1,80 @@
+#!/usr/bin/python
+
+import os
+import time
+import shutil
+import tempfile
+
+from obci.control.launcher import process_io_handler
+from obci.control.launcher.process_io_handler import ProcessIOHandler, \
+    StdioMultiplexer, STDIO_TAIL_LEN
+
+
+def wait_for(condition, timeout=2.0):
+    start = time.time()
+    while not condition() and time.time() - start < timeout:
+        time.sleep(0.01)
+    return condition()
+
+
+class TestProcessIOHandler(object):
+
+    def setup(self):
+        self.dir = tempfile.mkdtemp()
+        self.mx = StdioMultiplexer()
+
+    def teardown(self):
+        shutil.rmtree(self.dir)
+
+    def _handler(self, name, budget=None, log=True):
+        r, w = os.pipe()
+        if budget is not None:
+            self.mx._writer.budget = budget
+        log_path = os.path.join(self.dir, name + '.log') if log else None
+        handler = ProcessIOHandler(name, stdout=os.fdopen(r, 'rb'),
+                                   out_log=log_path, multiplexer=self.mx)
+        handler.start_output_handler()
+        return handler, os.fdopen(w, 'wb', 0), log_path
+
+    def test_tail_and_log(self):
+        handlers = [self._handler('peer_%d' % i) for i in range(5)]
+        for i, (handler, out, log) in enumerate(handlers):
+            out.write('first %d\nsecond' % i)
+            out.write(' %d\n' % i + 'unfinished')
+            out.close()
+        for i, (handler, out, log) in enumerate(handlers):
+            assert wait_for(handler.finished)
+            assert not handler.is_running()
+            assert handler.tail_stdout(2) == ['second %d\n' % i, 'unfinished']
+            assert wait_for(lambda: open(log).read() ==
+                            'first %d\nsecond %d\nunfinished' % (i, i))
+            assert handler.dropped_bytes == 0
+
+    def test_tail_is_bounded(self):
+        handler, out, log = self._handler('peer', log=False)
+        out.write(''.join('%d\n' % i for i in range(STDIO_TAIL_LEN * 3)))
+        out.close()
+        assert wait_for(handler.finished)
+        assert len(handler.out_tail) == STDIO_TAIL_LEN
+        assert handler.tail_stdout(1) == ['%d\n' % (STDIO_TAIL_LEN * 3 - 1)]
+
+    def test_dropped_bytes_over_budget(self):
+        handler, out, log = self._handler('peer', budget=10)
+        out.write('0123456789\n')
+        out.close()
+        assert wait_for(handler.finished)
+        assert handler.dropped_bytes == 11
+        assert handler.tail_stdout(1) == ['0123456789\n']
+
+    def test_stop_output_handler(self):
+        handler, out, log = self._handler('peer')
+        out.write('line\n')
+        assert wait_for(lambda: len(handler.out_tail) == 1)
+        assert handler.is_running()
+        assert handler.stop_output_handler()
+        assert not handler.is_running()
+        out.close()
+
+    def test_shared_multiplexer(self):
+        assert process_io_handler.io_multiplexer() is \
+                        process_io_handler.io_multiplexer()
@@ -11,7 +11,18 @@ from obci.analysis.obci_signal_processing.signal import read_info_source
 from obci.analysis.obci_signal_processing.tags import read_tags_source
 
 
+TAGS_CHUNK = 1000
+
 class AmplifierFile(BinaryDriverWrapper):
+    """Replay a signal (with its tags) from file. The driver binary
+    samples the file, this peer waits on the driver's pipes (not polling)
+    and sends a tag every time the driver reports its timestamp was reached.
+
+    replay_speed param speeds up (or slows down) the replay - the driver
+    is run with sampling_rate*replay_speed and tag timestamps are scaled
+    accordingly; sampling_rate param is the file's sampling frequency."""
+    io_threads = False
+
     def __init__(self, addresses):
         super(AmplifierFile, self).__init__(addresses=addresses, type=peers.AMPLIFIER_SERVER)
 
@@ -49,7 +60,9 @@ class AmplifierFile(BinaryDriverWrapper):
         self.all_names = ';'.join(names)
         self.all_gains = ';'.join(mgr.get_param('channels_gains'))
         self.all_offsets = ';'.join(mgr.get_param('channels_offsets'))
-        self.sleep_on_out = 1.0/float(mgr.get_param('sampling_frequency'))
+        self.replay_speed = float(self.config.get_param('replay_speed') or 1)
+        if self.replay_speed <= 0:
+            raise ValueError("replay_speed must be positive: "+str(self.replay_speed))
 
         self.config.set_param('sample_type', mgr.get_param('sample_type'))
         self.config.set_param('sampling_rate', str(int(float(mgr.get_param('sampling_frequency')))))
@@ -66,13 +79,17 @@ class AmplifierFile(BinaryDriverWrapper):
              '-n', self.all_names,
              '-g', self.all_gains,
              '-o', self.all_offsets,
-             '-s', self.get_param('sampling_rate')
+             '-s', self._driver_sampling_rate()
               ])
         self.logger.info("Extended arguments: "+str(args))
         return args
 
+    def _driver_sampling_rate(self):
+        return str(int(round(float(self.get_param('sampling_rate')) * self.replay_speed)))
+
     def set_driver_params(self):
-        super(AmplifierFile, self).set_driver_params()
+        self.set_sampling_rate(self._driver_sampling_rate())
+        self.set_active_channels(self.config.get_param("active_channels"))
         self.set_tags()
 
     def store_driver_description(self, driver_output):
@@ -81,13 +98,16 @@ class AmplifierFile(BinaryDriverWrapper):
 
     def set_tags(self):
         tags = read_tags_source.FileTagsSource(self.f_tags).get_tags()
-        self.msg_mgr = tags_to_mxmsg.TagsToMxmsg(tags, self.config.get_param('tags_rules'))
-        tss = ';'.join([repr(t['start_timestamp']) for t in tags])
-        self._communicate("tags_start", timeout_s=0.1, timeout_error=False)
-        self.logger.info("Start sending tss to driver...")
-        self._communicate(tss, timeout_s=0.1, timeout_error=False)
-        self.logger.info("Finished sending tss to driver!")
+        self.msg_mgr = tags_to_mxmsg.TagsToMxmsg(tags, self.config.get_param('tags_rules'),
+                                                self.replay_speed)
+        tss = [repr(t['start_timestamp'] / self.replay_speed) for t in tags]
+        self.logger.info("Sending "+str(len(tss))+" tss to driver...")
+        lines = ["tags_start"]
+        lines += [';'.join(tss[i:i + TAGS_CHUNK]) for i in range(0, len(tss), TAGS_CHUNK)]
+        for line in lines:
+            self.driver.stdin.write(line+"\n")
         self._communicate("tags_end", timeout_s=0.1, timeout_error=False)
+        self.logger.info("Finished sending tss to driver!")
 
     def got_trigger(self, ts):
         """Got trigger from the drivers.
@@ -98,7 +118,7 @@ class AmplifierFile(BinaryDriverWrapper):
         if tp is None:
             self.logger.warning("No tags left but got trigger. Should not happen!!!")
         else:
-            self.logger.info("Send msg of type: "+str(tp))
+            self.logger.debug("Send msg of type: "+str(tp))
             self.conn.send_message(
                 message = msg,
                 type=tp,
@@ -106,27 +126,33 @@ class AmplifierFile(BinaryDriverWrapper):
 
     def do_sampling(self):
         self.logger.info("Stat waiting on drivers output...")
-        while True:
-            try: #read tags from stdout
-                v = self.driver_out_q.get_nowait()
+        finished = False
+        while not finished:
+            if not self.read_driver_output():
+                self.logger.info("Driver closed its output")
+                break
+            while True: #log stderr
+                try:
+                    self.logger.info(self.driver_err_q.get_nowait())
+                except Queue.Empty:
+                    break
+            while True: #read tags from stdout
+                try:
+                    v = self.driver_out_q.get_nowait()
+                except Queue.Empty:
+                    break
                 try:
                     ts = float(v)
                 except ValueError:
                     if v.startswith('start OK'):
                         self.logger.info("Driver finished!!!")
+                        finished = True
                         break
                     else:
                         self.logger.warning("Got unrecognised message from driver: "+v)
                 else:
-                    self.logger.info("Got trigger with ts: "+repr(ts)+" / real ts: "+repr(time.time()))
+                    self.logger.debug("Got trigger with ts: "+repr(ts)+" / real ts: "+repr(time.time()))
                     self.got_trigger(ts)
-            except Queue.Empty: #try reading other log from stderr
-                try:
-                    v = self.driver_err_q.get_nowait()
-                    self.logger.info(v)
-                except Queue.Empty:
-                    pass
-                time.sleep(self.sleep_on_out)
 
         super(AmplifierFile, self).do_sampling()
 
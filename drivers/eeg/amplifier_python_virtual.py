@@ -0,0 +1,272 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+"""
+Virtual amplifier written in python - no driver binary is needed.
+Meant for load testing of the whole pipeline (savers, buffers, bci peers).
+
+Signal is taken from a table of shape (channels, samples) computed
+before sampling and sent in a loop, samples_per_packet samples in every
+SampleVector:
+- sine  - sines of sine_freqs (cycled over channels) plus noise,
+          table of table_len seconds,
+- noise - gaussian noise, table of table_len seconds,
+- file  - signal from data_file_dir/data_file_name .obci.raw/.obci.xml
+          (sampling_rate and channel_names are taken from the file).
+
+active_channels (names or indices of channels of the table, empty - all)
+selects rows of the table to be sent; channel_names, channel_gains and
+channel_offsets are then set for the active channels only.
+
+Packets are paced against absolute deadlines (start time + number of
+sent samples / sampling_rate), so sleep inaccuracies do not accumulate.
+Sample timestamps are computed the same way.
+
+blink_interval, tag_interval (seconds, 0 - off) inject synthetic
+BLINK_MESSAGEs (index cycling through blink_count values) and TAGs
+at sample timestamps.
+"""
+
+import os
+import sys
+import time
+import numpy
+
+from multiplexer.multiplexer_constants import peers, types
+from obci.control.peer.configured_multiplexer_server import ConfiguredMultiplexerServer
+from obci.configs import settings, variables_pb2
+from obci.utils import tags_helper
+from obci.analysis.obci_signal_processing.signal import read_info_source, \
+    data_read_proxy, sample_vector_codec
+
+SEP = ';'
+STATS_INTERVAL = 10.0
+
+
+def sine_table(num_of_channels, sampling_rate, length, freqs, amplitude,
+               noise_amplitude, seed=0):
+    """
+    >>> t = sine_table(2, 128, 256, [4.0, 32.0], 10.0, 0.0)
+    >>> t.shape, t.dtype
+    ((2, 256), dtype('float32'))
+    >>> [int(round(x)) for x in t[:, 8]]
+    [10, 0]
+    """
+    freqs = numpy.resize(numpy.asarray(freqs, dtype=numpy.float64), num_of_channels)
+    phase = 2 * numpy.pi * numpy.arange(length) / float(sampling_rate)
+    table = amplitude * numpy.sin(freqs[:, numpy.newaxis] * phase)
+    if noise_amplitude:
+        table += noise_table(num_of_channels, length, noise_amplitude, seed)
+    return table.astype(numpy.float32)
+
+
+def noise_table(num_of_channels, length, amplitude, seed=0):
+    rnd = numpy.random.RandomState(seed)
+    return (amplitude * rnd.standard_normal((num_of_channels, length))
+            ).astype(numpy.float32)
+
+
+def active_channel_indices(names, active):
+    """
+    Return indices in names of channels in active (names or indices,
+    separated with SEP, empty - all channels), None if some channel
+    is not found.
+
+    >>> active_channel_indices(['a', 'b', 'c'], 'c;0')
+    [2, 0]
+    >>> active_channel_indices(['a', 'b', 'c'], '')
+    [0, 1, 2]
+    >>> active_channel_indices(['a', 'b', 'c'], 'a;x') is None
+    True
+    """
+    if not active:
+        return range(len(names))
+    indices = []
+    for chan in active.split(SEP):
+        if chan in names:
+            indices.append(names.index(chan))
+        elif chan.isdigit() and int(chan) < len(names):
+            indices.append(int(chan))
+        else:
+            return None
+    return indices
+
+
+class PacketGenerator(object):
+    """
+    Cycle through table of shape (channels, samples), samples_per_packet
+    samples at a time, and compute deadlines and timestamps of packets.
+
+    >>> gen = PacketGenerator(numpy.arange(10, dtype=numpy.float32).reshape(2, 5), 100, 4, 1000.0)
+    >>> samples, ts = gen.next_packet()
+    >>> samples.tolist(), ts.tolist()
+    ([[0.0, 1.0, 2.0, 3.0], [5.0, 6.0, 7.0, 8.0]], [1000.0, 1000.01, 1000.02, 1000.03])
+    >>> gen.deadline()
+    1000.04
+    >>> gen.next_packet()[0].tolist()
+    [[4.0, 0.0, 1.0, 2.0], [9.0, 5.0, 6.0, 7.0]]
+    >>> gen.sent_samples
+    8
+    """
+    def __init__(self, table, sampling_rate, samples_per_packet, start_time):
+        self.table = table
+        self.sampling_rate = float(sampling_rate)
+        self.samples_per_packet = samples_per_packet
+        self.start_time = start_time
+        self.sent_samples = 0
+        self._offsets = numpy.arange(samples_per_packet)
+
+    def deadline(self):
+        """Time when the next packet should be sent."""
+        return self.start_time + self.sent_samples / self.sampling_rate
+
+    def next_packet(self):
+        """Return (samples, timestamps) of the next packet."""
+        index = self.sent_samples + self._offsets
+        samples = self.table.take(index, axis=1, mode='wrap')
+        timestamps = self.start_time + index / self.sampling_rate
+        self.sent_samples += self.samples_per_packet
+        return samples, timestamps
+
+
+class AmplifierPythonVirtual(ConfiguredMultiplexerServer):
+    def __init__(self, addresses):
+        super(AmplifierPythonVirtual, self).__init__(addresses=addresses,
+                                                     type=peers.AMPLIFIER_SERVER)
+        self.samples_per_packet = int(self.get_param('samples_per_packet'))
+        self.table = self._init_signal()
+        self.sampling_rate = float(self.get_param('sampling_rate'))
+        self._init_events()
+        self.ready()
+
+    def _init_signal(self):
+        signal_type = self.get_param('signal_type')
+        if signal_type == 'file':
+            table, names, gains, offsets = self._file_table()
+        else:
+            names = self.get_param('channel_names').split(SEP)
+            gains = self._channel_params('channel_gains', '1.0', len(names))
+            offsets = self._channel_params('channel_offsets', '0.0', len(names))
+            rate = float(self.get_param('sampling_rate'))
+            length = max(int(float(self.get_param('table_len')) * rate),
+                         self.samples_per_packet)
+            if signal_type == 'sine':
+                freqs = [float(f) for f in self.get_param('sine_freqs').split(SEP)]
+                table = sine_table(len(names), rate, length, freqs,
+                                   float(self.get_param('amplitude')),
+                                   float(self.get_param('noise_amplitude')))
+            elif signal_type == 'noise':
+                table = noise_table(len(names), length,
+                                    float(self.get_param('noise_amplitude')))
+            else:
+                self.logger.error("Unknown signal_type: " + signal_type)
+                sys.exit(1)
+
+        active = active_channel_indices(names, self.get_param('active_channels'))
+        if active is None:
+            self.logger.error("Invalid active_channels: " +
+                              self.get_param('active_channels') +
+                              ", channels: " + SEP.join(names))
+            sys.exit(1)
+        table = table[active]
+        names = [names[i] for i in active]
+        self.set_param('channel_names', SEP.join(names))
+        self.set_param('active_channels', SEP.join(names))
+        self.set_param('channel_gains', SEP.join([gains[i] for i in active]))
+        self.set_param('channel_offsets', SEP.join([offsets[i] for i in active]))
+
+        num_of_channels = table.shape[0]
+        self.logger.info("Signal: " + signal_type + ", " + str(num_of_channels) +
+                         " channels, " + str(table.shape[1]) + " samples in table")
+        return table
+
+    def _channel_params(self, param, default, num_of_channels):
+        """Values of param for every channel of the table, default if empty."""
+        value = self.get_param(param)
+        if not value:
+            return [default] * num_of_channels
+        values = value.split(SEP)
+        if len(values) != num_of_channels:
+            self.logger.error(param + " has " + str(len(values)) + " values, " +
+                              "channel_names has " + str(num_of_channels))
+            sys.exit(1)
+        return values
+
+    def _file_table(self):
+        path = os.path.expanduser(os.path.join(self.get_param('data_file_dir'),
+                                               self.get_param('data_file_name')))
+        info = read_info_source.FileInfoSource(path + '.obci.xml')
+        names = info.get_param('channels_names')
+        sample_type = info.get_param('sample_type').upper()
+        data = data_read_proxy.DataReadProxy(path + '.obci.raw', sample_type)
+        table = numpy.array(data.get_memmap(len(names)).T, dtype=numpy.float32)
+        data.finish_reading()
+
+        self.set_param('sampling_rate',
+                       str(int(float(info.get_param('sampling_frequency')))))
+        return table, names, info.get_param('channels_gains'), \
+            info.get_param('channels_offsets')
+
+    def _init_events(self):
+        """Number of samples between blinks and tags (0 - none)."""
+        def every(param):
+            return int(round(float(self.get_param(param) or 0) * self.sampling_rate))
+        self.blink_every = every('blink_interval')
+        self.blink_count = int(self.get_param('blink_count'))
+        if self.blink_every and self.blink_count <= 0:
+            self.logger.error("blink_count must be positive, got: " + str(self.blink_count))
+            sys.exit(1)
+        self.blink_index = 0
+        self.tag_every = every('tag_interval')
+        self.tag_name = self.get_param('tag_name')
+        self.tag_index = 0
+
+    def _send_events(self, first_sample, timestamps):
+        """Send blinks and tags for samples first_sample..first_sample+len(timestamps)-1."""
+        for i, ts in enumerate(timestamps):
+            sample = first_sample + i
+            if self.blink_every and sample % self.blink_every == 0:
+                blink = variables_pb2.Blink()
+                blink.timestamp = ts
+                blink.index = self.blink_index
+                self.blink_index = (self.blink_index + 1) % self.blink_count
+                self.conn.send_message(message=blink.SerializeToString(),
+                                       type=types.BLINK_MESSAGE, flush=True)
+            if self.tag_every and sample % self.tag_every == 0:
+                tags_helper.send_tag(self.conn, ts, ts + 1.0 / self.sampling_rate,
+                                     self.tag_name, {'index': str(self.tag_index)})
+                self.tag_index += 1
+
+    def handle_message(self, mxmsg):
+        self.no_response()
+
+    def do_sampling(self):
+        gen = PacketGenerator(self.table, self.sampling_rate,
+                              self.samples_per_packet, time.time())
+        events = self.blink_every or self.tag_every
+        self.logger.info("Start sampling: " + str(self.sampling_rate) + " Hz, " +
+                         str(self.samples_per_packet) + " samples per packet")
+        stats_time = gen.start_time + STATS_INTERVAL
+        max_lag = 0.0
+        while True:
+            lag = time.time() - gen.deadline()
+            if lag < 0:
+                time.sleep(-lag)
+            elif lag > max_lag:
+                max_lag = lag
+            first_sample = gen.sent_samples
+            samples, timestamps = gen.next_packet()
+            self.conn.send_message(message=sample_vector_codec.encode(samples, timestamps),
+                                   type=types.AMPLIFIER_SIGNAL_MESSAGE, flush=True)
+            if events:
+                self._send_events(first_sample, timestamps)
+
+            if timestamps[-1] >= stats_time:
+                self.logger.info("Sent " + str(gen.sent_samples) + " samples, " +
+                                 "max lag in last " + str(STATS_INTERVAL) + "s: " +
+                                 str(round(max_lag * 1000, 2)) + " ms")
+                stats_time += STATS_INTERVAL
+                max_lag = 0.0
+
+
+if __name__ == "__main__":
+    AmplifierPythonVirtual(settings.MULTIPLEXER_ADDRESSES).do_sampling()
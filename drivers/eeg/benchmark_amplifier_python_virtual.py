@@ -0,0 +1,39 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Measure how many samples per second AmplifierPythonVirtual can prepare
+(packet slicing, timestamps and SampleVector encoding - everything but
+sending) for several samples_per_packet values, to check which aggregate
+sampling rates it can sustain.
+
+Usage: python benchmark_amplifier_python_virtual.py [number_of_channels] [seconds]
+"""
+
+import sys
+import time
+
+from obci.drivers.eeg.amplifier_python_virtual import sine_table, PacketGenerator
+from obci.analysis.obci_signal_processing.signal import sample_vector_codec
+
+
+def run(number_of_channels=32, seconds=1.0):
+    rate = 1024
+    table = sine_table(number_of_channels, rate, 10 * rate, [10.0, 12.0], 100.0, 5.0)
+    print("Packets of "+str(number_of_channels)+" channels, encoded for "+str(seconds)+" s each")
+    print("samples_per_packet | packets/s | samples/s")
+    for samples_per_packet in [1, 4, 16, 64]:
+        gen = PacketGenerator(table, rate, samples_per_packet, time.time())
+        packets = 0
+        start = time.time()
+        while time.time() - start < seconds:
+            for i in range(100):
+                sample_vector_codec.encode(*gen.next_packet())
+            packets += 100
+        t = time.time() - start
+        print("%18d | %9.0f | %9.0f" % (samples_per_packet, packets / t,
+                                        packets * samples_per_packet / t))
+
+if __name__ == '__main__':
+    args = [int(sys.argv[1])] if len(sys.argv) > 1 else []
+    args += [float(a) for a in sys.argv[2:3]]
+    run(*args)
@@ -0,0 +1,147 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Compare throughput of VLDeltaData decoder and the previous (bit list
+based) implementation on synthetic packets. Both are checked to agree
+by drivers/eeg/tests/test_tmsi_vldelta.py.
+
+Synthetic packets contain random deltas of all kinds (normal, special
+0 and -1, overflow in the middle of a packet, channels in overflow from
+the beginning) and channels with different dividers.
+
+Usage: python benchmark_tmsi_vldelta.py [number_of_channels] [trans_freq_div] [packets]
+"""
+
+import sys
+import time
+import random
+
+from obci.drivers.eeg.tmsi import VLDeltaInfo, VLDeltaData, FrontendInfo, \
+    num_to_bits, bits_to_num, number_to_string_word, \
+    encode_tmsi_bluetooth_number
+
+OVERFLOW = VLDeltaData.OVERFLOW
+
+
+def legacy_decode(packet):
+    """VLDeltaData.decode before it was vectorized."""
+    def decode_next_delta():
+        delta_bits = packet.delta_bits
+        assert len(delta_bits) > 4, "Not enough bits to decode delta len"
+        delta_len = original_delta_len = bits_to_num(delta_bits[:4])
+        if delta_len == 0:
+            delta_len = 2
+        assert len(delta_bits) >= 4 + delta_len, \
+            "Not enough bits to decode delta body"
+        delta = bits_to_num(delta_bits[4:4 + delta_len])
+        special = original_delta_len == 0
+        if not special:
+            if delta_bits[4 + delta_len - 1] == 0:
+                delta = -delta
+        packet.delta_bits = delta_bits[4 + delta_len:]
+        return (special, delta)
+
+    n = packet.number_of_channels
+    divider_list = packet.vldelta_info.get_divider_list(n)
+    channel_data = [[packet.extract_channel_data(x)] for x in range(n)]
+    channel_data += [[ord(packet.data[3 * n])], [ord(packet.data[1 + 3 * n])]]
+    overflow = [x == [OVERFLOW] for x in channel_data]
+    packet.delta_bits = reduce(lambda x, y: x + y,
+        (num_to_bits(ord(x)) for x in
+            packet.data[3 * n + FrontendInfo.NUMBER_OF_HELP_CHANNELS:]))
+    for i in range(1, packet.vldelta_info.get_trans_freq_div() + 1):
+        for j in range(n + FrontendInfo.NUMBER_OF_HELP_CHANNELS):
+            if i % divider_list[j] == 0:
+                if not overflow[j]:
+                    special, delta = decode_next_delta()
+                    if special:
+                        if delta == 0:
+                            channel_data[j].append(channel_data[j][-1])
+                        elif delta == 2:
+                            overflow[j] = True
+                            channel_data[j].append(OVERFLOW)
+                        elif delta == 3:
+                            channel_data[j].append(channel_data[j][-1] - 1)
+                    else:
+                        channel_data[j].append(channel_data[j][-1] + delta)
+                else:
+                    channel_data[j].append(OVERFLOW)
+    return channel_data[:-FrontendInfo.NUMBER_OF_HELP_CHANNELS]
+
+
+def encode_delta(bits, delta, rnd=random):
+    """Append bits (least significant first) of one delta."""
+    def put(value, length):
+        bits.extend((value >> k) & 1 for k in range(length))
+    if delta is None:
+        put(0, 4); put(2, 2)
+    elif delta == 0:
+        put(0, 4); put(0, 2)
+    elif delta == -1 and rnd.random() < 0.5:
+        put(0, 4); put(3, 2)
+    else:
+        length = abs(delta).bit_length() + (1 if delta < 0 else 0)
+        put(length, 4); put(abs(delta), length)
+
+
+def synthetic_packet(number_of_channels, trans_freq_div, dividers=None, rnd=random):
+    """Return VLDeltaData packet (with VLDeltaInfo set) with random deltas."""
+    all_channels = number_of_channels + FrontendInfo.NUMBER_OF_HELP_CHANNELS
+    if dividers is None:
+        dividers = [0] * all_channels
+    info_words = [0, 0, trans_freq_div] + dividers
+    info = VLDeltaInfo()
+    info.data = ''.join(number_to_string_word(w) for w in info_words)
+
+    refs = [rnd.randint(-2 ** 20, 2 ** 20) for _ in range(number_of_channels)]
+    refs[0] = -OVERFLOW  # encoded as 2 ** 23 - overflow from the beginning
+    data = ''.join(encode_tmsi_bluetooth_number(r) for r in refs)
+    data += chr(rnd.randint(0, 7)) + chr(rnd.randint(0, 255))
+
+    overflow = [True] + [False] * (all_channels - 1)
+    bits = []
+    for i in range(1, trans_freq_div + 1):
+        for j in range(all_channels):
+            if i % 2 ** dividers[j] == 0 and not overflow[j]:
+                r = rnd.random()
+                if r < 0.01:
+                    overflow[j] = True
+                    delta = None
+                elif r < 0.1:
+                    delta = rnd.choice([0, -1])
+                else:
+                    delta = int(rnd.gauss(0, 200)) or 1
+                encode_delta(bits, delta, rnd)
+    bits += [0] * (-len(bits) % 16)
+    data += ''.join(chr(bits_to_num(bits[k:k + 8])) for k in range(0, len(bits), 8))
+
+    packet = VLDeltaData()
+    packet.data = data
+    packet.set_number_of_channels(number_of_channels)
+    packet.set_vldelta_info(info)
+    return packet
+
+
+def throughput(decode, packets):
+    start = time.time()
+    for packet in packets:
+        decode(packet)
+    return time.time() - start
+
+
+def run(number_of_channels=32, trans_freq_div=4, num_of_packets=300):
+    packets = [synthetic_packet(number_of_channels, trans_freq_div)
+               for _ in range(num_of_packets)]
+    samples = num_of_packets * (trans_freq_div + 1)
+    print("Decoding "+str(num_of_packets)+" packets, "+str(number_of_channels)+
+          " channels, "+str(trans_freq_div + 1)+" samples per packet")
+    print("decoder      | time (s) | samples/s")
+    for name, decode in [('legacy', legacy_decode),
+                         ('decode', VLDeltaData.decode),
+                         ('decode_array', VLDeltaData.decode_array)]:
+        t = throughput(decode, packets)
+        print("%-12s | %8.3f | %9.0f" % (name, t, samples / t))
+
+if __name__ == '__main__':
+    args = [int(a) for a in sys.argv[1:4]]
+    run(*args)
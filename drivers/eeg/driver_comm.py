@@ -2,11 +2,14 @@
 # -*- coding: utf-8 -*-
 
 import sys
+import os
 import os.path
+import errno
 import subprocess
 import signal
 import time
 import socket
+import select
 
 from obci.control.launcher.launcher_tools import obci_root
 
@@ -20,6 +23,7 @@ except ImportError:
     from queue import Queue, Empty  # python 3.x
 
 SEP = ';'
+READ_SIZE = 65536
 
 class DriverComm(object):
     """ Start, stop and communicate with amplifier driver binaries. 
@@ -40,8 +44,14 @@ class DriverComm(object):
         >>> driv.start_sampling()
         >>> time.sleep(3)
         >>> driv.terminate_driver()
+
+        Driver's stdout and stderr lines are put to driver_out_q and
+        driver_err_q by reader threads. Subclasses with io_threads set to
+        False read them in the peer's thread instead - with
+        read_driver_output(), which blocks on select() over the pipes.
     """
-    
+    io_threads = True
+
     def __init__(self, peer_config, mx_addresses=[('localhost', 41921)], catch_signals=True,
                  context=ctx.get_dummy_context('DriverComm')):
         """ *peer_config* - parameter provider. Should respond to get_param(param_name, value)
@@ -59,16 +69,21 @@ class DriverComm(object):
         self.driver = self.run_driver(self.get_run_args((socket.gethostbyname(
                                 self._mx_addresses[0][0]), self._mx_addresses[0][1])))
         self.driver_out_q = Queue()
-        self.driver_out_thr = Thread(target=enqueue_output,
-                                    args=(self.driver.stdout, self.driver_out_q))
-        self.driver_out_thr.daemon = True # thread dies with the program
-        self.driver_out_thr.start()
-
         self.driver_err_q = Queue()
-        self.driver_err_thr = Thread(target=enqueue_output,
-                                    args=(self.driver.stderr, self.driver_err_q))
-        self.driver_err_thr.daemon = True # thread dies with the program
-        self.driver_err_thr.start()
+        if self.io_threads:
+            self.driver_out_thr = Thread(target=enqueue_output,
+                                        args=(self.driver.stdout, self.driver_out_q))
+            self.driver_out_thr.daemon = True # thread dies with the program
+            self.driver_out_thr.start()
+
+            self.driver_err_thr = Thread(target=enqueue_output,
+                                        args=(self.driver.stderr, self.driver_err_q))
+            self.driver_err_thr.daemon = True # thread dies with the program
+            self.driver_err_thr.start()
+        else:
+            self._driver_pipes = {
+                self.driver.stdout.fileno(): [self.driver_out_q, ''],
+                self.driver.stderr.fileno(): [self.driver_err_q, '']}
 
 
         if catch_signals:
@@ -188,7 +203,7 @@ class DriverComm(object):
         self.driver.stdin.write(command+"\n")
         while timeout_s - get_timeout * count >= 0:
             line = None
-            try:  line = self.driver_out_q.get(timeout=get_timeout) # or self.driver_out_q.get_nowait()
+            try:  line = self._get_out_line(timeout=get_timeout) # or self.driver_out_q.get_nowait()
             except Empty:
                 count += 1
                 time.sleep(get_timeout)
@@ -211,6 +226,46 @@ class DriverComm(object):
 timeout " + str(timeout_s) + "s passed. ABORTING!!!")
         return out
 
+    def _get_out_line(self, timeout):
+        if self.io_threads:
+            return self.driver_out_q.get(timeout=timeout)
+        deadline = time.time() + timeout
+        while self.driver_out_q.empty():
+            left = deadline - time.time()
+            if left <= 0 or not self.read_driver_output(left):
+                break
+        return self.driver_out_q.get_nowait()
+
+    def read_driver_output(self, timeout=None):
+        """Wait (up to timeout seconds, None - without limit) until
+        driver's stdout or stderr is readable, read what is available
+        and put complete lines to driver_out_q and driver_err_q.
+        Only for io_threads = False.
+
+        Returns False if both pipes are closed, True otherwise."""
+        pipes = self._driver_pipes
+        if not pipes:
+            return False
+        try:
+            readable = select.select(list(pipes), [], [], timeout)[0]
+        except select.error, e:
+            if e.args[0] == errno.EINTR:
+                return True
+            raise
+        for fd in readable:
+            queue, partial = pipes[fd]
+            data = os.read(fd, READ_SIZE)
+            if not data:
+                if partial:
+                    queue.put(partial)
+                del pipes[fd]
+                continue
+            lines = (partial + data).split('\n')
+            pipes[fd][1] = lines.pop()
+            for line in lines:
+                queue.put(line + '\n')
+        return True
+
     def do_samplingg(self):
         self.driver.wait()
         self.logger.info("Driver finished working with code " + str(self.driver.returncode))
@@ -228,7 +283,8 @@ timeout " + str(timeout_s) + "s passed. ABORTING!!!")
                 v = self.driver_out_q.get_nowait()
                 self.logger.info(v)
             except Empty:
-                time.sleep(0.1)
+                if self.io_threads or not self.read_driver_output():
+                    time.sleep(0.1)
         sys.exit(self.driver.returncode)
 
 
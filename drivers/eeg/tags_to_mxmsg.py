@@ -8,8 +8,6 @@ from multiplexer.multiplexer_constants import peers, types
 from obci.utils import tags_helper
 from obci.configs import variables_pb2
 
-import Queue
-
 
 from obci.drivers import drivers_logging as logger
 LOGGER = logger.get_logger("tags_to_mxmsg", "info")
@@ -51,20 +49,30 @@ class DummyMsg(object):
 
 
 class TagsToMxmsg(object):
-    def __init__(self, tags, handle_rules):
+    def __init__(self, tags, handle_rules, replay_speed=1.0):
         """For every tag in tags find its corresponding
-        handler"""
+        handler. (tag, handler) pairs are stored in tags order,
+        next_message only moves the index of the next pair.
+        Tags are replayed replay_speed times faster, so their
+        timestamps (and durations) are divided by replay_speed."""
         self._eval_handle_rules(handle_rules)
-        self.msgs = Queue.Queue()
+        self.msgs = []
         for t in tags:
+            if replay_speed != 1 and 'start_timestamp' in t:
+                t = dict(t, start_timestamp=t['start_timestamp'] / replay_speed,
+                         end_timestamp=t['end_timestamp'] / replay_speed)
             got_rule = False
             for rule, handler in self.handle_rules:
                 if rule(t):
-                    self.msgs.put((t, handler))
+                    self.msgs.append((t, handler))
                     got_rule = True
                     break
             if not got_rule:
                 LOGGER.warning("Tag does not fit to any rule: "+str(t))
+        self.next_index = 0
+
+    def messages_left(self):
+        return len(self.msgs) - self.next_index
 
     def _eval_handle_rules(self, handle_rules):
         """Evaluate and store tag handle rules used every time next_message is fired.
@@ -96,12 +104,12 @@ class TagsToMxmsg(object):
             self.handle_rules.append((rule, handler))
 
     def next_message(self, ts, mx=True):
-        try:
-            tag, handler = self.msgs.get_nowait()
-        except Queue.Empty:
+        i = self.next_index
+        if i >= len(self.msgs):
             return None, None
-        else:
-            return handler.get_message(tag, ts, mx)
+        self.next_index = i + 1
+        tag, handler = self.msgs[i]
+        return handler.get_message(tag, ts, mx)
 
 def run_test():
     """
@@ -128,6 +136,9 @@ def run_test():
 
     >>> mgr.next_message(40.0, False)[1]
 
+    >>> mgr.messages_left()
+    0
+
     >>> rules = str([('lambda t: t["desc"].has_key("blink_id")', 'BlinkMsg(lambda t: int(t["desc"]["blink_id"]))')])
 
     >>> mgr = TagsToMxmsg(tags, rules)
@@ -140,6 +151,20 @@ def run_test():
 
     >>> mgr.next_message(30.0, False)[1]
 
+    Replayed two times faster tag lasts half as long:
+
+    >>> tags = [{'name':'dupa', 'start_timestamp':1, 'end_timestamp':1.5, 'channels':'', 'desc': {}}]
+
+    >>> mgr = TagsToMxmsg(tags, str([('dupa', 'TagMsg()')]), replay_speed=2)
+
+    >>> t = mgr.next_message(50.0, False)[1]
+
+    >>> t['start_timestamp'], t['end_timestamp']
+    (50.0, 50.25)
+
+    >>> tags[0]['start_timestamp'], tags[0]['end_timestamp']
+    (1, 1.5)
+
     >>> 
     
 
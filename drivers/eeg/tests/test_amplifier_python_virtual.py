@@ -0,0 +1,73 @@
+#!/usr/bin/python
+
+import logging
+
+from obci.drivers.eeg.amplifier_python_virtual import AmplifierPythonVirtual
+
+PARAMS = {'signal_type': 'noise', 'channel_names': 'a;b;c',
+          'channel_gains': '', 'channel_offsets': '', 'active_channels': '',
+          'sampling_rate': '128', 'table_len': '1', 'noise_amplitude': '1.0',
+          'blink_interval': '', 'blink_count': '2', 'tag_interval': '',
+          'tag_name': 'tag'}
+
+
+class Config(object):
+    def __init__(self, params):
+        self.params = dict(params)
+
+    def get_param(self, name):
+        return self.params[name]
+
+    def set_param(self, name, value):
+        self.params[name] = value
+
+
+class TestInitSignal(object):
+
+    def setup(self):
+        amp = self.amp = AmplifierPythonVirtual.__new__(AmplifierPythonVirtual)
+        amp.logger = logging.getLogger("test_amplifier_python_virtual")
+        amp.logger.addHandler(logging.NullHandler())
+        amp.config = Config(PARAMS)
+        amp.samples_per_packet = 4
+
+    def exits(self, init):
+        try:
+            init()
+        except SystemExit:
+            return True
+        return False
+
+    def test_default_gains_and_offsets(self):
+        self.amp.set_param('active_channels', 'c;a')
+        table = self.amp._init_signal()
+        assert table.shape == (2, 128)
+        assert self.amp.get_param('channel_names') == 'c;a'
+        assert self.amp.get_param('channel_gains') == '1.0;1.0'
+        assert self.amp.get_param('channel_offsets') == '0.0;0.0'
+
+    def test_gains_and_offsets_of_active_channels(self):
+        self.amp.set_param('channel_gains', '1.0;2.0;3.0')
+        self.amp.set_param('channel_offsets', '10;20;30')
+        self.amp.set_param('active_channels', 'c;a')
+        self.amp._init_signal()
+        assert self.amp.get_param('channel_gains') == '3.0;1.0'
+        assert self.amp.get_param('channel_offsets') == '30;10'
+
+    def test_gains_length_mismatch(self):
+        self.amp.set_param('channel_gains', '1.0;2.0')
+        assert self.exits(self.amp._init_signal)
+        self.amp.set_param('channel_gains', '')
+        self.amp.set_param('channel_offsets', '0;0;0;0')
+        assert self.exits(self.amp._init_signal)
+
+    def test_blink_count(self):
+        self.amp.sampling_rate = 128.0
+        self.amp.set_param('blink_count', '0')
+        self.amp._init_events()
+        assert self.amp.blink_every == 0
+        self.amp.set_param('blink_interval', '0.5')
+        assert self.exits(self.amp._init_events)
+        self.amp.set_param('blink_count', '3')
+        self.amp._init_events()
+        assert self.amp.blink_every == 64
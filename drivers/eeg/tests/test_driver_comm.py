@@ -0,0 +1,98 @@
+#!/usr/bin/python
+
+import time
+import logging
+import subprocess
+
+from obci.drivers.eeg.driver_comm import DriverComm, Queue, Empty
+
+# echoes stdin to stdout, writes a line to stderr at start
+DRIVER = ['sh', '-c', 'echo started >&2; exec cat']
+
+
+class PipeDriverComm(DriverComm):
+    io_threads = False
+
+    def __init__(self, run_args):
+        self.logger = logging.getLogger("test_driver_comm")
+        self.logger.addHandler(logging.NullHandler())
+        self.driver = subprocess.Popen(run_args, stdin=subprocess.PIPE,
+                                       stdout=subprocess.PIPE,
+                                       stderr=subprocess.PIPE)
+        self.driver_out_q = Queue()
+        self.driver_err_q = Queue()
+        self._driver_pipes = {
+            self.driver.stdout.fileno(): [self.driver_out_q, ''],
+            self.driver.stderr.fileno(): [self.driver_err_q, '']}
+
+
+def queued(queue):
+    items = []
+    while not queue.empty():
+        items.append(queue.get_nowait())
+    return items
+
+
+class TestReadDriverOutput(object):
+
+    def setup(self):
+        self.comm = PipeDriverComm(DRIVER)
+
+    def teardown(self):
+        if self.comm.driver_is_running():
+            self.comm.driver.kill()
+        self.comm.driver.wait()
+
+    def write(self, data):
+        self.comm.driver.stdin.write(data)
+        self.comm.driver.stdin.flush()
+
+    def read_until(self, queue, count, timeout=2.0):
+        """Read driver output until count items are in queue."""
+        deadline = time.time() + timeout
+        while queue.qsize() < count and time.time() < deadline:
+            self.comm.read_driver_output(0.1)
+        return queued(queue)
+
+    def test_lines(self):
+        assert self.read_until(self.comm.driver_err_q, 1) == ['started\n']
+        self.write('first\nsecond\n\nthird\n')
+        assert self.read_until(self.comm.driver_out_q, 4) == \
+            ['first\n', 'second\n', '\n', 'third\n']
+
+    def test_partial_lines(self):
+        self.write('par')
+        self.comm.read_driver_output(1.0)
+        assert queued(self.comm.driver_out_q) == []
+        self.write('tial\nnext ')
+        assert self.read_until(self.comm.driver_out_q, 1) == ['partial\n']
+        self.write('line\n')
+        assert self.read_until(self.comm.driver_out_q, 1) == ['next line\n']
+
+    def test_eof(self):
+        self.write('line\nno newline at the end')
+        self.comm.driver.stdin.close()
+        deadline = time.time() + 2.0
+        while self.comm.read_driver_output(0.1) and time.time() < deadline:
+            pass
+        assert self.comm._driver_pipes == {}
+        assert queued(self.comm.driver_out_q) == ['line\n', 'no newline at the end']
+        assert queued(self.comm.driver_err_q) == ['started\n']
+        assert not self.comm.read_driver_output(0.1)
+
+    def test_get_out_line(self):
+        self.write('line\n')
+        assert self.comm._get_out_line(timeout=2.0) == 'line\n'
+        start = time.time()
+        try:
+            self.comm._get_out_line(timeout=0.2)
+        except Empty:
+            pass
+        else:
+            assert False, "Got a line not written by the driver"
+        assert 0.15 < time.time() - start < 1.0
+
+    def test_communicate(self):
+        # the driver's response ends with an empty line
+        assert self.comm._communicate('first\nsecond\n', timeout_s=2) == \
+            'first\nsecond\n'
@@ -0,0 +1,105 @@
+#!/usr/bin/python
+
+import random
+
+from obci.drivers.eeg.tmsi import VLDeltaInfo, VLDeltaData, FrontendInfo, \
+    bits_to_num, number_to_string_word, encode_tmsi_bluetooth_number
+from obci.drivers.eeg.benchmark_tmsi_vldelta import legacy_decode, \
+    synthetic_packet
+
+O = VLDeltaData.OVERFLOW
+
+
+def encode_deltas(deltas):
+    """Return bit stream (as bytes, padded to a word) of deltas -
+    ints or special deltas 'zero', 'minus' (-1) and 'overflow'."""
+    bits = []
+    def put(value, length):
+        bits.extend((value >> k) & 1 for k in range(length))
+    for delta in deltas:
+        if delta in ('zero', 'minus', 'overflow'):
+            put(0, 4)
+            put(dict(zero=0, overflow=2, minus=3)[delta], 2)
+        else:
+            length = abs(delta).bit_length() + (1 if delta < 0 else 0)
+            put(length, 4)
+            put(abs(delta), length)
+    bits += [0] * (-len(bits) % 16)
+    return ''.join(chr(bits_to_num(bits[k:k + 8])) for k in range(0, len(bits), 8))
+
+
+def packet(refs, deltas, trans_freq_div, dividers=None):
+    """VLDeltaData packet with given references of data channels
+    (digi and saw start at 0) and deltas in order of transmission."""
+    if dividers is None:
+        dividers = [0] * (len(refs) + FrontendInfo.NUMBER_OF_HELP_CHANNELS)
+    info = VLDeltaInfo()
+    info.data = ''.join(number_to_string_word(w) for w in
+                        [0, 0, trans_freq_div] + dividers)
+    p = VLDeltaData()
+    p.data = ''.join(encode_tmsi_bluetooth_number(r) for r in refs) + \
+        '\x00\x00' + encode_deltas(deltas)
+    p.set_number_of_channels(len(refs))
+    p.set_vldelta_info(info)
+    return p
+
+
+class TestVLDeltaData(object):
+
+    def test_normal_and_special_deltas(self):
+        p = packet([100, -5], [3, -2, 'zero', 1,
+                               'minus', 'zero', 'zero', 1,
+                               100, -1, 'zero', 1], 3)
+        expected = [[100, 103, 102, 202], [-5, -7, -7, -8]]
+        assert p.decode() == expected
+        assert legacy_decode(p) == expected
+        assert p.decode_array().tolist() == expected
+
+    def test_overflow(self):
+        # channel 0 is in overflow from the beginning (not in deltas),
+        # channel 1 gets into overflow in the second sample
+        p = packet([-O, 10], [1, 'zero', 'zero',
+                              'overflow', 'zero', 'zero',
+                              'zero', 'zero'], 3)
+        expected = [[O, O, O, O], [10, 11, O, O]]
+        assert p.decode() == expected
+        assert legacy_decode(p) == expected
+
+    def test_dividers(self):
+        # channel 1 and saw sent with half of frequency of channel 0 and digi
+        p = packet([0, 0], [1, 'zero',
+                            2, -3, 'zero', 'zero',
+                            4, 'zero',
+                            8, 'minus', 'zero', 'zero'], 4, [0, 1, 0, 1])
+        expected = [[0, 1, 3, 7, 15], [0, -3, -4]]
+        assert p.decode() == expected
+        assert legacy_decode(p) == expected
+        try:
+            p.decode_array()
+        except ValueError:
+            pass
+        else:
+            assert False, "decode_array accepted different dividers"
+
+    def test_not_enough_bits(self):
+        p = packet([0, 0], [1000, 1000, 1000, 1000, 1000, 1000], 3)
+        try:
+            p.decode()
+        except AssertionError:
+            pass
+        else:
+            assert False, "Truncated packet decoded"
+
+    def test_agrees_with_legacy_decoder(self):
+        rnd = random.Random(0)
+        for k in range(200):
+            channels = rnd.randint(1, 16)
+            dividers = None
+            if k % 2:
+                dividers = [rnd.randint(0, 2) for _ in
+                            range(channels + FrontendInfo.NUMBER_OF_HELP_CHANNELS)]
+            p = synthetic_packet(channels, 4, dividers, rnd)
+            expected = legacy_decode(p)
+            assert p.decode() == expected
+            if dividers is None:
+                assert p.decode_array().tolist() == expected
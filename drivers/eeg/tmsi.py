@@ -31,6 +31,8 @@ __author__ = "kulewski@gmail.com (Krzysztof Kulewski)"
 
 import math
 
+import numpy
+
 WORD_SIZE = 2  #: word size in bytes
 
 def number_to_string_word(number):
@@ -650,6 +652,42 @@ class VLDeltaInfo(Packet):
             range(number_of_channels + FrontendInfo.NUMBER_OF_HELP_CHANNELS)]
 
 
+_DELTA_MASKS = [(1 << x) - 1 for x in range(16)]
+_SCHEDULES = {}
+
+def _vldelta_schedule(trans_freq_div, divider_list):
+    """
+    Return order of channels in deltas of VLDelta packet (cached).
+    
+    @type trans_freq_div:   number
+    @param trans_freq_div:  transmission frequency divider
+    @type divider_list:     tuple of ints
+    @param divider_list:    dividers of all channels
+    @rtype:                 list of ints
+    @return:                channel numbers in order of their deltas
+    """
+    key = (trans_freq_div, divider_list)
+    schedule = _SCHEDULES.get(key)
+    if schedule is None:
+        schedule = _SCHEDULES[key] = [j for i in range(1, trans_freq_div + 1) \
+            for j in range(len(divider_list)) if i % divider_list[j] == 0]
+    return schedule
+
+def _bit_windows(data):
+    """
+    For every byte offset of data, get number made of 4 bytes starting
+    there (first byte is least significant, data is padded with zeros).
+    
+    @type data:     string
+    @param data:    raw bit stream
+    @rtype:         list of ints
+    @return:        32 bit windows of the stream
+    """
+    raw = numpy.frombuffer(data + "\x00" * 4, dtype=numpy.uint8).astype(numpy.uint32)
+    window = raw[:-3] | raw[1:-2] << 8 | raw[2:-1] << 16 | raw[3:] << 24
+    return window.tolist()
+
+
 class VLDeltaData(ChannelData):
     """
     Packet containing VL Delta channel data.
@@ -697,7 +735,6 @@ class VLDeltaData(ChannelData):
         self.declared_type = PACKET_TYPE.TMS_VL_DELTA_DATA
         self.channel_data = []
         self.vldelta_info = None
-        self.delta_bits = None
     
     def set_vldelta_info(self, vldelta_info):
         """
@@ -710,80 +747,84 @@ class VLDeltaData(ChannelData):
         """
         self.vldelta_info = vldelta_info
 
-    def decode_next_delta(self):
-        """
-        Decode one delta data from delta_bits attribute.
-        Later delete decoded data from delta_bits.
-        
-        @rtype:     tuple (bool, int)
-        @return:    (was this delta special, value of delta)
-        """
-        assert len(self.delta_bits) > 4, "Not enough bits to decode delta len"
-        delta_len = original_delta_len = \
-            bits_to_num(self.delta_bits[:4])
-        if delta_len == 0:
-            delta_len = 2
-        assert len(self.delta_bits) >= 4 + delta_len, \
-            "Not enough bits to decode delta body"
-        delta = bits_to_num(self.delta_bits[4:4 + delta_len])
-        special = original_delta_len == 0
-        if not special:
-            if self.delta_bits[4 + delta_len - 1] == 0:
-                delta = -delta
-        self.delta_bits = self.delta_bits[4 + delta_len:]
-        return (special, delta)
-
     def decode(self):
         """
         Decode channel data contained in this packet.
         Supports VL Delta compression.
         
+        Deltas are read from the packet in one pass, using 32 bit windows
+        of the bit stream precomputed (with numpy) for every byte offset.
+        
         @rtype:     list of lists of ints
         @return:    List indexed by channel numbers. Every list contains
                     list of values in this channel.
         """
+        number_of_all_channels = self.number_of_channels + \
+            FrontendInfo.NUMBER_OF_HELP_CHANNELS
         divider_list = self.vldelta_info.get_divider_list( \
             self.number_of_channels)
-        assert len(divider_list) == \
-            self.number_of_channels + FrontendInfo.NUMBER_OF_HELP_CHANNELS, \
+        assert len(divider_list) == number_of_all_channels, \
             "Divider list of invalid length"
-        
+        schedule = _vldelta_schedule(self.vldelta_info.get_trans_freq_div(),
+                                     tuple(divider_list))
+
         self.channel_data = [[self.extract_channel_data(x)] for x in \
             range(self.number_of_channels)]
         self.channel_data += [[ord(self.data[3 * self.number_of_channels])], \
             [ord(self.data[1 + 3 * self.number_of_channels])]]
         overflow = [x == [self.OVERFLOW] for x in self.channel_data]
-        
-        self.delta_bits = reduce(lambda x, y: x + y, \
-            (num_to_bits(ord(x)) for x in \
-                self.data[3 * self.number_of_channels + \
-                    FrontendInfo.NUMBER_OF_HELP_CHANNELS:]))
-        for i in range(1, self.vldelta_info.get_trans_freq_div() + 1):
-            for j in range(self.number_of_channels + \
-                FrontendInfo.NUMBER_OF_HELP_CHANNELS):
-                if i % divider_list[j] == 0:
-                    if not overflow[j]:
-                        special, delta = self.decode_next_delta()
-                        if special:
-                            if delta == 0:
-                                self.channel_data[j].append( \
-                                    self.channel_data[j][-1])
-                            elif delta == 1:
-                                assert False, "Special delta 1 not used"
-                            elif delta == 2:
-                                overflow[j] = True
-                                self.channel_data[j].append(self.OVERFLOW)  
-                            elif delta == 3:
-                                self.channel_data[j].append( \
-                                    self.channel_data[j][-1] - 1)
-                        else:
-                            self.channel_data[j].append( \
-                                self.channel_data[j][-1] + delta)
-                    else:
-                        self.channel_data[j].append(self.OVERFLOW)
+
+        payload = self.data[3 * self.number_of_channels + \
+                    FrontendInfo.NUMBER_OF_HELP_CHANNELS:]
+        window = _bit_windows(payload)
+        bits = 8 * len(payload)
+        pos = 0
+        for j in schedule:
+            channel = self.channel_data[j]
+            if overflow[j]:
+                channel.append(self.OVERFLOW)
+                continue
+            assert bits - pos > 4, "Not enough bits to decode delta len"
+            word = window[pos >> 3] >> (pos & 7)
+            delta_len = word & 15
+            if delta_len == 0:
+                assert bits - pos >= 6, "Not enough bits to decode delta body"
+                special = (word >> 4) & 3
+                pos += 6
+                if special == 0:
+                    channel.append(channel[-1])
+                elif special == 3:
+                    channel.append(channel[-1] - 1)
+                elif special == 2:
+                    overflow[j] = True
+                    channel.append(self.OVERFLOW)
+                else:
+                    assert False, "Special delta 1 not used"
+            else:
+                assert bits - pos >= 4 + delta_len, \
+                    "Not enough bits to decode delta body"
+                delta = (word >> 4) & _DELTA_MASKS[delta_len]
+                pos += 4 + delta_len
+                if delta >> (delta_len - 1):
+                    channel.append(channel[-1] + delta)
+                else:
+                    channel.append(channel[-1] - delta)
 
         return self.channel_data[:-FrontendInfo.NUMBER_OF_HELP_CHANNELS]
 
+    def decode_array(self):
+        """
+        Decode channel data contained in this packet into one array.
+        All data channels must have the same divider.
+        
+        @rtype:     numpy.ndarray of int32, shape (channels, samples)
+        @return:    values of data channels (without digi and saw channels)
+        """
+        data = self.decode()
+        if len(set(len(x) for x in data)) > 1:
+            raise ValueError("Channels have different dividers")
+        return numpy.array(data, dtype=numpy.int32).reshape(len(data), -1)
+
     def get_digi(self):
         """
         Get Digi channel status.
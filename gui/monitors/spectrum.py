@@ -23,7 +23,6 @@
 #      Magdalena Michalska <jezzy.nietoperz@gmail.com>
 #
 
-import cPickle
 import numpy
 import sys
 
@@ -31,12 +30,17 @@ from PyQt4 import QtCore, QtGui
 from multiplexer.multiplexer_constants import peers, types
 from multiplexer.clients import connect_client
 
-import variables_pb2
+from obci.analysis.spectrum import spectrum_frame
 
 class Spectrum(QtGui.QWidget):
+    """Draw power spectrum of a channel estimated by spectrum peer
+    (see analysis/spectrum/spectrum_peer.py), 4 pixels per Hz."""
     colora = QtGui.QColor(127, 0, 127)
     colorb = QtGui.QColor(0, 0, 0)
     ms = 0.
+    # drawn and alpha band (in Hz)
+    band = (5., 45.)
+    alpha = (7., 15.)
 
     def __init__(self, channel_number):
         QtGui.QWidget.__init__(self, None)
@@ -51,7 +55,6 @@ class Spectrum(QtGui.QWidget):
         self.resize(680, 540)
 
         self.connection = connect_client(type = peers.MONITOR)
-        self.sampling_rate = int(self.connection.query(message="SamplingRate", type=types.DICT_GET_REQUEST_MESSAGE).message)
 
 
     def paintEvent(self, event):
@@ -60,40 +63,30 @@ class Spectrum(QtGui.QWidget):
 
         painter.setPen(self.colorb)
 
-        data = self.connection.query(message = str(self.channel_number), type = types.SIGNAL_CATCHER_REQUEST_MESSAGE, timeout = 5).message
-        #d = cPickle.loads(data)
-        vec = variables_pb2.SampleVector()
-        vec.ParseFromString(data)
-        d = []
-        for x in vec.samples:
-            d.append(x.value)
-        d2 = d[-int(self.sampling_rate * 4):]
-        d2 = abs(numpy.fft.rfft(d2))
-        d2[0] = 0
-        d2[1] = 0
-        j = len(d2)
-        for i in range(j):
-            if i < 5 * 4 or i > 45  * 4:
-                d2[i] = 0
-        s = 0
-        for x in range(7 * 4, 15 * 4):
-            s += d2[x]
+        data = self.connection.query(message = str(self.channel_number), type = types.SPECTRUM_REQUEST_MESSAGE, timeout = 5).message
+        timestamp, freqs, psd = spectrum_frame.decode(data)
+        if len(freqs) == 0 or len(psd) == 0:
+            return
+        d = numpy.sqrt(psd[0])
+        d = numpy.where((freqs >= self.band[0]) & (freqs <= self.band[1]), d, 0.)
+        s = d[(freqs >= self.alpha[0]) & (freqs < self.alpha[1])].sum()
         self.ms = max(s, self.ms)
-        m = max(d2)
-        #print s
-        d3 = [400. * x / m for x in d2]
-        for i in xrange(len(d3)):
-            if i % 8 == 0:
-                painter.drawLine(10 + i, 90 - 3 * (i % 32), 10 + i, 100)
-                painter.drawText(5 + i, 85 - 3 * (i % 32), str(i / 4))
+        m = d.max()
+        if m == 0:
+            return
+        xs = (10 + 4 * freqs).astype(int)
+        hs = (400. * d / m).astype(int)
+        for hz in xrange(0, int(freqs[-1]) + 1, 2):
+            painter.drawLine(10 + 4 * hz, 90 - 12 * (hz % 8), 10 + 4 * hz, 100)
+            painter.drawText(5 + 4 * hz, 85 - 12 * (hz % 8), str(hz))
         painter.setPen(self.colora)
-        for i in xrange(len(d3)):
-            painter.drawLine(10 + i, 100, 10 + i, 100 + int(d3[i]))
-            if d3[i] > 100:
-                painter.drawText(5 + i, 110 + int(d3[i]), str(i / 4.))
-        painter.drawLine(620, 10 + self.ms / 30., 680, 10 + self.ms / 30.)
-        painter.setBrush(QtCore.Qt.green)
-        painter.drawRect(640, 10, 40, s / 30.)
+        painter.drawLines([QtCore.QLine(x, 100, x, 100 + h) for x, h in zip(xs, hs)])
+        for i in (hs > 100).nonzero()[0]:
+            painter.drawText(xs[i] - 5, 110 + hs[i], str(freqs[i]))
+        painter.drawLine(620, 410, 680, 410)
+        if self.ms > 0:
+            painter.setBrush(QtCore.Qt.green)
+            painter.drawRect(640, 10, 40, 400. * s / self.ms)
     
 
 if __name__ == "__main__":
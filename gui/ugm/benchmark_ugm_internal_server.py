@@ -0,0 +1,139 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Measure update-to-paint latency of ugm updates sent over udp to
+ugm_internal_server at a given rate.
+
+ugm engine is replaced by a Qt-less one: gui thread is a loop firing
+every TIMER_INTERVAL (as engine`s QTimer does) and a 'paint' is a sleep
+of paint_ms. Compared engines:
+- legacy - every update put to a Queue under a lock and applied
+  (and painted) separately, as ugm_engine did before UgmUpdateBuffer,
+- current - UgmEngine.put_update/timer_update_gui with UgmUpdateBuffer.
+
+Every update flashes a row of a 6x6 speller (sets 'color' of 6
+stimuluses) and carries its send time. Latency is measured from send
+time to the end of the paint showing the update; updates overridden
+before being painted (or datagrams dropped while the udp thread waits
+for the legacy engine`s lock) are counted as skipped.
+
+Usage: python benchmark_ugm_internal_server.py [updates_per_second] [paint_ms] [seconds]
+"""
+
+import sys
+import time
+import socket
+import thread
+import threading
+import Queue
+
+from obci.gui.ugm import ugm_config_manager, ugm_internal_server, \
+    ugm_update_buffer, ugm_update_codec
+
+TIMER_INTERVAL = 0.01
+ROWS = 6
+
+
+def speller_fields():
+    return [{'id': 1, 'stimuluses': [
+                {'id': 100 + i, 'color': '#ffffff', 'message': chr(65 + i),
+                 'stimuluses': []} for i in range(ROWS * ROWS)]}]
+
+
+class BenchEngine(object):
+    """UgmEngine without Qt."""
+    def __init__(self, paint_time):
+        self._config_manager = ugm_config_manager.UgmConfigManager('text_neg')
+        self._config_manager.set_full_config(speller_fields())
+        self.updates = ugm_update_buffer.UgmUpdateBuffer()
+        self.paint_time = paint_time
+        self.latencies = []
+        self.painted = 0
+
+    def control(self, msg):
+        pass
+
+    def put_update(self, p_msg_type, p_msg_value, p_time):
+        self.updates.put_configs(ugm_update_codec.decode(p_msg_value), p_time)
+
+    def timer_update_gui(self):
+        l_updates = self.updates.take()
+        if l_updates is None:
+            return
+        l_full, l_configs, l_since = l_updates
+        self._config_manager.set_configs(l_configs)
+        self.paint([c['sent'] for c in l_configs])
+
+    def paint(self, sent_times):
+        time.sleep(self.paint_time)
+        l_now = time.time()
+        self.latencies.extend(l_now - t for t in set(sent_times))
+        self.painted += 1
+
+
+class LegacyBenchEngine(BenchEngine):
+    """UgmEngine with Queue of messages applied one by one."""
+    def __init__(self, paint_time):
+        super(LegacyBenchEngine, self).__init__(paint_time)
+        self.queue = Queue.Queue()
+        self.mutex = threading.Lock()
+
+    def put_update(self, p_msg_type, p_msg_value, p_time):
+        self.mutex.acquire()
+        self.queue.put(p_msg_value)
+        self.mutex.release()
+
+    def timer_update_gui(self):
+        self.mutex.acquire()
+        while True:
+            try:
+                msg = self.queue.get_nowait()
+            except Queue.Empty:
+                break
+            self._config_manager.set_config_from_binary_message(msg)
+            self.paint([c['sent'] for c in ugm_update_codec.decode(msg)])
+        self.mutex.release()
+
+
+def measure(engine, rate, seconds):
+    srv = ugm_internal_server.UdpServer(engine, '127.0.0.1', 0)
+    thread.start_new_thread(srv.run, ())
+    address = srv.socket.getsockname()
+    sender = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+
+    def send():
+        start = time.time()
+        for k in xrange(int(rate * seconds)):
+            delay = start + k / float(rate) - time.time()
+            if delay > 0:
+                time.sleep(delay)
+            row = k % ROWS
+            sent = time.time()
+            sender.sendto(ugm_update_codec.encode(
+                    [{'id': 100 + ROWS * row + i, 'color': '#%02x0000' % (k % 256),
+                      'sent': sent} for i in range(ROWS)]), address)
+    sending = threading.Thread(target=send)
+    sending.start()
+    # gui thread, until all updates sent and painted
+    end = None
+    while end is None or time.time() < end:
+        engine.timer_update_gui()
+        time.sleep(TIMER_INTERVAL)
+        if end is None and not sending.is_alive():
+            end = time.time() + 0.5
+    count = int(rate * seconds)
+    lat = sorted(engine.latencies)
+    return (count, count - len(lat), engine.painted,
+            1000 * lat[len(lat) / 2], 1000 * lat[int(len(lat) * 0.95)], 1000 * lat[-1])
+
+
+def run(rate=120, paint_ms=8, seconds=5):
+    print("%d updates/s, paint %d ms, %d s" % (rate, paint_ms, seconds))
+    print("engine  | updates | skipped | paints | latency ms: median |  p95 |   max")
+    for name, cls in [('legacy', LegacyBenchEngine), ('current', BenchEngine)]:
+        print("%-7s | %7d | %7d | %6d |             %6.1f | %4.1f | %5.1f" %
+              ((name,) + measure(cls(paint_ms / 1000.0), rate, seconds)))
+
+if __name__ == '__main__':
+    args = [int(a) for a in sys.argv[1:4]]
+    run(*args)
@@ -0,0 +1,122 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Compare cost of speller-like incremental ugm updates (a few 'message'
+attributes changed) sent the old way - str() of a list of configs,
+eval() and a recursive search of every stimulus - with binary updates
+(ugm_update_codec) applied through UgmConfigManager`s id index.
+
+Also compare the recursive old_new_fields_differ (both trees) with
+the current one after a full update of the same structure.
+
+Usage: python benchmark_ugm_update.py [number_of_stimuluses] [changed] [updates]
+"""
+
+import sys
+import time
+
+from obci.gui.ugm import ugm_config_manager, ugm_update_codec
+
+
+def synthetic_fields(number_of_stimuluses):
+    """Return ugm config - fields with 10 text stimuluses each."""
+    fields = []
+    for i in range(max(number_of_stimuluses / 10, 1)):
+        stims = [{'id': 1000 + 10 * i + j, 'stimulus_type': 'text',
+                  'message': '', 'font_size': 40, 'font_color': '#000000',
+                  'font_family': 'Arial', 'position_horizontal_type': 'aligned',
+                  'position_horizontal': 'center', 'position_vertical_type': 'aligned',
+                  'position_vertical': 'center', 'stimuluses': []}
+                 for j in range(10)]
+        fields.append({'id': i + 1, 'width_type': 'relative', 'width': 0.25,
+                       'height_type': 'relative', 'height': 0.25,
+                       'position_horizontal_type': 'relative',
+                       'position_horizontal': 0.0, 'position_vertical_type': 'relative',
+                       'position_vertical': 0.0, 'color': '#ffffff',
+                       'stimuluses': stims})
+    return fields
+
+
+def legacy_get_config(fields, elem_id):
+    for i in fields:
+        if i['id'] == elem_id:
+            return i
+        j = legacy_get_config(i['stimuluses'], elem_id)
+        if j is not None:
+            return j
+    return None
+
+
+def legacy_update(fields, msg):
+    """UgmConfigManager.set_config_from_message before binary updates."""
+    for config in eval(msg):
+        elem = legacy_get_config(fields, config['id'])
+        for key, value in config.iteritems():
+            elem[key] = value
+
+
+def legacy_differ(old_fields, new_fields):
+    """UgmConfigManager.old_new_fields_differ before binary updates."""
+    def configs(fields, ret):
+        for i in fields:
+            ret[i['id']] = i
+            configs(i['stimuluses'], ret)
+        return ret
+    olds, news = configs(old_fields, {}), configs(new_fields, {})
+    for a, b in [(olds, news), (news, olds)]:
+        for key, value in a.iteritems():
+            if key not in b or b[key].get('type') != value.get('type'):
+                return True
+    return False
+
+
+def updates(fields, changed, count):
+    ids = [s['id'] for f in fields for s in f['stimuluses']]
+    return [[{'id': ids[(k * changed + j) % len(ids)], 'message': chr(65 + k % 26)}
+             for j in range(changed)] for k in range(count)]
+
+
+def timed(func, args_list):
+    start = time.time()
+    for args in args_list:
+        func(*args)
+    return time.time() - start
+
+
+def run(number_of_stimuluses=500, changed=9, count=2000):
+    fields = synthetic_fields(number_of_stimuluses)
+    mgr = ugm_config_manager.UgmConfigManager('text_neg')
+    mgr.set_full_config(synthetic_fields(number_of_stimuluses))
+    ups = updates(fields, changed, count)
+
+    legacy_msgs = [str(u) for u in ups]
+    binary_msgs = [ugm_update_codec.encode(u) for u in ups]
+    legacy_update(fields, legacy_msgs[-1])
+    mgr.set_config_from_binary_message(binary_msgs[-1])
+    assert mgr.get_ugm_fields() == fields
+
+    print("%d updates of %d stimuluses in ugm of %d stimuluses" %
+          (count, changed, len(fields) * 11))
+    print("update        | bytes | encode (us) | apply (us)")
+    t_enc = timed(str, [(u,) for u in ups])
+    t_app = timed(legacy_update, [(fields, m) for m in legacy_msgs])
+    print("str/eval      | %5d | %11.1f | %10.1f" % (len(legacy_msgs[0]),
+          t_enc / count * 1e6, t_app / count * 1e6))
+    t_enc = timed(ugm_update_codec.encode, [(u,) for u in ups])
+    t_app = timed(mgr.set_config_from_binary_message, [(m,) for m in binary_msgs])
+    print("binary        | %5d | %11.1f | %10.1f" % (len(binary_msgs[0]),
+          t_enc / count * 1e6, t_app / count * 1e6))
+
+    runs = 100
+    new_fields = [synthetic_fields(number_of_stimuluses) for _ in range(runs)]
+    t_legacy = timed(legacy_differ, [(fields, f) for f in new_fields])
+    def full_update(f):
+        mgr.set_full_config(f)
+        assert not mgr.old_new_fields_differ()
+    t_current = timed(full_update, [(f,) for f in new_fields])
+    print("old_new_fields_differ after full update (us): legacy %.1f, current %.1f" %
+          (t_legacy / runs * 1e6, t_current / runs * 1e6))
+
+if __name__ == '__main__':
+    args = [int(a) for a in sys.argv[1:4]]
+    run(*args)
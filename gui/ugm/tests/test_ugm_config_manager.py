@@ -117,7 +117,25 @@ True
 >>> mgr.old_new_fields_differ()
 True
 
-""" 
+>>> from ugm import ugm_update_codec
+
+>>> mgr.set_config_from_binary_message(ugm_update_codec.encode([{'id':22, 'message':'abc'}, {'id':3, 'color':'#ffffff'}]))
+
+>>> print(mgr.get_config_for(22)['message'])
+abc
+
+>>> print(mgr.get_config_for(3)['color'])
+#ffffff
+
+>>> mgr.old_new_fields_differ()
+False
+
+>>> mgr.set_config_from_message("[{'id':2, 'stimuluses':[]}]")
+
+>>> mgr.get_config_for(22) is None
+True
+
+"""
 if __name__ == '__main__':
     import doctest, sys
     res = doctest.testmod(sys.modules[__name__])
@@ -22,15 +22,20 @@ SETTERS:
 UGM_UPDATE_MESSAGE handling:
 - set_config_from_message()
 - set_full_config_from_message()
+- set_config_from_binary_message()
 - config_from_message()
 - config_to_message()
 - update_message_is_full()
 - update_message_is_simple()
+- update_message_is_binary()
 - old_new_fields_differ()
 """
+import ast
 import copy
 import os, os.path, sys
 import pickle
+
+from obci.gui.ugm import ugm_update_codec
 class UgmAttributesManager(object):
     """Manager possible keys and values for config.
     Attributes:
@@ -171,6 +176,10 @@ class UgmConfigManager(object):
     python module path, eg ugm.configs.ugm_config
     (for file ...../ugm/configs/ugm_config.py)
     - _fields = a python-list taken from config file representing ugm config
+    - _index = a dictionary id -> config of every stimulus in _fields,
+    built when needed (None if _fields`s structure has changed)
+    - _types, _old_types = dictionaries id -> 'type' of every stimulus
+    in _fields and _old_fields (None if not computed yet)
     """
     def __init__(self, p_config_file='ugm_config'):
         """Init manager from config in format 
@@ -189,6 +198,9 @@ class UgmConfigManager(object):
 
         self._fields = []
         self._old_fields = []
+        self._index = None
+        self._types = None
+        self._old_types = {}
         self.update_from_file(p_standard_config=self._standard_config)
     # ----------------------------------------------------------------------
     # CONFIG FILE MANAGMENT ------------------------------------------------
@@ -271,7 +283,19 @@ class UgmConfigManager(object):
     # ----------------------------------------------------------------------
     def _configs(self, p_id):
         """Return configuration dictionary for stimulus with p_id id."""
-        return self._get_recursive_config(self._fields, p_id)
+        return self._get_index().get(p_id)
+    def _get_index(self):
+        if self._index is None:
+            self._index = self._get_recursive_configs(self._fields)
+        return self._index
+    def _get_types(self):
+        if self._types is None:
+            self._types = dict((i_id, i_config.get('type', None))
+                               for i_id, i_config in self._get_index().iteritems())
+        return self._types
+    def _structure_changed(self):
+        self._index = None
+        self._types = None
     def _get_recursive_config(self, p_fields, p_id):
         """Return configuration dictionary for stimulus with p_id id. 
         Internal method used by _config"""
@@ -289,11 +313,12 @@ class UgmConfigManager(object):
 
     def _int_get_recursive_configs(self, p_fields, l_ret_dict):      
         for i in p_fields:
-            l_ret_dict[i['id']] = i
+            l_ret_dict.setdefault(i['id'], i)
             self._int_get_recursive_configs(i['stimuluses'], l_ret_dict)
     def _update_old_fields(self):
         """Set _old_fields to _fields."""
         self._old_fields = self._fields
+        self._old_types = self._types
         
     # ----------------------------------------------------------------------
     # PUBLIC SETTERS -------------------------------------------------------
@@ -301,7 +326,10 @@ class UgmConfigManager(object):
         """Set self`s in-memory ugm configuration to p_config_fields 
         being a list of dictionaries representin ugm stimuluses."""
         self._update_old_fields()
+        if self._old_types is None:
+            self._old_types = self._get_types()
         self._fields = p_config_fields
+        self._structure_changed()
 
     def set_full_config_from_message(self, p_msg):
         """Set self`s in-memory ugm configuration based on a list of 
@@ -315,10 +343,12 @@ class UgmConfigManager(object):
         defined id p_elem_config."""
         # Don`create a new entry, use existing one so 
         # that corresponding element in self._fields is also updated
-        self._update_old_fields()
         l_elem = self._configs(p_elem_config['id'])
         for i_key, i_value in p_elem_config.iteritems():
             l_elem[i_key] = i_value
+        if 'stimuluses' in p_elem_config or 'type' in p_elem_config:
+            self._structure_changed()
+        self._update_old_fields()
 
     def set_configs(self, p_elem_configs):
         for i_config in p_elem_configs:
@@ -331,6 +361,11 @@ class UgmConfigManager(object):
         l_configs = self.config_from_message(p_msg)
         self.set_configs(l_configs)
 
+    def set_config_from_binary_message(self, p_msg):
+        """Update config for stimuluses with data extracted
+        from p_msg - binary update (see ugm_update_codec)."""
+        self.set_configs(ugm_update_codec.decode(p_msg))
+
     # PUBLIC SETTERS -------------------------------------------------------
     # ----------------------------------------------------------------------
     def update_message_is_full(self, p_msg_type):
@@ -339,34 +374,22 @@ class UgmConfigManager(object):
     def update_message_is_simple(self, p_msg_type):
         """Return true if p_msg_type represents simple update message."""
         return p_msg_type == 1
+    def update_message_is_binary(self, p_msg_type):
+        """Return true if p_msg_type represents binary update message
+        (see ugm_update_codec)."""
+        return p_msg_type == ugm_update_codec.BINARY_UPDATE_TYPE
     def old_new_fields_differ(self):
         """Return true if self._old_fields and self._fields 
-        are different."""
-
-        l_olds = self._get_recursive_configs(self._old_fields)
-        l_news = self._get_recursive_configs(self._fields)
-        l_first = self._old_new_fields_differ_helper(l_olds, l_news)
-        if not l_first:
-            return self._old_new_fields_differ_helper(l_news, l_olds)
-        else:
-            return l_first
-    def _old_new_fields_differ_helper(self, l_olds, l_news):
-        for i_old_key, i_old_value in l_olds.iteritems():
-            try:
-                #TODO this in unnesesary
-                l_new_value = l_news[i_old_key]
-            except KeyError:
-                return True
-            else:
-                # None, as 'fields' don`t have 'type' attribute
-                if l_new_value.get('type', None) != \
-                        i_old_value.get('type', None):
-                    return True
-        return False
+        are different - have different ids or types of stimuluses."""
+        # 'type' of every stimulus of _old_fields was stored while
+        # setting _fields, so only _fields are traversed (once).
+        if self._old_fields is self._fields:
+            return False
+        return self._old_types != self._get_types()
     def config_from_message(self, p_msg):
         """Create python configuration structure 
         from message string p_msg."""
-        return eval(p_msg)
+        return ast.literal_eval(p_msg)
     def config_to_message(self):
         """Create and return string from self`s configuration structure."""
         return str(self._fields)
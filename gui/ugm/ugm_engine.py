@@ -4,16 +4,19 @@
 #     Mateusz Kruszyński <mateusz.kruszynski@gmail.com>
 """A heart of ugm. This module implements core classes for ugm to work.
 It should be ran as a script in MAIN thread or using UgmEngine.run()."""
-import sys
+import sys, time
 from PyQt4 import QtGui, QtCore, Qt
-import Queue
 
 from obci.gui.ugm import ugm_config_manager
 from obci.gui.ugm import ugm_stimuluses
+from obci.gui.ugm import ugm_update_buffer
+from obci.gui.ugm import ugm_update_codec
 
 
 from obci.utils import context as ctx
 
+UPDATE_DELAY_WARNING = 0.1
+
 class UgmField(ugm_stimuluses.UgmRectStimulus):
     """For now, just to express it..."""
     pass
@@ -135,15 +138,23 @@ class UgmEngine(QtCore.QObject):
                      self.ugm_update_signal)
 
 
-        self.queue = Queue.Queue()
-        self.mutex = Qt.QMutex()
+        self.updates = ugm_update_buffer.UgmUpdateBuffer()
         self.mgr_mutex = Qt.QMutex()
 
-    def queue_message(self, l_msg):
-        """Insert message to queue waiting to be displayed."""
-        self.mutex.lock()
-        self.queue.put(l_msg)
-        self.mutex.unlock()
+    def put_update(self, p_msg_type, p_msg_value, p_time):
+        """Decode update message (see update_from_message) received
+        at p_time and merge it with updates waiting to be displayed.
+        Called from ugm_internal_server`s thread only."""
+        if self._config_manager.update_message_is_full(p_msg_type):
+            self.updates.put_full(
+                self._config_manager.config_from_message(p_msg_value), p_time)
+        elif self._config_manager.update_message_is_simple(p_msg_type):
+            self.updates.put_configs(
+                self._config_manager.config_from_message(p_msg_value), p_time)
+        elif self._config_manager.update_message_is_binary(p_msg_type):
+            self.updates.put_configs(ugm_update_codec.decode(p_msg_value), p_time)
+        else:
+            raise Exception("Wrong UgmUpdate message type!")
 
     def _timer_on_run(self):
         """Fired on run once time."""
@@ -160,23 +171,28 @@ class UgmEngine(QtCore.QObject):
 
 
     def timer_update_gui(self):
-        """Fired very often - clear self.queue and update gui with those messages."""
-        self.mutex.lock()
-        if self.queue.qsize() == 0:
-            self.mutex.unlock()
+        """Fired very often - update gui with latest state of stimuluses
+        updated since last call."""
+        l_updates = self.updates.take()
+        if l_updates is None:
             return
-        elif (self.queue.qsize() > 5):
-            self.context['logger'].warning("Warning! Queue size is: "+str(self.queue.qsize()))
-
-        while True:
-            try:
-                msg = self.queue.get_nowait()
-            except Queue.Empty:
-                break
-            else:
-                self.update_from_message(
-                    msg.type, msg.value)
-        self.mutex.unlock()
+        l_full, l_configs, l_since = l_updates
+        self.mgr_mutex.lock()
+        l_rebuild = False
+        if l_full is not None:
+            self.context['logger'].info('ugm_engine got full message to update.')
+            self._config_manager.set_full_config(l_full)
+            l_rebuild = self._config_manager.old_new_fields_differ()
+        self._config_manager.set_configs(l_configs)
+        if l_rebuild:
+            self.rebuild()
+        else:
+            self.update()
+        self.mgr_mutex.unlock()
+        l_delay = time.time() - l_since
+        if l_delay > UPDATE_DELAY_WARNING:
+            self.context['logger'].warning("Warning! ugm updated "+str(int(l_delay*1000))+
+                                           " ms after receiving update")
 
 
     @QtCore.pyqtSlot(QtGui.QMouseEvent)
@@ -218,10 +234,11 @@ class UgmEngine(QtCore.QObject):
 
     def update_from_message(self, p_msg_type, p_msg_value):
         """Update ugm from config defined by dictionary p_msg_value.
-        p_msg_type must be 0 or 1. 0 means that ugm should rebuild fully,
-        2 means that config hasn`t changed its structure, only attributes, 
+        p_msg_type must be 0, 1 or 2. 0 means that ugm should rebuild fully,
+        1 means that config hasn`t changed its structure, only attributes, 
         so that ugm`s widget might remain the same, 
-        they should only redraw."""
+        they should only redraw. 2 is the same as 1, but p_msg_value is
+        a binary update (see ugm_update_codec)."""
         self.mgr_mutex.lock()
         if self._config_manager.update_message_is_full(p_msg_type):
             self.context['logger'].info('ugm_engine got full message to update.')
@@ -233,6 +250,11 @@ class UgmEngine(QtCore.QObject):
             self._config_manager.set_config_from_message(p_msg_value)
             self.update()
             self.mgr_mutex.unlock()
+        elif self._config_manager.update_message_is_binary(p_msg_type):
+            self.context['logger'].debug('ugm_engine got binary message to update.')
+            self._config_manager.set_config_from_binary_message(p_msg_value)
+            self.update()
+            self.mgr_mutex.unlock()
         else:
             self.mgr_mutex.unlock()
             self.context['logger'].error("Wrong UgmUpdate message type!")
@@ -6,6 +6,7 @@
 from obci.configs import variables_pb2
 from multiplexer.multiplexer_constants import peers, types
 from obci.gui.ugm import ugm_config_manager
+from obci.gui.ugm import ugm_update_codec
 
 TEXT_SCREEN_MGR = ugm_config_manager.UgmConfigManager('text_neg')
 TEXT_ID = 101
@@ -25,9 +26,15 @@ def send_logo(conn, img):
   send_config_for(conn, LOGO_ID, 'image_path', img)
 
 def send_config_for(conn, id, key, value):
-  config = str([{'id':id,
-             key:value}])
-  send_config(conn, config, 1)
+  send_configs(conn, [{'id':id,
+                       key:value}])
+
+def send_configs(conn, configs):
+  """Send changed attributes of stimuluses - a list of dictionaries
+  with 'id' and the attributes - as a binary update."""
+  conn.send_message(
+    message = ugm_update_codec.encode(configs),
+    type=types.UGM_UPDATE_MESSAGE, flush=True)
 
 def send_config(conn, config, type=0):
   l_type = type
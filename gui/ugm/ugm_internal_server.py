@@ -10,8 +10,16 @@ import socket, time, sys
 from obci.utils import tagger
 from obci.utils import context as ctx
 from obci.configs import variables_pb2
+from obci.gui.ugm import ugm_update_codec
 
-BUF = 2**19
+BUF = 2**16 # max udp datagram size
+
+# First bytes of messages sent by ugm_server: binary update (see
+# ugm_update_codec) and serialized UgmUpdate and Variable (UGM_CONTROL_MESSAGE)
+# - protobuf tags of their required field 1 (type int32, key string).
+BINARY_UPDATE_HEADER = ugm_update_codec.BINARY_MARKER
+UGM_UPDATE_HEADER = '\x08'
+UGM_CONTROL_HEADER = '\x0a'
 
 class UdpServer(object):
     """The class solves a problem with PyQt - it`s main window MUST be 
@@ -34,8 +42,8 @@ class UdpServer(object):
 
     def run(self):
         """Do forever:
-        wait for data from ugm_server (it should be UgmUpdate() message
-        type by now), parse data and send it to self._ugm_engine."""
+        wait for data from ugm_server, parse data and send it to 
+        self._ugm_engine."""
         try:
             while True:
                 # Wait for data from ugm_server
@@ -45,25 +53,30 @@ class UdpServer(object):
             self.socket.close()
 
     def process_message(self, message):
-        # should represent UgmUpdate type...
-        l_msg = variables_pb2.UgmUpdate()
+        l_header = message[:1]
         try:
-            l_msg.ParseFromString(message)
-            if len(l_msg.value) == 0:
-                raise Exception("UgmUpdate message len is 0. Assumed parse error!!!")
-            l_time = time.time()
-            self._ugm_engine.queue_message(l_msg)
-            self.context['logger'].debug("Got ugm update message: ")
-            self.context['logger'].debug(l_msg.value)
-            if self._use_tagger:
-                self._tagger.send_tag(l_time, l_time, "ugm_update", 
-                                      {"ugm_config":str(l_msg.value)})
-        except:
-            self.context['logger'].info("PARSER ERROR, too big ugm update message or not UGM_UPDATE_MESSAGE... Try UGM_CONTROL_MESSAGE")
-            l_msg = variables_pb2.Variable()
-            try:
+            if l_header == BINARY_UPDATE_HEADER:
+                self._process_update(ugm_update_codec.BINARY_UPDATE_TYPE, message)
+            elif l_header == UGM_UPDATE_HEADER:
+                l_msg = variables_pb2.UgmUpdate()
+                l_msg.ParseFromString(message)
+                self._process_update(l_msg.type, l_msg.value)
+            elif l_header == UGM_CONTROL_HEADER:
+                l_msg = variables_pb2.Variable()
                 l_msg.ParseFromString(message)
-                self.context['logger'].info("Properly parsed UGM_CONTROL_MESSAGE...")
                 self._ugm_engine.control(l_msg)
-            except:
-                self.context['logger'].info("PARSER ERROR, too big ugm control message  or not UGM_CONTROL_MESSAGE... Do nothing!")
+            else:
+                self.context['logger'].error("Unknown ugm message, first byte: " +
+                                             repr(l_header))
+        except Exception, e:
+            self.context['logger'].error("PARSER ERROR, could not process ugm message: " +
+                                         str(e))
+
+    def _process_update(self, p_msg_type, p_msg_value):
+        l_time = time.time()
+        self._ugm_engine.put_update(p_msg_type, p_msg_value, l_time)
+        if self._use_tagger:
+            if p_msg_type == ugm_update_codec.BINARY_UPDATE_TYPE:
+                p_msg_value = str(ugm_update_codec.decode(p_msg_value))
+            self._tagger.send_tag(l_time, l_time, "ugm_update",
+                                  {"ugm_config":p_msg_value})
@@ -0,0 +1,82 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Author:
+#     Mateusz Kruszyński <mateusz.kruszynski@gmail.com>
+
+"""Hand-over of decoded ugm updates from ugm_internal_server`s udp
+thread (producer) to ugm_engine`s gui thread (consumer).
+
+The producer appends decoded updates to a deque (append and popleft
+are atomic, so no lock is needed). On every frame the consumer takes
+all of them at once and merges them: changed attributes of every
+stimulus by id (newer values override older ones) and the last full
+config (which drops all earlier simple updates). So the gui applies
+only the latest state of every stimulus, however many updates came
+since the previous frame.
+
+>>> buf = UgmUpdateBuffer()
+>>> buf.take() is None
+True
+>>> buf.put_configs([{'id': 1, 'message': 'a'}, {'id': 2, 'color': '#000000'}], 10.0)
+>>> buf.put_configs([{'id': 1, 'message': 'b'}], 10.1)
+>>> buf.put_configs([{'id': 1, 'message': 'c', 'font_size': 20}], 10.2)
+>>> full, configs, since = buf.take()
+>>> full, since
+(None, 10.0)
+>>> sorted(sorted(c.items()) for c in configs)
+[[('color', '#000000'), ('id', 2)], [('font_size', 20), ('id', 1), ('message', 'c')]]
+>>> buf.take() is None
+True
+>>> buf.put_configs([{'id': 1, 'message': 'd'}], 11.0)
+>>> buf.put_full([{'id': 5, 'stimuluses': []}], 11.1)
+>>> buf.put_configs([{'id': 5, 'color': '#ffffff'}], 11.2)
+>>> buf.take()
+([{'id': 5, 'stimuluses': []}], [{'color': '#ffffff', 'id': 5}], 11.0)
+"""
+
+import collections
+
+
+class UgmUpdateBuffer(object):
+    def __init__(self):
+        # (full config or None, list of configs or None, receive time)
+        self._queue = collections.deque()
+
+    def put_full(self, p_fields, p_time):
+        """Store full ugm config p_fields received at p_time.
+        Called by producer."""
+        self._queue.append((p_fields, None, p_time))
+
+    def put_configs(self, p_configs, p_time):
+        """Store p_configs (a list of dictionaries with 'id' and changed
+        attributes) received at p_time. Called by producer."""
+        self._queue.append((None, p_configs, p_time))
+
+    def take(self):
+        """Return updates stored since last call merged, as a tuple
+        (full config or None, list of configs, receive time of the oldest
+        update) or None if there are no updates. Called by consumer."""
+        l_full = None
+        l_configs = {}
+        l_since = None
+        while True:
+            try:
+                i_full, i_configs, i_time = self._queue.popleft()
+            except IndexError:
+                break
+            if l_since is None:
+                l_since = i_time
+            if i_full is not None:
+                l_full = i_full
+                l_configs = {}
+                continue
+            for i_config in i_configs:
+                l_pending = l_configs.get(i_config['id'])
+                if l_pending is None:
+                    l_configs[i_config['id']] = dict(i_config)
+                else:
+                    l_pending.update(i_config)
+        if l_since is None:
+            return None
+        return l_full, l_configs.values(), l_since
@@ -0,0 +1,167 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Author:
+#     Mateusz Kruszyński <mateusz.kruszynski@gmail.com>
+
+"""Compact binary format of incremental ugm updates (UGM_UPDATE_MESSAGE
+payload sent instead of UgmUpdate type 1).
+
+An update is a list of stimulus configs, every config is a dictionary
+with 'id' and changed attributes only, eg. [{'id':101, 'message':'A'}].
+Encoded update is BINARY_MARKER, format version byte, number of
+configs and for every config its id, number of attributes and
+the attributes: key code (index in KEYS or KEY_BY_NAME followed by
+the key), value type byte and the value.
+
+Attribute values must be ints, floats, strings, booleans or None.
+Structure changes (eg. new 'stimuluses') need a full update (type 0).
+
+A serialized UgmUpdate or Variable never starts with a zero byte, so
+receivers tell binary updates from protobuf messages by the first byte.
+
+>>> data = encode([{'id': 101, 'message': 'A', 'font_size': 40},
+...                {'id': 7, 'color': u'#ff0000', 'feedback_level': 0.5}])
+>>> is_binary(data), len(data)
+(True, 50)
+>>> decode(data) == [{'id': 101, 'message': 'A', 'font_size': 40},
+...                  {'id': 7, 'color': u'#ff0000', 'feedback_level': 0.5}]
+True
+>>> sorted(decode(encode([{'id': 1, 'my_key': None, 'visible': True}]))[0].items())
+[('id', 1), ('my_key', None), ('visible', True)]
+>>> encode([{'id': 1, 'stimuluses': []}])
+Traceback (most recent call last):
+...
+UgmUpdateCodecError: Can't encode value of stimuluses: []
+"""
+
+import struct
+
+BINARY_MARKER = '\x00'
+BINARY_VERSION = 1
+
+_HEADER = BINARY_MARKER + chr(BINARY_VERSION)
+
+# UgmUpdate type numbers are 0 (full) and 1 (simple update)
+BINARY_UPDATE_TYPE = 2
+
+# Codes of attribute keys are indexes in KEYS - only append new keys.
+KEYS = ('message', 'color', 'font_color', 'font_size', 'font_family',
+        'image_path', 'feedback_level', 'width', 'height',
+        'position_horizontal', 'position_vertical', 'width_type',
+        'height_type', 'position_horizontal_type', 'position_vertical_type',
+        'stimulus_type', 'maze_user_x', 'maze_user_y', 'maze_user_color',
+        'maze_user_direction')
+KEY_BY_NAME = 255
+
+_KEY_CODES = dict((key, chr(i)) for i, key in enumerate(KEYS))
+
+_COUNT = struct.Struct('<H')
+_CONFIG = struct.Struct('<iB')
+_INT = struct.Struct('<q')
+_FLOAT = struct.Struct('<d')
+
+
+class UgmUpdateCodecError(ValueError):
+    pass
+
+
+def is_binary(data):
+    return data[:1] == BINARY_MARKER
+
+
+def _encode_string(s):
+    if len(s) > 0xffff:
+        raise UgmUpdateCodecError("Too long string value: " + str(len(s)))
+    return _COUNT.pack(len(s)) + s
+
+
+def _encode_value(key, value):
+    # bool before int - bool is a subclass of int
+    if value is None:
+        return 'N'
+    elif value is True:
+        return 'T'
+    elif value is False:
+        return 'F'
+    elif isinstance(value, (int, long)):
+        return 'i' + _INT.pack(value)
+    elif isinstance(value, float):
+        return 'd' + _FLOAT.pack(value)
+    elif isinstance(value, str):
+        return 's' + _encode_string(value)
+    elif isinstance(value, unicode):
+        return 'u' + _encode_string(value.encode('utf-8'))
+    raise UgmUpdateCodecError("Can't encode value of " + key + ": " + repr(value))
+
+
+def encode(configs):
+    """Return binary update for configs - a list of dictionaries
+    with 'id' and changed attributes."""
+    parts = [_HEADER, _COUNT.pack(len(configs))]
+    for config in configs:
+        attrs = [(k, v) for k, v in config.iteritems() if k != 'id']
+        parts.append(_CONFIG.pack(config['id'], len(attrs)))
+        for key, value in attrs:
+            code = _KEY_CODES.get(key)
+            if code is None:
+                code = chr(KEY_BY_NAME) + chr(len(key)) + key
+            parts.append(code + _encode_value(key, value))
+    return ''.join(parts)
+
+
+def decode(data):
+    """Return list of configs (dictionaries) from binary update data."""
+    if data[1:2] != chr(BINARY_VERSION):
+        raise UgmUpdateCodecError("Unsupported binary ugm update version: " +
+                                  repr(data[1:2]))
+    try:
+        count, = _COUNT.unpack_from(data, 2)
+        pos = 2 + _COUNT.size
+        configs = []
+        for i in xrange(count):
+            elem_id, num_of_attrs = _CONFIG.unpack_from(data, pos)
+            pos += _CONFIG.size
+            config = {'id': elem_id}
+            for j in xrange(num_of_attrs):
+                code = ord(data[pos])
+                pos += 1
+                if code == KEY_BY_NAME:
+                    length = ord(data[pos])
+                    key = data[pos + 1:pos + 1 + length]
+                    pos += 1 + length
+                else:
+                    key = KEYS[code]
+                kind = data[pos]
+                pos += 1
+                if kind == 'i':
+                    value, = _INT.unpack_from(data, pos)
+                    pos += _INT.size
+                elif kind == 'd':
+                    value, = _FLOAT.unpack_from(data, pos)
+                    pos += _FLOAT.size
+                elif kind == 's' or kind == 'u':
+                    length, = _COUNT.unpack_from(data, pos)
+                    pos += _COUNT.size
+                    value = data[pos:pos + length]
+                    pos += length
+                    if kind == 'u':
+                        value = value.decode('utf-8')
+                elif kind == 'N':
+                    value = None
+                elif kind == 'T':
+                    value = True
+                elif kind == 'F':
+                    value = False
+                else:
+                    raise UgmUpdateCodecError("Unknown value type: " + repr(kind))
+                config[key] = value
+            configs.append(config)
+    except (struct.error, IndexError), e:
+        raise UgmUpdateCodecError("Malformed binary ugm update: " + str(e))
+    if pos != len(data):
+        raise UgmUpdateCodecError("Malformed binary ugm update: " +
+                                  str(len(data) - pos) + " bytes left")
+    return configs
+
+
@@ -7,6 +7,7 @@ import numpy as np
 from obci.interfaces.bci.p300_fda.p300_fda import P300_analysis
 from obci.interfaces.bci.p300_fda.p300_draw import P300_draw
 from signalAnalysis import DataAnalysis
+from obci.interfaces.bci.spatial_operator import SpatialOperator
 from obci.utils import context as ctx
 
 DEBUG = False
@@ -37,6 +38,12 @@ class BCIP300FdaAnalysis(object):
         print "cfg['w']: ", cfg['w']
         self.p300 = P300_analysis(sampling, cfg, fields= dec_count)
         self.p300.setPWC( cfg['P'], cfg['w'], cfg['c'])
+
+        # Montage and first conN CSP filters fused into one matrix
+        self.spatial = SpatialOperator(
+            montage_matrix, np.asarray(cfg['P'])[:, :self.p300.conN].T,
+            cfg.get('spatial_dtype', 'float64'))
+        self.csp_from, self.csp_to = [int(i) for i in self.csp_time]
         
         self.debugFlag = cfg['debug_flag']
         
@@ -74,15 +81,14 @@ class BCIP300FdaAnalysis(object):
         self.logger.debug("first and last value: "+str(data[0][0])+" - "+str(data[0][-1]))
         self.last_time = time.time()
         
-        # Get's montaged signal
-        signal = np.dot(self.montage_matrix.T, data)
-        signal = signal[:,self.csp_time[0]:self.csp_time[1]]
+        # Get's montaged signal projected on CSP components
+        signal = self.spatial.apply(data[:, self.csp_from:self.csp_to])
 
         # Counts each blink
         self.nPole[blink.index] += 1
 
         # Classify each signal
-        self.p300.testData(signal, blink.index)
+        self.p300.testProjected(signal, blink.index)
         dec = -1
 
         # If statistical significanse
@@ -460,11 +460,15 @@ class P300_analysis(object):
         return self.sp.prepareSignal(signal)
         
     def testData(self, signal, blink):
+        self.testProjected(np.dot(self.P[:,:self.conN].T, signal), blink)
 
+    def testProjected(self, signal, blink):
+        """
+        Like testData, but for signal already projected on
+        first conN CSP components (conN x data).
+        """
         # Analyze signal when data for that flash is neede
-        s = np.empty( self.avrM*self.conN)
-        for con in range(self.conN):
-            s[con*self.avrM:(con+1)*self.avrM] = self.prepareSignal(np.dot(self.P[:,con], signal))
+        s = self.sp.prepareSignals(signal).ravel()
         
         # Data projection on Fisher's space
         self.d = np.dot(s,self.w) - self.c
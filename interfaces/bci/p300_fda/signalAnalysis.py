@@ -1,5 +1,5 @@
 from scipy.signal import butter, buttord
-from scipy.signal import filtfilt, lfilter
+from scipy.signal import filtfilt, lfilter, sosfilt, sosfilt_zi
 from scipy.signal import cheb2ord, cheby2
 import numpy as np
 
@@ -43,9 +43,23 @@ class DataAnalysis(object):
             pass
         else:
             #~ temp = map(lambda i: temp[i], np.floor(np.linspace(self.csp_time[0], self.csp_time[1], self.avrM)*self.fs))
-            temp = map(lambda i: temp[i], np.floor(np.linspace(0, len(temp)-1, self.avrM)))
+            temp = map(lambda i: temp[i], np.floor(np.linspace(0, len(temp)-1, self.avrM)).astype(int))
         
         return np.array(temp)
+
+    def prepareSignals(self, S, avrM=None):
+        """
+        Prepare 2D signal (components x samples) for analysis -
+        the same as prepareSignal for every row, but all rows at once.
+        """
+        if avrM == None: avrM = self.avrM
+
+        temp = S - S.mean(axis=1)[:, np.newaxis]
+        temp = self.filtrHighRows(temp)
+        temp = self.movingAvrRows(temp, avrM+1)
+        if self.avrM != self.fs:
+            temp = temp[:, np.floor(np.linspace(0, temp.shape[1]-1, self.avrM)).astype(int)]
+        return temp
         
     def set_lowPass_filter(self, wp=20., ws=40., gpass=1., gstop=10.):
         Nq = self.fs/2.
@@ -72,6 +86,11 @@ class DataAnalysis(object):
         #~ N_filtr, Wn_filtr = buttord(wp, ws, gpass, gstop)
         N_filtr, Wn_filtr = 2, 1.5/Nq
         self.b_H, self.a_H = butter(N_filtr, Wn_filtr, btype='high')
+        # The same filter as second-order sections with its initial state
+        # for a unit step computed once, for filtrHighRows
+        self.sos_H = butter(N_filtr, Wn_filtr, btype='high', output='sos')
+        self.zi_H = sosfilt_zi(self.sos_H)[:, np.newaxis, :]
+        self.padlen_H = 3*max(len(self.a_H), len(self.b_H))
         
         self.N_H, self.Wn_H = N_filtr, Wn_filtr
         
@@ -96,6 +115,30 @@ class DataAnalysis(object):
         #~ return lfilter(self.b_H, self.a_H, s)
         return filtfilt(self.b_H, self.a_H, s)
         
+    def filtrHighRows(self, S):
+        """
+        filtfilt of every row of S with high pass filter
+        (odd extension, steady state initial conditions as in filtfilt).
+        """
+        n = self.padlen_H
+        if S.shape[1] <= n:
+            raise ValueError("The length of the input vector x must be at least "
+                             "padlen, which is %d." % n)
+        ext = np.hstack((2*S[:, :1] - S[:, n:0:-1], S,
+                         2*S[:, -1:] - S[:, -2:-n-2:-1]))
+        y, zf = sosfilt(self.sos_H, ext, axis=-1, zi=self.zi_H*ext[np.newaxis, :, :1])
+        y, zf = sosfilt(self.sos_H, y[:, ::-1], axis=-1, zi=self.zi_H*y[np.newaxis, :, -1:])
+        return y[:, ::-1][:, n:-n]
+
+    def movingAvrRows(self, S, r):
+        L, r = S.shape[1], int(r)
+        temp = np.zeros((S.shape[0], L+r))
+        temp[:, :r] = S[:, :1]
+        temp[:, r:] = S
+        for i in range(1,r):
+            S += temp[:, r-i:L+r-i]
+        return S/float(r)
+
     def movingAvr(self, s, r):
         L, r = len(s), int(r)
         temp = np.zeros(L+r)
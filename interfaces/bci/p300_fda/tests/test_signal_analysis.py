@@ -0,0 +1,70 @@
+# -*- coding: utf-8 -*-
+#!/usr/bin/env python
+#
+
+"""
+>>> import numpy
+
+>>> from obci.interfaces.bci.p300_fda.signalAnalysis import DataAnalysis
+
+>>> sp = DataAnalysis(128.)
+
+>>> sp.initConst(avrM=8, conN=3, csp_time=[0.1, 0.6])
+
+>>> S = numpy.random.randn(3, 64)
+
+prepareSignals gives the same result as prepareSignal for every row:
+
+>>> P = sp.prepareSignals(S.copy())
+
+>>> P.shape
+(3, 8)
+
+>>> rows = numpy.array([sp.prepareSignal(s.copy()) for s in S])
+
+>>> numpy.abs(P - rows).max() < 1e-10
+True
+
+Also with no downsampling and for the shortest signal filtfilt accepts:
+
+>>> sp.initConst(avrM=128, conN=3)
+
+>>> S = numpy.random.randn(3, 10)
+
+>>> P = sp.prepareSignals(S.copy())
+
+>>> rows = numpy.array([sp.prepareSignal(s.copy()) for s in S])
+
+>>> P.shape == rows.shape
+True
+
+>>> numpy.abs(P - rows).max() < 1e-10
+True
+
+Signals not longer than filter's padlen are rejected, as in prepareSignal:
+
+>>> sp.prepareSignal(numpy.random.randn(7))
+Traceback (most recent call last):
+...
+ValueError: The length of the input vector x must be at least padlen, which is 9.
+
+>>> sp.prepareSignals(numpy.random.randn(3, 7))
+Traceback (most recent call last):
+...
+ValueError: The length of the input vector x must be at least padlen, which is 9.
+
+>>> sp.prepareSignals(numpy.random.randn(3, 9))
+Traceback (most recent call last):
+...
+ValueError: The length of the input vector x must be at least padlen, which is 9.
+
+"""
+
+def run():
+    import doctest, sys
+    res = doctest.testmod(sys.modules[__name__])
+    if res.failed == 0:
+        print("All tests succeeded!")
+
+if __name__ == '__main__':
+    run()
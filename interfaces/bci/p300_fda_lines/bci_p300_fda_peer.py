@@ -93,11 +93,9 @@ class BCIP300Fda(ConfiguredMultiplexerServer):
     def handle_message(self, mxmsg):
         #always buffer signal
         if mxmsg.type == types.AMPLIFIER_SIGNAL_MESSAGE:
-            l_msg = variables_pb2.SampleVector()
-            l_msg.ParseFromString(mxmsg.message)
             #Supply buffer with sample data, the buffer will fire its
             #ret_func (that we defined as self.analysis.analyse) every 'every' samples
-            self.buffer.handle_sample_vect(l_msg)
+            self.buffer.handle_sample_msg(mxmsg.message)
             if DEBUG:
                 self.debug.next_sample()
 
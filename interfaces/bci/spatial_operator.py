@@ -0,0 +1,76 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""Spatial operator for online BCI analysis.
+
+Montage (with channels selection) and CSP projection are both linear,
+so instead of computing np.dot(P.T, np.dot(montage_matrix.T, data))
+on every buffer tick they are fused into one matrix at config time.
+Channels not used by the operator are not read at all.
+"""
+
+import numpy as np
+
+class SpatialOperator(object):
+    """Public interface:
+    - apply(data) - return projected data
+    - matrix - fused (components x channels) matrix
+    """
+    def __init__(self, montage_matrix, projection=None, dtype='float64'):
+        """
+        - montage_matrix - (all channels x montaged channels) matrix,
+          see csp_helper.get_montage_matrix
+        - projection - (components x montaged channels) matrix, eg. CSP
+          filters as rows; None means montage only
+        - dtype - type of computation and returned data, eg. 'float32'
+
+        >>> m = np.array([[1., 0.], [0., 0.], [-0.5, -0.5], [0., 1.]])
+
+        >>> p = np.array([[1., 2.], [0., -1.]])
+
+        >>> op = SpatialOperator(m, p)
+
+        >>> op.matrix
+        array([[ 1. ,  0. , -1.5,  2. ],
+               [ 0. ,  0. ,  0.5, -1. ]])
+
+        >>> op.channels
+        array([0, 2, 3])
+
+        >>> data = np.arange(20.).reshape(4, 5)
+
+        >>> np.allclose(op.apply(data), np.dot(p, np.dot(m.T, data)))
+        True
+
+        >>> op.apply(data[:, 1:3]).shape
+        (2, 2)
+
+        >>> SpatialOperator(m, p[:1], 'float32').apply(data)
+        array([[ 15. ,  16.5,  18. ,  19.5,  21. ]], dtype=float32)
+        """
+        matrix = np.asarray(montage_matrix, dtype=np.float64).T
+        if projection is not None:
+            matrix = np.dot(np.atleast_2d(projection), matrix)
+        self.dtype = np.dtype(dtype)
+        self.num_of_channels = matrix.shape[1]
+        self.channels = np.flatnonzero(np.any(matrix != 0, axis=0))
+        self.matrix = matrix
+        self._matrix = np.ascontiguousarray(matrix[:, self.channels], dtype=self.dtype)
+        self._selected = None
+        self._out = None
+
+    def apply(self, data):
+        """Return (components x samples) array for (channels x samples) data.
+        Returned array is preallocated and reused by subsequent calls
+        with the same number of samples - copy it if it is to be stored."""
+        n = data.shape[1]
+        if self._out is None or self._out.shape[1] != n:
+            self._selected = np.empty((len(self.channels), n), dtype=self.dtype)
+            self._out = np.empty((self._matrix.shape[0], n), dtype=self.dtype)
+        self._selected[:] = data[self.channels]
+        return np.dot(self._matrix, self._selected, out=self._out)
+
+
+if __name__ == "__main__":
+    import doctest
+    doctest.testmod()
+    print("If no errors - tests SUCCEDED!!!")
@@ -6,6 +6,7 @@ import numpy as np
 from scipy.signal import hamming
 import scipy.stats as st
 from obci.utils import context as ctx
+from obci.interfaces.bci.spatial_operator import SpatialOperator
 
 DEBUG = False
 
@@ -39,6 +40,9 @@ class BCISsvepCspAnalysis(object):
         self.q = cfg['q']
         self.out_top = cfg['out_top']
         self.out_bottom = cfg['out_bottom']
+        # Montage and the first CSP filter fused into one matrix
+        self.spatial = SpatialOperator(montage_matrix, self.q.P[:,0],
+                                      cfg.get('spatial_dtype', 'float64'))
 
     def analyse(self, data):
         """Fired as often as defined in hashtable configuration:
@@ -69,7 +73,7 @@ class BCISsvepCspAnalysis(object):
         #print("montage: "+str(self.montage_matrix.shape))
         #print("data: "+str(data.shape))
         #print("montage X data: "+str(np.dot(self.montage_matrix, data).shape))
-        csp_sig = np.dot(self.q.P[:,0], np.dot(self.montage_matrix.T, data))
+        csp_sig = self.spatial.apply(data)[0]
         csp_sig -= csp_sig.mean()#normujemy
         csp_sig /= np.sqrt(np.sum(csp_sig*csp_sig))#normujemy
         freq, feeds = self._analyse(csp_sig)
@@ -65,9 +65,8 @@ class LogicWordSpeller(ConfiguredMultiplexerServer):
             l_config.append(l_conf)
         l_config.append({'id':self.text_id,
                          'message':self._message})
-        l_str_config = str(l_config)
-        self.logger.info("UPDATE: "+l_str_config)
-        ugm_helper.send_config(self.conn, l_str_config, 1)
+        self.logger.info("UPDATE: "+str(l_config))
+        ugm_helper.send_configs(self.conn, l_config)
         
     def msg(self, dec):
         self._message = ''.join([self._message, self._curr_letters[dec]])
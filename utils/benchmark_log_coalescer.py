@@ -0,0 +1,109 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+CPU time of a log collector forwarding records of chatty peers to the gui
+over udp: one datagram per mx message (as before) versus coalesced,
+compressed batches pushed every push interval (LogCoalescer). Half of
+the records repeat the previous record of their peer.
+
+The number of datagrams is also the number of gui log updates.
+
+Usage: python benchmark_log_coalescer.py [records_per_second] [records_per_mx_message]
+"""
+
+import os
+import sys
+import time
+import json
+import socket
+import random
+
+from obci.utils.log_coalescer import LogCoalescer
+from obci.utils.log_mx_handler import pack_batches, unpack_records
+
+PUSH_INTERVAL = 0.2
+SECONDS = 10
+
+
+def mx_messages(rate, seconds, per_message):
+    """OBCI_LOG_MESSAGEs with per_message records each."""
+    rnd = random.Random(0)
+    records = []
+    last = {}
+    for i in xrange(int(rate * seconds)):
+        name = 'peer_%d' % rnd.randint(0, 9)
+        if name in last and rnd.random() < 0.5:
+            message = last[name]
+        else:
+            message = 'Got sample %d, value %f' % (i, rnd.random())
+        last[name] = message
+        records.append({'name': name, 'levelno': 10, 'levelname': 'DEBUG',
+                        'asctime': '2026-10-18 12:00:00,000', 'created': i / float(rate),
+                        'message': message, 'filename': 'peer.py', 'lineno': 10})
+    return [json.dumps(records[i:i + per_message])
+            for i in xrange(0, len(records), per_message)]
+
+
+class Receiver(object):
+    """Counts received records in a child process (so that its cpu time
+    is not measured), reports them when it gets an empty datagram."""
+    def __init__(self):
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.sock.bind(('127.0.0.1', 0))
+        self.sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 2 ** 22)
+        self.result_r, result_w = os.pipe()
+        self.pid = os.fork()
+        if self.pid == 0:
+            try:
+                records = datagrams = 0
+                while True:
+                    data = self.sock.recv(2 ** 15)
+                    if not data:
+                        break
+                    records += len(unpack_records(data))
+                    datagrams += 1
+                os.write(result_w, '%d %d' % (datagrams, records))
+            finally:
+                os._exit(0)
+
+    def result(self):
+        socket.socket(socket.AF_INET, socket.SOCK_DGRAM).sendto('', self.sock.getsockname())
+        datagrams, records = os.read(self.result_r, 100).split()
+        os.waitpid(self.pid, 0)
+        return int(datagrams), int(records)
+
+
+def legacy(msgs, rate, sock, addr):
+    for msg in msgs:
+        sock.sendto(msg, addr)
+
+
+def batched(msgs, rate, sock, addr):
+    coalescer = LogCoalescer()
+    per_push = max(1, int(len(msgs) * PUSH_INTERVAL / SECONDS))
+    for start in xrange(0, len(msgs), per_push):
+        for msg in msgs[start:start + per_push]:
+            for record in unpack_records(msg):
+                coalescer.add(record)
+        for data in pack_batches(coalescer.take_batch(), compress=True):
+            sock.sendto(data, addr)
+
+
+def run(rate=5000, per_message=1):
+    print(str(rate * SECONDS)+" records of 10 peers ("+str(rate)+" per second for "+
+          str(SECONDS)+" s), "+str(per_message)+" per mx message")
+    msgs = mx_messages(rate, SECONDS, per_message)
+    print("collector | cpu (s) | cpu per second of logs (ms) | datagrams | records at gui")
+    for name, forward in [('legacy', legacy), ('batched', batched)]:
+        receiver = Receiver()
+        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        start = time.clock()
+        forward(msgs, rate, sock, receiver.sock.getsockname())
+        cpu = time.clock() - start
+        datagrams, records = receiver.result()
+        print("%-9s | %7.3f | %28.1f | %9d | %d" % (name, cpu, cpu / SECONDS * 1000,
+                                                 datagrams, records))
+
+if __name__ == '__main__':
+    args = [int(a) for a in sys.argv[1:3]]
+    run(*args)
@@ -0,0 +1,92 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Per-sample latency of a peer loop which logs every sample at debug level
+with mx logging set to warning (verbose logging disabled), to debug with
+the previous synchronous LogMXHandler and to debug with the current
+(queued, batched) LogMXHandler.
+
+The multiplexer connection is simulated by a unix socket pair drained by
+a thread, so every send_message costs a real write.
+
+Usage: python benchmark_log_mx_handler.py [samples]
+"""
+
+import sys
+import time
+import json
+import socket
+import logging
+import threading
+
+import numpy
+
+from multiplexer.multiplexer_constants import types
+from obci.utils import log_mx_handler, openbci_logging
+
+
+class SocketConn(object):
+    def __init__(self):
+        self.sock, self.peer = socket.socketpair()
+        self.sent = 0
+        reader = threading.Thread(target=self._drain)
+        reader.daemon = True
+        reader.start()
+
+    def _drain(self):
+        while self.peer.recv(65536):
+            pass
+
+    def send_message(self, message, type, flush=False):
+        self.sock.sendall(message)
+        self.sent += 1
+
+
+class LegacyLogMXHandler(logging.Handler):
+    """LogMXHandler.emit before records were queued."""
+    def __init__(self, conn):
+        self.conn = conn
+        logging.Handler.__init__(self)
+
+    def emit(self, record):
+        self.format(record)
+        record.msg = record.message
+        record.args = None
+        record.exc_info = None
+        self.conn.send_message(message=json.dumps(record.__dict__),
+                               type=types.OBCI_LOG_MESSAGE, flush=True)
+
+
+def peer_loop(logger, samples):
+    data = numpy.zeros((8, 4))
+    latencies = numpy.empty(samples)
+    for i in xrange(samples):
+        start = time.time()
+        data += 1.0 # some work on the sample
+        logger.debug("Got sample %d, sum %f", i, data[0, 0])
+        latencies[i] = time.time() - start
+    return latencies
+
+
+def run(samples=20000):
+    print("Peer loop of "+str(samples)+" samples, a debug log record per sample")
+    print("mx logging   | mean (us) | p99 (us) | max (ms) | mx messages")
+    for name, level, handler_class in [('disabled', logging.WARNING, None),
+                                       ('synchronous', logging.DEBUG, LegacyLogMXHandler),
+                                       ('queued', logging.DEBUG, log_mx_handler.LogMXHandler)]:
+        conn = SocketConn()
+        logger = logging.getLogger('benchmark_' + name)
+        logger.setLevel(logging.DEBUG)
+        handler = (handler_class or log_mx_handler.LogMXHandler)(conn)
+        handler.setLevel(level)
+        handler.setFormatter(openbci_logging.mx_formatter())
+        logger.addHandler(handler)
+
+        latencies = peer_loop(logger, samples) * 1e6
+        handler.flush()
+        print("%-12s | %9.1f | %8.1f | %8.2f | %d" % (name, latencies.mean(),
+              numpy.percentile(latencies, 99), latencies.max() / 1000, conn.sent))
+
+if __name__ == '__main__':
+    args = [int(a) for a in sys.argv[1:2]]
+    run(*args)
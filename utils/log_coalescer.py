@@ -0,0 +1,85 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+"""
+Batching of log records received by log collector peers.
+
+Records (dicts, see log_mx_handler) are collected between pushes;
+a record repeating the previous record of the same peer (same level and
+message) only increments its 'count'. A push takes at most max_batch
+records; for the rest a single summary record per peer is pushed.
+Last ring_len records of every peer are kept for replay.
+"""
+
+import collections
+import time
+import threading
+
+RING_LEN = 1000
+MAX_BATCH = 500
+
+
+class LogCoalescer(object):
+    """
+    >>> c = LogCoalescer(ring_len=3, max_batch=3)
+    >>> for m in ['a', 'b', 'b', 'b', 'c']:
+    ...     c.add({'name': 'amp', 'levelno': 20, 'message': m, 'asctime': '12:00'})
+    >>> [(r['message'], r['count']) for r in c.take_batch()]
+    [('a', 1), ('b', 3), ('c', 1)]
+    >>> c.take_batch()
+    []
+    >>> for i in range(5):
+    ...     c.add({'name': 'amp', 'levelno': 20, 'message': str(i), 'asctime': '12:01'})
+    >>> [r['message'] for r in c.take_batch()]
+    ['0', '1', '2', '2 log records not forwarded (rate limit)']
+    >>> [r['message'] for r in c.replay('amp')]
+    ['2', '3', '4']
+    >>> c.replay('other')
+    []
+    """
+    def __init__(self, ring_len=RING_LEN, max_batch=MAX_BATCH):
+        self.ring_len = ring_len
+        self.max_batch = max_batch
+        self.lock = threading.Lock()
+        self._pending = []
+        self._last = {}
+        self._rings = {}
+
+    def add(self, record):
+        name = record.get('name')
+        last = self._last.get(name)
+        if last is not None and last.get('levelno') == record.get('levelno') \
+                and last.get('message') == record.get('message'):
+            last['count'] += 1
+            last['last_asctime'] = record.get('asctime')
+            return
+        record['count'] = 1
+        self._last[name] = record
+        self._pending.append(record)
+        ring = self._rings.get(name)
+        if ring is None:
+            ring = self._rings[name] = collections.deque(maxlen=self.ring_len)
+        ring.append(record)
+
+    def take_batch(self):
+        """Return records received since the last call (at most max_batch
+        of them and a summary record for every peer with more records)."""
+        batch, rest = self._pending[:self.max_batch], self._pending[self.max_batch:]
+        self._pending = []
+        self._last = {}
+        suppressed = collections.OrderedDict()
+        for record in rest:
+            suppressed[record.get('name')] = suppressed.get(record.get('name'), 0) + \
+                record['count']
+        for name, count in suppressed.iteritems():
+            batch.append({'name': name, 'levelname': 'WARNING', 'levelno': 30,
+                          'asctime': time.strftime('%Y-%m-%d %H:%M:%S'),
+                          'created': time.time(), 'count': 1,
+                          'message': '%d log records not forwarded (rate limit)' % count})
+        return batch
+
+    def replay(self, name=None):
+        """Return kept records of peer name (of all peers if name is None)."""
+        if name is not None:
+            return list(self._rings.get(name, []))
+        return [r for ring in self._rings.itervalues() for r in ring]
@@ -4,52 +4,217 @@
 """
 This module defines logging handler class for Multiplexer peers,
 a LogMXHandler.
+
+OBCI_LOG_MESSAGE payload is a json list of log records (dicts of
+LogRecord attributes). Older peers sent a single record - a json
+dict - use unpack_records() to read both. Log collectors forward
+batches of records packed with pack_records(), optionally zlib
+compressed (a zlib stream starts with 'x', json never does).
 """
 
 import logging
 import json
+import time
+import threading
+import collections
+import zlib
+
+from multiplexer.multiplexer_constants import peers, types
+from multiplexer.clients import connect_client
+
+BATCH_SIZE = 100
+BATCH_INTERVAL = 0.2
+BATCH_BYTES = 30000 # batches are forwarded as udp datagrams (see obci_log_peer)
+QUEUE_SIZE = 10000
+FLUSH_CHECK_INTERVAL = 0.01
+
+
+def pack_records(records, compress=False):
+    data = json.dumps(records)
+    if compress:
+        data = zlib.compress(data)
+    return data
+
+
+def pack_batches(records, max_bytes=BATCH_BYTES, compress=False):
+    """Return list of payloads with records, json of every payload
+    (before compression) has at most max_bytes."""
+    batches = _split([json.dumps(r) for r in records], max_bytes)
+    data = ['[' + ','.join(batch) + ']' for batch in batches]
+    if compress:
+        data = [zlib.compress(d) for d in data]
+    return data
+
+
+def _split(encoded, max_bytes):
+    """Return lists of json encoded records, of at most max_bytes
+    as a json list (a single record longer than that is alone)."""
+    batches, batch, size = [], [], 2
+    for data in encoded:
+        if batch and size + len(data) + 1 > max_bytes:
+            batches.append(batch)
+            batch, size = [], 2
+        batch.append(data)
+        size += len(data) + 1
+    if batch:
+        batches.append(batch)
+    return batches
+
+
+def unpack_records(data):
+    """Return list of log records (dicts) from OBCI_LOG_MESSAGE payload
+    or from pack_records() result."""
+    if data[:1] == 'x':
+        data = zlib.decompress(data)
+    records = json.loads(data)
+    if isinstance(records, dict):
+        return [records]
+    return records
 
-from multiplexer.multiplexer_constants import types
 
 class LogMXHandler(logging.Handler):
     """
-The handler pickles log records and sends them
-to the multiplexer as OBCI_LOG_MESSAGE. The records should be
-picked up by a log collector mx peer."""
+The handler sends log records to the multiplexer as OBCI_LOG_MESSAGE.
+The records should be picked up by a log collector mx peer.
+
+Records are sent through conn, used only by the handler`s thread. If
+conn is None, the thread opens its own connection (of LOG_STREAMER type)
+to addresses - the peer`s connection must not be shared, as the peer
+sends its messages from another thread.
+
+emit() only formats the record and puts it to a bounded queue, so
+logging does not wait for multiplexer I/O. A background thread sends
+queued records in batches of up to batch_size records (and
+batch_bytes bytes), at most batch_interval seconds after the first
+record of a batch was queued. Records which do not fit in the queue are
+dropped and counted (dropped); the number of dropped records is then
+reported in a WARNING record sent with the next batch. Records
+which could not be sent are counted (failed) and reported with
+handleError()."""
 
-    def __init__(self, conn):
-        # store multiplexer connection object
+    def __init__(self, conn=None, addresses=None, batch_size=BATCH_SIZE,
+                 batch_interval=BATCH_INTERVAL, batch_bytes=BATCH_BYTES,
+                 queue_size=QUEUE_SIZE):
+        # multiplexer connection object used only by the sender thread
         self.conn = conn
+        self.addresses = addresses
         # super(LogMXHandler, self).__init__()
         logging.Handler.__init__(self)
+        self.batch_size = batch_size
+        self.batch_interval = batch_interval
+        self.batch_bytes = batch_bytes
+        self.queue_size = queue_size
+        self.dropped = 0
+        self.failed = 0
+        self._reported_dropped = 0
+        self._last_logger = 'LogMXHandler'
+        # deque append/popleft are atomic, so emit() takes no locks
+        self._queue = collections.deque()
+        self._queued = 0
+        self._sent = 0
+        self._stop = False
+        self._sender = threading.Thread(target=self._send_batches)
+        self._sender.daemon = True
+        self._sender.start()
+
+    def flush(self):
+        """Wait until all queued records are sent."""
+        queued = self._queued
+        while self._sent < queued and self._sender.is_alive():
+            time.sleep(FLUSH_CHECK_INTERVAL)
 
     def close(self):
-        pass
+        if self._sender.is_alive():
+            self._stop = True
+            self._sender.join()
+        logging.Handler.close(self)
         # self.conn.close()
 
     def emit(self, record):
         """
         Emit a record.
 
-        Writes the LogRecord to the queue, preparing it for pickling first.
+        Puts the LogRecord (prepared for json serialization) to the queue.
         """
-        # print "  ## ## ## ## ## ##  emit!!! ", record
         try:
+            if len(self._queue) >= self.queue_size:
+                self.dropped += 1
+                return
             # The format operation gets traceback text into record.exc_text
             # (if there's exception data), and also puts the message into
             # record.message. We can then use this to replace the original
-            # msg + args, as these might be unpickleable. We also zap the
+            # msg + args, as these might be unserializable. We also zap the
             # exc_info attribute, as it's no longer needed and, if not None,
-            # will typically not be pickleable.
+            # will typically not be serializable.
             self.format(record)
             record.msg = record.message
             record.args = None
             record.exc_info = None
-            # print record.__dict__
-            data = json.dumps(record.__dict__)
-            self.conn.send_message(
-                        message=data, type=types.OBCI_LOG_MESSAGE, flush=True)
+            self._last_logger = record.name
+            self._queued += 1
+            self._queue.append(record)
         except (KeyboardInterrupt, SystemExit):
             raise
         except Exception:
             self.handleError(record)
+
+    def _dropped_record(self):
+        dropped = self.dropped - self._reported_dropped
+        self._reported_dropped += dropped
+        record = logging.LogRecord(self._last_logger, logging.WARNING, __file__, 0,
+                                   "%d log records dropped (queue full)",
+                                   (dropped,), None)
+        self.format(record)
+        record.msg = record.message
+        record.args = None
+        return record
+
+    def _connect(self):
+        try:
+            self.conn = connect_client(type=peers.LOG_STREAMER,
+                                       addresses=self.addresses)
+        except Exception:
+            # records are counted as failed until connected
+            self.conn = None
+
+    def _send_batches(self):
+        # Polling every batch_interval instead of waiting on a condition
+        # keeps emit() cheap and the sender off the GIL between batches.
+        while True:
+            if self.conn is None:
+                self._connect()
+            stop = self._stop
+            if len(self._queue) < self.batch_size and not stop:
+                time.sleep(self.batch_interval)
+            records = []
+            while len(records) < self.batch_size:
+                try:
+                    records.append(self._queue.popleft())
+                except IndexError:
+                    break
+            taken = len(records)
+            if self.dropped != self._reported_dropped:
+                records.insert(0, self._dropped_record())
+            encoded, encoded_records = [], []
+            for record in records:
+                try:
+                    encoded.append(json.dumps(record.__dict__))
+                    encoded_records.append(record)
+                except Exception:
+                    self.handleError(record)
+            first = 0
+            for batch in _split(encoded, self.batch_bytes):
+                self._send('[' + ','.join(batch) + ']',
+                           encoded_records[first:first + len(batch)])
+                first += len(batch)
+            self._sent += taken
+            if stop and not self._queue:
+                return
+
+    def _send(self, data, records):
+        try:
+            self.conn.send_message(
+                        message=data, type=types.OBCI_LOG_MESSAGE, flush=True)
+        except Exception:
+            self.failed += len(records)
+            self.handleError(records[0])
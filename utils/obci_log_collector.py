@@ -1,6 +1,8 @@
 #!/usr/bin/env python
 # -*- coding: utf-8 -*-
 
+import threading
+import json
 import zmq
 
 
@@ -8,21 +10,72 @@ from multiplexer.multiplexer_constants import peers, types
 # from multiplexer.clients import BaseMultiplexerServer
 from obci.control.peer.configured_multiplexer_server import ConfiguredMultiplexerServer
 from obci.configs import settings
-
-from obci.control.common.message import send_msg, recv_msg
+from obci.utils.log_mx_handler import pack_records, unpack_records
+from obci.utils.log_coalescer import LogCoalescer
 
 class OBCILogCollector(ConfiguredMultiplexerServer):
+    """Collect log records of all peers and push them (coalesced, in
+    compressed batches - see LogCoalescer, pack_records) to
+    log_destination_addr every push_interval seconds. If replay_addr is
+    set, a REP socket bound there answers requests {"peer_id": id or null}
+    with kept records of the peer (or of all peers)."""
     def __init__(self, addresses):
         super(OBCILogCollector, self).__init__(addresses=addresses, 
                                             type=peers.OBCI_LOG_COLLECTOR)   
         self.ctx = zmq.Context()
+        self.coalescer = LogCoalescer(int(self.get_param('ring_len')),
+                                      int(self.get_param('max_batch')))
+        self.push_interval = float(self.get_param('push_interval'))
+        self.compress = self.config.true_val(self.get_param('compress'))
+
         self.forwarder = self.ctx.socket(zmq.PUSH)
         self.forwarder.connect(self.get_param('log_destination_addr'))
+        self.replay_sock = None
+        if self.get_param('replay_addr'):
+            self.replay_sock = self.ctx.socket(zmq.REP)
+            self.replay_sock.bind(self.get_param('replay_addr'))
+        # zmq sockets are used only by the pushing thread
+        self.pusher = threading.Thread(target=self._push_batches)
+        self.pusher.daemon = True
+        self.pusher.start()
         self.ready()
 
     def handle_message(self, mxmsg):
         if mxmsg.type == types.OBCI_LOG_MESSAGE:
-            send_msg(self.forwarder, mxmsg.message)
+            try:
+                records = unpack_records(mxmsg.message)
+            except ValueError:
+                self.logger.warning("Bad log message: " + repr(mxmsg.message[:100]))
+            else:
+                with self.coalescer.lock:
+                    for record in records:
+                        self.coalescer.add(record)
+        self.no_response()
+
+    def _push_batches(self):
+        poller = zmq.Poller()
+        if self.replay_sock is not None:
+            poller.register(self.replay_sock, zmq.POLLIN)
+        while True:
+            # waiting for replay requests is also the push cadence timer
+            for sock, event in poller.poll(timeout=self.push_interval * 1000):
+                self._replay(sock.recv())
+            self._push()
+
+    def _push(self):
+        with self.coalescer.lock:
+            batch = self.coalescer.take_batch()
+        if batch:
+            self.forwarder.send(pack_records(batch, self.compress))
+
+    def _replay(self, request):
+        try:
+            peer_id = json.loads(request).get('peer_id')
+        except (ValueError, AttributeError):
+            peer_id = None
+        with self.coalescer.lock:
+            records = self.coalescer.replay(peer_id)
+        self.replay_sock.send(pack_records(records, self.compress))
 
 if __name__ == '__main__':
     OBCILogCollector(settings.MULTIPLEXER_ADDRESSES).loop()
@@ -58,10 +58,14 @@ def get_dummy_logger(p_name, p_level='info'):
 
 
 def get_logger(name, file_level='debug', stream_level='warning', 
-                            mx_level='warning', conn=None, log_dir=None):
+                            mx_level='warning', conn=None, log_dir=None,
+                            mx_addresses=None):
     """Return logger with name as name. And logging level p_level.
     p_level should be in (starting with the most talkactive):
-    'debug', 'info', 'warning', 'error', 'critical'."""
+    'debug', 'info', 'warning', 'error', 'critical'.
+    If conn (peer`s multiplexer connection) is given, records are also
+    sent to the multiplexer through a separate connection to
+    mx_addresses (settings.MULTIPLEXER_ADDRESSES by default)."""
     logger = logging.getLogger(name)
     if len(logger.handlers) == 0:
         # Some module migh be imported few times. In every get_logger call 
@@ -81,7 +85,12 @@ def get_logger(name, file_level='debug', stream_level='warning',
         logger.addHandler(shandler)
         
         if conn is not None:
-            mxhandler = log_mx_handler.LogMXHandler(conn)
+            # records are queued and sent in batches by a background thread
+            # through its own connection (conn is used by the peer`s thread)
+            if mx_addresses is None:
+                from obci.configs import settings
+                mx_addresses = settings.MULTIPLEXER_ADDRESSES
+            mxhandler = log_mx_handler.LogMXHandler(addresses=mx_addresses)
             mxhandler.setLevel(LEVELS[mx_level])
             mxhandler.setFormatter(mx_formatter())
             logger.addHandler(mxhandler)
@@ -4,11 +4,13 @@
 #     Mateusz Kruszyński <mateusz.kruszynski@titanis.pl>
 
 import sys, os.path, time
+import numpy
 
 from multiplexer.multiplexer_constants import peers, types
 from obci.control.peer.configured_multiplexer_server import ConfiguredMultiplexerServer
 
-from obci.configs import settings, variables_pb2
+from obci.configs import settings
+from obci.analysis.obci_signal_processing.signal import sample_vector_codec
 from obci.utils import streaming_debug
 
 DEBUG = True
@@ -49,52 +51,48 @@ class SignalReceiver(ConfiguredMultiplexerServer):
         if mxmsg.type == types.AMPLIFIER_SIGNAL_MESSAGE:
             if DEBUG:
                 self.debug.next_sample()
-            msg = mxmsg.message
-            l_vec = variables_pb2.SampleVector()
-            l_vec.ParseFromString(msg)
-            self.logger.debug("Got pack of samples in moment: "+str(time.time()))
-            for i_sample in l_vec.samples:
-                diff = time.time()-i_sample.timestamp
-                comm = ''.join([
-                        "Sample ts: ", str(i_sample.timestamp),
-                        " / Real ts:"+str(time.time()),
-                        " / "+"DIFF: "+str(diff)])
-                self.logger.debug(comm)
-                if diff > 0.1:
-                    self.logger.error(comm+"\n\n")
-                if self.amp_saw_ind >= 0:
-                    v = i_sample.channels[self.amp_saw_ind]
-                    if self._amp_saw_last + self.amp_saw_step - v > 0:
-                        self.logger.error("Last: "+str(self._amp_saw_last)+" Amp saw: "+str(v))
-                        self.logger.error(''.join(["LOOOOOOOOST AMPLIFIER SAMPLES, sth like: ",
-                                              str(self._amp_saw_last + self.amp_saw_step - v),
-                                              " samples!!!"
-                                              ])+"\n\n")
-
-                    if v == self.amp_saw_max:
-                        self._amp_saw_last = -self.amp_saw_step + 1
-                    else:
-                        self._amp_saw_last = v
-                    self.logger.debug("Amp saw: "+str(v))
-                if self.driver_saw_ind >= 0:
-                    v = i_sample.channels[self.driver_saw_ind]
-                    if self._driver_saw_last + self.driver_saw_step - v > 0:
-                        self.logger.error("Last: "+str(self._driver_saw_last)+" Driver saw: "+str(v))
-                        self.logger.error(''.join(["LOOOOOOOOST DRIVER SAMPLES, sth like: ",
-                                              str(self._driver_saw_last + self.driver_saw_step - v),
-                                              " samples!!!"
-                                              ])+"\n\n")
-
-                    if v == self.driver_saw_max:
-                        self._driver_saw_last = -self.driver_saw_step + 1
-                    else:
-                        self._driver_saw_last = v
-                    self.logger.debug("Driver saw: "+str(v))
-                self.logger.debug("First channel value: "+str(i_sample.channels[0]))
+            samples, timestamps = sample_vector_codec.decode(mxmsg.message)
+            t = time.time()
+            self.logger.debug("Got pack of samples in moment: "+str(t))
+            if samples.shape[1] == 0:
+                self.no_response()
+                return
+            diffs = t - timestamps
+            self.logger.debug("Max DIFF: "+str(diffs.max()))
+            for i in numpy.nonzero(diffs > 0.1)[0]:
+                self.logger.error(''.join([
+                        "Sample ts: ", str(timestamps[i]),
+                        " / Real ts:"+str(t),
+                        " / "+"DIFF: "+str(diffs[i])])+"\n\n")
+            if self.amp_saw_ind >= 0:
+                self._amp_saw_last = self._check_saw(
+                    samples[self.amp_saw_ind], self._amp_saw_last,
+                    self.amp_saw_step, self.amp_saw_max, "Amp", "AMPLIFIER")
+            if self.driver_saw_ind >= 0:
+                self._driver_saw_last = self._check_saw(
+                    samples[self.driver_saw_ind], self._driver_saw_last,
+                    self.driver_saw_step, self.driver_saw_max, "Driver", "DRIVER")
+            self.logger.debug("First channel value: "+str(samples[0, -1]))
         else:
             self.logger.error("Got unrecognised message!!!")
         self.no_response()
 
+    def _check_saw(self, values, last, step, saw_max, name, lost_name):
+        """Check saw channel values (lost samples make a gap bigger than step),
+        return new last value."""
+        values = values.astype(numpy.float64)
+        lasts = numpy.where(values == saw_max, -step + 1, values)
+        prevs = numpy.concatenate(([last], lasts[:-1]))
+        lost = prevs + step - values
+        for i in numpy.nonzero(lost > 0)[0]:
+            self.logger.error("Last: "+str(prevs[i])+" "+name+" saw: "+str(values[i]))
+            self.logger.error(''.join(["LOOOOOOOOST "+lost_name+" SAMPLES, sth like: ",
+                                       str(lost[i]),
+                                       " samples!!!"
+                                       ])+"\n\n")
+        self.logger.debug(name+" saw: "+str(values[-1]))
+        return lasts[-1]
+
 if __name__ == "__main__":
     SignalReceiver(settings.MULTIPLEXER_ADDRESSES).loop()
 
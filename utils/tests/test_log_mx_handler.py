@@ -0,0 +1,114 @@
+#!/usr/bin/python
+
+import time
+import logging
+
+from multiplexer.multiplexer_constants import peers, types
+
+from obci.utils import log_mx_handler
+from obci.utils.log_mx_handler import LogMXHandler, unpack_records
+
+
+class Conn(object):
+    def __init__(self, fail=False):
+        self.fail = fail
+        self.messages = []
+
+    def send_message(self, message, type, flush=False):
+        if self.fail:
+            raise IOError("connection lost")
+        assert type == types.OBCI_LOG_MESSAGE
+        self.messages.append(unpack_records(message))
+
+
+class TestLogMXHandler(object):
+
+    def setup(self):
+        self.conn = Conn()
+        self.handlers = []
+        self.logger = logging.getLogger("test_log_mx_handler")
+        self.logger.setLevel(logging.DEBUG)
+        self.logger.propagate = False
+
+    def teardown(self):
+        for handler in self.handlers:
+            self.logger.removeHandler(handler)
+            handler.close()
+
+    def handler(self, conn, **kwargs):
+        handler = LogMXHandler(conn, **kwargs)
+        self.logger.addHandler(handler)
+        self.handlers.append(handler)
+        return handler
+
+    def log(self, count):
+        for i in range(count):
+            self.logger.info("record %d", i)
+
+    def test_batches(self):
+        handler = self.handler(self.conn, batch_size=10, batch_interval=0.05)
+        self.log(25)
+        handler.flush()
+        assert [len(m) for m in self.conn.messages] == [10, 10, 5]
+        records = sum(self.conn.messages, [])
+        assert [r['message'] for r in records] == ["record %d" % i for i in range(25)]
+        assert records[0]['args'] is None
+
+    def test_batch_bytes(self):
+        handler = self.handler(self.conn, batch_interval=0.05, batch_bytes=1000)
+        self.log(20)
+        handler.flush()
+        assert len(self.conn.messages) > 1
+        assert sum(len(m) for m in self.conn.messages) == 20
+
+    def test_dropped_records_reported(self):
+        handler = self.handler(self.conn, batch_interval=0.5, queue_size=5)
+        self.log(12)
+        assert handler.dropped == 7
+        handler.flush()
+        records = sum(self.conn.messages, [])
+        assert len(records) == 6
+        assert records[0]['levelname'] == 'WARNING'
+        assert records[0]['message'] == "7 log records dropped (queue full)"
+        assert records[0]['name'] == "test_log_mx_handler"
+        assert [r['message'] for r in records[1:]] == ["record %d" % i for i in range(5)]
+
+        self.log(1)
+        handler.flush()
+        assert len(sum(self.conn.messages, [])) == 7
+
+    def test_close_sends_queued_records(self):
+        handler = self.handler(self.conn, batch_interval=0.5)
+        self.log(3)
+        start = time.time()
+        handler.close()
+        assert time.time() - start < 1.0
+        assert not handler._sender.is_alive()
+        assert len(sum(self.conn.messages, [])) == 3
+
+    def test_send_errors(self):
+        handler = self.handler(Conn(fail=True), batch_size=2, batch_interval=0.05)
+        errors = []
+        handler.handleError = errors.append
+        self.log(5)
+        handler.flush()
+        assert handler.failed == 5
+        assert len(errors) == 3
+        assert errors[0].getMessage() == "record 0"
+
+    def test_own_connection(self):
+        connected = []
+        def connect_client(type, addresses):
+            connected.append((type, addresses))
+            return self.conn
+        original = log_mx_handler.connect_client
+        log_mx_handler.connect_client = connect_client
+        try:
+            handler = self.handler(None, addresses=[('localhost', 1980)],
+                                   batch_interval=0.05)
+            self.log(2)
+            handler.flush()
+        finally:
+            log_mx_handler.connect_client = original
+        assert connected == [(peers.LOG_STREAMER, [('localhost', 1980)])]
+        assert len(sum(self.conn.messages, [])) == 2
@@ -0,0 +1,78 @@
+#!/usr/bin/python
+
+import json
+import logging
+
+from multiplexer.multiplexer_constants import types
+
+from obci.utils.obci_log_collector import OBCILogCollector
+from obci.utils.log_coalescer import LogCoalescer
+from obci.utils.log_mx_handler import pack_records, unpack_records
+
+
+class MxMessage(object):
+    def __init__(self, message, type=types.OBCI_LOG_MESSAGE):
+        self.message = message
+        self.type = type
+
+
+class Socket(object):
+    def __init__(self):
+        self.sent = []
+
+    def send(self, data):
+        self.sent.append(data)
+
+
+def record(name, message):
+    return {'name': name, 'message': message, 'levelno': 20,
+            'levelname': 'INFO', 'asctime': '12:00'}
+
+
+class TestOBCILogCollector(object):
+
+    def setup(self):
+        collector = self.collector = OBCILogCollector.__new__(OBCILogCollector)
+        collector.logger = logging.getLogger("test_obci_log_collector")
+        collector.logger.addHandler(logging.NullHandler())
+        collector.no_response = lambda: None
+        collector.coalescer = LogCoalescer(3, 500)
+        collector.compress = True
+        collector.forwarder = Socket()
+        collector.replay_sock = Socket()
+
+    def handle(self, records):
+        self.collector.handle_message(MxMessage(pack_records(records)))
+
+    def test_compressed_batch(self):
+        self.handle([record('amp', 'a'), record('amp', 'a')])
+        self.collector.handle_message(MxMessage(json.dumps(record('saver', 'b'))))
+        self.collector.handle_message(MxMessage('not a log record'))
+        self.collector._push()
+        [data] = self.collector.forwarder.sent
+        assert data[:1] == 'x'
+        assert [(r['name'], r['message'], r['count']) for r in unpack_records(data)] == \
+            [('amp', 'a', 2), ('saver', 'b', 1)]
+
+        self.collector._push()
+        assert len(self.collector.forwarder.sent) == 1
+
+    def test_uncompressed_batch(self):
+        self.collector.compress = False
+        self.handle([record('amp', 'a')])
+        self.collector._push()
+        [data] = self.collector.forwarder.sent
+        assert json.loads(data)[0]['message'] == 'a'
+
+    def test_replay(self):
+        self.handle([record('amp', str(i)) for i in range(5)])
+        self.handle([record('saver', 'b')])
+        self.collector._push()
+        self.collector._replay(json.dumps({'peer_id': 'amp'}))
+        self.collector._replay(json.dumps({'peer_id': None}))
+        self.collector._replay('not json')
+        amp, everything, bad_request = [[r['message'] for r in unpack_records(data)]
+                                        for data in self.collector.replay_sock.sent]
+        assert amp == ['2', '3', '4']
+        assert sorted(everything) == ['2', '3', '4', 'b']
+        assert bad_request == everything